@@ -0,0 +1,141 @@
+"""Analytics API router implementation."""
+
+from __future__ import annotations
+
+from datetime import date
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import Session
+
+from app.database import get_session
+from app.models import RollupGranularity
+from app.schemas.analytics import (
+    OrderVolumePointResponse,
+    ProductLeadTimeResponse,
+    ReceivablesAgingResponse,
+    RevenueSeriesPointResponse,
+    RoleBreakdownResponse,
+    RollupRebuildResponse,
+)
+from app.schemas.common import SuccessResponse
+from app.schemas.dashboard import TopProductResponse
+from app.services import (
+    analytics_service,
+    dashboard_service,
+    lead_time_service,
+    order_fact_cache,
+    receivables_service,
+)
+
+router = APIRouter(prefix="/api/analytics", tags=["Analytics"], redirect_slashes=False)
+
+
+@router.get("/revenue", response_model=SuccessResponse[list[RevenueSeriesPointResponse]])
+def get_revenue_series(
+    start_date: date = Query(description="First day of the range (inclusive)"),
+    end_date: date = Query(description="Last day of the range (inclusive)"),
+    granularity: RollupGranularity = Query(default=RollupGranularity.day),
+    group_by: Literal["product", "role"] = Query(default="product"),
+    session: Session = Depends(get_session),
+) -> SuccessResponse[list[RevenueSeriesPointResponse]]:
+    """Return order counts and revenue per time bucket from pre-aggregated rollups."""
+
+    try:
+        series = analytics_service.get_revenue_series(
+            session,
+            granularity=granularity,
+            start=start_date,
+            end=end_date,
+            group_by=group_by,
+        )
+        return SuccessResponse(data=series)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/rollups/rebuild", response_model=SuccessResponse[RollupRebuildResponse])
+def rebuild_rollups(
+    session: Session = Depends(get_session),
+) -> SuccessResponse[RollupRebuildResponse]:
+    """Recompute all analytics rollups from billed orders."""
+
+    try:
+        billed_orders = analytics_service.rebuild_rollups(session)
+        return SuccessResponse(data={"billed_orders": billed_orders})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/order-volume", response_model=SuccessResponse[list[OrderVolumePointResponse]])
+def get_order_volume(
+    start_date: date = Query(description="First day of the range (inclusive)"),
+    end_date: date = Query(description="Last day of the range (inclusive)"),
+    granularity: RollupGranularity = Query(default=RollupGranularity.day),
+    session: Session = Depends(get_session),
+) -> SuccessResponse[list[OrderVolumePointResponse]]:
+    """Return order counts and revenue by order date from the in-memory fact cache."""
+
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date.")
+    try:
+        cache = order_fact_cache.get_fact_cache(session)
+        return SuccessResponse(data=cache.order_volume(granularity, start_date, end_date))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/top-products", response_model=SuccessResponse[list[TopProductResponse]])
+def get_top_products(
+    limit: int = Query(default=5, ge=1, le=100),
+    session: Session = Depends(get_session),
+) -> SuccessResponse[list[TopProductResponse]]:
+    """Return the most ordered products by quantity from the in-memory fact cache."""
+
+    try:
+        top_products = dashboard_service.get_top_products(session, limit=limit)
+        return SuccessResponse(data=top_products)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/role-breakdown", response_model=SuccessResponse[list[RoleBreakdownResponse]])
+def get_role_breakdown(
+    session: Session = Depends(get_session),
+) -> SuccessResponse[list[RoleBreakdownResponse]]:
+    """Return order totals per customer role from the in-memory fact cache."""
+
+    try:
+        breakdown = order_fact_cache.get_fact_cache(session).role_breakdown()
+        return SuccessResponse(data=breakdown)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/lead-times", response_model=SuccessResponse[list[ProductLeadTimeResponse]])
+def get_lead_times(
+    product_id: int | None = Query(default=None, description="Limit the result to one product"),
+    session: Session = Depends(get_session),
+) -> SuccessResponse[list[ProductLeadTimeResponse]]:
+    """Return p50/p90/p99 production lead and queue times per product from streaming sketches."""
+
+    try:
+        stats = lead_time_service.get_production_time_stats(session, product_id)
+        return SuccessResponse(data=stats)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/ar-aging", response_model=SuccessResponse[ReceivablesAgingResponse])
+def get_receivables_aging(
+    as_of: date | None = Query(default=None, description="Day to age receivables at (default today)"),
+    session: Session = Depends(get_session),
+) -> SuccessResponse[ReceivablesAgingResponse]:
+    """Return open receivables per customer and role in 0-30/31-60/61-90/90+ day buckets."""
+
+    try:
+        return SuccessResponse(data=receivables_service.get_aging_report(session, as_of))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
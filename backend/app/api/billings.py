@@ -3,17 +3,19 @@
 from __future__ import annotations
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
 from sqlmodel import Session
 
 from app.database import get_session
 from app.schemas.billings import (
     BillingCreateRequest,
     BillingResponse,
+    BillingRunRequest,
+    BillingRunResponse,
     BillingSendInvoiceRequest,
 )
 from app.schemas.common import SuccessResponse
 from app.services import billing_service
-from app.services.exceptions import EmailDeliveryError
 
 router = APIRouter(prefix="/api/billings", tags=["Billings"], redirect_slashes=False)
 
@@ -31,6 +33,70 @@ def list_billings(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/runs", response_model=SuccessResponse[BillingRunResponse])
+def start_billing_run(
+    request: BillingRunRequest,
+    session: Session = Depends(get_session),
+) -> SuccessResponse[BillingRunResponse]:
+    """Bill every delivered sales order without a billing and report the run."""
+
+    try:
+        report = billing_service.start_billing_run(
+            session,
+            send_invoices=request.send_invoices,
+            chunk_size=request.chunk_size,
+        )
+        return SuccessResponse(data=report)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/runs", response_model=SuccessResponse[list[BillingRunResponse]])
+def list_billing_runs(
+    session: Session = Depends(get_session),
+) -> SuccessResponse[list[BillingRunResponse]]:
+    """Retrieve reports of recent billing runs."""
+
+    try:
+        return SuccessResponse(data=billing_service.list_billing_runs(session))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/runs/{run_id}", response_model=SuccessResponse[BillingRunResponse])
+def get_billing_run(
+    run_id: int,
+    session: Session = Depends(get_session),
+) -> SuccessResponse[BillingRunResponse]:
+    """Retrieve the report of one billing run."""
+
+    try:
+        return SuccessResponse(data=billing_service.get_billing_run(session, run_id))
+    except Exception as e:
+        if "not found" in str(e).lower():
+            raise HTTPException(status_code=404, detail="Billing run not found")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/runs/{run_id}/resume", response_model=SuccessResponse[BillingRunResponse])
+def resume_billing_run(
+    run_id: int,
+    session: Session = Depends(get_session),
+) -> SuccessResponse[BillingRunResponse]:
+    """Continue a failed or interrupted billing run where it stopped."""
+
+    try:
+        return SuccessResponse(data=billing_service.resume_billing_run(session, run_id))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        if "not found" in str(e).lower():
+            raise HTTPException(status_code=404, detail="Billing run not found")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/{billing_id}", response_model=SuccessResponse[BillingResponse])
 def get_billing(
     billing_id: int,
@@ -47,6 +113,33 @@ def get_billing(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/{billing_id}/pdf", response_class=FileResponse)
+def download_invoice_pdf(
+    billing_id: int,
+    session: Session = Depends(get_session),
+) -> FileResponse:
+    """Download the invoice PDF of a billing, rendering it only if it is not stored yet.
+
+    The file is served from the invoice store with ``Range`` support and its
+    content hash as ``ETag``; servers offering the ASGI ``pathsend`` extension
+    hand it to ``sendfile`` instead of streaming it through Python.
+    """
+
+    try:
+        billing = billing_service.get_billing(session, billing_id)
+        stored = billing_service.get_invoice_pdf(session, billing_id)
+    except Exception as e:
+        if "not found" in str(e).lower():
+            raise HTTPException(status_code=404, detail="Billing not found")
+        raise HTTPException(status_code=500, detail=str(e))
+    return FileResponse(
+        stored.path,
+        media_type="application/pdf",
+        filename=f"{billing.invoice_number or billing.id}.pdf",
+        headers={"ETag": f'"{stored.digest}"', "Cache-Control": "private, max-age=86400"},
+    )
+
+
 @router.post("/", response_model=SuccessResponse[BillingResponse])
 def generate_billing(
     request: BillingCreateRequest,
@@ -71,7 +164,7 @@ def generate_billing_and_send_invoice(
     request: BillingSendInvoiceRequest,
     session: Session = Depends(get_session),
 ) -> SuccessResponse[BillingResponse]:
-    """Generate a billing invoice and email it to the customer."""
+    """Generate a billing invoice and queue its email to the customer."""
 
     try:
         billing = billing_service.generate_billing_and_send_invoice(
@@ -81,7 +174,5 @@ def generate_billing_and_send_invoice(
         return SuccessResponse(data=billing)
     except billing_service.InvalidTransitionError as e:
         raise HTTPException(status_code=400, detail=str(e))
-    except EmailDeliveryError as e:
-        raise HTTPException(status_code=502, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -6,9 +6,9 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlmodel import Session
 
 from app.database import get_session
-from app.schemas.common import SuccessResponse
-from app.schemas.customers import CustomerResponse
-from app.services import customer_service
+from app.schemas.common import SuccessResponse, SuggestionResponse
+from app.schemas.customers import CreditLimitRequest, CustomerCreditResponse, CustomerResponse
+from app.services import credit_service, customer_service
 
 router = APIRouter(prefix="/api/customers", tags=["Customers"], redirect_slashes=False)
 
@@ -25,3 +25,52 @@ def list_customers(
         return SuccessResponse(data=customers)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/autocomplete", response_model=SuccessResponse[list[SuggestionResponse]])
+def autocomplete_customers(
+    q: str = Query(min_length=1, description="Prefix or fragment of a customer name"),
+    limit: int = Query(default=10, ge=1, le=50),
+    session: Session = Depends(get_session),
+) -> SuccessResponse[list[SuggestionResponse]]:
+    """Suggest customers from the in-memory search index."""
+
+    try:
+        suggestions = customer_service.autocomplete_customers(session, q, limit=limit)
+        return SuccessResponse(data=suggestions)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{customer_id}/credit", response_model=SuccessResponse[CustomerCreditResponse])
+def get_customer_credit(
+    customer_id: int,
+    session: Session = Depends(get_session),
+) -> SuccessResponse[CustomerCreditResponse]:
+    """Retrieve a customer's credit limit, open orders, receivables and remaining credit."""
+
+    try:
+        return SuccessResponse(data=credit_service.get_credit_status(session, customer_id))
+    except Exception as e:
+        if "not found" in str(e).lower():
+            raise HTTPException(status_code=404, detail=f"Customer with ID {customer_id} not found")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.put("/{customer_id}/credit", response_model=SuccessResponse[CustomerCreditResponse])
+def set_customer_credit_limit(
+    customer_id: int,
+    request: CreditLimitRequest,
+    session: Session = Depends(get_session),
+) -> SuccessResponse[CustomerCreditResponse]:
+    """Set a customer's credit limit, or remove it with ``null``."""
+
+    try:
+        status = credit_service.set_credit_limit(session, customer_id, request.credit_limit)
+        return SuccessResponse(data=status)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        if "not found" in str(e).lower():
+            raise HTTPException(status_code=404, detail=f"Customer with ID {customer_id} not found")
+        raise HTTPException(status_code=500, detail=str(e))
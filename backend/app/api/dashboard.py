@@ -2,16 +2,23 @@
 
 from __future__ import annotations
 
+import asyncio
+from collections.abc import AsyncIterator
+
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session
+from starlette.concurrency import run_in_threadpool
 
-from app.database import get_session
+from app.database import engine, get_session
 from app.schemas.common import SuccessResponse
-from app.schemas.dashboard import DashboardSummaryResponse
-from app.services import dashboard_service
+from app.schemas.dashboard import DashboardSummaryResponse, KpiCounterDriftResponse
+from app.services import dashboard_service, event_hub, kpi_service
 
 router = APIRouter(prefix="/api/dashboard", tags=["Dashboard"], redirect_slashes=False)
 
+KEEP_ALIVE_SECONDS = 15.0
+
 
 @router.get("/summary", response_model=SuccessResponse[DashboardSummaryResponse])
 def get_dashboard_summary(
@@ -24,3 +31,76 @@ def get_dashboard_summary(
         return SuccessResponse(data=summary)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post(
+    "/kpi-counters/reconcile",
+    response_model=SuccessResponse[list[KpiCounterDriftResponse]],
+)
+def reconcile_kpi_counters(
+    session: Session = Depends(get_session),
+) -> SuccessResponse[list[KpiCounterDriftResponse]]:
+    """Recount KPIs from base tables and repair drifted counters."""
+
+    try:
+        drift = kpi_service.reconcile_counters(session)
+        return SuccessResponse(data=drift)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _read_kpi_snapshot() -> dict[str, dict[str, int]]:
+    """Read the counters on a session of its own, released before streaming starts."""
+
+    with Session(engine) as session:
+        return kpi_service.get_counter_snapshot(session)
+
+
+@router.get("/stream")
+async def stream_dashboard_events() -> StreamingResponse:
+    """Push KPI deltas and order status changes as Server-Sent Events.
+
+    The stream opens with a ``kpi_snapshot`` event holding each counter's
+    ``value`` and ``version``; every ``kpi_delta`` event carries the new value
+    and version of the counters it changed. A subscriber that falls behind is
+    disconnected and should reconnect to receive a fresh snapshot.
+
+    The subscription is registered before the snapshot is read so no event
+    committed in between is lost; updates the snapshot already holds are
+    dropped by version. The snapshot's session is closed before streaming so
+    a connected client holds no database connection.
+    """
+
+    subscription = event_hub.hub.subscribe()
+    try:
+        snapshot = await run_in_threadpool(_read_kpi_snapshot)
+    except Exception as e:
+        event_hub.hub.unsubscribe(subscription)
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def event_source() -> AsyncIterator[str]:
+        seen = {name: dict(entry) for name, entry in snapshot.items()}
+        try:
+            yield event_hub.format_sse({"id": 0, "type": "kpi_snapshot", "data": snapshot})
+            while True:
+                try:
+                    payload = await asyncio.wait_for(subscription.get(), KEEP_ALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if payload is None:
+                    break
+                if payload["type"] == "kpi_delta":
+                    updates = kpi_service.unseen_updates(seen, payload["data"])
+                    if not updates:
+                        continue
+                    payload = {**payload, "data": updates}
+                yield event_hub.format_sse(payload)
+        finally:
+            event_hub.hub.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -7,7 +7,13 @@ from sqlmodel import Session
 
 from app.database import get_session
 from app.schemas.common import SuccessResponse
-from app.schemas.deliveries import DeliveryCreateRequest, DeliveryResponse
+from app.schemas.deliveries import (
+    DeliveryCreateRequest,
+    DeliveryResponse,
+    ShipmentBatchCompletionResponse,
+    ShipmentBatchResponse,
+    ShipmentConsolidationRequest,
+)
 from app.services import delivery_service
 
 router = APIRouter(prefix="/api/deliveries", tags=["Deliveries"], redirect_slashes=False)
@@ -63,3 +69,77 @@ def mark_delivery_complete(
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/batches", response_model=SuccessResponse[list[ShipmentBatchResponse]])
+def consolidate_deliveries(
+    request: ShipmentConsolidationRequest,
+    session: Session = Depends(get_session),
+) -> SuccessResponse[list[ShipmentBatchResponse]]:
+    """Group pending deliveries into shipment batches by customer or customer role."""
+
+    try:
+        batches = delivery_service.consolidate_deliveries(
+            session,
+            group_by=request.group_by,
+            customer_id=request.customer_id,
+            customer_role=request.customer_role,
+        )
+        return SuccessResponse(data=batches)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/batches", response_model=SuccessResponse[list[ShipmentBatchResponse]])
+def list_shipment_batches(
+    status: str | None = Query(default=None, description="Filter by batch status"),
+    session: Session = Depends(get_session),
+) -> SuccessResponse[list[ShipmentBatchResponse]]:
+    """List shipment batches, optionally filtered by status."""
+
+    try:
+        batches = delivery_service.list_shipment_batches(session, status=status)
+        return SuccessResponse(data=batches)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/batches/{batch_id}", response_model=SuccessResponse[ShipmentBatchResponse])
+def get_shipment_batch(
+    batch_id: int,
+    session: Session = Depends(get_session),
+) -> SuccessResponse[ShipmentBatchResponse]:
+    """Return one shipment batch with its deliveries."""
+
+    try:
+        batch = delivery_service.get_shipment_batch(session, batch_id)
+        return SuccessResponse(data=batch)
+    except Exception as e:
+        if "not found" in str(e).lower():
+            raise HTTPException(status_code=404, detail="Shipment batch not found")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post(
+    "/batches/{batch_id}/complete",
+    response_model=SuccessResponse[ShipmentBatchCompletionResponse],
+)
+def complete_shipment_batch(
+    batch_id: int,
+    session: Session = Depends(get_session),
+) -> SuccessResponse[ShipmentBatchCompletionResponse]:
+    """Mark a whole shipment batch delivered and advance its sales orders."""
+
+    try:
+        result = delivery_service.complete_shipment_batch(session, batch_id)
+        return SuccessResponse(data=result)
+    except delivery_service.InvalidTransitionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        if "not found" in str(e).lower():
+            raise HTTPException(status_code=404, detail="Shipment batch not found")
+        raise HTTPException(status_code=500, detail=str(e))
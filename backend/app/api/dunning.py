@@ -0,0 +1,46 @@
+"""Dunning API router implementation."""
+
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import Session
+
+from app.database import get_session
+from app.schemas.common import SuccessResponse
+from app.schemas.dunning import DunningNoticeResponse, DunningRunRequest, DunningRunResponse
+from app.services import dunning_service
+
+router = APIRouter(prefix="/api/dunning", tags=["Dunning"], redirect_slashes=False)
+
+
+@router.post("/runs", response_model=SuccessResponse[DunningRunResponse])
+def run_dunning(
+    request: DunningRunRequest,
+    session: Session = Depends(get_session),
+) -> SuccessResponse[DunningRunResponse]:
+    """Raise reminders for customers with overdue billings; reruns skip customers already notified.
+
+    Reminders are delivered by the email outbox worker unless ``send`` asks for inline delivery.
+    """
+
+    try:
+        summary = dunning_service.run_dunning(session, request.as_of, send=request.send)
+        return SuccessResponse(data=summary)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/notices", response_model=SuccessResponse[list[DunningNoticeResponse]])
+def list_notices(
+    customer_id: int | None = Query(default=None, description="Only notices of this customer"),
+    level: int | None = Query(default=None, ge=1, description="Only notices at this dunning level"),
+    limit: int = Query(default=100, ge=1, le=1000),
+    session: Session = Depends(get_session),
+) -> SuccessResponse[list[DunningNoticeResponse]]:
+    """List dunning notices newest first."""
+
+    try:
+        notices = dunning_service.list_notices(session, customer_id=customer_id, level=level, limit=limit)
+        return SuccessResponse(data=notices)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
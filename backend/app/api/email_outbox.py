@@ -0,0 +1,62 @@
+"""Email outbox API router implementation."""
+
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import Session
+
+from app.database import get_session
+from app.schemas.common import SuccessResponse
+from app.schemas.email_outbox import EmailOutboxResponse, OutboxDrainResponse
+from app.services import email_outbox_service
+
+router = APIRouter(prefix="/api/email-outbox", tags=["Email Outbox"], redirect_slashes=False)
+
+
+@router.get("/", response_model=SuccessResponse[list[EmailOutboxResponse]])
+def list_messages(
+    status: str | None = Query(default=None, description="Filter by outbox status"),
+    limit: int = Query(default=100, ge=1, le=1000),
+    session: Session = Depends(get_session),
+) -> SuccessResponse[list[EmailOutboxResponse]]:
+    """List outbox messages newest first, e.g. ``status=dead`` for the dead-letter queue."""
+
+    try:
+        messages = email_outbox_service.list_messages(session, status=status, limit=limit)
+        return SuccessResponse(data=messages)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/drain", response_model=SuccessResponse[OutboxDrainResponse])
+def drain_outbox(
+    limit: int = Query(default=100, ge=1, le=1000),
+    session: Session = Depends(get_session),
+) -> SuccessResponse[OutboxDrainResponse]:
+    """Deliver due messages within this request, for deployments without the background worker."""
+
+    try:
+        counts = email_outbox_service.process_due(session, limit=limit)
+        return SuccessResponse(data=counts)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/{outbox_id}/requeue", response_model=SuccessResponse[EmailOutboxResponse])
+def requeue_message(
+    outbox_id: int,
+    session: Session = Depends(get_session),
+) -> SuccessResponse[EmailOutboxResponse]:
+    """Give a dead-lettered message a fresh round of delivery attempts."""
+
+    try:
+        message = email_outbox_service.requeue(session, outbox_id)
+        return SuccessResponse(data=message)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        if "not found" in str(e).lower():
+            raise HTTPException(status_code=404, detail="Email not found")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -10,10 +10,12 @@ from app.schemas.common import ErrorResponse, SuccessResponse
 from app.schemas.orders import (
     OrderCreateRequest,
     OrderDetailResponse,
+    OrderQuoteRequest,
+    OrderQuoteResponse,
     OrderStatusUpdateRequest,
     OrderSummaryResponse,
 )
-from app.services import order_service
+from app.services import atp_service, order_service
 
 router = APIRouter(prefix="/api/orders", tags=["Orders"], redirect_slashes=False)
 
@@ -68,6 +70,25 @@ def create_order(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.post("/quote", response_model=SuccessResponse[OrderQuoteResponse])
+def quote_order(
+    quote_data: OrderQuoteRequest,
+    session: Session = Depends(get_session),
+) -> SuccessResponse[OrderQuoteResponse]:
+    """Quote the completion date for a prospective order from the capacity index."""
+
+    try:
+        quote = atp_service.quote(
+            session,
+            [(item.product_id, item.quantity) for item in quote_data.items],
+        )
+        return SuccessResponse(data=quote)
+    except Exception as e:
+        if "not found" in str(e).lower():
+            raise HTTPException(status_code=404, detail=str(e))
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.patch("/{order_id}/status", response_model=SuccessResponse[OrderDetailResponse])
 def update_order_status(
     order_id: int,
@@ -0,0 +1,104 @@
+"""Payments API router implementation."""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlmodel import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.database import get_session
+from app.schemas.common import SuccessResponse
+from app.schemas.payments import PaymentImportResponse, PaymentResponse
+from app.services import payment_service
+
+router = APIRouter(prefix="/api/payments", tags=["Payments"], redirect_slashes=False)
+
+
+async def _iter_statement_lines(request: Request) -> AsyncIterator[list[str]]:
+    """Yield decoded lines of a streamed CSV body, one list per received chunk."""
+
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        if lines:
+            yield [line.decode("utf-8-sig") for line in lines]
+    if buffer:
+        yield [buffer.decode("utf-8-sig")]
+
+
+@router.get("/", response_model=SuccessResponse[list[PaymentResponse]])
+def list_payments(
+    import_id: int | None = Query(default=None, description="Only payments of this statement import"),
+    status: str | None = Query(default=None, description="Filter by payment status"),
+    limit: int = Query(default=100, ge=1, le=1000),
+    offset: int = Query(default=0, ge=0),
+    session: Session = Depends(get_session),
+) -> SuccessResponse[list[PaymentResponse]]:
+    """List recorded payments, e.g. ``status=unmatched`` for manual follow-up."""
+
+    try:
+        payments = payment_service.list_payments(
+            session, import_id=import_id, status=status, limit=limit, offset=offset
+        )
+        return SuccessResponse(data=payments)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/imports", response_model=SuccessResponse[PaymentImportResponse])
+async def import_statement(
+    request: Request,
+    filename: str | None = Query(default=None, description="Name of the uploaded statement file"),
+    session: Session = Depends(get_session),
+) -> SuccessResponse[PaymentImportResponse]:
+    """Import a CSV bank statement and apply its payments to open billings in one transaction.
+
+    The body is matched and staged in batches while it is still streaming;
+    nothing is committed unless the whole statement is applied.
+    """
+
+    try:
+        statement_import = await run_in_threadpool(payment_service.StatementImport, session, filename)
+        async for lines in _iter_statement_lines(request):
+            await run_in_threadpool(statement_import.feed, lines)
+        record = await run_in_threadpool(statement_import.finish)
+        return SuccessResponse(data=record)
+    except (ValueError, UnicodeDecodeError) as e:
+        await run_in_threadpool(session.rollback)
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        await run_in_threadpool(session.rollback)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/imports", response_model=SuccessResponse[list[PaymentImportResponse]])
+def list_imports(
+    limit: int = Query(default=50, ge=1, le=500),
+    session: Session = Depends(get_session),
+) -> SuccessResponse[list[PaymentImportResponse]]:
+    """List statement imports newest first."""
+
+    try:
+        return SuccessResponse(data=payment_service.list_imports(session, limit))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/imports/{import_id}", response_model=SuccessResponse[PaymentImportResponse])
+def get_import(
+    import_id: int,
+    session: Session = Depends(get_session),
+) -> SuccessResponse[PaymentImportResponse]:
+    """Retrieve one statement import and its cash application totals."""
+
+    try:
+        return SuccessResponse(data=payment_service.get_import(session, import_id))
+    except Exception as e:
+        if "not found" in str(e).lower():
+            raise HTTPException(status_code=404, detail=f"Payment import with ID {import_id} not found")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -10,8 +10,11 @@ from app.schemas.common import SuccessResponse
 from app.schemas.production_orders import (
     ProductionOrderResponse,
     ProductionOrderStartRequest,
+    ScheduledProductionOrderResponse,
+    WaveReleaseRequest,
+    WaveReleaseResponse,
 )
-from app.services import production_service
+from app.services import production_service, scheduling_service
 
 router = APIRouter(prefix="/api/production-orders", tags=["Production Orders"], redirect_slashes=False)
 
@@ -30,6 +33,39 @@ def list_production_orders(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/schedule", response_model=SuccessResponse[list[ScheduledProductionOrderResponse]])
+def get_production_schedule(
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1, le=1000),
+    session: Session = Depends(get_session),
+) -> SuccessResponse[list[ScheduledProductionOrderResponse]]:
+    """List open production orders in execution order with their planned time slots."""
+
+    try:
+        schedule = scheduling_service.get_schedule(session, offset=offset, limit=limit)
+        return SuccessResponse(data=schedule)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{production_id}/schedule", response_model=SuccessResponse[ScheduledProductionOrderResponse])
+def get_production_slot(
+    production_id: int,
+    session: Session = Depends(get_session),
+) -> SuccessResponse[ScheduledProductionOrderResponse]:
+    """Retrieve the planned time slot of one open production order."""
+
+    try:
+        slot = scheduling_service.get_production_slot(session, production_id)
+    except Exception as e:
+        if "not found" in str(e).lower():
+            raise HTTPException(status_code=404, detail="Production order not found")
+        raise HTTPException(status_code=500, detail=str(e))
+    if slot is None:
+        raise HTTPException(status_code=404, detail="Production order is not scheduled")
+    return SuccessResponse(data=slot)
+
+
 @router.post("/", response_model=SuccessResponse[ProductionOrderResponse])
 def start_production(
     request: ProductionOrderStartRequest,
@@ -89,3 +125,23 @@ def mark_production_complete(
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/waves", response_model=SuccessResponse[WaveReleaseResponse])
+def release_wave(
+    request: WaveReleaseRequest,
+    session: Session = Depends(get_session),
+) -> SuccessResponse[WaveReleaseResponse]:
+    """Release all created sales orders (optionally for one product) as a production wave."""
+
+    try:
+        wave = production_service.release_wave(
+            session,
+            product_id=request.product_id,
+            limit=request.limit,
+        )
+        return SuccessResponse(data=wave)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
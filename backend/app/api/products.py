@@ -2,27 +2,71 @@
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from collections.abc import AsyncIterator
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from pydantic import ValidationError
 from sqlmodel import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.database import get_session
-from app.schemas.common import SuccessResponse
-from app.schemas.products import ProductCreateRequest, ProductResponse, ProductUpdateRequest
-from app.services import product_service
+from app.schemas.common import SuccessResponse, SuggestionResponse
+from app.schemas.products import (
+    ProductBulkItem,
+    ProductBulkUpsertResponse,
+    ProductCapacityRequest,
+    ProductCapacityResponse,
+    ProductCreateRequest,
+    ProductResponse,
+    ProductUpdateRequest,
+    StockLevelResponse,
+    StockReceiptRequest,
+    StockSplitRequest,
+)
+from app.services import atp_service, inventory_service, product_service
 
 router = APIRouter(prefix="/api/products", tags=["Products"], redirect_slashes=False)
 
+CATALOG_CACHE_CONTROL = "public, max-age=60, stale-while-revalidate=300"
+
 
 @router.get("/", response_model=SuccessResponse[list[ProductResponse]])
 def list_products(
+    request: Request,
     search: str | None = Query(default=None, description="Search products by name"),
     session: Session = Depends(get_session),
-) -> SuccessResponse[list[ProductResponse]]:
-    """Retrieve full product catalog, optionally filtered by keyword."""
+) -> SuccessResponse[list[ProductResponse]] | Response:
+    """Retrieve full product catalog, optionally filtered by keyword.
+
+    The unfiltered catalog is served from a pre-encoded in-process cache with
+    ``Cache-Control`` and ``ETag`` headers.
+    """
+
+    try:
+        if search:
+            products = product_service.get_product_catalog(session, search=search)
+            return SuccessResponse(data=products)
+
+        snapshot = product_service.get_catalog_snapshot(session)
+        headers = {"Cache-Control": CATALOG_CACHE_CONTROL, "ETag": snapshot.etag}
+        if request.headers.get("if-none-match") == snapshot.etag:
+            return Response(status_code=304, headers=headers)
+        return Response(content=snapshot.body, media_type="application/json", headers=headers)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/autocomplete", response_model=SuccessResponse[list[SuggestionResponse]])
+def autocomplete_products(
+    q: str = Query(min_length=1, description="Prefix or fragment of a product name"),
+    limit: int = Query(default=10, ge=1, le=50),
+    session: Session = Depends(get_session),
+) -> SuccessResponse[list[SuggestionResponse]]:
+    """Suggest products from the in-memory search index."""
 
     try:
-        products = product_service.get_product_catalog(session, search=search)
-        return SuccessResponse(data=products)
+        suggestions = product_service.autocomplete_products(session, q, limit=limit)
+        return SuccessResponse(data=suggestions)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -44,6 +88,55 @@ def create_product(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+async def _iter_ndjson_lines(request: Request) -> AsyncIterator[bytes]:
+    """Yield non-empty lines from a streamed newline-delimited request body."""
+
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+
+@router.post("/bulk", response_model=SuccessResponse[ProductBulkUpsertResponse])
+async def bulk_upsert_products(
+    request: Request,
+    session: Session = Depends(get_session),
+) -> SuccessResponse[ProductBulkUpsertResponse]:
+    """Upsert products from an NDJSON stream (one product per line) in one transaction.
+
+    Lines are validated and applied in batches while the body is still streaming;
+    nothing is committed unless every line succeeds.
+    """
+
+    summary = product_service.new_bulk_summary()
+    batch: list[dict] = []
+    line_number = 0
+    try:
+        async for line in _iter_ndjson_lines(request):
+            line_number += 1
+            batch.append(ProductBulkItem.model_validate_json(line).model_dump())
+            if len(batch) >= product_service.BULK_UPSERT_BATCH_SIZE:
+                result = await run_in_threadpool(product_service.upsert_product_batch, session, batch)
+                product_service.merge_bulk_summaries(summary, result)
+                batch = []
+        if batch:
+            result = await run_in_threadpool(product_service.upsert_product_batch, session, batch)
+            product_service.merge_bulk_summaries(summary, result)
+        await run_in_threadpool(product_service.finish_bulk_upsert, session)
+        return SuccessResponse(data=summary)
+    except ValidationError as e:
+        await run_in_threadpool(session.rollback)
+        raise HTTPException(status_code=400, detail=f"Line {line_number}: {e.errors()[0]['msg']}")
+    except Exception as e:
+        await run_in_threadpool(session.rollback)
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("/{product_id}", response_model=SuccessResponse[ProductResponse])
 def get_product(
     product_id: int,
@@ -91,3 +184,74 @@ def delete_product(
         if "not found" in str(e).lower():
             raise HTTPException(status_code=404, detail=f"Product with ID {product_id} not found")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{product_id}/stock", response_model=SuccessResponse[StockLevelResponse])
+def get_product_stock(
+    product_id: int,
+    session: Session = Depends(get_session),
+) -> SuccessResponse[StockLevelResponse]:
+    """Retrieve on-hand, reserved and available stock for a product."""
+
+    try:
+        return SuccessResponse(data=inventory_service.get_stock_level(session, product_id))
+    except Exception as e:
+        if "not found" in str(e).lower():
+            raise HTTPException(status_code=404, detail=f"Product with ID {product_id} not found")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/{product_id}/stock/receipts", response_model=SuccessResponse[StockLevelResponse])
+def receive_product_stock(
+    product_id: int,
+    request: StockReceiptRequest,
+    session: Session = Depends(get_session),
+) -> SuccessResponse[StockLevelResponse]:
+    """Receive additional units of a product into stock."""
+
+    try:
+        product_service.restock_product(session, product_id, request.quantity)
+        return SuccessResponse(data=inventory_service.get_stock_level(session, product_id))
+    except Exception as e:
+        if "not found" in str(e).lower():
+            raise HTTPException(status_code=404, detail=f"Product with ID {product_id} not found")
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.put("/{product_id}/stock/slots", response_model=SuccessResponse[StockLevelResponse])
+def split_product_stock(
+    product_id: int,
+    request: StockSplitRequest,
+    session: Session = Depends(get_session),
+) -> SuccessResponse[StockLevelResponse]:
+    """Spread a hot product's stock across more balance rows to reduce contention."""
+
+    try:
+        return SuccessResponse(data=inventory_service.split_stock(session, product_id, request.slots))
+    except Exception as e:
+        if "not found" in str(e).lower():
+            raise HTTPException(status_code=404, detail=f"Product with ID {product_id} not found")
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.put("/{product_id}/capacity", response_model=SuccessResponse[ProductCapacityResponse])
+def set_product_capacity(
+    product_id: int,
+    request: ProductCapacityRequest,
+    session: Session = Depends(get_session),
+) -> SuccessResponse[ProductCapacityResponse]:
+    """Configure how many units of a product can be finished per day."""
+
+    try:
+        capacity = atp_service.set_product_capacity(
+            session,
+            product_id,
+            request.daily_capacity,
+            request.lead_time_days,
+            request.run_minutes,
+        )
+        return SuccessResponse(data=capacity)
+    except Exception as e:
+        if "not found" in str(e).lower():
+            raise HTTPException(status_code=404, detail=f"Product with ID {product_id} not found")
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,81 @@
+"""Shop-floor work queue API router implementation."""
+
+from __future__ import annotations
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlmodel import Session
+
+from app.database import get_session
+from app.schemas.common import SuccessResponse
+from app.schemas.production_orders import ProductionOrderResponse
+from app.schemas.work_queue import (
+    LeaseRenewalResponse,
+    LeaseTokenRequest,
+    WorkClaimRequest,
+    WorkClaimResponse,
+)
+from app.services import work_queue_service
+from app.services.exceptions import InvalidTransitionError, LeaseLostError
+
+router = APIRouter(prefix="/api/work-queue", tags=["Work Queue"], redirect_slashes=False)
+
+
+@router.post("/claim", response_model=SuccessResponse[Optional[WorkClaimResponse]])
+def claim_work(
+    request: WorkClaimRequest,
+    session: Session = Depends(get_session),
+) -> SuccessResponse[Optional[WorkClaimResponse]]:
+    """Lease the next production order to a worker; ``data`` is null when the queue is empty."""
+
+    try:
+        claim = work_queue_service.claim_next(
+            session,
+            request.worker_id,
+            lease_seconds=request.lease_seconds,
+        )
+        return SuccessResponse(data=claim, message=None if claim else "No work available")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/{production_id}/heartbeat", response_model=SuccessResponse[LeaseRenewalResponse])
+def renew_lease(
+    production_id: int,
+    request: LeaseTokenRequest,
+    session: Session = Depends(get_session),
+) -> SuccessResponse[LeaseRenewalResponse]:
+    """Extend the caller's lease on a production order."""
+
+    try:
+        renewal = work_queue_service.heartbeat(
+            session,
+            production_id,
+            request.token,
+            lease_seconds=request.lease_seconds,
+        )
+        return SuccessResponse(data=renewal)
+    except LeaseLostError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/{production_id}/complete", response_model=SuccessResponse[ProductionOrderResponse])
+def complete_work(
+    production_id: int,
+    request: LeaseTokenRequest,
+    session: Session = Depends(get_session),
+) -> SuccessResponse[ProductionOrderResponse]:
+    """Complete a leased production order and release the lease."""
+
+    try:
+        production = work_queue_service.complete_claimed(session, production_id, request.token)
+        return SuccessResponse(data=production)
+    except LeaseLostError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except InvalidTransitionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
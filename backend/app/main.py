@@ -1,9 +1,24 @@
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
-from app.database import init_db
+from sqlmodel import Session
+
+from app.database import engine, init_db
 from . import models
-from app.api import orders, production_orders, deliveries, billings, products, customers, dashboard
+from app.api import orders, production_orders, deliveries, billings, products, customers, dashboard, analytics, work_queue, email_outbox, payments, dunning
+from app.services import (
+    analytics_service,
+    billing_service,
+    credit_service,
+    dunning_service,
+    email_outbox_service,
+    email_transport,
+    invoice_numbers,
+    kpi_service,
+    lead_time_service,
+    pdf_render_pool,
+    product_service,
+)
 from fastapi.middleware.cors import CORSMiddleware
 import os
 
@@ -17,8 +32,22 @@ async def lifespan(app: FastAPI):
     load_dotenv()
 
     init_db()
+    with Session(engine) as session:
+        invoice_numbers.ensure_unique_index(session)
+        dunning_service.ensure_overdue_index(session)
+        billing_service.ensure_single_run_index(session)
+        kpi_service.ensure_counters(session)
+        analytics_service.ensure_rollups(session)
+        credit_service.ensure_balances(session)
+        lead_time_service.ensure_sketches(session)
+        product_service.warm_catalog_cache(session)
+    if os.getenv("EMAIL_OUTBOX_WORKER", "1") != "0":
+        email_outbox_service.outbox_worker.start(lambda: Session(engine))
     yield
-    # Shutdown (if needed)
+    # Shutdown
+    email_outbox_service.outbox_worker.stop()
+    email_transport.close_transport()
+    pdf_render_pool.render_pool.shutdown()
 
 
 app = FastAPI(title="Mapúa MTO Backend", lifespan=lifespan)
@@ -46,3 +75,8 @@ app.include_router(billings.router)
 app.include_router(products.router)
 app.include_router(customers.router)
 app.include_router(dashboard.router)
+app.include_router(analytics.router)
+app.include_router(work_queue.router)
+app.include_router(email_outbox.router)
+app.include_router(payments.router)
+app.include_router(dunning.router)
@@ -1,7 +1,8 @@
-from datetime import UTC, datetime
+from datetime import UTC, date, datetime
 from typing import List, Optional
 
 import enum
+from sqlalchemy import CheckConstraint, Index, UniqueConstraint, text
 from sqlmodel import Field, Relationship, SQLModel
 
 
@@ -31,6 +32,50 @@ class DeliveryStatus(str, enum.Enum):
     delivered = "delivered"
     cancelled = "cancelled"
 
+
+class ShipmentBatchStatus(str, enum.Enum):
+    open = "open"
+    delivered = "delivered"
+
+
+class OutboxStatus(str, enum.Enum):
+    pending = "pending"
+    sending = "sending"
+    sent = "sent"
+    dead = "dead"
+
+
+class PaymentStatus(str, enum.Enum):
+    applied = "applied"
+    partial = "partial"
+    overpaid = "overpaid"
+    unmatched = "unmatched"
+
+
+class BillingRunStatus(str, enum.Enum):
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
+
+class RollupGranularity(str, enum.Enum):
+    day = "day"
+    week = "week"
+    month = "month"
+
+
+class ProductionTimeMetric(str, enum.Enum):
+    lead_time = "lead_time"
+    queue_time = "queue_time"
+
+
+class StockMovementType(str, enum.Enum):
+    receipt = "receipt"
+    reservation = "reservation"
+    release = "release"
+    issue = "issue"
+    transfer = "transfer"
+
 # --- Customers ---
 class Customer(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -46,6 +91,14 @@ class Product(SQLModel, table=True):
     description: str
     price: float
     image_url: Optional[str] = None
+    external_key: Optional[str] = Field(default=None, unique=True, index=True)
+    stock_balances: List["StockBalance"] = Relationship(cascade_delete=True)
+    capacity: Optional["ProductCapacity"] = Relationship(cascade_delete=True)
+
+    @property
+    def stock_qty(self) -> int:
+        """Unreserved quantity summed across the product's stock balance slots."""
+        return sum(balance.on_hand - balance.reserved for balance in self.stock_balances)
 
 # --- Sales Orders ---
 class SalesOrder(SQLModel, table=True):
@@ -95,6 +148,10 @@ class Delivery(SQLModel, table=True):
 
 # --- Billing ---
 class Billing(SQLModel, table=True):
+    __table_args__ = (
+        Index("ux_billing_invoice_number", "invoice_number", unique=True),
+        Index("ix_billing_billed_date", "billed_date"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     sales_order_id: int = Field(foreign_key="sales_order.id")
     invoice_number: Optional[str] = None
@@ -102,3 +159,303 @@ class Billing(SQLModel, table=True):
     billed_date: Optional[datetime] = Field(default_factory=current_utc_time)
 
     sales_order: Optional[SalesOrder] = Relationship(back_populates="billing")
+
+class InvoiceNumberSequence(SQLModel, table=True):
+    """Hi value of a hi-lo invoice number sequence, one row per prefix (e.g. ``INV-2026``)."""
+
+    __tablename__ = "invoice_number_sequence"
+    prefix: str = Field(primary_key=True)
+    next_block: int = Field(default=0)
+
+# --- KPI Counters ---
+class KpiCounter(SQLModel, table=True):
+    __tablename__ = "kpi_counters"
+    name: str = Field(primary_key=True)
+    value: int = Field(default=0)
+    # Bumped on every write so event subscribers can tell which updates a snapshot covers.
+    version: int = Field(default=0)
+    updated_at: datetime = Field(default_factory=current_utc_time)
+
+# --- Analytics Rollups ---
+class ProductSalesRollup(SQLModel, table=True):
+    __tablename__ = "product_sales_rollup"
+    granularity: RollupGranularity = Field(primary_key=True)
+    bucket_start: date = Field(primary_key=True)
+    product_id: int = Field(primary_key=True)
+    customer_role: str = Field(primary_key=True)
+    order_count: int = Field(default=0)
+    quantity: int = Field(default=0)
+    revenue: float = Field(default=0.0)
+
+
+class RoleRevenueRollup(SQLModel, table=True):
+    __tablename__ = "role_revenue_rollup"
+    granularity: RollupGranularity = Field(primary_key=True)
+    bucket_start: date = Field(primary_key=True)
+    customer_role: str = Field(primary_key=True)
+    order_count: int = Field(default=0)
+    billed_amount: float = Field(default=0.0)
+
+# --- Inventory ---
+class StockBalance(SQLModel, table=True):
+    """On-hand and reserved quantity for one slot of a product's stock.
+
+    Hot products are split across several slots so concurrent reservations update
+    different rows instead of queueing on a single one.
+    """
+
+    __tablename__ = "stock_balances"
+    __table_args__ = (
+        CheckConstraint("reserved >= 0 AND reserved <= on_hand", name="ck_stock_balance_levels"),
+    )
+    product_id: int = Field(foreign_key="product.id", primary_key=True, ondelete="CASCADE")
+    slot: int = Field(default=0, primary_key=True)
+    on_hand: int = Field(default=0)
+    reserved: int = Field(default=0)
+
+
+class StockLedgerEntry(SQLModel, table=True):
+    __tablename__ = "stock_ledger"
+    id: Optional[int] = Field(default=None, primary_key=True)
+    product_id: int = Field(index=True)
+    slot: int = Field(default=0)
+    sales_order_id: Optional[int] = Field(default=None, index=True)
+    movement: StockMovementType
+    quantity: int
+    created_at: datetime = Field(default_factory=current_utc_time)
+
+
+# --- Capacity Planning ---
+class ProductCapacity(SQLModel, table=True):
+    """Production capacity settings for a product.
+
+    ``daily_capacity`` (units per day) drives date promises; ``run_minutes`` (line
+    time per unit) drives the shop-floor schedule.
+    """
+
+    __tablename__ = "product_capacity"
+    product_id: int = Field(foreign_key="product.id", primary_key=True, ondelete="CASCADE")
+    daily_capacity: int = Field(gt=0)
+    lead_time_days: int = Field(default=0, ge=0)
+    run_minutes: float = Field(default=30.0, gt=0)
+
+
+class CapacityCommitment(SQLModel, table=True):
+    """Units of a product's daily capacity promised to a sales order."""
+
+    __tablename__ = "capacity_commitment"
+    sales_order_id: int = Field(foreign_key="sales_order.id", primary_key=True)
+    product_id: int = Field(primary_key=True)
+    day: date = Field(primary_key=True, index=True)
+    quantity: int
+
+
+# --- Shop-floor Work Queue ---
+class ProductionLease(SQLModel, table=True):
+    """Time-limited claim of a production order by a shop-floor worker."""
+
+    __tablename__ = "production_lease"
+    production_order_id: int = Field(foreign_key="production_order.id", primary_key=True)
+    worker_id: str
+    token: str
+    claimed_at: datetime = Field(default_factory=current_utc_time)
+    expires_at: datetime = Field(index=True)
+
+
+# --- Production Time Sketches ---
+class ProductionTimeSketchBucket(SQLModel, table=True):
+    """One logarithmic bucket of a per-product production time quantile sketch."""
+
+    __tablename__ = "production_time_sketch"
+    product_id: int = Field(primary_key=True)
+    metric: ProductionTimeMetric = Field(primary_key=True)
+    bucket: int = Field(primary_key=True)
+    count: int = Field(default=0)
+
+
+# --- Shipment Batches ---
+class ShipmentBatch(SQLModel, table=True):
+    """Pending deliveries consolidated into one shipment for a customer or customer role."""
+
+    __tablename__ = "shipment_batch"
+    id: Optional[int] = Field(default=None, primary_key=True)
+    group_by: str  # customer, role
+    customer_id: Optional[int] = Field(default=None, foreign_key="customer.id", index=True)
+    customer_role: Optional[str] = None
+    status: ShipmentBatchStatus = Field(default=ShipmentBatchStatus.open, index=True)
+    created_at: datetime = Field(default_factory=current_utc_time)
+    delivered_at: Optional[datetime] = None
+
+
+class ShipmentBatchDelivery(SQLModel, table=True):
+    """Membership of a delivery in a shipment batch; a delivery joins at most one batch."""
+
+    __tablename__ = "shipment_batch_delivery"
+    delivery_id: int = Field(foreign_key="delivery.id", primary_key=True)
+    batch_id: int = Field(foreign_key="shipment_batch.id", index=True)
+
+
+# --- Email Outbox ---
+class EmailOutbox(SQLModel, table=True):
+    """Outbound email staged in the business transaction and delivered by a background worker."""
+
+    __tablename__ = "email_outbox"
+    __table_args__ = (Index("ix_email_outbox_due", "status", "next_attempt_at"),)
+    id: Optional[int] = Field(default=None, primary_key=True)
+    kind: str  # composer name, e.g. invoice
+    reference_id: int  # id of the entity the composer renders, e.g. billing id
+    recipient: str
+    status: OutboxStatus = Field(default=OutboxStatus.pending)
+    attempts: int = Field(default=0)
+    next_attempt_at: datetime = Field(default_factory=current_utc_time)
+    locked_until: Optional[datetime] = None
+    last_error: Optional[str] = None
+    provider_message_id: Optional[str] = None
+    created_at: datetime = Field(default_factory=current_utc_time)
+    sent_at: Optional[datetime] = None
+
+
+# --- Billing Runs ---
+class BillingRun(SQLModel, table=True):
+    """Progress and report of one bulk billing run over delivered orders.
+
+    ``billed_through`` (a sales order id) and ``rendered_through`` (a billing
+    id) are cursors committed with each chunk, so an interrupted run resumes
+    where it stopped instead of starting over. A partial unique index admits
+    at most one ``running`` run.
+    """
+
+    __tablename__ = "billing_run"
+    __table_args__ = (
+        Index(
+            "ux_billing_run_running",
+            "status",
+            unique=True,
+            postgresql_where=text("status = 'running'"),
+            sqlite_where=text("status = 'running'"),
+        ),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True)
+    status: BillingRunStatus = Field(default=BillingRunStatus.running, index=True)
+    send_invoices: bool = Field(default=False)
+    chunk_size: int = Field(default=500)
+    billed_through: int = Field(default=0)
+    rendered_through: int = Field(default=0)
+    orders_billed: int = Field(default=0)
+    total_amount: float = Field(default=0.0)
+    invoices_rendered: int = Field(default=0)
+    invoices_queued: int = Field(default=0)
+    last_error: Optional[str] = None
+    started_at: datetime = Field(default_factory=current_utc_time)
+    finished_at: Optional[datetime] = None
+
+
+class BillingRunInvoice(SQLModel, table=True):
+    """Billing created by a billing run."""
+
+    __tablename__ = "billing_run_invoice"
+    billing_id: int = Field(foreign_key="billing.id", primary_key=True)
+    run_id: int = Field(foreign_key="billing_run.id", index=True)
+
+
+# --- Payments ---
+class PaymentImport(SQLModel, table=True):
+    """One imported bank statement and the totals of its cash application."""
+
+    __tablename__ = "payment_import"
+    id: Optional[int] = Field(default=None, primary_key=True)
+    filename: Optional[str] = None
+    checksum: Optional[str] = Field(default=None, unique=True)  # SHA-256 of the statement lines
+    lines: int = Field(default=0)
+    matched: int = Field(default=0)
+    unmatched: int = Field(default=0)
+    skipped: int = Field(default=0)
+    amount_received: float = Field(default=0.0)
+    amount_applied: float = Field(default=0.0)
+    amount_unapplied: float = Field(default=0.0)
+    imported_at: datetime = Field(default_factory=current_utc_time)
+
+
+class Payment(SQLModel, table=True):
+    """Statement line and the part of it applied to a billing.
+
+    ``unapplied_amount`` is the overpayment, or the whole amount when no
+    billing matched, held as customer credit or for manual follow-up.
+    """
+
+    __tablename__ = "payment"
+    id: Optional[int] = Field(default=None, primary_key=True)
+    import_id: Optional[int] = Field(default=None, foreign_key="payment_import.id", index=True)
+    line_number: Optional[int] = None
+    paid_on: date
+    amount: float
+    reference: Optional[str] = None
+    invoice_number: Optional[str] = None
+    customer_id: Optional[int] = Field(default=None, foreign_key="customer.id", index=True)
+    billing_id: Optional[int] = Field(default=None, foreign_key="billing.id", index=True)
+    applied_amount: float = Field(default=0.0)
+    unapplied_amount: float = Field(default=0.0)
+    status: PaymentStatus = Field(default=PaymentStatus.unmatched, index=True)
+    match_rule: Optional[str] = None  # invoice_number or customer_amount
+    created_at: datetime = Field(default_factory=current_utc_time)
+
+
+class BillingPaymentTotal(SQLModel, table=True):
+    """Running total of payments applied to one billing."""
+
+    __tablename__ = "billing_payment_total"
+    billing_id: int = Field(foreign_key="billing.id", primary_key=True)
+    amount_paid: float = Field(default=0.0)
+    payment_count: int = Field(default=0)
+
+
+# --- Dunning ---
+class DunningNotice(SQLModel, table=True):
+    """Payment reminder raised for one customer at one dunning level.
+
+    ``anchor_billing_id`` is the customer's oldest overdue billing when the
+    notice was raised; a customer gets at most one notice per level for the
+    same arrears, and a new round starts once that billing is paid.
+    """
+
+    __tablename__ = "dunning_notice"
+    __table_args__ = (UniqueConstraint("customer_id", "level", "anchor_billing_id"),)
+    id: Optional[int] = Field(default=None, primary_key=True)
+    customer_id: int = Field(foreign_key="customer.id", index=True)
+    level: int
+    anchor_billing_id: int = Field(foreign_key="billing.id")
+    recipient: str
+    as_of: date
+    invoice_count: int
+    amount_due: float
+    max_days_overdue: int
+    created_at: datetime = Field(default_factory=current_utc_time)
+
+
+class DunningNoticeLine(SQLModel, table=True):
+    """Overdue billing listed on a dunning notice, as it stood when the notice was raised."""
+
+    __tablename__ = "dunning_notice_line"
+    notice_id: int = Field(foreign_key="dunning_notice.id", primary_key=True)
+    billing_id: int = Field(foreign_key="billing.id", primary_key=True)
+    invoice_number: Optional[str] = None
+    billed_date: datetime
+    open_amount: float
+    days_overdue: int
+
+
+# --- Credit management ---
+class CustomerCredit(SQLModel, table=True):
+    """Credit limit and running exposure of one customer.
+
+    ``open_order_amount`` is the value of orders neither billed nor cancelled
+    and ``receivable_amount`` the billed value not yet paid. Both are adjusted
+    incrementally by the writes that change them, so the credit check at order
+    entry touches only this row. A ``credit_limit`` of ``None`` means unlimited.
+    """
+
+    __tablename__ = "customer_credit"
+    customer_id: int = Field(foreign_key="customer.id", primary_key=True)
+    credit_limit: Optional[float] = None
+    open_order_amount: float = Field(default=0.0)
+    receivable_amount: float = Field(default=0.0)
@@ -10,4 +10,22 @@ __all__ = [
     "production_order_repository",
     "delivery_repository",
     "billing_repository",
+    "kpi_counter_repository",
+    "product_sales_rollup_repository",
+    "role_revenue_rollup_repository",
+    "stock_balance_repository",
+    "stock_ledger_repository",
+    "product_capacity_repository",
+    "capacity_commitment_repository",
+    "production_lease_repository",
+    "production_time_sketch_repository",
+    "shipment_batch_repository",
+    "email_outbox_repository",
+    "billing_run_repository",
+    "invoice_number_sequence_repository",
+    "payment_import_repository",
+    "payment_repository",
+    "billing_payment_total_repository",
+    "dunning_notice_repository",
+    "customer_credit_repository",
 ]
@@ -2,8 +2,9 @@
 
 from __future__ import annotations
 
-from typing import Any, Iterable, Optional, Type, TypeVar, Generic
+from typing import Any, Callable, Iterable, Mapping, Optional, Type, TypeVar, Generic
 
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlmodel import Session, SQLModel, select
 
 from app.repositories.exceptions import EntityNotFoundError
@@ -11,6 +12,16 @@ from app.repositories.exceptions import EntityNotFoundError
 T = TypeVar("T", bound=SQLModel)
 
 
+def dialect_insert(session: Session) -> Callable[..., Any]:
+    """Return the dialect-specific ``insert`` construct supporting ``ON CONFLICT``."""
+    dialect_name = session.get_bind().dialect.name
+    if dialect_name == "postgresql":
+        return postgresql.insert
+    if dialect_name == "sqlite":
+        return sqlite.insert
+    raise NotImplementedError(f"ON CONFLICT upserts are not supported on {dialect_name!r}.")
+
+
 class BaseRepository(Generic[T]):
     """Base class providing common CRUD utilities for repositories."""
 
@@ -18,10 +29,17 @@ class BaseRepository(Generic[T]):
         """Initialize the repository with a SQLModel type."""
         self.model = model
 
-    def create(self, session: Session, obj_data: dict[str, Any]) -> T:
-        """Persist a new model instance using the provided attribute mapping."""
+    def create(self, session: Session, obj_data: dict[str, Any], *, commit: bool = True) -> T:
+        """Persist a new model instance using the provided attribute mapping.
+
+        With ``commit=False`` the instance is only flushed (so its identifier is
+        assigned) and the caller owns the transaction.
+        """
         obj = self.model(**obj_data)
         session.add(obj)
+        if not commit:
+            session.flush()
+            return obj
         session.commit()
         session.refresh(obj)
         return obj
@@ -72,3 +90,47 @@ class BaseRepository(Generic[T]):
         session.delete(entity)
         session.commit()
         return True
+
+    def upsert_increment(
+        self,
+        session: Session,
+        key: Mapping[str, Any],
+        deltas: Mapping[str, Any],
+    ) -> None:
+        """Stage an ``INSERT ... ON CONFLICT DO UPDATE`` adding ``deltas`` to the row at ``key``.
+
+        The statement is executed without committing so callers can group it with the
+        write that caused it.
+        """
+        table = self.model.__table__
+        statement = dialect_insert(session)(table).values({**key, **deltas})
+        statement = statement.on_conflict_do_update(
+            index_elements=list(key),
+            set_={name: table.c[name] + statement.excluded[name] for name in deltas},
+        )
+        session.exec(statement)
+
+    def upsert_increment_many(
+        self,
+        session: Session,
+        key_columns: Iterable[str],
+        rows: list[Mapping[str, Any]],
+    ) -> None:
+        """Stage an executemany ``INSERT ... ON CONFLICT DO UPDATE`` adding each row's non-key values.
+
+        All rows must carry the same columns; aggregate per key before calling.
+        """
+        if not rows:
+            return
+        key_columns = list(key_columns)
+        table = self.model.__table__
+        statement = dialect_insert(session)(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=key_columns,
+            set_={
+                name: table.c[name] + statement.excluded[name]
+                for name in rows[0]
+                if name not in key_columns
+            },
+        )
+        session.exec(statement, params=list(rows))
@@ -0,0 +1,13 @@
+"""Billing payment total repository implementation."""
+
+from __future__ import annotations
+
+from app.models import BillingPaymentTotal
+from app.repositories.base_repository import BaseRepository
+
+
+class BillingPaymentTotalRepository(BaseRepository[BillingPaymentTotal]):
+    """Data access helpers for ``BillingPaymentTotal`` rows, maintained with ``upsert_increment_many``."""
+
+    def __init__(self) -> None:
+        super().__init__(BillingPaymentTotal)
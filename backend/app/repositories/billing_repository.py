@@ -2,13 +2,19 @@
 
 from __future__ import annotations
 
-from typing import Optional
+from collections.abc import Collection, Sequence
+from datetime import datetime
+from typing import Any, Optional
 
+from sqlalchemy import case, func, insert, or_
 from sqlmodel import Session, select
 
-from app.models import Billing
+from app.models import Billing, BillingPaymentTotal, Customer, SalesOrder, SalesOrderStatus
 from app.repositories.base_repository import BaseRepository
 
+# Billed amount not yet covered by applied payments.
+OPEN_AMOUNT = Billing.amount - func.coalesce(BillingPaymentTotal.amount_paid, 0.0)
+
 
 class BillingRepository(BaseRepository[Billing]):
     """Data access helpers for ``Billing`` entities."""
@@ -20,3 +26,175 @@ class BillingRepository(BaseRepository[Billing]):
         """Return the billing record for the specified sales order."""
         statement = select(Billing).where(Billing.sales_order_id == sales_order_id)
         return session.exec(statement).first()
+
+    def create_many(self, session: Session, rows: Sequence[dict[str, Any]]) -> list[tuple[int, int]]:
+        """Stage a multi-row insert of billings; return ``(id, sales_order_id)`` pairs."""
+        if not rows:
+            return []
+        statement = insert(Billing).values(list(rows)).returning(Billing.id, Billing.sales_order_id)
+        return sorted(tuple(row) for row in session.exec(statement).all())
+
+    def list_unbilled_delivered(self, session: Session, after_order_id: int, limit: int) -> list[Any]:
+        """Return delivered orders without a billing, by id after ``after_order_id``.
+
+        Rows carry ``id``, ``total_amount``, ``customer_id``, ``customer_role`` and
+        ``customer_email``.
+        """
+        statement = (
+            select(
+                SalesOrder.id,
+                SalesOrder.total_amount,
+                SalesOrder.customer_id,
+                Customer.role.label("customer_role"),
+                Customer.email.label("customer_email"),
+            )
+            .join(Customer, Customer.id == SalesOrder.customer_id)
+            .outerjoin(Billing, Billing.sales_order_id == SalesOrder.id)
+            .where(SalesOrder.status == SalesOrderStatus.delivered)
+            .where(Billing.id.is_(None))
+            .where(SalesOrder.id > after_order_id)
+            .order_by(SalesOrder.id)
+            .limit(limit)
+        )
+        return session.exec(statement).all()
+
+    def aging_by_customer(
+        self,
+        session: Session,
+        billed_before: datetime,
+        bucket_starts: Sequence[datetime],
+    ) -> list[Any]:
+        """Return unpaid billed amounts per customer split into age buckets, in one grouped query.
+
+        ``bucket_starts`` holds the earliest billing time of each bucket but the
+        oldest, newest first; billings from ``billed_before`` on are left out and
+        billings without a billed date count as current.
+        Rows carry ``customer_id``, ``customer_name``, ``customer_role``,
+        ``invoice_count`` and ``bucket_0`` .. ``bucket_<len(bucket_starts)>``.
+        """
+        billed = func.coalesce(Billing.billed_date, billed_before)
+        buckets = []
+        for index in range(len(bucket_starts) + 1):
+            whens = [(billed >= start, 0.0) for start in bucket_starts[:index]]
+            if index < len(bucket_starts):
+                whens.append((billed >= bucket_starts[index], OPEN_AMOUNT))
+                amount = case(*whens, else_=0.0)
+            else:
+                amount = case(*whens, else_=OPEN_AMOUNT) if whens else OPEN_AMOUNT
+            buckets.append(func.sum(amount).label(f"bucket_{index}"))
+        statement = (
+            select(
+                Customer.id.label("customer_id"),
+                Customer.name.label("customer_name"),
+                Customer.role.label("customer_role"),
+                func.count(Billing.id).label("invoice_count"),
+                *buckets,
+            )
+            .join(SalesOrder, SalesOrder.id == Billing.sales_order_id)
+            .join(Customer, Customer.id == SalesOrder.customer_id)
+            .outerjoin(BillingPaymentTotal, BillingPaymentTotal.billing_id == Billing.id)
+            .where(
+                or_(Billing.billed_date.is_(None), Billing.billed_date < billed_before),
+                OPEN_AMOUNT > 0.005,
+            )
+            .group_by(Customer.id, Customer.name, Customer.role)
+            .order_by(Customer.id)
+        )
+        return session.exec(statement).all()
+
+    def open_amounts_by_invoice_number(self, session: Session, invoice_numbers: Collection[str]) -> list[Any]:
+        """Return ``id``, ``invoice_number``, ``customer_id`` and ``open_amount`` of the given invoices."""
+        if not invoice_numbers:
+            return []
+        statement = (
+            select(
+                Billing.id,
+                Billing.invoice_number,
+                SalesOrder.customer_id,
+                OPEN_AMOUNT.label("open_amount"),
+            )
+            .join(SalesOrder, SalesOrder.id == Billing.sales_order_id)
+            .outerjoin(BillingPaymentTotal, BillingPaymentTotal.billing_id == Billing.id)
+            .where(Billing.invoice_number.in_(list(invoice_numbers)))
+        )
+        return session.exec(statement).all()
+
+    def open_amounts_for_customers(self, session: Session, customer_ids: Collection[int]) -> list[Any]:
+        """Return ``id``, ``customer_id`` and ``open_amount`` of the customers' unpaid billings, oldest first."""
+        if not customer_ids:
+            return []
+        statement = (
+            select(Billing.id, SalesOrder.customer_id, OPEN_AMOUNT.label("open_amount"))
+            .join(SalesOrder, SalesOrder.id == Billing.sales_order_id)
+            .outerjoin(BillingPaymentTotal, BillingPaymentTotal.billing_id == Billing.id)
+            .where(SalesOrder.customer_id.in_(list(customer_ids)), OPEN_AMOUNT > 0.005)
+            .order_by(Billing.billed_date, Billing.id)
+        )
+        return session.exec(statement).all()
+
+    def lock_open_amounts(self, session: Session, billing_ids: Collection[int]) -> list[Any]:
+        """Lock the given billings and return their current ``id`` and ``open_amount``.
+
+        On PostgreSQL the billings are locked ``FOR UPDATE`` in id order first;
+        the open amounts are read by a second statement, so they include payments
+        committed by a transaction that held the locks.
+        """
+        if not billing_ids:
+            return []
+        ids = sorted(billing_ids)
+        if session.get_bind().dialect.name == "postgresql":
+            lock = select(Billing.id).where(Billing.id.in_(ids)).order_by(Billing.id)
+            session.exec(lock.with_for_update()).all()
+        statement = (
+            select(Billing.id, OPEN_AMOUNT.label("open_amount"))
+            .outerjoin(BillingPaymentTotal, BillingPaymentTotal.billing_id == Billing.id)
+            .where(Billing.id.in_(ids))
+        )
+        return session.exec(statement).all()
+
+    def list_overdue(self, session: Session, billed_before: datetime) -> list[Any]:
+        """Return unpaid billings billed before ``billed_before``, grouped by customer, oldest first.
+
+        Rows carry ``id``, ``invoice_number``, ``billed_date``, ``open_amount``,
+        ``customer_id`` and ``customer_email``. The date range is served by the
+        ``ix_billing_billed_date`` index.
+        """
+        statement = (
+            select(
+                Billing.id,
+                Billing.invoice_number,
+                Billing.billed_date,
+                OPEN_AMOUNT.label("open_amount"),
+                SalesOrder.customer_id,
+                Customer.email.label("customer_email"),
+            )
+            .join(SalesOrder, SalesOrder.id == Billing.sales_order_id)
+            .join(Customer, Customer.id == SalesOrder.customer_id)
+            .outerjoin(BillingPaymentTotal, BillingPaymentTotal.billing_id == Billing.id)
+            .where(Billing.billed_date < billed_before, OPEN_AMOUNT > 0.005)
+            .order_by(SalesOrder.customer_id, Billing.billed_date, Billing.id)
+        )
+        return session.exec(statement).all()
+
+    def unbilled_order_amounts_by_customer(self, session: Session) -> list[Any]:
+        """Return ``customer_id`` and ``amount`` of orders neither billed nor cancelled, per customer."""
+        statement = (
+            select(SalesOrder.customer_id, func.sum(SalesOrder.total_amount).label("amount"))
+            .outerjoin(Billing, Billing.sales_order_id == SalesOrder.id)
+            .where(
+                Billing.id.is_(None),
+                SalesOrder.status.not_in([SalesOrderStatus.billed, SalesOrderStatus.cancelled]),
+            )
+            .group_by(SalesOrder.customer_id)
+        )
+        return session.exec(statement).all()
+
+    def receivables_by_customer(self, session: Session) -> list[Any]:
+        """Return ``customer_id`` and unpaid billed ``amount`` per customer."""
+        statement = (
+            select(SalesOrder.customer_id, func.sum(OPEN_AMOUNT).label("amount"))
+            .join(SalesOrder, SalesOrder.id == Billing.sales_order_id)
+            .outerjoin(BillingPaymentTotal, BillingPaymentTotal.billing_id == Billing.id)
+            .group_by(SalesOrder.customer_id)
+        )
+        return session.exec(statement).all()
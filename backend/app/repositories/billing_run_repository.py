@@ -0,0 +1,89 @@
+"""Billing run repository implementation."""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import Any
+
+from sqlalchemy import insert
+from sqlmodel import Session, select, update
+
+from app.models import (
+    Billing,
+    BillingRun,
+    BillingRunInvoice,
+    BillingRunStatus,
+    Customer,
+    SalesOrder,
+)
+from app.repositories.base_repository import BaseRepository
+
+
+class BillingRunRepository(BaseRepository[BillingRun]):
+    """Data access helpers for ``BillingRun`` entities and the billings they created."""
+
+    def __init__(self) -> None:
+        super().__init__(BillingRun)
+
+    def get_running(self, session: Session) -> BillingRun | None:
+        """Return the run still marked running, if any."""
+        statement = select(BillingRun).where(BillingRun.status == BillingRunStatus.running)
+        return session.exec(statement).first()
+
+    def list_recent(self, session: Session, limit: int = 50) -> list[BillingRun]:
+        """Return runs newest first."""
+        statement = select(BillingRun).order_by(BillingRun.id.desc()).limit(limit)
+        return session.exec(statement).all()
+
+    def add_invoices(self, session: Session, run_id: int, billing_ids: Sequence[int]) -> None:
+        """Stage a multi-row insert linking billings to the run that created them."""
+        if billing_ids:
+            session.exec(
+                insert(BillingRunInvoice).values(
+                    [{"billing_id": billing_id, "run_id": run_id} for billing_id in billing_ids]
+                )
+            )
+
+    def list_unrendered(
+        self,
+        session: Session,
+        run_id: int,
+        after_billing_id: int,
+        limit: int,
+    ) -> list[Any]:
+        """Return the run's billings after ``after_billing_id`` with their customer, by id.
+
+        Rows carry ``id``, ``sales_order_id``, ``invoice_number``, ``amount``,
+        ``billed_date``, ``customer_name`` and ``customer_email``.
+        """
+        statement = (
+            select(
+                Billing.id,
+                Billing.sales_order_id,
+                Billing.invoice_number,
+                Billing.amount,
+                Billing.billed_date,
+                Customer.name.label("customer_name"),
+                Customer.email.label("customer_email"),
+            )
+            .join(BillingRunInvoice, BillingRunInvoice.billing_id == Billing.id)
+            .join(SalesOrder, SalesOrder.id == Billing.sales_order_id)
+            .join(Customer, Customer.id == SalesOrder.customer_id)
+            .where(BillingRunInvoice.run_id == run_id, Billing.id > after_billing_id)
+            .order_by(Billing.id)
+            .limit(limit)
+        )
+        return session.exec(statement).all()
+
+    def advance(self, session: Session, run_id: int, values: dict[str, Any], **increments: float) -> None:
+        """Stage new ``values`` and counter ``increments`` for a run."""
+        changes = dict(values)
+        for column, delta in increments.items():
+            changes[column] = getattr(BillingRun, column) + delta
+        statement = (
+            update(BillingRun)
+            .where(BillingRun.id == run_id)
+            .values(**changes)
+            .execution_options(synchronize_session=False)
+        )
+        session.exec(statement)
@@ -0,0 +1,85 @@
+"""Capacity commitment repository implementation."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+from datetime import date
+from typing import Any
+
+from sqlalchemy import func, insert
+from sqlmodel import Session, delete, select
+
+from app.models import CapacityCommitment
+from app.repositories.base_repository import BaseRepository
+
+
+class CapacityCommitmentRepository(BaseRepository[CapacityCommitment]):
+    """Data access helpers for ``CapacityCommitment`` rows.
+
+    Writes are staged without committing so commitments always land in the same
+    transaction as the order or production change that caused them.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(CapacityCommitment)
+
+    def load_from(self, session: Session, first_day: date) -> list[tuple[int, date, int]]:
+        """Return ``(product_id, day, committed)`` totals for days on or after ``first_day``."""
+        statement = (
+            select(
+                CapacityCommitment.product_id,
+                CapacityCommitment.day,
+                func.sum(CapacityCommitment.quantity),
+            )
+            .where(CapacityCommitment.day >= first_day)
+            .group_by(CapacityCommitment.product_id, CapacityCommitment.day)
+        )
+        rows = session.exec(statement).all()
+        return [(product_id, day, int(total)) for product_id, day, total in rows]
+
+    def add_many(self, session: Session, rows: Sequence[dict[str, Any]]) -> None:
+        """Stage a multi-row insert of commitments."""
+        if rows:
+            session.exec(insert(CapacityCommitment).values(list(rows)))
+
+    def list_for_order(
+        self,
+        session: Session,
+        sales_order_id: int,
+        *,
+        from_day: date | None = None,
+    ) -> list[CapacityCommitment]:
+        """Return a sales order's commitments, optionally only those from ``from_day`` on."""
+        statement = select(CapacityCommitment).where(
+            CapacityCommitment.sales_order_id == sales_order_id
+        )
+        if from_day is not None:
+            statement = statement.where(CapacityCommitment.day >= from_day)
+        return session.exec(statement).all()
+
+    def delete_for_order(
+        self,
+        session: Session,
+        sales_order_id: int,
+        *,
+        from_day: date | None = None,
+    ) -> None:
+        """Stage deletion of a sales order's commitments (from ``from_day`` on, if given)."""
+        statement = delete(CapacityCommitment).where(
+            CapacityCommitment.sales_order_id == sales_order_id
+        )
+        if from_day is not None:
+            statement = statement.where(CapacityCommitment.day >= from_day)
+        session.exec(statement)
+
+    def promised_dates(self, session: Session, sales_order_ids: Iterable[int]) -> dict[int, date]:
+        """Return the last committed day (the promise date) per sales order."""
+        ids = list(sales_order_ids)
+        if not ids:
+            return {}
+        statement = (
+            select(CapacityCommitment.sales_order_id, func.max(CapacityCommitment.day))
+            .where(CapacityCommitment.sales_order_id.in_(ids))
+            .group_by(CapacityCommitment.sales_order_id)
+        )
+        return dict(session.exec(statement).all())
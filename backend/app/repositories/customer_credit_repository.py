@@ -0,0 +1,73 @@
+"""Customer credit repository implementation."""
+
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from sqlalchemy import or_
+from sqlmodel import Session, select, update
+
+from app.models import CustomerCredit
+from app.repositories.base_repository import BaseRepository, dialect_insert
+
+# Rounding slack when comparing float amounts against a limit.
+_TOLERANCE = 0.005
+
+
+class CustomerCreditRepository(BaseRepository[CustomerCredit]):
+    """Data access helpers for ``CustomerCredit`` rows.
+
+    Writes are staged without committing so balance changes land in the same
+    transaction as the order, billing or payment that caused them.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(CustomerCredit)
+
+    def get_balance(self, session: Session, customer_id: int) -> Optional[Any]:
+        """Return the customer's ``credit_limit``, ``open_order_amount`` and ``receivable_amount`` row."""
+        statement = select(
+            CustomerCredit.credit_limit,
+            CustomerCredit.open_order_amount,
+            CustomerCredit.receivable_amount,
+        ).where(CustomerCredit.customer_id == customer_id)
+        return session.exec(statement).first()
+
+    def try_reserve(self, session: Session, customer_id: int, amount: float) -> bool:
+        """Stage ``open_order_amount += amount`` if it keeps the customer within their limit.
+
+        Returns ``False`` when the customer has no row yet or the order would
+        exceed the limit; the guarded single-row update keeps concurrent
+        orders from jointly overrunning it.
+        """
+        exposure = CustomerCredit.open_order_amount + CustomerCredit.receivable_amount + amount
+        statement = (
+            update(CustomerCredit)
+            .where(
+                CustomerCredit.customer_id == customer_id,
+                or_(CustomerCredit.credit_limit.is_(None), exposure <= CustomerCredit.credit_limit + _TOLERANCE),
+            )
+            .values(open_order_amount=CustomerCredit.open_order_amount + amount)
+            .execution_options(synchronize_session=False)
+        )
+        return session.exec(statement).rowcount > 0
+
+    def set_limit(self, session: Session, customer_id: int, credit_limit: Optional[float]) -> None:
+        """Stage a new limit for the customer, creating their row when needed."""
+        statement = dialect_insert(session)(CustomerCredit.__table__).values(
+            customer_id=customer_id, credit_limit=credit_limit
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=["customer_id"],
+            set_={"credit_limit": statement.excluded.credit_limit},
+        )
+        session.exec(statement)
+
+    def reset_balances(self, session: Session) -> None:
+        """Stage zeroing every balance, keeping the limits."""
+        statement = (
+            update(CustomerCredit)
+            .values(open_order_amount=0.0, receivable_amount=0.0)
+            .execution_options(synchronize_session=False)
+        )
+        session.exec(statement)
@@ -2,8 +2,10 @@
 
 from __future__ import annotations
 
+from collections.abc import Collection
 from typing import Optional
 
+from sqlalchemy import func
 from sqlmodel import Session, select
 
 from app.models import Customer
@@ -20,3 +22,11 @@ class CustomerRepository(BaseRepository[Customer]):
         """Return a customer when the provided email address matches."""
         statement = select(Customer).where(Customer.email == email)
         return session.exec(statement).first()
+
+    def ids_by_email(self, session: Session, emails: Collection[str]) -> dict[str, int]:
+        """Return customer ids keyed by lower-cased email for the given addresses."""
+        if not emails:
+            return {}
+        lowered = func.lower(Customer.email)
+        statement = select(lowered, Customer.id).where(lowered.in_([email.lower() for email in emails]))
+        return {email: customer_id for email, customer_id in session.exec(statement).all()}
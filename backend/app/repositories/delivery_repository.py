@@ -2,9 +2,11 @@
 
 from __future__ import annotations
 
-from sqlmodel import Session, select
+from datetime import datetime
 
-from app.models import Delivery, DeliveryStatus
+from sqlmodel import Session, select, update
+
+from app.models import Delivery, DeliveryStatus, ShipmentBatchDelivery
 from app.repositories.base_repository import BaseRepository
 
 
@@ -23,3 +25,26 @@ class DeliveryRepository(BaseRepository[Delivery]):
         """Return deliveries associated with a specific sales order."""
         statement = select(Delivery).where(Delivery.sales_order_id == sales_order_id)
         return session.exec(statement).all()
+
+    def deliver_batch(
+        self,
+        session: Session,
+        batch_id: int,
+        delivered_at: datetime,
+    ) -> list[tuple[int, int]]:
+        """Stage one set-based completion of a batch's pending deliveries.
+
+        Returns ``(delivery_id, sales_order_id)`` for the deliveries actually
+        moved; ones delivered or cancelled in the meantime are left untouched.
+        """
+        members = select(ShipmentBatchDelivery.delivery_id).where(
+            ShipmentBatchDelivery.batch_id == batch_id
+        )
+        statement = (
+            update(Delivery)
+            .where(Delivery.id.in_(members.scalar_subquery()), Delivery.status == DeliveryStatus.pending)
+            .values(status=DeliveryStatus.delivered, delivery_date=delivered_at)
+            .returning(Delivery.id, Delivery.sales_order_id)
+            .execution_options(synchronize_session=False)
+        )
+        return sorted(tuple(row) for row in session.exec(statement).all())
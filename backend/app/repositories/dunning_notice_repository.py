@@ -0,0 +1,65 @@
+"""Dunning notice repository implementation."""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import Any
+
+from sqlalchemy import insert
+from sqlmodel import Session, select
+
+from app.models import DunningNotice, DunningNoticeLine
+from app.repositories.base_repository import BaseRepository, dialect_insert
+
+
+class DunningNoticeRepository(BaseRepository[DunningNotice]):
+    """Data access helpers for ``DunningNotice`` rows and their lines."""
+
+    def __init__(self) -> None:
+        super().__init__(DunningNotice)
+
+    def create_missing(self, session: Session, rows: Sequence[dict[str, Any]]) -> dict[int, int]:
+        """Stage notices not raised before and return ``{customer_id: notice_id}`` of the new ones.
+
+        Notices already recorded for the same customer, level and anchor billing
+        are skipped by ``ON CONFLICT DO NOTHING``, so concurrent or repeated runs
+        never raise a notice twice.
+        """
+        if not rows:
+            return {}
+        statement = (
+            dialect_insert(session)(DunningNotice.__table__)
+            .on_conflict_do_nothing(index_elements=["customer_id", "level", "anchor_billing_id"])
+            .returning(DunningNotice.id, DunningNotice.customer_id)
+        )
+        return {customer_id: notice_id for notice_id, customer_id in session.exec(statement, params=list(rows))}
+
+    def add_lines(self, session: Session, rows: Sequence[dict[str, Any]]) -> None:
+        """Stage an executemany insert of notice lines."""
+        if rows:
+            session.exec(insert(DunningNoticeLine.__table__), params=list(rows))
+
+    def list_lines(self, session: Session, notice_id: int) -> list[DunningNoticeLine]:
+        """Return the billings listed on a notice, oldest first."""
+        statement = (
+            select(DunningNoticeLine)
+            .where(DunningNoticeLine.notice_id == notice_id)
+            .order_by(DunningNoticeLine.billed_date, DunningNoticeLine.billing_id)
+        )
+        return session.exec(statement).all()
+
+    def list_recent(
+        self,
+        session: Session,
+        *,
+        customer_id: int | None = None,
+        level: int | None = None,
+        limit: int = 100,
+    ) -> list[DunningNotice]:
+        """Return notices newest first, optionally of one customer and at one level."""
+        statement = select(DunningNotice).order_by(DunningNotice.id.desc()).limit(limit)
+        if customer_id is not None:
+            statement = statement.where(DunningNotice.customer_id == customer_id)
+        if level is not None:
+            statement = statement.where(DunningNotice.level == level)
+        return session.exec(statement).all()
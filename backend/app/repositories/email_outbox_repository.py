@@ -0,0 +1,122 @@
+"""Email outbox repository implementation."""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import and_, insert, or_
+from sqlmodel import Session, select, update
+
+from app.models import EmailOutbox, OutboxStatus
+from app.repositories.base_repository import BaseRepository
+
+
+class EmailOutboxRepository(BaseRepository[EmailOutbox]):
+    """Data access helpers for ``EmailOutbox`` rows.
+
+    Claims and outcome updates are conditional statements staged without
+    committing, so two workers can never both own the same message.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(EmailOutbox)
+
+    def enqueue(self, session: Session, kind: str, reference_id: int, recipient: str) -> EmailOutbox:
+        """Stage a pending message in the caller's transaction."""
+        return self.create(
+            session,
+            {"kind": kind, "reference_id": reference_id, "recipient": recipient},
+            commit=False,
+        )
+
+    def enqueue_many(self, session: Session, kind: str, targets: Sequence[tuple[int, str]]) -> list[int]:
+        """Stage pending messages of ``kind`` for ``(reference_id, recipient)`` pairs; return their ids."""
+        if not targets:
+            return []
+        statement = insert(EmailOutbox.__table__).returning(EmailOutbox.id)
+        rows = [
+            {"kind": kind, "reference_id": reference_id, "recipient": recipient}
+            for reference_id, recipient in targets
+        ]
+        return list(session.exec(statement, params=rows).scalars().all())
+
+    def claim_due(
+        self,
+        session: Session,
+        now: datetime,
+        locked_until: datetime,
+        limit: int,
+        kind: str | None = None,
+    ) -> list[int]:
+        """Move up to ``limit`` due messages to ``sending`` and return their ids.
+
+        Pending messages whose retry time has come are due, as are ``sending``
+        messages whose claim expired because their worker died. On PostgreSQL
+        candidates are locked with ``FOR UPDATE SKIP LOCKED`` so concurrent
+        workers pick disjoint rows; elsewhere the guarded ``UPDATE`` decides.
+        ``kind`` restricts the claim to one kind of message.
+        """
+        due = or_(
+            and_(EmailOutbox.status == OutboxStatus.pending, EmailOutbox.next_attempt_at <= now),
+            and_(EmailOutbox.status == OutboxStatus.sending, EmailOutbox.locked_until < now),
+        )
+        if kind is not None:
+            due = and_(EmailOutbox.kind == kind, due)
+        candidates = select(EmailOutbox.id).where(due).order_by(EmailOutbox.next_attempt_at).limit(limit)
+        if session.get_bind().dialect.name == "postgresql":
+            candidates = candidates.with_for_update(skip_locked=True)
+        ids = list(session.exec(candidates).all())
+        if not ids:
+            return []
+        statement = (
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(ids), due)
+            .values(
+                status=OutboxStatus.sending,
+                locked_until=locked_until,
+                attempts=EmailOutbox.attempts + 1,
+            )
+            .returning(EmailOutbox.id)
+            .execution_options(synchronize_session=False)
+        )
+        return sorted(session.exec(statement).scalars().all())
+
+    def settle(
+        self,
+        session: Session,
+        outbox_id: int,
+        values: dict[str, Any],
+    ) -> bool:
+        """Stage the outcome of a delivery attempt for a message still being sent."""
+        statement = (
+            update(EmailOutbox)
+            .where(EmailOutbox.id == outbox_id, EmailOutbox.status == OutboxStatus.sending)
+            .values(locked_until=None, **values)
+            .execution_options(synchronize_session=False)
+        )
+        return session.exec(statement).rowcount > 0
+
+    def requeue(self, session: Session, outbox_id: int, now: datetime) -> bool:
+        """Stage a dead-lettered message for a fresh round of attempts."""
+        statement = (
+            update(EmailOutbox)
+            .where(EmailOutbox.id == outbox_id, EmailOutbox.status == OutboxStatus.dead)
+            .values(status=OutboxStatus.pending, attempts=0, next_attempt_at=now, last_error=None)
+            .execution_options(synchronize_session=False)
+        )
+        return session.exec(statement).rowcount > 0
+
+    def list_recent(
+        self,
+        session: Session,
+        *,
+        status: OutboxStatus | None = None,
+        limit: int = 100,
+    ) -> list[EmailOutbox]:
+        """Return messages newest first, optionally filtered by status."""
+        statement = select(EmailOutbox).order_by(EmailOutbox.id.desc()).limit(limit)
+        if status is not None:
+            statement = statement.where(EmailOutbox.status == status)
+        return session.exec(statement).all()
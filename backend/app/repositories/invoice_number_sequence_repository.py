@@ -0,0 +1,35 @@
+"""Invoice number sequence repository implementation."""
+
+from __future__ import annotations
+
+from sqlmodel import Session, update
+
+from app.models import InvoiceNumberSequence
+from app.repositories.base_repository import BaseRepository, dialect_insert
+
+
+class InvoiceNumberSequenceRepository(BaseRepository[InvoiceNumberSequence]):
+    """Data access helpers for ``InvoiceNumberSequence`` rows."""
+
+    def __init__(self) -> None:
+        super().__init__(InvoiceNumberSequence)
+
+    def reserve_block(self, session: Session, prefix: str) -> int:
+        """Stage taking the next block of ``prefix`` and return its number, starting at 0.
+
+        The row stays locked until the caller's transaction ends, so concurrent
+        reservations of the same prefix are serialized and never share a block.
+        """
+        session.exec(
+            dialect_insert(session)(InvoiceNumberSequence)
+            .values(prefix=prefix, next_block=0)
+            .on_conflict_do_nothing(index_elements=["prefix"])
+        )
+        statement = (
+            update(InvoiceNumberSequence)
+            .where(InvoiceNumberSequence.prefix == prefix)
+            .values(next_block=InvoiceNumberSequence.next_block + 1)
+            .returning(InvoiceNumberSequence.next_block)
+            .execution_options(synchronize_session=False)
+        )
+        return session.exec(statement).scalar_one() - 1
@@ -0,0 +1,83 @@
+"""KPI counter repository implementation."""
+
+from __future__ import annotations
+
+from typing import Optional
+
+from sqlmodel import Session, select, update
+
+from app.models import KpiCounter, current_utc_time
+from app.repositories.base_repository import BaseRepository, dialect_insert
+
+
+class KpiCounterRepository(BaseRepository[KpiCounter]):
+    """Data access helpers for ``KpiCounter`` entities.
+
+    The write helpers stage their changes on the session without committing so that
+    counter updates land in the same transaction as the status change they describe.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(KpiCounter)
+
+    def get_values(self, session: Session) -> dict[str, int]:
+        """Return every stored counter keyed by name."""
+        statement = select(KpiCounter.name, KpiCounter.value)
+        return {row.name: row.value for row in session.exec(statement).all()}
+
+    def get_entries(self, session: Session) -> dict[str, tuple[int, int]]:
+        """Return ``(value, version)`` of every stored counter keyed by name."""
+        statement = select(KpiCounter.name, KpiCounter.value, KpiCounter.version)
+        return {row.name: (row.value, row.version) for row in session.exec(statement).all()}
+
+    def lock_values(self, session: Session) -> dict[str, int]:
+        """Return every stored counter, locking the rows ``FOR UPDATE`` on PostgreSQL.
+
+        Increments of other transactions wait for the lock, so counts read
+        afterwards line up with the counters until this transaction ends.
+        """
+        statement = select(KpiCounter.name, KpiCounter.value).order_by(KpiCounter.name)
+        if session.get_bind().dialect.name == "postgresql":
+            statement = statement.with_for_update()
+        return {row.name: row.value for row in session.exec(statement).all()}
+
+    def insert_missing(self, session: Session, values: dict[str, int]) -> None:
+        """Stage rows for counters that do not exist yet, leaving existing ones untouched."""
+        if not values:
+            return
+        rows = [
+            {"name": name, "value": value, "updated_at": current_utc_time()}
+            for name, value in values.items()
+        ]
+        statement = dialect_insert(session)(KpiCounter.__table__).values(rows)
+        session.exec(statement.on_conflict_do_nothing(index_elements=["name"]))
+
+    def increment(self, session: Session, name: str, delta: int) -> Optional[tuple[int, int]]:
+        """Stage an atomic ``value = value + delta`` update.
+
+        Returns the counter's new ``(value, version)``, or ``None`` if the row is missing.
+        """
+        statement = (
+            update(KpiCounter)
+            .where(KpiCounter.name == name)
+            .values(
+                value=KpiCounter.value + delta,
+                version=KpiCounter.version + 1,
+                updated_at=current_utc_time(),
+            )
+            .returning(KpiCounter.value, KpiCounter.version)
+        )
+        row = session.exec(statement).first()
+        return (row.value, row.version) if row is not None else None
+
+    def set_value(self, session: Session, name: str, value: int) -> KpiCounter:
+        """Stage an absolute value for a counter, creating the row when needed."""
+        counter = session.get(KpiCounter, name)
+        if counter is None:
+            counter = KpiCounter(name=name)
+        else:
+            counter.version += 1
+        counter.value = value
+        counter.updated_at = current_utc_time()
+        session.add(counter)
+        return counter
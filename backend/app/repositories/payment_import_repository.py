@@ -0,0 +1,25 @@
+"""Payment import repository implementation."""
+
+from __future__ import annotations
+
+from sqlmodel import Session, select
+
+from app.models import PaymentImport
+from app.repositories.base_repository import BaseRepository
+
+
+class PaymentImportRepository(BaseRepository[PaymentImport]):
+    """Data access helpers for ``PaymentImport`` entities."""
+
+    def __init__(self) -> None:
+        super().__init__(PaymentImport)
+
+    def get_by_checksum(self, session: Session, checksum: str) -> PaymentImport | None:
+        """Return the import of the statement with this checksum, if any."""
+        statement = select(PaymentImport).where(PaymentImport.checksum == checksum)
+        return session.exec(statement).first()
+
+    def list_recent(self, session: Session, limit: int = 50) -> list[PaymentImport]:
+        """Return imports newest first."""
+        statement = select(PaymentImport).order_by(PaymentImport.id.desc()).limit(limit)
+        return session.exec(statement).all()
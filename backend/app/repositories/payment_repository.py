@@ -0,0 +1,41 @@
+"""Payment repository implementation."""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import Any
+
+from sqlalchemy import insert
+from sqlmodel import Session, select
+
+from app.models import Payment, PaymentStatus
+from app.repositories.base_repository import BaseRepository
+
+
+class PaymentRepository(BaseRepository[Payment]):
+    """Data access helpers for ``Payment`` entities."""
+
+    def __init__(self) -> None:
+        super().__init__(Payment)
+
+    def insert_many(self, session: Session, rows: Sequence[dict[str, Any]]) -> None:
+        """Stage a Core executemany insert of payments, compiled once however many rows there are."""
+        if rows:
+            session.exec(insert(Payment.__table__), params=list(rows))
+
+    def list_filtered(
+        self,
+        session: Session,
+        *,
+        import_id: int | None = None,
+        status: PaymentStatus | None = None,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> list[Payment]:
+        """Return payments by id, optionally of one import and in one status."""
+        statement = select(Payment).order_by(Payment.id).offset(offset).limit(limit)
+        if import_id is not None:
+            statement = statement.where(Payment.import_id == import_id)
+        if status is not None:
+            statement = statement.where(Payment.status == status)
+        return session.exec(statement).all()
@@ -0,0 +1,39 @@
+"""Product capacity repository implementation."""
+
+from __future__ import annotations
+
+from sqlmodel import Session, select
+
+from app.models import ProductCapacity
+from app.repositories.base_repository import BaseRepository
+
+
+class ProductCapacityRepository(BaseRepository[ProductCapacity]):
+    """Data access helpers for ``ProductCapacity`` settings."""
+
+    def __init__(self) -> None:
+        super().__init__(ProductCapacity)
+
+    def list_all(self, session: Session) -> list[ProductCapacity]:
+        """Return the capacity settings of every configured product."""
+        return session.exec(select(ProductCapacity)).all()
+
+    def save(
+        self,
+        session: Session,
+        product_id: int,
+        daily_capacity: int,
+        lead_time_days: int,
+        run_minutes: float,
+    ) -> ProductCapacity:
+        """Create or replace a product's capacity settings and commit."""
+        capacity = session.get(ProductCapacity, product_id)
+        if capacity is None:
+            capacity = ProductCapacity(product_id=product_id, daily_capacity=daily_capacity)
+        capacity.daily_capacity = daily_capacity
+        capacity.lead_time_days = lead_time_days
+        capacity.run_minutes = run_minutes
+        session.add(capacity)
+        session.commit()
+        session.refresh(capacity)
+        return capacity
@@ -2,16 +2,23 @@
 
 from __future__ import annotations
 
-from typing import Optional
+from typing import Any, Iterable, Mapping, Optional, Sequence
 
-from sqlmodel import Session, select
+from sqlalchemy import case, insert
+from sqlmodel import Session, select, update
 
 from app.models import Product
-from app.repositories.base_repository import BaseRepository
+from app.repositories.base_repository import BaseRepository, dialect_insert
+
+UPSERT_COLUMNS = ("name", "description", "price", "image_url")
 
 
 class ProductRepository(BaseRepository[Product]):
-    """Data access helpers for ``Product`` entities."""
+    """Data access helpers for ``Product`` entities.
+
+    The bulk helpers execute set-based statements without committing; callers
+    group a whole import into one transaction.
+    """
 
     def __init__(self) -> None:
         super().__init__(Product)
@@ -20,3 +27,65 @@ class ProductRepository(BaseRepository[Product]):
         """Return the first product matching the provided name."""
         statement = select(Product).where(Product.name == name)
         return session.exec(statement).first()
+
+    def existing_values(self, session: Session, column: str, values: Iterable[str]) -> set[str]:
+        """Return which of ``values`` already exist in the given key column."""
+        values = list(values)
+        if not values:
+            return set()
+        key = getattr(Product, column)
+        return set(session.exec(select(key).where(key.in_(values))).all())
+
+    def unkeyed_names(self, session: Session, names: Iterable[str]) -> set[str]:
+        """Return which of ``names`` belong to products without an ``external_key``."""
+        names = list(names)
+        if not names:
+            return set()
+        statement = select(Product.name).where(
+            Product.name.in_(names), Product.external_key.is_(None)
+        )
+        return set(session.exec(statement).all())
+
+    def upsert_by_external_key(self, session: Session, rows: Sequence[Mapping[str, Any]]) -> None:
+        """Insert rows, updating products whose ``external_key`` already exists."""
+        if not rows:
+            return
+        table = Product.__table__
+        statement = dialect_insert(session)(table).values(list(rows))
+        statement = statement.on_conflict_do_update(
+            index_elements=["external_key"],
+            set_={column: statement.excluded[column] for column in UPSERT_COLUMNS},
+        )
+        session.exec(statement)
+
+    def insert_many(self, session: Session, rows: Sequence[Mapping[str, Any]]) -> None:
+        """Insert rows with a single multi-row ``INSERT``."""
+        if rows:
+            session.exec(insert(Product.__table__).values(list(rows)))
+
+    def update_many_by_key(
+        self,
+        session: Session,
+        column: str,
+        rows: Mapping[str, Mapping[str, Any]],
+        fields: Sequence[str],
+        *,
+        unkeyed_only: bool = False,
+    ) -> int:
+        """Update ``fields`` of every product whose ``column`` matches a key in ``rows``.
+
+        Runs a single ``UPDATE ... SET field = CASE key WHEN ... END WHERE key IN (...)``;
+        ``unkeyed_only`` restricts it to products without an ``external_key``.
+        """
+        if not rows:
+            return 0
+        key = getattr(Product, column)
+        values = {
+            field: case({match: row[field] for match, row in rows.items()}, value=key)
+            for field in fields
+        }
+        statement = update(Product).where(key.in_(list(rows)))
+        if unkeyed_only:
+            statement = statement.where(Product.external_key.is_(None))
+        statement = statement.values(values).execution_options(synchronize_session=False)
+        return session.exec(statement).rowcount
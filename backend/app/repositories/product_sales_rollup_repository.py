@@ -0,0 +1,34 @@
+"""Product sales rollup repository implementation."""
+
+from __future__ import annotations
+
+from datetime import date
+
+from sqlmodel import Session, select
+
+from app.models import ProductSalesRollup, RollupGranularity
+from app.repositories.base_repository import BaseRepository
+
+
+class ProductSalesRollupRepository(BaseRepository[ProductSalesRollup]):
+    """Data access helpers for ``ProductSalesRollup`` entities."""
+
+    def __init__(self) -> None:
+        super().__init__(ProductSalesRollup)
+
+    def list_range(
+        self,
+        session: Session,
+        granularity: RollupGranularity,
+        start: date,
+        end: date,
+    ) -> list[ProductSalesRollup]:
+        """Return rollup rows whose bucket starts within ``[start, end]``."""
+        statement = (
+            select(ProductSalesRollup)
+            .where(ProductSalesRollup.granularity == granularity)
+            .where(ProductSalesRollup.bucket_start >= start)
+            .where(ProductSalesRollup.bucket_start <= end)
+            .order_by(ProductSalesRollup.bucket_start)
+        )
+        return session.exec(statement).all()
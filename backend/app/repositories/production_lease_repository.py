@@ -0,0 +1,114 @@
+"""Production lease repository implementation."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+from sqlmodel import Session, delete, select, update
+
+from app.models import ProductionLease, ProductionOrder, ProductionOrderStatus
+from app.repositories.base_repository import BaseRepository, dialect_insert
+
+
+class ProductionLeaseRepository(BaseRepository[ProductionLease]):
+    """Data access helpers for ``ProductionLease`` rows.
+
+    Acquiring, renewing and dropping a lease are single conditional statements
+    staged without committing; the ``rowcount`` tells the caller whether it won.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(ProductionLease)
+
+    def claimable_ids(self, session: Session, now: datetime, limit: int) -> list[int]:
+        """Return ids of production orders a worker may claim, oldest first.
+
+        Planned orders without a lease and planned or in-progress orders whose
+        lease has expired are claimable. On PostgreSQL the rows are locked with
+        ``FOR UPDATE SKIP LOCKED`` so concurrent claimers receive disjoint
+        candidates; other databases rely on the conditional lease insert alone.
+        """
+        statement = (
+            select(ProductionOrder.id)
+            .outerjoin(ProductionLease, ProductionLease.production_order_id == ProductionOrder.id)
+            .where(
+                or_(
+                    and_(
+                        ProductionOrder.status == ProductionOrderStatus.planned,
+                        ProductionLease.production_order_id.is_(None),
+                    ),
+                    and_(
+                        ProductionOrder.status.in_(
+                            (ProductionOrderStatus.planned, ProductionOrderStatus.in_progress)
+                        ),
+                        ProductionLease.expires_at < now,
+                    ),
+                )
+            )
+            .order_by(ProductionOrder.id)
+            .limit(limit)
+        )
+        if session.get_bind().dialect.name == "postgresql":
+            statement = statement.with_for_update(skip_locked=True, of=ProductionOrder)
+        return list(session.exec(statement).all())
+
+    def acquire(
+        self,
+        session: Session,
+        production_order_id: int,
+        worker_id: str,
+        token: str,
+        now: datetime,
+        expires_at: datetime,
+    ) -> bool:
+        """Take the lease unless another worker holds an unexpired one."""
+        table = ProductionLease.__table__
+        values = {
+            "production_order_id": production_order_id,
+            "worker_id": worker_id,
+            "token": token,
+            "claimed_at": now,
+            "expires_at": expires_at,
+        }
+        statement = dialect_insert(session)(table).values(values)
+        statement = statement.on_conflict_do_update(
+            index_elements=["production_order_id"],
+            set_={name: statement.excluded[name] for name in values if name != "production_order_id"},
+            where=table.c.expires_at < now,
+        )
+        return session.exec(statement).rowcount > 0
+
+    def renew(
+        self,
+        session: Session,
+        production_order_id: int,
+        token: str,
+        now: datetime,
+        expires_at: datetime,
+    ) -> bool:
+        """Extend a lease that is still held under ``token``."""
+        statement = (
+            update(ProductionLease)
+            .where(
+                ProductionLease.production_order_id == production_order_id,
+                ProductionLease.token == token,
+                ProductionLease.expires_at >= now,
+            )
+            .values(expires_at=expires_at)
+            .execution_options(synchronize_session=False)
+        )
+        return session.exec(statement).rowcount > 0
+
+    def drop(self, session: Session, production_order_id: int, token: str, now: datetime) -> bool:
+        """Remove a lease that is still held under ``token``."""
+        statement = (
+            delete(ProductionLease)
+            .where(
+                ProductionLease.production_order_id == production_order_id,
+                ProductionLease.token == token,
+                ProductionLease.expires_at >= now,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return session.exec(statement).rowcount > 0
@@ -2,9 +2,20 @@
 
 from __future__ import annotations
 
+from collections.abc import Iterable
+from typing import Any
+
+from sqlalchemy import func, insert
 from sqlmodel import Session, select
 
-from app.models import ProductionOrder, ProductionOrderStatus
+from app.models import (
+    CapacityCommitment,
+    ProductCapacity,
+    ProductionOrder,
+    ProductionOrderStatus,
+    SalesOrder,
+    SalesOrderItem,
+)
 from app.repositories.base_repository import BaseRepository
 
 
@@ -23,3 +34,75 @@ class ProductionOrderRepository(BaseRepository[ProductionOrder]):
         """Return production orders associated with a sales order."""
         statement = select(ProductionOrder).where(ProductionOrder.sales_order_id == sales_order_id)
         return session.exec(statement).all()
+
+    def list_open_workloads(
+        self,
+        session: Session,
+        default_run_minutes: float,
+        production_ids: Iterable[int] | None = None,
+    ) -> list[Any]:
+        """Return planned and in-progress orders with their line minutes and promise date.
+
+        Each row carries ``id``, ``sales_order_id``, ``status``, ``created_at``,
+        ``promised_date`` (last capacity commitment of the sales order, if any) and
+        ``run_minutes`` (item quantities times each product's per-unit run time).
+        """
+        promised = (
+            select(
+                CapacityCommitment.sales_order_id,
+                func.max(CapacityCommitment.day).label("promised_date"),
+            )
+            .group_by(CapacityCommitment.sales_order_id)
+            .subquery()
+        )
+        run_minutes = func.coalesce(
+            func.sum(
+                SalesOrderItem.quantity
+                * func.coalesce(ProductCapacity.run_minutes, default_run_minutes)
+            ),
+            0,
+        )
+        statement = (
+            select(
+                ProductionOrder.id,
+                ProductionOrder.sales_order_id,
+                ProductionOrder.status,
+                SalesOrder.created_at,
+                promised.c.promised_date,
+                run_minutes.label("run_minutes"),
+            )
+            .join(SalesOrder, SalesOrder.id == ProductionOrder.sales_order_id)
+            .join(promised, promised.c.sales_order_id == ProductionOrder.sales_order_id, isouter=True)
+            .join(SalesOrderItem, SalesOrderItem.sales_order_id == ProductionOrder.sales_order_id, isouter=True)
+            .join(ProductCapacity, ProductCapacity.product_id == SalesOrderItem.product_id, isouter=True)
+            .where(
+                ProductionOrder.status.in_(
+                    (ProductionOrderStatus.planned, ProductionOrderStatus.in_progress)
+                )
+            )
+            .group_by(
+                ProductionOrder.id,
+                ProductionOrder.sales_order_id,
+                ProductionOrder.status,
+                SalesOrder.created_at,
+                promised.c.promised_date,
+            )
+        )
+        if production_ids is not None:
+            statement = statement.where(ProductionOrder.id.in_(list(production_ids)))
+        return session.exec(statement).all()
+
+    def create_planned_many(self, session: Session, sales_order_ids: Iterable[int]) -> list[tuple[int, int]]:
+        """Stage a multi-row insert of planned orders; return ``(id, sales_order_id)`` pairs."""
+        rows = [
+            {"sales_order_id": sales_order_id, "status": ProductionOrderStatus.planned}
+            for sales_order_id in sales_order_ids
+        ]
+        if not rows:
+            return []
+        statement = (
+            insert(ProductionOrder)
+            .values(rows)
+            .returning(ProductionOrder.id, ProductionOrder.sales_order_id)
+        )
+        return sorted((row.id, row.sales_order_id) for row in session.exec(statement).all())
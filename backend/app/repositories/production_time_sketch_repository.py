@@ -0,0 +1,26 @@
+"""Production time sketch repository implementation."""
+
+from __future__ import annotations
+
+from sqlmodel import Session, select
+
+from app.models import ProductionTimeSketchBucket
+from app.repositories.base_repository import BaseRepository
+
+
+class ProductionTimeSketchRepository(BaseRepository[ProductionTimeSketchBucket]):
+    """Data access helpers for ``ProductionTimeSketchBucket`` rows."""
+
+    def __init__(self) -> None:
+        super().__init__(ProductionTimeSketchBucket)
+
+    def list_buckets(
+        self,
+        session: Session,
+        product_id: int | None = None,
+    ) -> list[ProductionTimeSketchBucket]:
+        """Return sketch buckets, optionally for a single product."""
+        statement = select(ProductionTimeSketchBucket)
+        if product_id is not None:
+            statement = statement.where(ProductionTimeSketchBucket.product_id == product_id)
+        return session.exec(statement).all()
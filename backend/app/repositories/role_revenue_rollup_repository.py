@@ -0,0 +1,34 @@
+"""Role revenue rollup repository implementation."""
+
+from __future__ import annotations
+
+from datetime import date
+
+from sqlmodel import Session, select
+
+from app.models import RoleRevenueRollup, RollupGranularity
+from app.repositories.base_repository import BaseRepository
+
+
+class RoleRevenueRollupRepository(BaseRepository[RoleRevenueRollup]):
+    """Data access helpers for ``RoleRevenueRollup`` entities."""
+
+    def __init__(self) -> None:
+        super().__init__(RoleRevenueRollup)
+
+    def list_range(
+        self,
+        session: Session,
+        granularity: RollupGranularity,
+        start: date,
+        end: date,
+    ) -> list[RoleRevenueRollup]:
+        """Return rollup rows whose bucket starts within ``[start, end]``."""
+        statement = (
+            select(RoleRevenueRollup)
+            .where(RoleRevenueRollup.granularity == granularity)
+            .where(RoleRevenueRollup.bucket_start >= start)
+            .where(RoleRevenueRollup.bucket_start <= end)
+            .order_by(RoleRevenueRollup.bucket_start)
+        )
+        return session.exec(statement).all()
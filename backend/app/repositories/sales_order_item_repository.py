@@ -2,9 +2,13 @@
 
 from __future__ import annotations
 
+from collections.abc import Sequence
+from typing import Any
+
+from sqlalchemy import func
 from sqlmodel import Session, select
 
-from app.models import SalesOrderItem
+from app.models import Product, SalesOrderItem
 from app.repositories.base_repository import BaseRepository
 
 
@@ -18,3 +22,42 @@ class SalesOrderItemRepository(BaseRepository[SalesOrderItem]):
         """Return items belonging to the specified sales order."""
         statement = select(SalesOrderItem).where(SalesOrderItem.sales_order_id == order_id)
         return session.exec(statement).all()
+
+    def quantities_by_product(self, session: Session, order_ids: Sequence[int]) -> list[Any]:
+        """Return ``product_id``, ``product_name``, ``sales_order_id`` and summed ``quantity`` rows.
+
+        Rows are grouped per product and order so callers can build per-product
+        batches without loading individual items.
+        """
+        if not order_ids:
+            return []
+        statement = (
+            select(
+                SalesOrderItem.product_id,
+                Product.name.label("product_name"),
+                SalesOrderItem.sales_order_id,
+                func.sum(SalesOrderItem.quantity).label("quantity"),
+            )
+            .join(Product, Product.id == SalesOrderItem.product_id)
+            .where(SalesOrderItem.sales_order_id.in_(list(order_ids)))
+            .group_by(SalesOrderItem.product_id, Product.name, SalesOrderItem.sales_order_id)
+            .order_by(SalesOrderItem.product_id, SalesOrderItem.sales_order_id)
+        )
+        return session.exec(statement).all()
+
+    def list_invoice_lines(self, session: Session, order_ids: Sequence[int]) -> list[Any]:
+        """Return ``sales_order_id``, ``name``, ``quantity`` and ``subtotal`` rows for invoices."""
+        if not order_ids:
+            return []
+        statement = (
+            select(
+                SalesOrderItem.sales_order_id,
+                Product.name,
+                SalesOrderItem.quantity,
+                SalesOrderItem.subtotal,
+            )
+            .join(Product, Product.id == SalesOrderItem.product_id)
+            .where(SalesOrderItem.sales_order_id.in_(list(order_ids)))
+            .order_by(SalesOrderItem.sales_order_id, SalesOrderItem.id)
+        )
+        return session.exec(statement).all()
@@ -2,9 +2,11 @@
 
 from __future__ import annotations
 
-from sqlmodel import Session, select
+from collections.abc import Collection
 
-from app.models import SalesOrder, SalesOrderStatus
+from sqlmodel import Session, select, update
+
+from app.models import SalesOrder, SalesOrderItem, SalesOrderStatus
 from app.repositories.base_repository import BaseRepository
 
 
@@ -27,3 +29,40 @@ class SalesOrderRepository(BaseRepository[SalesOrder]):
     def update_status(self, session: Session, order_id: int, status: SalesOrderStatus) -> SalesOrder:
         """Update the status for a sales order and return the refreshed entity."""
         return self.update(session, order_id, {"status": status})
+
+    def transition_many(
+        self,
+        session: Session,
+        current: SalesOrderStatus,
+        new: SalesOrderStatus,
+        *,
+        product_id: int | None = None,
+        order_ids: Collection[int] | None = None,
+        limit: int | None = None,
+    ) -> list[int]:
+        """Stage one set-based status change and return the ids it actually moved.
+
+        Orders are picked oldest first, optionally only those containing
+        ``product_id`` or listed in ``order_ids``. The ``status = current`` guard is repeated in the ``UPDATE``
+        so orders changed concurrently are skipped rather than overwritten.
+        """
+        candidates = select(SalesOrder.id).where(SalesOrder.status == current)
+        if product_id is not None:
+            candidates = candidates.where(
+                SalesOrder.id.in_(
+                    select(SalesOrderItem.sales_order_id).where(SalesOrderItem.product_id == product_id)
+                )
+            )
+        if order_ids is not None:
+            candidates = candidates.where(SalesOrder.id.in_(list(order_ids)))
+        candidates = candidates.order_by(SalesOrder.id)
+        if limit is not None:
+            candidates = candidates.limit(limit)
+        statement = (
+            update(SalesOrder)
+            .where(SalesOrder.id.in_(candidates.scalar_subquery()), SalesOrder.status == current)
+            .values(status=new)
+            .returning(SalesOrder.id)
+            .execution_options(synchronize_session=False)
+        )
+        return sorted(session.exec(statement).scalars().all())
@@ -0,0 +1,89 @@
+"""Shipment batch repository implementation."""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import insert
+from sqlmodel import Session, select, update
+
+from app.models import (
+    Customer,
+    Delivery,
+    DeliveryStatus,
+    SalesOrder,
+    ShipmentBatch,
+    ShipmentBatchDelivery,
+    ShipmentBatchStatus,
+)
+from app.repositories.base_repository import BaseRepository
+
+
+class ShipmentBatchRepository(BaseRepository[ShipmentBatch]):
+    """Data access helpers for ``ShipmentBatch`` entities and their deliveries."""
+
+    def __init__(self) -> None:
+        super().__init__(ShipmentBatch)
+
+    def list_unbatched_pending(
+        self,
+        session: Session,
+        *,
+        customer_id: int | None = None,
+        customer_role: str | None = None,
+    ) -> list[Any]:
+        """Return pending deliveries not yet in a batch, with their customer, oldest first."""
+        statement = (
+            select(
+                Delivery.id.label("delivery_id"),
+                Delivery.sales_order_id,
+                Customer.id.label("customer_id"),
+                Customer.role.label("customer_role"),
+            )
+            .join(SalesOrder, SalesOrder.id == Delivery.sales_order_id)
+            .join(Customer, Customer.id == SalesOrder.customer_id)
+            .outerjoin(ShipmentBatchDelivery, ShipmentBatchDelivery.delivery_id == Delivery.id)
+            .where(Delivery.status == DeliveryStatus.pending)
+            .where(ShipmentBatchDelivery.batch_id.is_(None))
+            .order_by(Delivery.id)
+        )
+        if customer_id is not None:
+            statement = statement.where(Customer.id == customer_id)
+        if customer_role is not None:
+            statement = statement.where(Customer.role == customer_role)
+        return session.exec(statement).all()
+
+    def add_deliveries(self, session: Session, rows: Sequence[dict[str, int]]) -> None:
+        """Stage a multi-row insert of ``{batch_id, delivery_id}`` memberships."""
+        if rows:
+            session.exec(insert(ShipmentBatchDelivery).values(list(rows)))
+
+    def list_members(self, session: Session, batch_ids: Sequence[int]) -> list[Any]:
+        """Return ``(batch_id, delivery_id, sales_order_id, status)`` rows for batches."""
+        if not batch_ids:
+            return []
+        statement = (
+            select(
+                ShipmentBatchDelivery.batch_id,
+                Delivery.id.label("delivery_id"),
+                Delivery.sales_order_id,
+                Delivery.status,
+            )
+            .join(Delivery, Delivery.id == ShipmentBatchDelivery.delivery_id)
+            .where(ShipmentBatchDelivery.batch_id.in_(list(batch_ids)))
+            .order_by(ShipmentBatchDelivery.batch_id, Delivery.id)
+        )
+        return session.exec(statement).all()
+
+    def close(self, session: Session, batch_id: int, delivered_at: datetime) -> bool:
+        """Stage the guarded ``open -> delivered`` flip; ``False`` if the batch was not open."""
+        statement = (
+            update(ShipmentBatch)
+            .where(ShipmentBatch.id == batch_id, ShipmentBatch.status == ShipmentBatchStatus.open)
+            .values(status=ShipmentBatchStatus.delivered, delivered_at=delivered_at)
+            .returning(ShipmentBatch.id)
+            .execution_options(synchronize_session=False)
+        )
+        return session.exec(statement).first() is not None
@@ -0,0 +1,113 @@
+"""Stock balance repository implementation."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+from sqlalchemy import func
+from sqlmodel import Session, select, update
+
+from app.models import StockBalance
+from app.repositories.base_repository import BaseRepository, dialect_insert
+
+
+class StockBalanceRepository(BaseRepository[StockBalance]):
+    """Data access helpers for ``StockBalance`` slots.
+
+    Every write is a single conditional ``UPDATE`` against one slot row and is staged
+    without committing, so no table or explicit row locks are taken and the caller
+    commits the balance change together with its ledger entries.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(StockBalance)
+
+    def list_available(self, session: Session, product_id: int) -> list[tuple[int, int]]:
+        """Return ``(slot, on_hand - reserved)`` pairs for a product ordered by slot."""
+        statement = (
+            select(StockBalance.slot, StockBalance.on_hand - StockBalance.reserved)
+            .where(StockBalance.product_id == product_id)
+            .order_by(StockBalance.slot)
+        )
+        return [(slot, available) for slot, available in session.exec(statement).all()]
+
+    def tracked_product_ids(self, session: Session, product_ids: Iterable[int]) -> set[int]:
+        """Return the subset of ``product_ids`` that have stock balance rows."""
+        ids = set(product_ids)
+        if not ids:
+            return set()
+        statement = select(StockBalance.product_id).where(StockBalance.product_id.in_(ids)).distinct()
+        return set(session.exec(statement).all())
+
+    def totals(self, session: Session, product_id: int) -> tuple[int, int, int]:
+        """Return ``(on_hand, reserved, slot_count)`` summed over a product's slots."""
+        statement = select(
+            func.coalesce(func.sum(StockBalance.on_hand), 0),
+            func.coalesce(func.sum(StockBalance.reserved), 0),
+            func.count(),
+        ).where(StockBalance.product_id == product_id)
+        on_hand, reserved, slots = session.exec(statement).one()
+        return int(on_hand), int(reserved), int(slots)
+
+    def ensure_slots(self, session: Session, product_id: int, slots: int) -> None:
+        """Stage creation of slots ``0..slots-1`` that do not exist yet."""
+        statement = dialect_insert(session)(StockBalance.__table__).values(
+            [{"product_id": product_id, "slot": slot, "on_hand": 0, "reserved": 0} for slot in range(slots)]
+        )
+        session.exec(statement.on_conflict_do_nothing(index_elements=["product_id", "slot"]))
+
+    def try_reserve(self, session: Session, product_id: int, slot: int, quantity: int) -> bool:
+        """Reserve ``quantity`` on a slot only if that much is unreserved; return success."""
+        return self._apply(
+            session,
+            product_id,
+            slot,
+            {"reserved": StockBalance.reserved + quantity},
+            StockBalance.on_hand - StockBalance.reserved >= quantity,
+        )
+
+    def release(self, session: Session, product_id: int, slot: int, quantity: int) -> bool:
+        """Return ``quantity`` of reserved stock on a slot to the available pool."""
+        return self._apply(
+            session,
+            product_id,
+            slot,
+            {"reserved": StockBalance.reserved - quantity},
+            StockBalance.reserved >= quantity,
+        )
+
+    def issue(self, session: Session, product_id: int, slot: int, quantity: int) -> bool:
+        """Consume ``quantity`` of reserved stock on a slot (it leaves the warehouse)."""
+        return self._apply(
+            session,
+            product_id,
+            slot,
+            {
+                "on_hand": StockBalance.on_hand - quantity,
+                "reserved": StockBalance.reserved - quantity,
+            },
+            StockBalance.reserved >= quantity,
+        )
+
+    def receive(self, session: Session, product_id: int, slot: int, quantity: int) -> bool:
+        """Add ``quantity`` to the on-hand stock of a slot."""
+        return self._apply(session, product_id, slot, {"on_hand": StockBalance.on_hand + quantity})
+
+    def take_free(self, session: Session, product_id: int, slot: int, quantity: int) -> bool:
+        """Remove ``quantity`` of unreserved stock from a slot if it is still free."""
+        return self._apply(
+            session,
+            product_id,
+            slot,
+            {"on_hand": StockBalance.on_hand - quantity},
+            StockBalance.on_hand - StockBalance.reserved >= quantity,
+        )
+
+    def _apply(self, session: Session, product_id: int, slot: int, values: dict, *conditions) -> bool:
+        statement = (
+            update(StockBalance)
+            .where(StockBalance.product_id == product_id, StockBalance.slot == slot, *conditions)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        return session.exec(statement).rowcount > 0
@@ -0,0 +1,85 @@
+"""Stock ledger repository implementation."""
+
+from __future__ import annotations
+
+from collections.abc import Collection, Sequence
+from typing import Any
+
+from sqlalchemy import case, func, insert
+from sqlmodel import Session, select
+
+from app.models import StockLedgerEntry, StockMovementType, current_utc_time
+from app.repositories.base_repository import BaseRepository
+
+
+class StockLedgerRepository(BaseRepository[StockLedgerEntry]):
+    """Data access helpers for the append-only ``StockLedgerEntry`` table."""
+
+    def __init__(self) -> None:
+        super().__init__(StockLedgerEntry)
+
+    def append_many(self, session: Session, entries: Sequence[dict[str, Any]]) -> None:
+        """Stage a multi-row insert of ledger entries without committing."""
+        if not entries:
+            return
+        created_at = current_utc_time()
+        session.exec(
+            insert(StockLedgerEntry).values(
+                [{"created_at": created_at, "sales_order_id": None, **entry} for entry in entries]
+            )
+        )
+
+    def open_reservations(self, session: Session, sales_order_id: int) -> list[tuple[int, int, int]]:
+        """Return ``(product_id, slot, quantity)`` still reserved for a sales order.
+
+        Reservations are netted against the releases and issues recorded for the
+        same order, product and slot.
+        """
+        statement = (
+            select(StockLedgerEntry.product_id, StockLedgerEntry.slot, func.sum(_signed_quantity()))
+            .where(StockLedgerEntry.sales_order_id == sales_order_id)
+            .group_by(StockLedgerEntry.product_id, StockLedgerEntry.slot)
+            .order_by(StockLedgerEntry.product_id, StockLedgerEntry.slot)
+        )
+        return [
+            (product_id, slot, int(quantity))
+            for product_id, slot, quantity in session.exec(statement).all()
+            if quantity and quantity > 0
+        ]
+
+    def open_reservations_many(
+        self,
+        session: Session,
+        sales_order_ids: Collection[int],
+    ) -> list[tuple[int, int, int, int]]:
+        """Return ``(sales_order_id, product_id, slot, quantity)`` still reserved, in one query."""
+        if not sales_order_ids:
+            return []
+        statement = (
+            select(
+                StockLedgerEntry.sales_order_id,
+                StockLedgerEntry.product_id,
+                StockLedgerEntry.slot,
+                func.sum(_signed_quantity()),
+            )
+            .where(StockLedgerEntry.sales_order_id.in_(list(sales_order_ids)))
+            .group_by(StockLedgerEntry.sales_order_id, StockLedgerEntry.product_id, StockLedgerEntry.slot)
+            .order_by(StockLedgerEntry.sales_order_id, StockLedgerEntry.product_id, StockLedgerEntry.slot)
+        )
+        return [
+            (sales_order_id, product_id, slot, int(quantity))
+            for sales_order_id, product_id, slot, quantity in session.exec(statement).all()
+            if quantity and quantity > 0
+        ]
+
+
+def _signed_quantity() -> Any:
+    """Ledger quantity signed so reservations net against their releases and issues."""
+    return case(
+        (StockLedgerEntry.movement == StockMovementType.reservation, StockLedgerEntry.quantity),
+        (
+            StockLedgerEntry.movement.in_((StockMovementType.release, StockMovementType.issue)),
+            -StockLedgerEntry.quantity,
+        ),
+        else_=0,
+    )
@@ -0,0 +1,97 @@
+"""Pydantic schemas for analytics API endpoints."""
+
+from __future__ import annotations
+
+from datetime import date
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class RevenueSeriesPointResponse(BaseModel):
+    """Response payload for one bucket of a revenue time series."""
+
+    bucket_start: date
+    product_id: Optional[int] = None
+    product_name: Optional[str] = None
+    customer_role: Optional[str] = None
+    order_count: int
+    quantity: Optional[int] = None
+    revenue: float
+
+
+class OrderVolumePointResponse(BaseModel):
+    """Response payload for one bucket of the in-memory order volume series."""
+
+    bucket_start: date
+    order_count: int
+    revenue: float
+
+
+class RoleBreakdownResponse(BaseModel):
+    """Response payload summarising orders placed by one customer role."""
+
+    customer_role: str
+    order_count: int
+    quantity: int
+    revenue: float
+
+
+class RollupRebuildResponse(BaseModel):
+    """Response payload describing a completed rollup rebuild."""
+
+    billed_orders: int
+
+
+class DurationPercentilesResponse(BaseModel):
+    """Response payload with estimated duration percentiles in seconds."""
+
+    count: int
+    p50_seconds: Optional[float] = None
+    p90_seconds: Optional[float] = None
+    p99_seconds: Optional[float] = None
+
+
+class ProductLeadTimeResponse(BaseModel):
+    """Response payload with production lead and queue time percentiles for one product."""
+
+    product_id: int
+    product_name: Optional[str] = None
+    lead_time: DurationPercentilesResponse
+    queue_time: DurationPercentilesResponse
+
+
+class AgingBucketsResponse(BaseModel):
+    """Open receivable amounts split by age in days."""
+
+    days_0_30: float
+    days_31_60: float
+    days_61_90: float
+    days_over_90: float
+    total: float
+
+
+class CustomerAgingResponse(AgingBucketsResponse):
+    """Receivables aging of one customer."""
+
+    customer_id: int
+    customer_name: str
+    customer_role: str
+    invoice_count: int
+
+
+class RoleAgingResponse(AgingBucketsResponse):
+    """Receivables aging summed over the customers of one role."""
+
+    customer_role: str
+    customer_count: int
+    invoice_count: int
+
+
+class ReceivablesAgingResponse(BaseModel):
+    """Accounts-receivable aging report as of one day."""
+
+    as_of: date
+    customers: list[CustomerAgingResponse]
+    roles: list[RoleAgingResponse]
+    totals: AgingBucketsResponse
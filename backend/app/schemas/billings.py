@@ -5,7 +5,9 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from app.models import BillingRunStatus
 
 
 class BillingCreateRequest(BaseModel):
@@ -28,3 +30,28 @@ class BillingResponse(BaseModel):
     invoice_number: Optional[str] = None
     amount: float
     billed_date: Optional[datetime] = None
+
+
+class BillingRunRequest(BaseModel):
+    """Request payload for starting a bulk billing run."""
+
+    send_invoices: bool = False
+    chunk_size: int = Field(default=500, ge=1, le=10000)
+
+
+class BillingRunResponse(BaseModel):
+    """Response payload reporting the progress and outcome of a billing run."""
+
+    id: int
+    status: BillingRunStatus
+    send_invoices: bool
+    chunk_size: int
+    orders_billed: int
+    total_amount: float
+    invoices_rendered: int
+    invoices_queued: int
+    billed_through_order_id: int
+    last_error: Optional[str] = None
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    duration_seconds: Optional[float] = None
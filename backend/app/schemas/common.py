@@ -23,3 +23,10 @@ class ErrorResponse(BaseModel):
     success: Literal[False] = False
     error: str
     message: str
+
+
+class SuggestionResponse(BaseModel):
+    """Schema for an autocomplete suggestion."""
+
+    id: int
+    label: str
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+from typing import Optional
+
 from pydantic import BaseModel
 
 
@@ -12,3 +14,20 @@ class CustomerResponse(BaseModel):
     name: str
     email: str
     role: str
+
+
+class CreditLimitRequest(BaseModel):
+    """Request payload setting a customer's credit limit; ``None`` removes the limit."""
+
+    credit_limit: Optional[float] = None
+
+
+class CustomerCreditResponse(BaseModel):
+    """Response payload describing a customer's credit limit and exposure."""
+
+    customer_id: int
+    credit_limit: Optional[float] = None
+    open_order_amount: float
+    receivable_amount: float
+    exposure: float
+    available_credit: Optional[float] = None
@@ -35,3 +35,11 @@ class DashboardSummaryResponse(BaseModel):
     billed: int
     top_products: List[TopProductResponse]
     recent_orders: List[RecentOrderResponse]
+
+
+class KpiCounterDriftResponse(BaseModel):
+    """Response payload describing a KPI counter repaired by reconciliation."""
+
+    name: str
+    stored: int | None
+    actual: int
@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import BaseModel
 
@@ -22,3 +22,35 @@ class DeliveryResponse(BaseModel):
     sales_order_id: int
     status: str
     delivery_date: Optional[datetime] = None
+
+
+class ShipmentConsolidationRequest(BaseModel):
+    """Request payload for grouping pending deliveries into shipment batches."""
+
+    group_by: Literal["customer", "role"] = "customer"
+    customer_id: Optional[int] = None
+    customer_role: Optional[str] = None
+
+
+class ShipmentBatchResponse(BaseModel):
+    """Response payload describing a shipment batch and its deliveries."""
+
+    id: int
+    group_by: str
+    customer_id: Optional[int] = None
+    customer_role: Optional[str] = None
+    status: str
+    created_at: datetime
+    delivered_at: Optional[datetime] = None
+    delivery_ids: list[int]
+    sales_order_ids: list[int]
+
+
+class ShipmentBatchCompletionResponse(BaseModel):
+    """Response payload summarising a bulk-completed shipment batch."""
+
+    batch_id: int
+    delivered_at: datetime
+    delivery_ids: list[int]
+    sales_order_ids: list[int]
+    skipped_delivery_ids: list[int]
@@ -0,0 +1,50 @@
+"""Pydantic schemas for dunning endpoints."""
+
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class DunningRunRequest(BaseModel):
+    """Request payload for a dunning run."""
+
+    as_of: Optional[date] = None
+    send: bool = False
+
+
+class DunningEmailCounts(BaseModel):
+    """Outcomes of the reminders sent inline by a dunning run."""
+
+    sent: int
+    pending: int
+    dead: int
+
+
+class DunningRunResponse(BaseModel):
+    """Response payload summarising a dunning run."""
+
+    as_of: date
+    customers_overdue: int
+    notices_created: int
+    already_notified: int
+    amount_overdue: float
+    notices_by_level: dict[str, int]
+    emails: DunningEmailCounts
+
+
+class DunningNoticeResponse(BaseModel):
+    """Response payload describing one dunning notice."""
+
+    id: int
+    customer_id: int
+    level: int
+    anchor_billing_id: int
+    recipient: str
+    as_of: date
+    invoice_count: int
+    amount_due: float
+    max_days_overdue: int
+    created_at: datetime
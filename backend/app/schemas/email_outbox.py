@@ -0,0 +1,32 @@
+"""Pydantic schemas for email outbox endpoints."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class EmailOutboxResponse(BaseModel):
+    """Response payload describing one outbox message and its delivery state."""
+
+    id: int
+    kind: str
+    reference_id: int
+    recipient: str
+    status: str
+    attempts: int
+    next_attempt_at: datetime
+    last_error: Optional[str] = None
+    provider_message_id: Optional[str] = None
+    created_at: datetime
+    sent_at: Optional[datetime] = None
+
+
+class OutboxDrainResponse(BaseModel):
+    """Response payload counting the outcomes of an inline outbox drain."""
+
+    sent: int
+    pending: int
+    dead: int
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import date, datetime
 from typing import List, Optional
 
 from pydantic import BaseModel, Field
@@ -85,7 +85,29 @@ class OrderDetailResponse(BaseModel):
     status: SalesOrderStatus
     total_amount: float
     created_at: datetime
+    promised_date: Optional[date] = None
     items: List[OrderItemResponse]
     production_orders: List[ProductionOrderResponse]
     deliveries: List[DeliveryResponse]
     billing: Optional[BillingResponse] = None
+
+
+class OrderQuoteRequest(BaseModel):
+    """Request schema for quoting a completion date without placing an order."""
+
+    items: List[OrderItemPayload]
+
+
+class OrderQuoteItemResponse(BaseModel):
+    """Promise date for a single product of a quote."""
+
+    product_id: int
+    quantity: int
+    promised_date: date
+
+
+class OrderQuoteResponse(BaseModel):
+    """Promise date for a whole order (the latest of its items)."""
+
+    promised_date: date
+    items: List[OrderQuoteItemResponse]
@@ -0,0 +1,43 @@
+"""Pydantic schemas for payment endpoints."""
+
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class PaymentImportResponse(BaseModel):
+    """Response payload summarising one imported bank statement."""
+
+    id: int
+    filename: Optional[str] = None
+    checksum: Optional[str] = None
+    lines: int
+    matched: int
+    unmatched: int
+    skipped: int
+    amount_received: float
+    amount_applied: float
+    amount_unapplied: float
+    imported_at: datetime
+
+
+class PaymentResponse(BaseModel):
+    """Response payload describing one statement line and how it was applied."""
+
+    id: int
+    import_id: Optional[int] = None
+    line_number: Optional[int] = None
+    paid_on: date
+    amount: float
+    reference: Optional[str] = None
+    invoice_number: Optional[str] = None
+    customer_id: Optional[int] = None
+    billing_id: Optional[int] = None
+    applied_amount: float
+    unapplied_amount: float
+    status: str
+    match_rule: Optional[str] = None
+    created_at: datetime
@@ -2,10 +2,10 @@
 
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class ProductionOrderStartRequest(BaseModel):
@@ -22,3 +22,40 @@ class ProductionOrderResponse(BaseModel):
     status: str
     start_date: Optional[datetime] = None
     end_date: Optional[datetime] = None
+
+
+class ScheduledProductionOrderResponse(BaseModel):
+    """Response model describing a production order's slot on the shop-floor schedule."""
+
+    production_order_id: int
+    sales_order_id: int
+    status: str
+    priority_date: date
+    run_minutes: int
+    planned_start: datetime
+    planned_end: datetime
+
+
+class WaveReleaseRequest(BaseModel):
+    """Request payload for releasing created sales orders to the floor as a wave."""
+
+    product_id: Optional[int] = None
+    limit: int = Field(default=500, ge=1, le=5000)
+
+
+class WaveProductBatch(BaseModel):
+    """Total quantity of one product in a wave and the sales orders needing it."""
+
+    product_id: int
+    product_name: Optional[str] = None
+    quantity: int
+    sales_order_ids: List[int]
+
+
+class WaveReleaseResponse(BaseModel):
+    """Composition of a released production wave."""
+
+    order_count: int
+    sales_order_ids: List[int]
+    production_order_ids: List[int]
+    products: List[WaveProductBatch]
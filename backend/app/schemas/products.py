@@ -2,9 +2,9 @@
 
 from __future__ import annotations
 
-from typing import Optional
+from typing import List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class ProductCreateRequest(BaseModel):
@@ -24,6 +24,7 @@ class ProductResponse(BaseModel):
     description: str
     price: float
     image_url: Optional[str] = None
+    external_key: Optional[str] = None
 
 class ProductUpdateRequest(BaseModel):
     """Request payload for updating an existing product."""
@@ -32,3 +33,74 @@ class ProductUpdateRequest(BaseModel):
     description: str
     price: float = Field(gt=0)
     image_url: Optional[str] = None
+
+
+class ProductBulkItem(BaseModel):
+    """One line of a bulk product upsert stream.
+
+    Lines carrying a description are full upserts; lines with only a match key and
+    a price update the price of an existing product.
+    """
+
+    external_key: Optional[str] = None
+    name: Optional[str] = None
+    description: Optional[str] = None
+    price: float = Field(gt=0)
+    image_url: Optional[str] = None
+
+    @model_validator(mode="after")
+    def _require_match_key(self) -> "ProductBulkItem":
+        if not self.external_key and not self.name:
+            raise ValueError("Either external_key or name is required.")
+        if self.description is not None and not self.name:
+            raise ValueError("name is required when upserting a product.")
+        return self
+
+
+class ProductBulkUpsertResponse(BaseModel):
+    """Response payload summarising a bulk upsert."""
+
+    received: int
+    inserted: int
+    updated: int
+    price_updates: int
+    unmatched: List[str]
+
+
+class StockLevelResponse(BaseModel):
+    """Response payload describing a product's stock position."""
+
+    product_id: int
+    on_hand: int
+    reserved: int
+    available: int
+    slots: int
+
+
+class StockReceiptRequest(BaseModel):
+    """Request payload for receiving stock into inventory."""
+
+    quantity: int = Field(gt=0)
+
+
+class StockSplitRequest(BaseModel):
+    """Request payload for spreading a hot product's stock over more slots."""
+
+    slots: int = Field(ge=1, le=64)
+
+
+class ProductCapacityRequest(BaseModel):
+    """Request payload for configuring a product's production capacity."""
+
+    daily_capacity: int = Field(gt=0)
+    lead_time_days: int = Field(default=0, ge=0)
+    run_minutes: float = Field(default=30.0, gt=0)
+
+
+class ProductCapacityResponse(BaseModel):
+    """Response payload describing a product's production capacity."""
+
+    product_id: int
+    daily_capacity: int
+    lead_time_days: int
+    run_minutes: float
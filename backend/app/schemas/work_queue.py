@@ -0,0 +1,40 @@
+"""Pydantic schemas for shop-floor work queue endpoints."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class WorkClaimRequest(BaseModel):
+    """Request payload for claiming the next production order."""
+
+    worker_id: str = Field(min_length=1)
+    lease_seconds: Optional[float] = Field(default=None, gt=0, le=3600)
+
+
+class WorkClaimResponse(BaseModel):
+    """Production order leased to a worker."""
+
+    production_order_id: int
+    sales_order_id: int
+    status: str
+    worker_id: str
+    token: str
+    expires_at: datetime
+
+
+class LeaseTokenRequest(BaseModel):
+    """Request payload proving the caller still holds a lease."""
+
+    token: str
+    lease_seconds: Optional[float] = Field(default=None, gt=0, le=3600)
+
+
+class LeaseRenewalResponse(BaseModel):
+    """Lease expiry after a heartbeat."""
+
+    production_order_id: int
+    expires_at: datetime
@@ -9,4 +9,24 @@ __all__ = [
     "product_service",
     "customer_service",
     "dashboard_service",
+    "kpi_service",
+    "analytics_service",
+    "event_hub",
+    "order_fact_cache",
+    "search_index",
+    "inventory_service",
+    "atp_service",
+    "scheduling_service",
+    "work_queue_service",
+    "lead_time_service",
+    "email_transport",
+    "email_outbox_service",
+    "pdf_render_pool",
+    "invoice_template",
+    "invoice_pdf_store",
+    "invoice_numbers",
+    "receivables_service",
+    "payment_service",
+    "dunning_service",
+    "credit_service",
 ]
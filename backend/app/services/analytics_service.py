@@ -0,0 +1,312 @@
+"""Analytics service serving time-bucketed sales figures from rollup tables."""
+
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from collections.abc import Sequence
+from datetime import date, datetime, timedelta
+from typing import Any, Literal
+
+from sqlalchemy import func
+from sqlmodel import Session, delete, select
+
+from app.models import (
+    Billing,
+    Customer,
+    Product,
+    ProductSalesRollup,
+    RoleRevenueRollup,
+    RollupGranularity,
+    SalesOrder,
+    SalesOrderItem,
+    SalesOrderStatus,
+)
+from app.repositories.customer_repository import CustomerRepository
+from app.repositories.product_sales_rollup_repository import ProductSalesRollupRepository
+from app.repositories.role_revenue_rollup_repository import RoleRevenueRollupRepository
+from app.repositories.sales_order_item_repository import SalesOrderItemRepository
+
+logger = logging.getLogger(__name__)
+
+customer_repo = CustomerRepository()
+sales_order_item_repo = SalesOrderItemRepository()
+product_rollup_repo = ProductSalesRollupRepository()
+role_rollup_repo = RoleRevenueRollupRepository()
+
+UNKNOWN_ROLE = "unknown"
+
+RevenueGrouping = Literal["product", "role"]
+
+
+def bucket_start(day: date, granularity: RollupGranularity) -> date:
+    """Return the first day of the bucket containing ``day`` (weeks start on Monday)."""
+
+    if granularity == RollupGranularity.week:
+        return day - timedelta(days=day.weekday())
+    if granularity == RollupGranularity.month:
+        return day.replace(day=1)
+    return day
+
+
+def record_order_billed(
+    session: Session,
+    order: SalesOrder,
+    billed_at: datetime,
+    amount: float,
+) -> None:
+    """Stage rollup increments for a sales order that is being marked billed.
+
+    Nothing is committed here; the caller's status update commits the rollups
+    together with the billed transition.
+    """
+
+    customer = order.customer or customer_repo.get(session, order.customer_id)
+    role = getattr(customer, "role", None) or UNKNOWN_ROLE
+
+    per_product: dict[int, list[float]] = defaultdict(lambda: [0, 0.0])
+    for item in sales_order_item_repo.list_by_order(session, order.id):
+        per_product[item.product_id][0] += item.quantity
+        per_product[item.product_id][1] += item.subtotal
+
+    billed_day = billed_at.date()
+    for granularity in RollupGranularity:
+        bucket = bucket_start(billed_day, granularity)
+        role_rollup_repo.upsert_increment(
+            session,
+            {"granularity": granularity, "bucket_start": bucket, "customer_role": role},
+            {"order_count": 1, "billed_amount": amount},
+        )
+        for product_id, (quantity, revenue) in per_product.items():
+            product_rollup_repo.upsert_increment(
+                session,
+                {
+                    "granularity": granularity,
+                    "bucket_start": bucket,
+                    "product_id": product_id,
+                    "customer_role": role,
+                },
+                {"order_count": 1, "quantity": int(quantity), "revenue": revenue},
+            )
+
+
+def record_orders_billed(
+    session: Session,
+    orders: Sequence[tuple[int, str | None, float]],
+    billed_at: datetime,
+) -> None:
+    """Stage rollup increments for many ``(order_id, customer_role, amount)`` billed at once.
+
+    Line items are summed in one grouped query and every rollup row is
+    incremented once with the combined figures. Nothing is committed here.
+    """
+
+    if not orders:
+        return
+    roles = {order_id: role or UNKNOWN_ROLE for order_id, role, _ in orders}
+    role_totals: dict[str, list[float]] = defaultdict(lambda: [0, 0.0])
+    for order_id, _, amount in orders:
+        entry = role_totals[roles[order_id]]
+        entry[0] += 1
+        entry[1] += amount
+
+    product_totals: dict[tuple[int, str], list[float]] = defaultdict(lambda: [0, 0, 0.0])
+    item_rows = session.exec(
+        select(
+            SalesOrderItem.sales_order_id,
+            SalesOrderItem.product_id,
+            func.sum(SalesOrderItem.quantity).label("quantity"),
+            func.sum(SalesOrderItem.subtotal).label("revenue"),
+        )
+        .where(SalesOrderItem.sales_order_id.in_(list(roles)))
+        .group_by(SalesOrderItem.sales_order_id, SalesOrderItem.product_id)
+    ).all()
+    for row in item_rows:
+        entry = product_totals[(row.product_id, roles[row.sales_order_id])]
+        entry[0] += 1
+        entry[1] += int(row.quantity)
+        entry[2] += row.revenue
+
+    billed_day = billed_at.date()
+    for granularity in RollupGranularity:
+        bucket = bucket_start(billed_day, granularity)
+        for role, (order_count, amount) in role_totals.items():
+            role_rollup_repo.upsert_increment(
+                session,
+                {"granularity": granularity, "bucket_start": bucket, "customer_role": role},
+                {"order_count": order_count, "billed_amount": amount},
+            )
+        for (product_id, role), (order_count, quantity, revenue) in product_totals.items():
+            product_rollup_repo.upsert_increment(
+                session,
+                {
+                    "granularity": granularity,
+                    "bucket_start": bucket,
+                    "product_id": product_id,
+                    "customer_role": role,
+                },
+                {"order_count": order_count, "quantity": quantity, "revenue": revenue},
+            )
+
+
+def get_revenue_series(
+    session: Session,
+    *,
+    granularity: RollupGranularity | str,
+    start: date,
+    end: date,
+    group_by: RevenueGrouping = "product",
+) -> list[dict[str, Any]]:
+    """Return order counts and revenue per bucket, read exclusively from rollups."""
+
+    desired_granularity = (
+        granularity
+        if isinstance(granularity, RollupGranularity)
+        else RollupGranularity(granularity)
+    )
+    if end < start:
+        raise ValueError("end must not be before start.")
+    first_bucket = bucket_start(start, desired_granularity)
+
+    if group_by == "role":
+        rows = role_rollup_repo.list_range(session, desired_granularity, first_bucket, end)
+        return [
+            {
+                "bucket_start": row.bucket_start,
+                "customer_role": row.customer_role,
+                "order_count": row.order_count,
+                "revenue": row.billed_amount,
+            }
+            for row in rows
+        ]
+    if group_by != "product":
+        raise ValueError(f"Unsupported grouping {group_by!r}.")
+
+    totals: dict[tuple[date, int], list[float]] = defaultdict(lambda: [0, 0, 0.0])
+    for row in product_rollup_repo.list_range(session, desired_granularity, first_bucket, end):
+        entry = totals[(row.bucket_start, row.product_id)]
+        entry[0] += row.order_count
+        entry[1] += row.quantity
+        entry[2] += row.revenue
+
+    product_ids = {product_id for _, product_id in totals}
+    product_names: dict[int, str] = {}
+    if product_ids:
+        product_names = dict(
+            session.exec(select(Product.id, Product.name).where(Product.id.in_(product_ids))).all()
+        )
+
+    return [
+        {
+            "bucket_start": bucket,
+            "product_id": product_id,
+            "product_name": product_names.get(product_id),
+            "order_count": int(order_count),
+            "quantity": int(quantity),
+            "revenue": revenue,
+        }
+        for (bucket, product_id), (order_count, quantity, revenue) in sorted(totals.items())
+    ]
+
+
+def rebuild_rollups(session: Session) -> int:
+    """Recompute every rollup from billed orders and return the number of orders folded in."""
+
+    billed_rows = session.exec(
+        select(
+            Billing.sales_order_id,
+            Billing.billed_date,
+            Billing.amount,
+            Customer.role,
+        )
+        .join(SalesOrder, SalesOrder.id == Billing.sales_order_id)
+        .join(Customer, Customer.id == SalesOrder.customer_id)
+        .where(SalesOrder.status == SalesOrderStatus.billed)
+    ).all()
+    billed_orders = {
+        row.sales_order_id: (row.billed_date.date(), row.role or UNKNOWN_ROLE, row.amount)
+        for row in billed_rows
+        if row.billed_date is not None
+    }
+
+    item_rows = session.exec(
+        select(
+            SalesOrderItem.sales_order_id,
+            SalesOrderItem.product_id,
+            func.sum(SalesOrderItem.quantity).label("quantity"),
+            func.sum(SalesOrderItem.subtotal).label("revenue"),
+        )
+        .join(SalesOrder, SalesOrder.id == SalesOrderItem.sales_order_id)
+        .where(SalesOrder.status == SalesOrderStatus.billed)
+        .group_by(SalesOrderItem.sales_order_id, SalesOrderItem.product_id)
+    ).all()
+
+    role_totals: dict[tuple[RollupGranularity, date, str], list[float]] = defaultdict(
+        lambda: [0, 0.0]
+    )
+    product_totals: dict[tuple[RollupGranularity, date, int, str], list[float]] = defaultdict(
+        lambda: [0, 0, 0.0]
+    )
+    for billed_day, role, amount in billed_orders.values():
+        for granularity in RollupGranularity:
+            entry = role_totals[(granularity, bucket_start(billed_day, granularity), role)]
+            entry[0] += 1
+            entry[1] += amount
+    for row in item_rows:
+        if row.sales_order_id not in billed_orders:
+            continue
+        billed_day, role, _ = billed_orders[row.sales_order_id]
+        for granularity in RollupGranularity:
+            key = (granularity, bucket_start(billed_day, granularity), row.product_id, role)
+            entry = product_totals[key]
+            entry[0] += 1
+            entry[1] += int(row.quantity or 0)
+            entry[2] += float(row.revenue or 0.0)
+
+    try:
+        session.exec(delete(ProductSalesRollup))
+        session.exec(delete(RoleRevenueRollup))
+        session.add_all(
+            RoleRevenueRollup(
+                granularity=granularity,
+                bucket_start=bucket,
+                customer_role=role,
+                order_count=int(order_count),
+                billed_amount=amount,
+            )
+            for (granularity, bucket, role), (order_count, amount) in role_totals.items()
+        )
+        session.add_all(
+            ProductSalesRollup(
+                granularity=granularity,
+                bucket_start=bucket,
+                product_id=product_id,
+                customer_role=role,
+                order_count=int(order_count),
+                quantity=int(quantity),
+                revenue=revenue,
+            )
+            for (granularity, bucket, product_id, role), (order_count, quantity, revenue)
+            in product_totals.items()
+        )
+        session.commit()
+    except Exception:
+        session.rollback()
+        logger.exception("Failed to rebuild analytics rollups")
+        raise
+
+    logger.info("Rebuilt analytics rollups from %d billed order(s)", len(billed_orders))
+    return len(billed_orders)
+
+
+def ensure_rollups(session: Session) -> None:
+    """Backfill rollups when they are empty but billed history already exists."""
+
+    has_rollups = session.exec(select(RoleRevenueRollup.order_count).limit(1)).first()
+    if has_rollups is not None:
+        return
+    has_billed = session.exec(
+        select(SalesOrder.id).where(SalesOrder.status == SalesOrderStatus.billed).limit(1)
+    ).first()
+    if has_billed is not None:
+        rebuild_rollups(session)
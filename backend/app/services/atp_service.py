@@ -0,0 +1,370 @@
+"""Available-to-promise service quoting completion dates from a capacity index."""
+
+from __future__ import annotations
+
+import bisect
+import itertools
+import logging
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import date
+from typing import Any
+
+from sqlalchemy import event
+from sqlmodel import Session
+
+from app.models import ProductCapacity, current_utc_time
+from app.repositories.capacity_commitment_repository import CapacityCommitmentRepository
+from app.repositories.product_capacity_repository import ProductCapacityRepository
+from app.repositories.product_repository import ProductRepository
+from app.services import event_hub
+
+logger = logging.getLogger(__name__)
+
+product_repo = ProductRepository()
+capacity_repo = ProductCapacityRepository()
+commitment_repo = CapacityCommitmentRepository()
+
+DEFAULT_DAILY_CAPACITY = int(os.getenv("ATP_DEFAULT_DAILY_CAPACITY", "20"))
+
+_UNDO_KEY = "atp_service.undo"
+_RELEASE_KEY = "atp_service.release"
+
+Allocation = tuple[int, int]  # (day ordinal, quantity)
+
+
+def _today() -> int:
+    return current_utc_time().date().toordinal()
+
+
+class ProductLoad:
+    """Committed quantity per day for one product.
+
+    Days after ``frontier`` carry no commitments, so the tail of any quote is
+    plain arithmetic. Days before the frontier that still have spare capacity
+    (left behind by cancellations or early completions) are kept in the sorted
+    ``holes`` list and are filled first, which keeps a quote proportional to the
+    number of holes rather than to the length of the order book.
+    """
+
+    def __init__(self, daily_capacity: int, lead_time_days: int = 0) -> None:
+        self.daily_capacity = daily_capacity
+        self.lead_time_days = lead_time_days
+        self.committed: dict[int, int] = {}
+        self.frontier = 0
+        self.holes: list[int] = []
+
+    def rebuild_holes(self, first_day: int) -> None:
+        """Recompute the frontier and holes from ``committed``, ignoring days before ``first_day``."""
+        self.frontier = max(self.committed, default=0)
+        self.holes = [
+            day
+            for day in range(first_day, self.frontier)
+            if self.committed.get(day, 0) < self.daily_capacity
+        ]
+
+    def plan(self, quantity: int, today: int) -> list[Allocation]:
+        """Return the earliest ``(day, quantity)`` allocations covering ``quantity``."""
+        earliest = today + self.lead_time_days
+        del self.holes[: bisect.bisect_left(self.holes, earliest)]
+
+        allocations: list[Allocation] = []
+        remaining = quantity
+        for day in self.holes:
+            free = self.daily_capacity - self.committed.get(day, 0)
+            if free <= 0:
+                continue
+            take = min(free, remaining)
+            allocations.append((day, take))
+            remaining -= take
+            if not remaining:
+                return allocations
+
+        day = max(self.frontier, earliest)
+        free = self.daily_capacity - self.committed.get(day, 0)
+        if free > 0:
+            take = min(free, remaining)
+            allocations.append((day, take))
+            remaining -= take
+        full_days, rest = divmod(remaining, self.daily_capacity)
+        allocations.extend((day + offset, self.daily_capacity) for offset in range(1, full_days + 1))
+        if rest:
+            allocations.append((day + full_days + 1, rest))
+        return allocations
+
+    def promise(self, quantity: int, today: int) -> int:
+        """Return the day ``quantity`` more units would be finished, without listing every day."""
+        earliest = today + self.lead_time_days
+        remaining = quantity
+        for day in self.holes[bisect.bisect_left(self.holes, earliest) :]:
+            remaining -= max(self.daily_capacity - self.committed.get(day, 0), 0)
+            if remaining <= 0:
+                return day
+        day = max(self.frontier, earliest)
+        remaining -= max(self.daily_capacity - self.committed.get(day, 0), 0)
+        if remaining <= 0:
+            return day
+        return day + math.ceil(remaining / self.daily_capacity)
+
+    def apply(self, allocations: Iterable[Allocation], sign: int) -> None:
+        """Add (``sign=1``) or remove (``sign=-1``) allocations."""
+        for day, quantity in allocations:
+            committed = self.committed.get(day, 0) + sign * quantity
+            if committed > 0:
+                self.committed[day] = committed
+            else:
+                self.committed.pop(day, None)
+            if sign > 0:
+                self.frontier = max(self.frontier, day)
+            elif day < self.frontier and committed < self.daily_capacity:
+                index = bisect.bisect_left(self.holes, day)
+                if index == len(self.holes) or self.holes[index] != day:
+                    self.holes.insert(index, day)
+        if sign > 0:
+            self.holes = [
+                day for day in self.holes if self.committed.get(day, 0) < self.daily_capacity
+            ]
+
+
+class AtpIndex:
+    """In-memory per-product, per-day capacity and commitment index.
+
+    Bookings are applied immediately (so concurrent requests in this process see
+    them) and stay pending until their session ends: ``settle`` keeps them on
+    commit and reverts them on rollback. Releases are applied once the session
+    commits. The index is rebuilt from ``capacity_commitment`` when used with a
+    different database or after ``reload_interval`` seconds, bounding drift from
+    writes made by other worker processes; pending bookings are not in the
+    database yet, so a rebuild applies them again.
+    """
+
+    def __init__(self, reload_interval: float = 300.0) -> None:
+        self.reload_interval = reload_interval
+        self._lock = threading.RLock()
+        self._bind: Any = None
+        self._loaded_at = 0.0
+        self._loads: dict[int, ProductLoad] = {}
+        self._pending: dict[int, tuple[int, list[Allocation]]] = {}
+        self._booking_ids = itertools.count(1)
+
+    def ensure_loaded(self, session: Session) -> None:
+        """Build the index from the database if it is missing or stale."""
+        bind = session.get_bind()
+        with self._lock:
+            if self._bind is bind and time.monotonic() - self._loaded_at < self.reload_interval:
+                return
+            today = _today()
+            loads = {
+                capacity.product_id: ProductLoad(capacity.daily_capacity, capacity.lead_time_days)
+                for capacity in capacity_repo.list_all(session)
+            }
+            for product_id, day, committed in commitment_repo.load_from(
+                session, date.fromordinal(today)
+            ):
+                load = loads.get(product_id)
+                if load is None:
+                    load = loads[product_id] = ProductLoad(DEFAULT_DAILY_CAPACITY)
+                load.committed[day.toordinal()] = committed
+            for load in loads.values():
+                load.rebuild_holes(today)
+            if self._bind is not bind:
+                # Bookings against another database do not belong in this index.
+                self._pending.clear()
+            for product_id, allocations in self._pending.values():
+                load = loads.get(product_id)
+                if load is None:
+                    load = loads[product_id] = ProductLoad(DEFAULT_DAILY_CAPACITY)
+                load.apply(allocations, 1)
+            self._loads = loads
+            self._bind = bind
+            self._loaded_at = time.monotonic()
+        logger.info("Built ATP index for %d product(s)", len(loads))
+
+    def invalidate(self) -> None:
+        """Force a rebuild on next use."""
+        with self._lock:
+            self._loaded_at = -math.inf
+
+    def promise(self, product_id: int, quantity: int) -> date:
+        """Return the date ``quantity`` units of a product could be finished."""
+        with self._lock:
+            return date.fromordinal(self._load(product_id).promise(quantity, _today()))
+
+    def book(self, product_id: int, quantity: int) -> tuple[int, list[Allocation]]:
+        """Reserve capacity for ``quantity`` units; return a pending booking id and the allocations."""
+        with self._lock:
+            load = self._load(product_id)
+            allocations = load.plan(quantity, _today())
+            load.apply(allocations, 1)
+            booking_id = next(self._booking_ids)
+            self._pending[booking_id] = (product_id, allocations)
+            return booking_id, allocations
+
+    def settle(self, booking_id: int, *, committed: bool) -> None:
+        """End a pending booking, reverting it unless its transaction committed."""
+        with self._lock:
+            booking = self._pending.pop(booking_id, None)
+            if booking is not None and not committed:
+                self.release(*booking)
+
+    def release(self, product_id: int, allocations: Iterable[Allocation]) -> None:
+        """Return previously booked allocations to the free pool."""
+        with self._lock:
+            load = self._loads.get(product_id)
+            if load is not None:
+                load.apply(allocations, -1)
+
+    def _load(self, product_id: int) -> ProductLoad:
+        load = self._loads.get(product_id)
+        if load is None:
+            load = self._loads[product_id] = ProductLoad(DEFAULT_DAILY_CAPACITY)
+        return load
+
+
+atp_index = AtpIndex()
+
+
+def _combine(items: Iterable[tuple[int, int]]) -> dict[int, int]:
+    quantities: dict[int, int] = defaultdict(int)
+    for product_id, quantity in items:
+        if quantity <= 0:
+            raise ValueError("Item quantity must be greater than zero.")
+        quantities[product_id] += quantity
+    return quantities
+
+
+def quote(session: Session, items: Iterable[tuple[int, int]]) -> dict[str, Any]:
+    """Return the promise date for ``(product_id, quantity)`` pairs without booking."""
+
+    quantities = _combine(items)
+    if not quantities:
+        raise ValueError("At least one item is required to quote an order.")
+    for product_id in quantities:
+        product_repo.get_or_raise(session, product_id)
+
+    atp_index.ensure_loaded(session)
+    item_quotes = [
+        {
+            "product_id": product_id,
+            "quantity": quantity,
+            "promised_date": atp_index.promise(product_id, quantity),
+        }
+        for product_id, quantity in quantities.items()
+    ]
+    return {
+        "promised_date": max(item["promised_date"] for item in item_quotes),
+        "items": item_quotes,
+    }
+
+
+def commit_order(session: Session, sales_order_id: int, items: Iterable[tuple[int, int]]) -> date:
+    """Book capacity for a new sales order and return its promise date.
+
+    The commitment rows are staged without committing; if the caller rolls back,
+    the in-memory bookings are reverted as well.
+    """
+
+    atp_index.ensure_loaded(session)
+    rows: list[dict[str, Any]] = []
+    promised = _today()
+    for product_id, quantity in _combine(items).items():
+        booking_id, allocations = atp_index.book(product_id, quantity)
+        session.info.setdefault(_UNDO_KEY, []).append(booking_id)
+        rows.extend(
+            {
+                "sales_order_id": sales_order_id,
+                "product_id": product_id,
+                "day": date.fromordinal(day),
+                "quantity": booked,
+            }
+            for day, booked in allocations
+        )
+        promised = max(promised, allocations[-1][0])
+    commitment_repo.add_many(session, rows)
+    return date.fromordinal(promised)
+
+
+def release_order(session: Session, sales_order_id: int, *, after: date | None = None) -> None:
+    """Stage the release of a sales order's commitments.
+
+    With ``after`` only days after that date are released, e.g. the unused tail
+    of an order whose production finished early. Past days are never released.
+    """
+
+    first_day = date.fromordinal(max(_today(), after.toordinal() + 1 if after else 0))
+    commitments = commitment_repo.list_for_order(session, sales_order_id, from_day=first_day)
+    if not commitments:
+        return
+    released: dict[int, list[Allocation]] = defaultdict(list)
+    for commitment in commitments:
+        released[commitment.product_id].append((commitment.day.toordinal(), commitment.quantity))
+    commitment_repo.delete_for_order(session, sales_order_id, from_day=first_day)
+    session.info.setdefault(_RELEASE_KEY, []).extend(released.items())
+
+
+def forget_order(session: Session, sales_order_id: int) -> None:
+    """Stage removal of every commitment of a sales order that is being deleted.
+
+    Days still ahead go back to capacity as with ``release_order``; rows for
+    past days are deleted too, since they reference the order.
+    """
+
+    release_order(session, sales_order_id)
+    commitment_repo.delete_for_order(session, sales_order_id)
+
+
+def get_promised_dates(session: Session, sales_order_ids: Iterable[int]) -> dict[int, date]:
+    """Return the promise date of each sales order that has capacity booked."""
+
+    return commitment_repo.promised_dates(session, sales_order_ids)
+
+
+def set_product_capacity(
+    session: Session,
+    product_id: int,
+    daily_capacity: int,
+    lead_time_days: int = 0,
+    run_minutes: float = 30.0,
+) -> ProductCapacity:
+    """Configure a product's daily capacity, lead time and per-unit run time."""
+
+    if daily_capacity <= 0:
+        raise ValueError("daily_capacity must be greater than zero.")
+    if lead_time_days < 0:
+        raise ValueError("lead_time_days cannot be negative.")
+    if run_minutes <= 0:
+        raise ValueError("run_minutes must be greater than zero.")
+    product_repo.get_or_raise(session, product_id)
+    event_hub.publish_after_commit(session, "product_capacity", {"product_id": product_id})
+    capacity = capacity_repo.save(
+        session, product_id, daily_capacity, lead_time_days, run_minutes
+    )
+    atp_index.invalidate()
+    logger.info("Set capacity of product %s to %d/day", product_id, daily_capacity)
+    return capacity
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_releases(session: Session) -> None:
+    for booking_id in session.info.pop(_UNDO_KEY, []):
+        atp_index.settle(booking_id, committed=True)
+    for product_id, allocations in session.info.pop(_RELEASE_KEY, []):
+        atp_index.release(product_id, allocations)
+
+
+@event.listens_for(Session, "after_rollback")
+def _undo_bookings(session: Session) -> None:
+    session.info.pop(_RELEASE_KEY, None)
+    for booking_id in reversed(session.info.pop(_UNDO_KEY, [])):
+        atp_index.settle(booking_id, committed=False)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _undo_abandoned_bookings(session: Session, transaction: Any) -> None:
+    # Closing a session ends its transaction without an ``after_rollback``.
+    if transaction.parent is None:
+        _undo_bookings(session)
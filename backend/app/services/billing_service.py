@@ -2,23 +2,33 @@
 
 from __future__ import annotations
 
-import base64
 import logging
 import os
-import secrets
+from collections import defaultdict
 from datetime import UTC, datetime
-from typing import TYPE_CHECKING, Sequence
+from typing import TYPE_CHECKING, Any, Sequence
 
-import resend
-from fpdf import FPDF
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session
 
-from app.models import Billing, SalesOrderStatus
+from app.models import Billing, BillingRun, BillingRunStatus, SalesOrderStatus, current_utc_time
 from app.repositories.billing_repository import BillingRepository
+from app.repositories.billing_run_repository import BillingRunRepository
 from app.repositories.customer_repository import CustomerRepository
 from app.repositories.product_repository import ProductRepository
 from app.repositories.sales_order_item_repository import SalesOrderItemRepository
 from app.repositories.sales_order_repository import SalesOrderRepository
+from app.services import (
+    analytics_service,
+    credit_service,
+    email_outbox_service,
+    event_hub,
+    invoice_numbers,
+    invoice_pdf_store,
+    kpi_service,
+    pdf_render_pool,
+)
+from app.services.email_transport import EmailAttachment, EmailMessage
 from app.services.exceptions import EmailDeliveryError, InvalidTransitionError
 
 if TYPE_CHECKING:
@@ -31,6 +41,11 @@ sales_order_repo = SalesOrderRepository()
 sales_order_item_repo = SalesOrderItemRepository()
 customer_repo = CustomerRepository()
 product_repo = ProductRepository()
+billing_run_repo = BillingRunRepository()
+
+INVOICE_EMAIL = "invoice"
+SINGLE_RUN_INDEX = "ux_billing_run_running"
+BILLING_RUN_CHUNK_SIZE = int(os.getenv("BILLING_RUN_CHUNK_SIZE", "500"))
 
 
 def list_billings(session: Session) -> Sequence[Billing]:
@@ -45,19 +60,24 @@ def get_billing(session: Session, billing_id: int) -> Billing:
     return billing_repo.get_or_raise(session, billing_id)
 
 
-def _generate_invoice_number(timestamp: datetime) -> str:
-    """Return an invoice number following the `INV-{YYYY}-{random4}` format."""
-
-    random_suffix = f"{secrets.randbelow(10000):04d}"
-    return f"INV-{timestamp:%Y}-{random_suffix}"
-
+def generate_billing_for_order(
+    session: Session,
+    sales_order_id: int,
+    *,
+    send_invoice: bool = False,
+) -> Billing:
+    """Create a billing record for a delivered sales order and mark it billed.
 
-def generate_billing_for_order(session: Session, sales_order_id: int) -> Billing:
-    """Create a billing record for a delivered sales order and mark it billed."""
+    With ``send_invoice`` an invoice email is queued in the email outbox within
+    the same transaction, also when the order was billed before.
+    """
 
     order = sales_order_repo.get_or_raise(session, sales_order_id)
     existing = billing_repo.get_by_sales_order(session, sales_order_id)
     if existing is not None:
+        if send_invoice:
+            _queue_invoice_email(session, existing, order)
+            session.commit()
         return existing
 
     if order.status != SalesOrderStatus.delivered:
@@ -68,7 +88,7 @@ def generate_billing_for_order(session: Session, sales_order_id: int) -> Billing
         )
 
     billed_at = datetime.now(tz=UTC)
-    invoice_number = _generate_invoice_number(billed_at)
+    invoice_number = invoice_numbers.next_invoice_number(session, billed_at)
 
     try:
         billing = billing_repo.create(
@@ -79,8 +99,27 @@ def generate_billing_for_order(session: Session, sales_order_id: int) -> Billing
                 "amount": order.total_amount,
                 "billed_date": billed_at,
             },
+            commit=False,
+        )
+        if send_invoice:
+            _queue_invoice_email(session, billing, order)
+        event_hub.publish_billings_created(session, [billing.id])
+        credit_service.record_billed(session, [(order.customer_id, order.total_amount, billing.amount)])
+        analytics_service.record_order_billed(session, order, billed_at, billing.amount)
+        kpi_service.record_sales_order_transition(
+            session,
+            SalesOrderStatus.delivered,
+            SalesOrderStatus.billed,
         )
+        event_hub.publish_order_status(
+            session,
+            sales_order_id,
+            SalesOrderStatus.delivered,
+            SalesOrderStatus.billed,
+        )
+        # Commits the billing row (and any queued invoice email) with the status change.
         sales_order_repo.update_status(session, sales_order_id, SalesOrderStatus.billed)
+        session.refresh(billing)
         logger.info(
             "Generated invoice %s for sales order %s",
             billing.invoice_number,
@@ -100,134 +139,348 @@ def get_billing_for_order(session: Session, sales_order_id: int) -> Billing | No
 
 
 def generate_billing_and_send_invoice(session: Session, sales_order_id: int) -> Billing:
-    """Create or retrieve billing for a sales order and send the invoice via email."""
+    """Create or retrieve billing for a sales order and queue the invoice email.
+
+    The email is delivered by the outbox worker, so a slow or failing provider
+    never holds up the request or undoes the billing.
+    """
+
+    return generate_billing_for_order(session, sales_order_id, send_invoice=True)
+
+
+def start_billing_run(
+    session: Session,
+    *,
+    send_invoices: bool = False,
+    chunk_size: int = BILLING_RUN_CHUNK_SIZE,
+) -> dict[str, Any]:
+    """Bill every delivered sales order that has no billing yet and return the run report.
+
+    Orders are taken in id order, ``chunk_size`` at a time. Each chunk is one
+    transaction: a single guarded ``delivered -> billed`` update, one multi-row
+    billing insert, grouped analytics and KPI increments, optional invoice
+    emails in the outbox, and the run's cursor. After each commit the chunk's
+    invoice PDFs are rendered in the PDF render pool into the invoice store. A run
+    that fails or is interrupted keeps its cursors and is continued with
+    ``resume_billing_run``; only one run may be in progress at a time.
+    """
+
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1.")
+    running = billing_run_repo.get_running(session)
+    if running is not None:
+        raise ValueError(f"Billing run {running.id} is still running; resume it instead.")
+    try:
+        run = billing_run_repo.create(
+            session, {"send_invoices": send_invoices, "chunk_size": chunk_size}
+        )
+    except IntegrityError:
+        # Another run started since the check; the partial unique index refused this one.
+        session.rollback()
+        raise ValueError("Another billing run is still running; resume it instead.")
+    logger.info("Started billing run %s", run.id)
+    return _execute_billing_run(session, run)
 
-    billing = generate_billing_for_order(session, sales_order_id)
-    order = sales_order_repo.get_or_raise(session, sales_order_id)
-    customer = order.customer or customer_repo.get(session, order.customer_id)
-    if customer is None:
-        raise ValueError(f"Customer {order.customer_id} not found for sales order {order.id}.")
 
-    items = sales_order_item_repo.list_by_order(session, sales_order_id)
-    line_items: list[dict[str, str | int | float]] = []
-    for item in items:
-        product = product_repo.get(session, item.product_id)
-        product_name = getattr(product, "name", f"Product #{item.product_id}")
-        line_items.append(
-            {
-                "name": product_name,
-                "quantity": item.quantity,
-                "subtotal": item.subtotal,
-            }
+def resume_billing_run(
+    session: Session,
+    run_id: int,
+) -> dict[str, Any]:
+    """Continue a failed or interrupted billing run from its committed cursors."""
+
+    run = billing_run_repo.get_or_raise(session, run_id)
+    if run.status == BillingRunStatus.completed:
+        raise ValueError(f"Billing run {run_id} is already completed.")
+    try:
+        billing_run_repo.advance(
+            session,
+            run_id,
+            {"status": BillingRunStatus.running, "last_error": None, "finished_at": None},
         )
+        session.commit()
+    except IntegrityError:
+        session.rollback()
+        raise ValueError("Another billing run is still running; resume it instead.")
+    logger.info("Resuming billing run %s after sales order %s", run_id, run.billed_through)
+    return _execute_billing_run(session, run)
 
-    pdf_bytes = _build_invoice_pdf(billing, order, customer, line_items)
 
+def ensure_single_run_index(session: Session) -> None:
+    """Create the one-running-run index on databases that predate it.
+
+    Databases already holding several running runs keep working without the
+    index; the runs are logged to be resumed or failed by hand.
+    """
+
+    index = next(index for index in BillingRun.__table__.indexes if index.name == SINGLE_RUN_INDEX)
     try:
-        _send_invoice_email(billing, order, customer, pdf_bytes)
-    except EmailDeliveryError:
-        raise
-    except Exception as exc:  # pragma: no cover - unexpected errors should be surfaced
-        logger.exception("Unexpected error while sending invoice email for order %s", order.id)
-        raise EmailDeliveryError("Failed to send invoice email.") from exc
+        index.create(session.connection(), checkfirst=True)
+        session.commit()
+    except IntegrityError:
+        session.rollback()
+        logger.error("Cannot create %s: several billing runs are running", SINGLE_RUN_INDEX)
 
-    return billing
 
+def list_billing_runs(session: Session, limit: int = 50) -> list[dict[str, Any]]:
+    """Return reports of recent billing runs, newest first."""
 
-def _build_invoice_pdf(
-    billing: Billing,
-    order: "SalesOrder",
-    customer: "Customer",
-    line_items: Sequence[dict[str, str | int | float]],
-) -> bytes:
-    """Return a PDF document containing invoice details as bytes."""
+    return [_billing_run_report(run) for run in billing_run_repo.list_recent(session, limit)]
 
-    billed_at = billing.billed_date or datetime.now(tz=UTC)
 
-    pdf = FPDF()
-    pdf.set_auto_page_break(auto=True, margin=15)
-    pdf.add_page()
+def get_billing_run(session: Session, run_id: int) -> dict[str, Any]:
+    """Return the report of one billing run."""
 
-    pdf.set_font("Helvetica", "B", 18)
-    pdf.cell(0, 10, "Invoice", ln=True)
+    return _billing_run_report(billing_run_repo.get_or_raise(session, run_id))
 
-    pdf.set_font("Helvetica", size=12)
-    pdf.cell(0, 8, f"Invoice Number: {billing.invoice_number}", ln=True)
-    pdf.cell(0, 8, f"Invoice Date: {billed_at:%Y-%m-%d %H:%M %Z}", ln=True)
-    pdf.ln(4)
-    pdf.cell(0, 8, f"Bill To: {customer.name}", ln=True)
-    pdf.cell(0, 8, f"Email: {customer.email}", ln=True)
-    pdf.ln(6)
 
-    pdf.set_font("Helvetica", "B", 12)
-    pdf.cell(100, 8, "Item", border=1)
-    pdf.cell(30, 8, "Quantity", border=1, align="R")
-    pdf.cell(40, 8, "Subtotal", border=1, align="R", ln=True)
+def _execute_billing_run(session: Session, run: BillingRun) -> dict[str, Any]:
+    try:
+        # Catch up on PDFs of chunks billed before an interruption.
+        _render_billing_run_invoices(session, run)
+        while _bill_next_chunk(session, run):
+            _render_billing_run_invoices(session, run)
+        billing_run_repo.advance(
+            session,
+            run.id,
+            {"status": BillingRunStatus.completed, "finished_at": current_utc_time()},
+        )
+        session.commit()
+    except Exception as exc:
+        session.rollback()
+        logger.exception("Billing run %s failed", run.id)
+        billing_run_repo.advance(
+            session,
+            run.id,
+            {
+                "status": BillingRunStatus.failed,
+                "last_error": str(exc)[:500],
+                "finished_at": current_utc_time(),
+            },
+        )
+        session.commit()
+        raise
+    session.refresh(run)
+    logger.info(
+        "Billing run %s completed: %d order(s) billed, %d invoice(s) rendered",
+        run.id,
+        run.orders_billed,
+        run.invoices_rendered,
+    )
+    return _billing_run_report(run)
 
-    pdf.set_font("Helvetica", size=12)
-    for entry in line_items:
-        pdf.cell(100, 8, str(entry["name"]), border=1)
-        pdf.cell(30, 8, f"{entry['quantity']}", border=1, align="R")
-        pdf.cell(40, 8, f"{entry['subtotal']:.2f}", border=1, align="R", ln=True)
 
-    pdf.ln(6)
-    pdf.set_font("Helvetica", "B", 12)
-    pdf.cell(130, 8, "Total", border=1)
-    pdf.cell(40, 8, f"{billing.amount:.2f}", border=1, align="R", ln=True)
+def _bill_next_chunk(session: Session, run: BillingRun) -> int:
+    """Bill the next chunk of candidates in one transaction; return how many were examined."""
 
-    output = pdf.output(dest="S")
-    return output
+    candidates = {
+        row.id: row
+        for row in billing_repo.list_unbilled_delivered(session, run.billed_through, run.chunk_size)
+    }
+    if not candidates:
+        return 0
 
+    # Orders changed concurrently are skipped by the guarded update, never billed twice.
+    order_ids = sales_order_repo.transition_many(
+        session,
+        SalesOrderStatus.delivered,
+        SalesOrderStatus.billed,
+        order_ids=list(candidates),
+    )
+    billed_at = current_utc_time()
+    numbers = invoice_numbers.allocator.allocate(session, billed_at, len(order_ids))
+    created = billing_repo.create_many(
+        session,
+        [
+            {
+                "sales_order_id": order_id,
+                "invoice_number": invoice_number,
+                "amount": candidates[order_id].total_amount,
+                "billed_date": billed_at,
+            }
+            for order_id, invoice_number in zip(order_ids, numbers)
+        ],
+    )
+    billing_ids = [billing_id for billing_id, _ in created]
+    billing_run_repo.add_invoices(session, run.id, billing_ids)
+    event_hub.publish_billings_created(session, billing_ids)
+    credit_service.record_billed(
+        session,
+        [(row.customer_id, row.total_amount, row.total_amount) for row in map(candidates.get, order_ids)],
+    )
+    analytics_service.record_orders_billed(
+        session,
+        [
+            (order_id, candidates[order_id].customer_role, candidates[order_id].total_amount)
+            for order_id in order_ids
+        ],
+        billed_at,
+    )
+    if order_ids:
+        kpi_service.record_sales_order_transition(
+            session,
+            SalesOrderStatus.delivered,
+            SalesOrderStatus.billed,
+            count=len(order_ids),
+        )
+    for order_id in order_ids:
+        event_hub.publish_order_status(
+            session,
+            order_id,
+            SalesOrderStatus.delivered,
+            SalesOrderStatus.billed,
+        )
+    if run.send_invoices:
+        for billing_id, order_id in created:
+            email_outbox_service.enqueue(
+                session,
+                INVOICE_EMAIL,
+                billing_id,
+                candidates[order_id].customer_email or "",
+            )
+
+    billing_run_repo.advance(
+        session,
+        run.id,
+        {"billed_through": max(candidates)},
+        orders_billed=len(order_ids),
+        total_amount=sum(candidates[order_id].total_amount for order_id in order_ids),
+        invoices_queued=len(created) if run.send_invoices else 0,
+    )
+    session.commit()
+    logger.info("Billing run %s billed %d sales order(s)", run.id, len(order_ids))
+    return len(candidates)
+
+
+def _render_billing_run_invoices(session: Session, run: BillingRun) -> None:
+    """Render the run's invoices not yet in the invoice store, a chunk at a time."""
+
+    store = invoice_pdf_store.invoice_store
+    while rows := billing_run_repo.list_unrendered(session, run.id, run.rendered_through, run.chunk_size):
+        missing = [row for row in rows if store.get(row.id) is None]
+        line_items: dict[int, list[dict[str, Any]]] = defaultdict(list)
+        for line in sales_order_item_repo.list_invoice_lines(session, [row.sales_order_id for row in missing]):
+            line_items[line.sales_order_id].append(
+                {"name": line.name, "quantity": line.quantity, "subtotal": line.subtotal}
+            )
+        payloads = [
+            pdf_render_pool.invoice_payload(
+                invoice_number=row.invoice_number,
+                billed_at=row.billed_date,
+                customer_name=row.customer_name,
+                customer_email=row.customer_email,
+                line_items=line_items[row.sales_order_id],
+                amount=row.amount,
+            )
+            for row in missing
+        ]
+        # Do not hold the read transaction open while the pool renders.
+        session.rollback()
+        for row, pdf_bytes in zip(missing, pdf_render_pool.render_pool.render_many(payloads)):
+            store.put(row.id, pdf_bytes)
+
+        billing_run_repo.advance(
+            session,
+            run.id,
+            {"rendered_through": rows[-1].id},
+            invoices_rendered=len(missing),
+        )
+        session.commit()
+
+
+def _billing_run_report(run: BillingRun) -> dict[str, Any]:
+    finished = run.finished_at
+    return {
+        "id": run.id,
+        "status": run.status,
+        "send_invoices": run.send_invoices,
+        "chunk_size": run.chunk_size,
+        "orders_billed": run.orders_billed,
+        "total_amount": run.total_amount,
+        "invoices_rendered": run.invoices_rendered,
+        "invoices_queued": run.invoices_queued,
+        "billed_through_order_id": run.billed_through,
+        "last_error": run.last_error,
+        "started_at": run.started_at,
+        "finished_at": finished,
+        "duration_seconds": (
+            (finished - run.started_at).total_seconds() if finished is not None else None
+        ),
+    }
+
+
+def _queue_invoice_email(session: Session, billing: Billing, order: "SalesOrder") -> None:
+    customer = order.customer or customer_repo.get(session, order.customer_id)
+    if customer is None:
+        raise ValueError(f"Customer {order.customer_id} not found for sales order {order.id}.")
+    email_outbox_service.enqueue(session, INVOICE_EMAIL, billing.id, customer.email or "")
+
+
+def get_invoice_pdf(session: Session, billing_id: int) -> invoice_pdf_store.StoredPdf:
+    """Return the stored invoice PDF of a billing, rendering and storing it on a miss."""
+
+    store = invoice_pdf_store.invoice_store
+    stored = store.get(billing_id)
+    if stored is not None:
+        return stored
+    billing = billing_repo.get_or_raise(session, billing_id)
+    order = sales_order_repo.get_or_raise(session, billing.sales_order_id)
+    customer = order.customer or customer_repo.get_or_raise(session, order.customer_id)
+    return store.put(billing_id, _build_invoice_pdf(session, billing, order, customer))
 
-def _send_invoice_email(
-    billing: Billing,
-    order: "SalesOrder",
-    customer: "Customer",
-    pdf_bytes: bytes,
-) -> None:
-    """Send the generated invoice PDF via Resend email service."""
 
-    api_key = os.getenv("RESEND_API_KEY")
-    if not api_key:
-        raise EmailDeliveryError("RESEND_API_KEY environment variable is not set.")
+def compose_invoice_email(session: Session, billing_id: int, recipient: str) -> EmailMessage:
+    """Build the invoice email with its stored PDF attached for the email outbox."""
 
     sender = os.getenv("BILLING_FROM_EMAIL")
     if not sender:
         raise EmailDeliveryError("BILLING_FROM_EMAIL environment variable is not set.")
+    if not recipient:
+        raise EmailDeliveryError("Customer email address is missing.", retryable=False)
+
+    billing = billing_repo.get_or_raise(session, billing_id)
+    order = sales_order_repo.get_or_raise(session, billing.sales_order_id)
+    customer = order.customer or customer_repo.get_or_raise(session, order.customer_id)
+    pdf_bytes = get_invoice_pdf(session, billing_id).path.read_bytes()
+    return EmailMessage(
+        sender=sender,
+        to=(recipient,),
+        subject=f"Invoice {billing.invoice_number} for Sales Order #{order.id}",
+        html=_render_invoice_email_html(billing, customer),
+        attachments=(EmailAttachment(f"{billing.invoice_number}.pdf", pdf_bytes),),
+    )
 
-    if not customer.email:
-        raise EmailDeliveryError("Customer email address is missing.")
 
-    resend.api_key = api_key
+def _build_invoice_pdf(
+    session: Session,
+    billing: Billing,
+    order: "SalesOrder",
+    customer: "Customer",
+) -> bytes:
+    """Return a PDF document containing invoice details as bytes.
 
-    attachment_b64 = base64.b64encode(pdf_bytes).decode("ascii")
-    subject = f"Invoice {billing.invoice_number} for Sales Order #{order.id}"
-    html_body = _render_invoice_email_html(billing, customer)
+    Layout runs in the PDF render pool; this thread only waits for the bytes.
+    """
 
-    try:
-        resend.Emails.send(
+    line_items: list[dict[str, str | int | float]] = []
+    for item in sales_order_item_repo.list_by_order(session, order.id):
+        product = product_repo.get(session, item.product_id)
+        product_name = getattr(product, "name", f"Product #{item.product_id}")
+        line_items.append(
             {
-                "from": sender,
-                "to": [customer.email],
-                "subject": subject,
-                "html": html_body,
-                "attachments": [
-                    {
-                        "filename": f"{billing.invoice_number}.pdf",
-                        "content": attachment_b64,
-                        "content_type": "application/pdf",
-                    }
-                ],
+                "name": product_name,
+                "quantity": item.quantity,
+                "subtotal": item.subtotal,
             }
         )
-    except Exception as exc:  # pragma: no cover - depends on external service
-        raise EmailDeliveryError("Resend failed to send the invoice email.") from exc
-    logger.info(
-        "Sent invoice %s to %s for sales order %s",
-        billing.invoice_number,
-        customer.email,
-        order.id,
+    payload = pdf_render_pool.invoice_payload(
+        invoice_number=billing.invoice_number,
+        billed_at=billing.billed_date or datetime.now(tz=UTC),
+        customer_name=customer.name,
+        customer_email=customer.email,
+        line_items=line_items,
+        amount=billing.amount,
     )
+    return pdf_render_pool.render_pool.render(payload)
 
 
 def _render_invoice_email_html(billing: Billing, customer: "Customer") -> str:
@@ -243,3 +496,6 @@ def _render_invoice_email_html(billing: Billing, customer: "Customer") -> str:
         "<p>Please settle the payment at your earliest convenience.</p>"
         "<p>Best regards,<br/>Mapúa MTO Billing Team</p>"
     )
+
+
+email_outbox_service.register_composer(INVOICE_EMAIL, compose_invoice_email)
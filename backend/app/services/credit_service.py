@@ -0,0 +1,153 @@
+"""Customer credit limits and incrementally maintained credit exposure."""
+
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+from sqlmodel import Session, select
+
+from app.models import CustomerCredit, SalesOrder
+from app.repositories.billing_repository import BillingRepository
+from app.repositories.customer_credit_repository import CustomerCreditRepository
+from app.repositories.customer_repository import CustomerRepository
+from app.services.exceptions import CreditLimitExceededError
+
+logger = logging.getLogger(__name__)
+
+billing_repo = BillingRepository()
+credit_repo = CustomerCreditRepository()
+customer_repo = CustomerRepository()
+
+
+def reserve_order(session: Session, customer_id: int, amount: float) -> None:
+    """Stage a new order's value as open exposure, or raise if it breaks the customer's limit.
+
+    The check is one guarded single-row update; only when it does not apply is
+    the row read to tell a missing row (no limit yet) from an exceeded limit.
+    """
+
+    if credit_repo.try_reserve(session, customer_id, amount):
+        return
+    balance = credit_repo.get_balance(session, customer_id)
+    if balance is not None:
+        raise CreditLimitExceededError(
+            customer_id,
+            amount,
+            balance.open_order_amount + balance.receivable_amount,
+            balance.credit_limit,
+        )
+    credit_repo.upsert_increment(session, {"customer_id": customer_id}, {"open_order_amount": amount})
+
+
+def release_order(session: Session, customer_id: int, amount: float) -> None:
+    """Stage removing a cancelled or deleted order's value from open exposure."""
+
+    credit_repo.upsert_increment(session, {"customer_id": customer_id}, {"open_order_amount": -amount})
+
+
+def record_billed(session: Session, billed: Iterable[tuple[int, float, float]]) -> None:
+    """Stage moving billed orders from open orders to receivables.
+
+    ``billed`` holds ``(customer_id, order_amount, billed_amount)`` per billing;
+    balances are aggregated per customer into one upsert.
+    """
+
+    totals: dict[int, list[float]] = defaultdict(lambda: [0.0, 0.0])
+    for customer_id, order_amount, billed_amount in billed:
+        totals[customer_id][0] -= order_amount
+        totals[customer_id][1] += billed_amount
+    credit_repo.upsert_increment_many(
+        session,
+        ["customer_id"],
+        [
+            {"customer_id": customer_id, "open_order_amount": open_delta, "receivable_amount": receivable_delta}
+            for customer_id, (open_delta, receivable_delta) in totals.items()
+        ],
+    )
+
+
+def record_payments(session: Session, applied: Mapping[int, float]) -> None:
+    """Stage reducing receivables by the payment amounts applied per customer."""
+
+    credit_repo.upsert_increment_many(
+        session,
+        ["customer_id"],
+        [
+            {"customer_id": customer_id, "receivable_amount": -amount}
+            for customer_id, amount in applied.items()
+            if amount
+        ],
+    )
+
+
+def get_credit_status(session: Session, customer_id: int) -> dict[str, Any]:
+    """Return the customer's limit, exposure and remaining credit from their balance row."""
+
+    customer_repo.get_or_raise(session, customer_id)
+    balance = credit_repo.get_balance(session, customer_id)
+    credit_limit = balance.credit_limit if balance is not None else None
+    open_orders = round(balance.open_order_amount, 2) if balance is not None else 0.0
+    receivable = round(balance.receivable_amount, 2) if balance is not None else 0.0
+    exposure = round(open_orders + receivable, 2)
+    return {
+        "customer_id": customer_id,
+        "credit_limit": credit_limit,
+        "open_order_amount": open_orders,
+        "receivable_amount": receivable,
+        "exposure": exposure,
+        "available_credit": round(credit_limit - exposure, 2) if credit_limit is not None else None,
+    }
+
+
+def set_credit_limit(session: Session, customer_id: int, credit_limit: float | None) -> dict[str, Any]:
+    """Set or clear (``None``) a customer's credit limit."""
+
+    if credit_limit is not None and credit_limit < 0:
+        raise ValueError("Credit limit cannot be negative.")
+    customer_repo.get_or_raise(session, customer_id)
+    try:
+        credit_repo.set_limit(session, customer_id, credit_limit)
+        session.commit()
+    except Exception:
+        session.rollback()
+        logger.exception("Failed to set credit limit of customer %s", customer_id)
+        raise
+    return get_credit_status(session, customer_id)
+
+
+def rebuild_balances(session: Session) -> None:
+    """Recompute every customer's exposure from orders, billings and payments."""
+
+    try:
+        credit_repo.reset_balances(session)
+        balances: dict[int, dict[str, Any]] = {}
+        for field, rows in (
+            ("open_order_amount", billing_repo.unbilled_order_amounts_by_customer(session)),
+            ("receivable_amount", billing_repo.receivables_by_customer(session)),
+        ):
+            for row in rows:
+                balance = balances.setdefault(
+                    row.customer_id,
+                    {"customer_id": row.customer_id, "open_order_amount": 0.0, "receivable_amount": 0.0},
+                )
+                balance[field] = float(row.amount or 0.0)
+        credit_repo.upsert_increment_many(session, ["customer_id"], list(balances.values()))
+        session.commit()
+    except Exception:
+        session.rollback()
+        logger.exception("Failed to rebuild customer credit balances")
+        raise
+    logger.info("Rebuilt credit balances of %d customer(s)", len(balances))
+
+
+def ensure_balances(session: Session) -> None:
+    """Backfill balances when none exist yet but orders already do."""
+
+    has_balances = session.exec(select(CustomerCredit.customer_id).limit(1)).first()
+    if has_balances is not None:
+        return
+    if session.exec(select(SalesOrder.id).limit(1)).first() is not None:
+        rebuild_balances(session)
@@ -2,13 +2,13 @@
 
 from __future__ import annotations
 
-from typing import Sequence
+from typing import Any, Sequence
 
-from sqlalchemy import func
 from sqlmodel import Session
 
 from app.models import Customer
 from app.repositories.customer_repository import CustomerRepository
+from app.services.search_index import customer_index
 
 customer_repo = CustomerRepository()
 
@@ -22,7 +22,20 @@ def list_customers(
 
     filters = None
     if search:
-        pattern = f"%{search.lower()}%"
-        filters = [func.lower(Customer.name).like(pattern)]
+        customer_index.ensure_built(session)
+        customer_ids = customer_index.search(search)
+        if not customer_ids:
+            return []
+        filters = [Customer.id.in_(customer_ids)]
 
     return customer_repo.list(session, filters=filters)
+
+
+def autocomplete_customers(session: Session, query: str, *, limit: int = 10) -> list[dict[str, Any]]:
+    """Return customer suggestions for ``query`` straight from the search index."""
+
+    customer_index.ensure_built(session)
+    return [
+        {"id": customer_id, "label": name}
+        for customer_id, name in customer_index.autocomplete(query, limit=limit)
+    ]
@@ -4,53 +4,25 @@ from __future__ import annotations
 
 from typing import Any, Dict, List
 
-from sqlalchemy import desc, func
+from sqlalchemy import desc
 from sqlmodel import Session, select
 
 from app.models import (
     Customer,
     Product,
-    ProductionOrder,
     ProductionOrderStatus,
     SalesOrder,
     SalesOrderStatus,
-    SalesOrderItem,
 )
+from app.services import kpi_service, order_fact_cache
 
 
-def get_dashboard_summary(session: Session) -> Dict[str, Any]:
-    """Return aggregated statistics for the dashboard summary endpoint."""
+def get_top_products(session: Session, *, limit: int = 5) -> List[Dict[str, Any]]:
+    """Return the most ordered products by quantity, computed from the fact cache."""
 
-    total_orders = session.exec(
-        select(func.count()).select_from(SalesOrder)
-    ).one()
-    in_production = session.exec(
-        select(func.count()).select_from(ProductionOrder).where(
-            ProductionOrder.status == ProductionOrderStatus.in_progress
-        )
-    ).one()
-    ready_for_delivery = session.exec(
-        select(func.count())
-        .select_from(SalesOrder)
-        .where(SalesOrder.status == SalesOrderStatus.ready_for_delivery)
-    ).one()
-    billed = session.exec(
-        select(func.count())
-        .select_from(SalesOrder)
-        .where(SalesOrder.status == SalesOrderStatus.billed)
-    ).one()
-
-    top_products_rows = session.exec(
-        select(
-            SalesOrderItem.product_id,
-            func.sum(SalesOrderItem.quantity).label("orders"),
-        )
-        .group_by(SalesOrderItem.product_id)
-        .order_by(desc("orders"))
-        .limit(5)
-    ).all()
+    top_products_rows = order_fact_cache.get_fact_cache(session).top_products(limit=limit)
 
-    product_ids = [row.product_id for row in top_products_rows]
+    product_ids = [product_id for product_id, _ in top_products_rows]
     product_names: Dict[int, str] = {}
     if product_ids:
         product_name_rows = session.exec(
@@ -58,15 +30,31 @@ def get_dashboard_summary(session: Session) -> Dict[str, Any]:
         ).all()
         product_names = {row.id: row.name for row in product_name_rows}
 
-    top_products: List[Dict[str, Any]] = [
+    return [
         {
-            "product_id": row.product_id,
-            "name": product_names.get(row.product_id),
-            "orders": int(row.orders or 0),
+            "product_id": product_id,
+            "name": product_names.get(product_id),
+            "orders": quantity,
         }
-        for row in top_products_rows
+        for product_id, quantity in top_products_rows
     ]
 
+
+def get_dashboard_summary(session: Session) -> Dict[str, Any]:
+    """Return aggregated statistics for the dashboard summary endpoint."""
+
+    counters = kpi_service.get_counter_values(session)
+    total_orders = counters.get(kpi_service.TOTAL_ORDERS, 0)
+    in_production = counters.get(
+        kpi_service.production_counter(ProductionOrderStatus.in_progress), 0
+    )
+    ready_for_delivery = counters.get(
+        kpi_service.sales_order_counter(SalesOrderStatus.ready_for_delivery), 0
+    )
+    billed = counters.get(kpi_service.sales_order_counter(SalesOrderStatus.billed), 0)
+
+    top_products = get_top_products(session, limit=5)
+
     recent_orders = session.exec(
         select(
             SalesOrder.id,
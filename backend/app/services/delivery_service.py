@@ -4,18 +4,29 @@ from __future__ import annotations
 
 import logging
 from datetime import datetime
+from typing import Any, Literal
 
 from sqlmodel import Session
 
-from app.models import Delivery, DeliveryStatus, SalesOrderStatus, current_utc_time
+from app.models import (
+    Delivery,
+    DeliveryStatus,
+    SalesOrderStatus,
+    ShipmentBatch,
+    ShipmentBatchStatus,
+    current_utc_time,
+)
 from app.repositories.delivery_repository import DeliveryRepository
 from app.repositories.sales_order_repository import SalesOrderRepository
+from app.repositories.shipment_batch_repository import ShipmentBatchRepository
+from app.services import event_hub, inventory_service, kpi_service
 from app.services.exceptions import InvalidTransitionError
 
 logger = logging.getLogger(__name__)
 
 delivery_repo = DeliveryRepository()
 sales_order_repo = SalesOrderRepository()
+shipment_batch_repo = ShipmentBatchRepository()
 
 
 def list_deliveries(
@@ -91,6 +102,19 @@ def mark_delivery_done(session: Session, delivery_id: int) -> Delivery:
             "delivery_date": completion_time,
         },
     )
+    order = sales_order_repo.get_or_raise(session, delivery.sales_order_id)
+    inventory_service.issue_order(session, order.id)
+    kpi_service.record_sales_order_transition(
+        session,
+        order.status,
+        SalesOrderStatus.delivered,
+    )
+    event_hub.publish_order_status(
+        session,
+        order.id,
+        order.status,
+        SalesOrderStatus.delivered,
+    )
     sales_order_repo.update_status(
         session,
         delivery.sales_order_id,
@@ -102,3 +126,164 @@ def mark_delivery_done(session: Session, delivery_id: int) -> Delivery:
         delivery.sales_order_id,
     )
     return updated
+
+
+def consolidate_deliveries(
+    session: Session,
+    *,
+    group_by: Literal["customer", "role"] = "customer",
+    customer_id: int | None = None,
+    customer_role: str | None = None,
+) -> list[dict[str, Any]]:
+    """Group pending, unbatched deliveries into shipment batches and return the new batches.
+
+    ``group_by="customer"`` opens one batch per customer; ``group_by="role"`` one
+    per customer role, so e.g. every department order ships together. Deliveries
+    can be narrowed to one customer or role first.
+    """
+
+    if group_by not in ("customer", "role"):
+        raise ValueError("group_by must be 'customer' or 'role'.")
+
+    try:
+        groups: dict[Any, list[Any]] = {}
+        for row in shipment_batch_repo.list_unbatched_pending(
+            session, customer_id=customer_id, customer_role=customer_role
+        ):
+            key = row.customer_id if group_by == "customer" else row.customer_role
+            groups.setdefault(key, []).append(row)
+
+        batches: list[ShipmentBatch] = []
+        members: list[dict[str, int]] = []
+        for key, rows in groups.items():
+            batch = shipment_batch_repo.create(
+                session,
+                {
+                    "group_by": group_by,
+                    "customer_id": key if group_by == "customer" else None,
+                    "customer_role": rows[0].customer_role,
+                },
+                commit=False,
+            )
+            batches.append(batch)
+            members.extend({"batch_id": batch.id, "delivery_id": row.delivery_id} for row in rows)
+        shipment_batch_repo.add_deliveries(session, members)
+        session.commit()
+    except Exception:
+        session.rollback()
+        logger.exception("Failed to consolidate deliveries")
+        raise
+
+    logger.info(
+        "Consolidated %d delivery(ies) into %d shipment batch(es) by %s",
+        len(members),
+        len(batches),
+        group_by,
+    )
+    return _batch_payloads(session, batches)
+
+
+def list_shipment_batches(
+    session: Session,
+    *,
+    status: ShipmentBatchStatus | str | None = None,
+) -> list[dict[str, Any]]:
+    """Return shipment batches with their deliveries, optionally filtered by status."""
+
+    filters = None
+    if status is not None:
+        filters = [ShipmentBatch.status == ShipmentBatchStatus(status)]
+    return _batch_payloads(session, shipment_batch_repo.list(session, filters=filters))
+
+
+def get_shipment_batch(session: Session, batch_id: int) -> dict[str, Any]:
+    """Return one shipment batch with its deliveries."""
+
+    return _batch_payloads(session, [shipment_batch_repo.get_or_raise(session, batch_id)])[0]
+
+
+def complete_shipment_batch(session: Session, batch_id: int) -> dict[str, Any]:
+    """Mark every pending delivery of a batch delivered and advance the linked sales orders.
+
+    Deliveries, sales orders and stock are each moved with set-based statements
+    and committed together. Deliveries that were completed or cancelled on their
+    own in the meantime are reported as skipped.
+    """
+
+    batch = shipment_batch_repo.get_or_raise(session, batch_id)
+    completion_time = current_utc_time()
+    if not shipment_batch_repo.close(session, batch_id, completion_time):
+        session.rollback()
+        raise InvalidTransitionError(
+            "ShipmentBatch",
+            batch.status,
+            ShipmentBatchStatus.delivered,
+        )
+    try:
+        delivered = delivery_repo.deliver_batch(session, batch_id, completion_time)
+        order_ids = sales_order_repo.transition_many(
+            session,
+            SalesOrderStatus.ready_for_delivery,
+            SalesOrderStatus.delivered,
+            order_ids=[order_id for _, order_id in delivered],
+        )
+        inventory_service.issue_orders(session, order_ids)
+        if order_ids:
+            kpi_service.record_sales_order_transition(
+                session,
+                SalesOrderStatus.ready_for_delivery,
+                SalesOrderStatus.delivered,
+                count=len(order_ids),
+            )
+        for order_id in order_ids:
+            event_hub.publish_order_status(
+                session,
+                order_id,
+                SalesOrderStatus.ready_for_delivery,
+                SalesOrderStatus.delivered,
+            )
+        session.commit()
+    except Exception:
+        session.rollback()
+        logger.exception("Failed to complete shipment batch %s", batch_id)
+        raise
+
+    delivered_ids = [delivery_id for delivery_id, _ in delivered]
+    skipped = [
+        row.delivery_id
+        for row in shipment_batch_repo.list_members(session, [batch_id])
+        if row.delivery_id not in delivered_ids
+    ]
+    logger.info(
+        "Shipment batch %s delivered: %d delivery(ies), %d sales order(s)",
+        batch_id,
+        len(delivered_ids),
+        len(order_ids),
+    )
+    return {
+        "batch_id": batch_id,
+        "delivered_at": completion_time,
+        "delivery_ids": delivered_ids,
+        "sales_order_ids": order_ids,
+        "skipped_delivery_ids": skipped,
+    }
+
+
+def _batch_payloads(session: Session, batches: list[ShipmentBatch]) -> list[dict[str, Any]]:
+    members: dict[int, list[Any]] = {}
+    for row in shipment_batch_repo.list_members(session, [batch.id for batch in batches]):
+        members.setdefault(row.batch_id, []).append(row)
+    return [
+        {
+            "id": batch.id,
+            "group_by": batch.group_by,
+            "customer_id": batch.customer_id,
+            "customer_role": batch.customer_role,
+            "status": batch.status,
+            "created_at": batch.created_at,
+            "delivered_at": batch.delivered_at,
+            "delivery_ids": [row.delivery_id for row in members.get(batch.id, [])],
+            "sales_order_ids": [row.sales_order_id for row in members.get(batch.id, [])],
+        }
+        for batch in batches
+    ]
@@ -0,0 +1,258 @@
+"""Dunning: payment reminders for customers with overdue billings."""
+
+from __future__ import annotations
+
+import html
+import logging
+import os
+from collections import Counter
+from datetime import UTC, date, datetime, time as dt_time, timedelta
+from itertools import groupby
+from typing import Any
+
+from sqlmodel import Session
+
+from app.models import Billing, DunningNotice
+from app.repositories.billing_repository import BillingRepository
+from app.repositories.customer_repository import CustomerRepository
+from app.repositories.dunning_notice_repository import DunningNoticeRepository
+from app.services import billing_service, email_outbox_service, email_transport
+from app.services.email_transport import EmailAttachment, EmailMessage, EmailTransport
+from app.services.exceptions import EmailDeliveryError
+
+logger = logging.getLogger(__name__)
+
+billing_repo = BillingRepository()
+customer_repo = CustomerRepository()
+notice_repo = DunningNoticeRepository()
+
+DUNNING_EMAIL = "dunning_reminder"
+PAYMENT_TERMS_DAYS = int(os.getenv("DUNNING_PAYMENT_TERMS_DAYS", "30"))
+SEND_CHUNK_SIZE = int(os.getenv("DUNNING_SEND_CHUNK_SIZE", "500"))
+# Share of the outbox claim window one inline chunk may take at the worst-case
+# rate of one request per reminder, so claims never lapse mid-send.
+CLAIM_WINDOW_SHARE = 0.5
+OVERDUE_INDEX = "ix_billing_billed_date"
+# (level, first day overdue, subject prefix) of each reminder, gentlest first.
+DUNNING_LEVELS: tuple[tuple[int, int, str], ...] = (
+    (1, 1, "Payment reminder"),
+    (2, 30, "Second payment reminder"),
+    (3, 60, "Final notice"),
+)
+# From this level on the stored invoice PDFs are attached; earlier reminders
+# carry none so the HTTP transport can send them in batches.
+ATTACH_INVOICES_FROM_LEVEL = 3
+
+
+def dunning_level(days_overdue: int) -> int:
+    """Return the reminder level for a customer whose oldest billing is ``days_overdue`` late."""
+
+    return max((level for level, first_day, _ in DUNNING_LEVELS if days_overdue >= first_day), default=0)
+
+
+def run_dunning(
+    session: Session,
+    as_of: date | None = None,
+    *,
+    send: bool = False,
+    transport: EmailTransport | None = None,
+) -> dict[str, Any]:
+    """Raise one reminder per customer with overdue billings and send the new ones.
+
+    A billing is overdue once ``PAYMENT_TERMS_DAYS`` have passed since its
+    billing day without it being paid in full. Overdue billings come from one
+    query over the billing date index, already ordered by customer, and each
+    customer's level follows from the age of their oldest overdue billing.
+    Notices, their lines and outbox messages are staged with one statement
+    each and committed together; customers already notified at their level
+    for the same arrears are skipped. The outbox worker delivers the new
+    reminders; with ``send`` they are delivered inline instead, as batched
+    sends in chunks small enough to finish within the outbox claim window.
+    """
+
+    as_of = as_of or datetime.now(tz=UTC).date()
+    due_before = datetime.combine(as_of - timedelta(days=PAYMENT_TERMS_DAYS), dt_time.min, tzinfo=UTC)
+    notices: list[dict[str, Any]] = []
+    lines: dict[int, list[dict[str, Any]]] = {}
+    amount_overdue = 0.0
+    try:
+        overdue = billing_repo.list_overdue(session, due_before)
+        for customer_id, group in groupby(overdue, lambda row: row.customer_id):
+            rows = list(group)
+            customer_lines = [
+                {
+                    "billing_id": row.id,
+                    "invoice_number": row.invoice_number,
+                    "billed_date": row.billed_date,
+                    "open_amount": round(float(row.open_amount), 2),
+                    "days_overdue": (as_of - row.billed_date.date()).days - PAYMENT_TERMS_DAYS,
+                }
+                for row in rows
+            ]
+            amount_due = round(sum(line["open_amount"] for line in customer_lines), 2)
+            max_days_overdue = customer_lines[0]["days_overdue"]
+            notices.append(
+                {
+                    "customer_id": customer_id,
+                    "level": dunning_level(max_days_overdue),
+                    "anchor_billing_id": rows[0].id,
+                    "recipient": rows[0].customer_email or "",
+                    "as_of": as_of,
+                    "invoice_count": len(rows),
+                    "amount_due": amount_due,
+                    "max_days_overdue": max_days_overdue,
+                }
+            )
+            lines[customer_id] = customer_lines
+            amount_overdue += amount_due
+
+        created = notice_repo.create_missing(session, notices)
+        notice_repo.add_lines(
+            session,
+            [
+                {"notice_id": notice_id, **line}
+                for customer_id, notice_id in created.items()
+                for line in lines[customer_id]
+            ],
+        )
+        recipients = {notice["customer_id"]: notice["recipient"] for notice in notices}
+        email_outbox_service.enqueue_many(
+            session,
+            DUNNING_EMAIL,
+            [(notice_id, recipients[customer_id]) for customer_id, notice_id in created.items()],
+        )
+        session.commit()
+    except Exception:
+        session.rollback()
+        logger.exception("Dunning run for %s failed", as_of)
+        raise
+
+    levels = Counter(notice["level"] for notice in notices if notice["customer_id"] in created)
+    emails = {"sent": 0, "pending": 0, "dead": 0}
+    if send and created:
+        chunk_size = send_chunk_size()
+        while True:
+            # Each chunk is claimed afresh, so only its own sends run against the claim window.
+            counts = email_outbox_service.process_due(
+                session, limit=chunk_size, transport=transport, kind=DUNNING_EMAIL
+            )
+            for outcome, count in counts.items():
+                emails[outcome] += count
+            if sum(counts.values()) < chunk_size:
+                break
+    logger.info(
+        "Dunning run for %s: %d overdue customer(s), %d new notice(s), %d already notified",
+        as_of,
+        len(notices),
+        len(created),
+        len(notices) - len(created),
+    )
+    return {
+        "as_of": as_of,
+        "customers_overdue": len(notices),
+        "notices_created": len(created),
+        "already_notified": len(notices) - len(created),
+        "amount_overdue": round(amount_overdue, 2),
+        "notices_by_level": {str(level): levels.get(level, 0) for level, _, _ in DUNNING_LEVELS},
+        "emails": emails,
+    }
+
+
+def send_chunk_size() -> int:
+    """Return how many reminders one inline chunk may claim.
+
+    Reminders with attachments cost one rate-limited request each, so a chunk
+    is capped at what the provider rate allows within part of the claim window.
+    """
+
+    rate = email_transport.EMAIL_MAX_REQUESTS_PER_SECOND
+    if rate <= 0:
+        return SEND_CHUNK_SIZE
+    budget = int(rate * email_outbox_service.CLAIM_SECONDS * CLAIM_WINDOW_SHARE)
+    return max(1, min(SEND_CHUNK_SIZE, budget))
+
+
+def list_notices(
+    session: Session,
+    *,
+    customer_id: int | None = None,
+    level: int | None = None,
+    limit: int = 100,
+) -> list[DunningNotice]:
+    """Return dunning notices newest first."""
+
+    return notice_repo.list_recent(session, customer_id=customer_id, level=level, limit=limit)
+
+
+def compose_dunning_email(session: Session, notice_id: int, recipient: str) -> EmailMessage:
+    """Build the reminder for one notice for the email outbox."""
+
+    sender = os.getenv("BILLING_FROM_EMAIL")
+    if not sender:
+        raise EmailDeliveryError("BILLING_FROM_EMAIL environment variable is not set.")
+    if not recipient:
+        raise EmailDeliveryError("Customer email address is missing.", retryable=False)
+
+    notice = notice_repo.get_or_raise(session, notice_id)
+    customer = customer_repo.get_or_raise(session, notice.customer_id)
+    lines = notice_repo.list_lines(session, notice_id)
+    attachments: tuple[EmailAttachment, ...] = ()
+    if notice.level >= ATTACH_INVOICES_FROM_LEVEL:
+        attachments = tuple(
+            EmailAttachment(
+                f"{line.invoice_number}.pdf",
+                billing_service.get_invoice_pdf(session, line.billing_id).path.read_bytes(),
+            )
+            for line in lines
+        )
+    prefix = next(prefix for level, _, prefix in DUNNING_LEVELS if level == notice.level)
+    plural = "s" if notice.invoice_count != 1 else ""
+    return EmailMessage(
+        sender=sender,
+        to=(recipient,),
+        subject=f"{prefix}: {notice.invoice_count} overdue invoice{plural}",
+        html=_render_dunning_email_html(notice, customer.name, lines),
+        attachments=attachments,
+    )
+
+
+def _render_dunning_email_html(notice: DunningNotice, customer_name: str, lines: list[Any]) -> str:
+    """Return HTML body for a dunning reminder."""
+
+    greeting_name = html.escape(customer_name or "valued customer")
+    if notice.level >= ATTACH_INVOICES_FROM_LEVEL:
+        request = (
+            "This is our final notice. Copies of the invoices are attached; please settle "
+            "the outstanding amount immediately."
+        )
+    elif notice.level > 1:
+        request = "We have not yet received payment despite our earlier reminder."
+    else:
+        request = "Our records show the following invoices are past due."
+    rows = "".join(
+        f"<tr><td>{html.escape(line.invoice_number or '')}</td>"
+        f"<td>{line.billed_date:%Y-%m-%d}</td>"
+        f"<td align=\"right\">{line.days_overdue}</td>"
+        f"<td align=\"right\">{line.open_amount:,.2f}</td></tr>"
+        for line in lines
+    )
+    return (
+        f"<p>Dear {greeting_name},</p>"
+        f"<p>{request}</p>"
+        "<table><tr><th>Invoice</th><th>Billed</th><th>Days overdue</th><th>Amount due</th></tr>"
+        f"{rows}</table>"
+        f"<p><strong>Total Due:</strong> {notice.amount_due:,.2f}</p>"
+        "<p>If you have already paid, please disregard this reminder.</p>"
+        "<p>Best regards,<br/>Mapúa MTO Billing Team</p>"
+    )
+
+
+def ensure_overdue_index(session: Session) -> None:
+    """Create the billing date index used by dunning on databases that predate it."""
+
+    index = next(index for index in Billing.__table__.indexes if index.name == OVERDUE_INDEX)
+    index.create(session.connection(), checkfirst=True)
+    session.commit()
+
+
+email_outbox_service.register_composer(DUNNING_EMAIL, compose_dunning_email)
@@ -0,0 +1,335 @@
+"""Transactional email outbox drained by a background worker with retries."""
+
+from __future__ import annotations
+
+import logging
+import os
+import random
+import threading
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import event
+from sqlmodel import Session
+
+from app.models import EmailOutbox, OutboxStatus, current_utc_time
+from app.repositories.email_outbox_repository import EmailOutboxRepository
+from app.repositories.exceptions import EntityNotFoundError
+from app.services.email_transport import EmailMessage, EmailTransport, get_transport, send_many
+from app.services.exceptions import EmailDeliveryError
+
+logger = logging.getLogger(__name__)
+
+outbox_repo = EmailOutboxRepository()
+
+MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", "8"))
+BACKOFF_BASE_SECONDS = float(os.getenv("EMAIL_OUTBOX_BACKOFF_BASE_SECONDS", "30"))
+BACKOFF_MAX_SECONDS = float(os.getenv("EMAIL_OUTBOX_BACKOFF_MAX_SECONDS", "3600"))
+CONCURRENCY = int(os.getenv("EMAIL_OUTBOX_CONCURRENCY", "4"))
+CLAIM_SECONDS = float(os.getenv("EMAIL_OUTBOX_CLAIM_SECONDS", "300"))
+POLL_SECONDS = float(os.getenv("EMAIL_OUTBOX_POLL_SECONDS", "5"))
+
+_WAKE_KEY = "email_outbox.wake"
+
+# Builds the message for ``(session, reference_id, recipient)`` at delivery time.
+Composer = Callable[[Session, int, str], EmailMessage]
+_composers: dict[str, Composer] = {}
+
+
+def register_composer(kind: str, composer: Composer) -> None:
+    """Register how messages of ``kind`` are rendered when they are delivered."""
+
+    _composers[kind] = composer
+
+
+def enqueue(session: Session, kind: str, reference_id: int, recipient: str) -> EmailOutbox:
+    """Stage a message in the caller's transaction; the worker is woken once it commits."""
+
+    if kind not in _composers:
+        raise ValueError(f"No email composer registered for {kind!r}.")
+    message = outbox_repo.enqueue(session, kind, reference_id, recipient)
+    session.info[_WAKE_KEY] = True
+    return message
+
+
+def enqueue_many(session: Session, kind: str, targets: Sequence[tuple[int, str]]) -> list[int]:
+    """Stage one message per ``(reference_id, recipient)`` in a single statement; return their ids."""
+
+    if kind not in _composers:
+        raise ValueError(f"No email composer registered for {kind!r}.")
+    ids = outbox_repo.enqueue_many(session, kind, targets)
+    if ids:
+        session.info[_WAKE_KEY] = True
+    return ids
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Return the jittered delay before retrying after ``attempts`` failed attempts."""
+
+    delay = min(BACKOFF_BASE_SECONDS * 2 ** max(attempts - 1, 0), BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def claim_due(
+    session: Session,
+    limit: int,
+    now: datetime | None = None,
+    kind: str | None = None,
+) -> list[int]:
+    """Claim up to ``limit`` due messages (of ``kind``, if given) and commit the claim."""
+
+    now = now or current_utc_time()
+    try:
+        ids = outbox_repo.claim_due(session, now, now + timedelta(seconds=CLAIM_SECONDS), limit, kind)
+        session.commit()
+        return ids
+    except Exception:
+        session.rollback()
+        logger.exception("Failed to claim email outbox messages")
+        raise
+
+
+def deliver(
+    session: Session,
+    outbox_id: int,
+    *,
+    transport: EmailTransport | None = None,
+    now: datetime | None = None,
+) -> OutboxStatus:
+    """Render and send one claimed message, then record the outcome.
+
+    A failed attempt is rescheduled with exponential backoff; after
+    ``MAX_ATTEMPTS`` attempts, or on a failure a retry cannot fix, the message
+    is dead-lettered for an operator to inspect and requeue.
+    """
+
+    message = outbox_repo.get_or_raise(session, outbox_id)
+    try:
+        result: str | None | Exception = (transport or get_transport()).send(_compose(session, message))
+    except Exception as exc:
+        result = exc
+    return _record_outcomes(session, [(message, result)], now)[0]
+
+
+def deliver_many(
+    session: Session,
+    outbox_ids: Sequence[int],
+    *,
+    transport: EmailTransport | None = None,
+    now: datetime | None = None,
+) -> list[OutboxStatus]:
+    """Render claimed messages and send them together, batched where the transport allows.
+
+    Each message's outcome is recorded as ``deliver`` records it.
+    """
+
+    messages = [outbox_repo.get_or_raise(session, outbox_id) for outbox_id in outbox_ids]
+    results: list[str | None | Exception] = [None] * len(messages)
+    composed: list[tuple[int, EmailMessage]] = []
+    for index, message in enumerate(messages):
+        try:
+            composed.append((index, _compose(session, message)))
+        except Exception as exc:
+            results[index] = exc
+    sent = send_many(transport or get_transport(), [email for _, email in composed])
+    for (index, _), result in zip(composed, sent):
+        results[index] = result
+    return _record_outcomes(session, list(zip(messages, results)), now)
+
+
+def _compose(session: Session, message: EmailOutbox) -> EmailMessage:
+    composer = _composers.get(message.kind)
+    if composer is None:
+        raise EmailDeliveryError(f"No email composer registered for {message.kind!r}.", retryable=False)
+    return composer(session, message.reference_id, message.recipient)
+
+
+def _outcome(
+    message: EmailOutbox,
+    result: str | None | Exception,
+    now: datetime,
+) -> tuple[OutboxStatus, dict[str, Any]]:
+    if isinstance(result, Exception):
+        retryable = not isinstance(result, EntityNotFoundError) and getattr(result, "retryable", True)
+        if retryable and message.attempts < MAX_ATTEMPTS:
+            status = OutboxStatus.pending
+            values: dict[str, Any] = {
+                "next_attempt_at": now + timedelta(seconds=backoff_seconds(message.attempts)),
+            }
+        else:
+            status = OutboxStatus.dead
+            values = {}
+        log = logger.warning if status == OutboxStatus.pending else logger.error
+        log("Email %s attempt %d failed (%s): %s", message.id, message.attempts, status.value, result)
+        values.update(status=status, last_error=str(result)[:500])
+        return status, values
+    logger.info("Sent email %s (%s #%s)", message.id, message.kind, message.reference_id)
+    return OutboxStatus.sent, {"status": OutboxStatus.sent, "sent_at": now, "provider_message_id": result}
+
+
+def _record_outcomes(
+    session: Session,
+    outcomes: list[tuple[EmailOutbox, str | None | Exception]],
+    now: datetime | None,
+) -> list[OutboxStatus]:
+    now = now or current_utc_time()
+    settled = [(message.id, *_outcome(message, result, now)) for message, result in outcomes]
+    # Composing only reads; end that transaction before recording the outcomes.
+    session.rollback()
+    try:
+        for outbox_id, _, values in settled:
+            if not outbox_repo.settle(session, outbox_id, values):
+                logger.warning("Email %s was reclaimed before its outcome was recorded", outbox_id)
+        session.commit()
+    except Exception:
+        session.rollback()
+        logger.exception("Failed to record outcome of email(s) %s", [outbox_id for outbox_id, _, _ in settled])
+        raise
+    return [status for _, status, _ in settled]
+
+
+def process_due(
+    session: Session,
+    *,
+    limit: int = 100,
+    transport: EmailTransport | None = None,
+    kind: str | None = None,
+) -> dict[str, int]:
+    """Drain due messages inline as one batched send and return counts per outcome."""
+
+    counts = {status.value: 0 for status in (OutboxStatus.sent, OutboxStatus.pending, OutboxStatus.dead)}
+    ids = claim_due(session, limit, kind=kind)
+    if ids:
+        for status in deliver_many(session, ids, transport=transport):
+            counts[status.value] += 1
+    return counts
+
+
+def list_messages(
+    session: Session,
+    *,
+    status: OutboxStatus | str | None = None,
+    limit: int = 100,
+) -> list[EmailOutbox]:
+    """Return outbox messages newest first, optionally filtered by status."""
+
+    desired = OutboxStatus(status) if status is not None else None
+    return outbox_repo.list_recent(session, status=desired, limit=limit)
+
+
+def requeue(session: Session, outbox_id: int) -> EmailOutbox:
+    """Give a dead-lettered message a fresh round of attempts."""
+
+    message = outbox_repo.get_or_raise(session, outbox_id)
+    if not outbox_repo.requeue(session, outbox_id, current_utc_time()):
+        session.rollback()
+        raise ValueError(f"Email {outbox_id} is {message.status.value}, only dead messages can be requeued.")
+    session.info[_WAKE_KEY] = True
+    session.commit()
+    session.refresh(message)
+    return message
+
+
+class OutboxWorker:
+    """Background thread draining the outbox with at most ``concurrency`` sends in flight.
+
+    The dispatcher claims only as many messages as there are free send slots,
+    so a slow provider applies backpressure instead of piling up claims. It
+    sleeps ``poll_interval`` seconds when idle and is woken early by commits that
+    enqueue mail and by finished sends. Each send uses its own session.
+    """
+
+    def __init__(self, concurrency: int = CONCURRENCY, poll_interval: float = POLL_SECONDS) -> None:
+        self.concurrency = max(concurrency, 1)
+        self.poll_interval = poll_interval
+        self._session_factory: Callable[[], Session] | None = None
+        self._transport: EmailTransport | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._thread: threading.Thread | None = None
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    @property
+    def running(self) -> bool:
+        """Return whether the dispatcher thread is alive."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(
+        self,
+        session_factory: Callable[[], Session],
+        transport: EmailTransport | None = None,
+    ) -> None:
+        """Start dispatching; a no-op if already running."""
+        if self.running:
+            return
+        self._session_factory = session_factory
+        self._transport = transport
+        self._stopping.clear()
+        self._executor = ThreadPoolExecutor(self.concurrency, thread_name_prefix="email-outbox")
+        self._thread = threading.Thread(target=self._run, name="email-outbox-dispatcher", daemon=True)
+        self._thread.start()
+        logger.info("Email outbox worker started with %d slot(s)", self.concurrency)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop claiming new messages and wait for in-flight sends."""
+        if not self.running:
+            return
+        self._stopping.set()
+        self._wake.set()
+        self._thread.join(timeout)
+        self._executor.shutdown(wait=True)
+        logger.info("Email outbox worker stopped")
+
+    def wake(self) -> None:
+        """Ask the dispatcher to look for due messages now."""
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.clear()
+            claimed = 0
+            with self._lock:
+                free = self.concurrency - self._in_flight
+            if free > 0:
+                try:
+                    with self._session_factory() as session:
+                        ids = claim_due(session, free)
+                except Exception:
+                    # Already logged; back off until the next poll.
+                    ids = []
+                for outbox_id in ids:
+                    with self._lock:
+                        self._in_flight += 1
+                    self._executor.submit(self._deliver, outbox_id)
+                claimed = len(ids)
+            if claimed < free or free <= 0:
+                self._wake.wait(self.poll_interval)
+
+    def _deliver(self, outbox_id: int) -> None:
+        try:
+            with self._session_factory() as session:
+                deliver(session, outbox_id, transport=self._transport)
+        except Exception:
+            logger.exception("Email outbox worker failed on message %s", outbox_id)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            self._wake.set()
+
+
+outbox_worker = OutboxWorker()
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_worker(session: Session) -> None:
+    if session.info.pop(_WAKE_KEY, False):
+        outbox_worker.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_wake(session: Session) -> None:
+    session.info.pop(_WAKE_KEY, None)
@@ -0,0 +1,358 @@
+"""Pluggable transports delivering composed emails to a provider."""
+
+from __future__ import annotations
+
+import base64
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import Any, Protocol
+
+import httpx
+import resend
+
+from app.services.exceptions import EmailDeliveryError
+
+logger = logging.getLogger(__name__)
+
+EMAIL_API_URL = os.getenv("EMAIL_API_URL", "https://api.resend.com")
+EMAIL_BATCH_WINDOW_SECONDS = float(os.getenv("EMAIL_BATCH_WINDOW_MS", "50")) / 1000
+EMAIL_MAX_BATCH = int(os.getenv("EMAIL_MAX_BATCH", "100"))
+EMAIL_MAX_IN_FLIGHT = int(os.getenv("EMAIL_MAX_IN_FLIGHT", "4"))
+EMAIL_HTTP_TIMEOUT = float(os.getenv("EMAIL_HTTP_TIMEOUT", "15"))
+# Resend allows two API requests per second per team unless raised; 0 disables the limit.
+EMAIL_MAX_REQUESTS_PER_SECOND = float(os.getenv("EMAIL_MAX_REQUESTS_PER_SECOND", "2"))
+
+
+@dataclass(frozen=True)
+class EmailAttachment:
+    """File attached to an outbound email."""
+
+    filename: str
+    content: bytes
+    content_type: str = "application/pdf"
+
+
+@dataclass(frozen=True)
+class EmailMessage:
+    """Provider-neutral outbound email."""
+
+    sender: str
+    to: tuple[str, ...]
+    subject: str
+    html: str
+    attachments: tuple[EmailAttachment, ...] = field(default_factory=tuple)
+
+
+class EmailTransport(Protocol):
+    """Delivers one message; returns the provider's message id or raises ``EmailDeliveryError``."""
+
+    def send(self, message: EmailMessage) -> str | None: ...
+
+
+def _provider_payload(message: EmailMessage) -> dict[str, Any]:
+    payload: dict[str, Any] = {
+        "from": message.sender,
+        "to": list(message.to),
+        "subject": message.subject,
+        "html": message.html,
+    }
+    if message.attachments:
+        payload["attachments"] = [
+            {
+                "filename": attachment.filename,
+                "content": base64.b64encode(attachment.content).decode("ascii"),
+                "content_type": attachment.content_type,
+            }
+            for attachment in message.attachments
+        ]
+    return payload
+
+
+class RequestRateLimiter:
+    """Spaces calls to ``wait`` so that at most ``rate`` of them start per second.
+
+    Each caller reserves the next free start time under a lock and then sleeps
+    outside it until that time; ``rate <= 0`` disables the limit.
+    """
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class _ProviderRejection(EmailDeliveryError):
+    """The provider refused the request as invalid; resending it unchanged cannot succeed."""
+
+    def __init__(self, message: str) -> None:
+        super().__init__(message, retryable=False)
+
+
+class HttpEmailTransport:
+    """Transport posting to the Resend HTTP API over one pooled keep-alive client.
+
+    Messages without attachments that arrive within ``batch_window`` seconds
+    of each other are coalesced into ``POST /emails/batch`` calls of up to
+    ``max_batch`` emails: the first sender waits out the window, posts what has
+    gathered and hands every waiting sender its own message id. The batch
+    endpoint does not accept attachments, so those messages (invoices included)
+    are posted one by one to ``POST /emails``, still over the pooled
+    connections. At most ``max_in_flight`` requests are open at any time and
+    no more than ``max_requests_per_second`` are started, so bulk sends stay
+    within the provider's rate limit instead of collecting 429 responses.
+    """
+
+    def __init__(
+        self,
+        base_url: str = EMAIL_API_URL,
+        api_key: str | None = None,
+        *,
+        batch_window: float = EMAIL_BATCH_WINDOW_SECONDS,
+        max_batch: int = EMAIL_MAX_BATCH,
+        max_in_flight: int = EMAIL_MAX_IN_FLIGHT,
+        timeout: float = EMAIL_HTTP_TIMEOUT,
+        max_requests_per_second: float = EMAIL_MAX_REQUESTS_PER_SECOND,
+    ) -> None:
+        self.api_key = api_key
+        self.batch_window = batch_window
+        self.max_batch = min(max(max_batch, 1), 100)
+        self.max_in_flight = max(max_in_flight, 1)
+        self._client = httpx.Client(
+            base_url=base_url,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=self.max_in_flight,
+                max_keepalive_connections=self.max_in_flight,
+            ),
+        )
+        self._in_flight = threading.BoundedSemaphore(self.max_in_flight)
+        self._rate_limiter = RequestRateLimiter(max_requests_per_second)
+        self._pending: list[tuple[EmailMessage, Future[str | None]]] = []
+        self._batch_full = threading.Event()
+        self._lock = threading.Lock()
+
+    def send(self, message: EmailMessage) -> str | None:
+        if message.attachments or self.max_batch == 1:
+            return self._post("/emails", _provider_payload(message)).get("id")
+        future: Future[str | None] = Future()
+        with self._lock:
+            self._pending.append((message, future))
+            leader = len(self._pending) == 1
+            if len(self._pending) >= self.max_batch:
+                self._batch_full.set()
+        if leader:
+            self._batch_full.wait(self.batch_window)
+            with self._lock:
+                gathered, self._pending = self._pending, []
+                self._batch_full.clear()
+            for start in range(0, len(gathered), self.max_batch):
+                self._flush(gathered[start : start + self.max_batch])
+        return future.result()
+
+    def send_many(self, messages: Sequence[EmailMessage]) -> list[str | None | Exception]:
+        """Send messages in as few requests as possible; return each one's id or error.
+
+        Messages without attachments go out in ``/emails/batch`` calls of up to
+        ``max_batch`` emails, the others one by one.
+        """
+        outcomes: list[str | None | Exception] = [None] * len(messages)
+        batchable: list[tuple[int, tuple[EmailMessage, Future[str | None]]]] = []
+        for index, message in enumerate(messages):
+            if message.attachments:
+                try:
+                    outcomes[index] = self._post("/emails", _provider_payload(message)).get("id")
+                except Exception as exc:
+                    outcomes[index] = exc
+            else:
+                batchable.append((index, (message, Future())))
+        for start in range(0, len(batchable), self.max_batch):
+            self._flush([entry for _, entry in batchable[start : start + self.max_batch]])
+        for index, (_, future) in batchable:
+            outcomes[index] = future.exception() or future.result()
+        return outcomes
+
+    def close(self) -> None:
+        """Close the pooled connections."""
+        self._client.close()
+
+    def _flush(self, batch: list[tuple[EmailMessage, Future[str | None]]]) -> None:
+        try:
+            if len(batch) == 1:
+                ids = [self._post("/emails", _provider_payload(batch[0][0])).get("id")]
+            else:
+                response = self._post("/emails/batch", [_provider_payload(message) for message, _ in batch])
+                ids = [entry.get("id") for entry in response.get("data", [])]
+                if len(ids) != len(batch):
+                    raise EmailDeliveryError("Email provider returned an incomplete batch response.")
+        except _ProviderRejection as exc:
+            if len(batch) == 1:
+                batch[0][1].set_exception(exc)
+                return
+            # One invalid message rejects the whole batch; send each alone to isolate it.
+            logger.warning("Email batch of %d rejected, sending individually: %s", len(batch), exc)
+            for message, future in batch:
+                try:
+                    future.set_result(self._post("/emails", _provider_payload(message)).get("id"))
+                except Exception as single_exc:
+                    future.set_exception(single_exc)
+        except Exception as exc:
+            for _, future in batch:
+                future.set_exception(exc)
+        else:
+            for (_, future), message_id in zip(batch, ids):
+                future.set_result(message_id)
+
+    def _post(self, path: str, payload: Any) -> Any:
+        api_key = self.api_key or os.getenv("RESEND_API_KEY")
+        if not api_key:
+            raise EmailDeliveryError("RESEND_API_KEY environment variable is not set.")
+        self._rate_limiter.wait()
+        with self._in_flight:
+            try:
+                response = self._client.post(
+                    path,
+                    json=payload,
+                    headers={"Authorization": f"Bearer {api_key}"},
+                )
+            except httpx.HTTPError as exc:
+                raise EmailDeliveryError(f"Email provider request failed: {exc}") from exc
+        if response.status_code == 422:
+            raise _ProviderRejection(f"Email provider rejected the request: {response.text[:200]}")
+        if response.status_code >= 400:
+            raise EmailDeliveryError(
+                f"Email provider answered {response.status_code}: {response.text[:200]}",
+                retryable=response.status_code == 429 or response.status_code >= 500,
+            )
+        try:
+            return response.json()
+        except ValueError as exc:
+            raise EmailDeliveryError("Email provider returned an invalid response.") from exc
+
+
+class ResendTransport:
+    """Transport sending through the Resend SDK, one unpooled request per message."""
+
+    def send(self, message: EmailMessage) -> str | None:
+        api_key = os.getenv("RESEND_API_KEY")
+        if not api_key:
+            raise EmailDeliveryError("RESEND_API_KEY environment variable is not set.")
+        resend.api_key = api_key
+        try:
+            response = resend.Emails.send(
+                {
+                    "from": message.sender,
+                    "to": list(message.to),
+                    "subject": message.subject,
+                    "html": message.html,
+                    "attachments": [
+                        {
+                            "filename": attachment.filename,
+                            "content": base64.b64encode(attachment.content).decode("ascii"),
+                            "content_type": attachment.content_type,
+                        }
+                        for attachment in message.attachments
+                    ],
+                }
+            )
+        except Exception as exc:  # pragma: no cover - depends on external service
+            raise EmailDeliveryError("Resend failed to send the email.") from exc
+        return response.get("id") if isinstance(response, dict) else None
+
+
+class InMemoryTransport:
+    """Local stand-in collecting messages instead of sending them.
+
+    ``fail_next`` makes the following sends raise, which lets tests and local
+    runs exercise retries and dead-lettering without a provider.
+    """
+
+    def __init__(self) -> None:
+        self.sent: list[EmailMessage] = []
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def fail_next(self, count: int = 1) -> None:
+        """Make the next ``count`` sends fail."""
+        with self._lock:
+            self.failures += count
+
+    def send(self, message: EmailMessage) -> str | None:
+        with self._lock:
+            if self.failures:
+                self.failures -= 1
+                raise EmailDeliveryError("Simulated delivery failure.")
+            self.sent.append(message)
+        return uuid.uuid4().hex
+
+
+def send_many(transport: EmailTransport, messages: Sequence[EmailMessage]) -> list[str | None | Exception]:
+    """Send ``messages``, batched when the transport supports it; return each id or error."""
+
+    batch_send = getattr(transport, "send_many", None)
+    if batch_send is not None:
+        return batch_send(messages)
+    outcomes: list[str | None | Exception] = []
+    for message in messages:
+        try:
+            outcomes.append(transport.send(message))
+        except Exception as exc:
+            outcomes.append(exc)
+    return outcomes
+
+
+_TRANSPORTS: dict[str, type] = {
+    "resend": HttpEmailTransport,
+    "resend-sdk": ResendTransport,
+    "memory": InMemoryTransport,
+}
+_transport: EmailTransport | None = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> EmailTransport:
+    """Return the process-wide transport chosen by ``EMAIL_TRANSPORT`` (default ``resend``)."""
+
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            name = os.getenv("EMAIL_TRANSPORT", "resend")
+            if name not in _TRANSPORTS:
+                raise ValueError(f"Unknown EMAIL_TRANSPORT {name!r}.")
+            _transport = _TRANSPORTS[name]()
+            logger.info("Using %s email transport", name)
+        return _transport
+
+
+def set_transport(transport: EmailTransport | None) -> None:
+    """Replace the process-wide transport; ``None`` re-reads ``EMAIL_TRANSPORT`` on next use."""
+
+    global _transport
+    with _transport_lock:
+        _transport = transport
+
+
+def close_transport() -> None:
+    """Release the process-wide transport's connections, if it holds any."""
+
+    global _transport
+    with _transport_lock:
+        transport, _transport = _transport, None
+    close = getattr(transport, "close", None)
+    if close is not None:
+        close()
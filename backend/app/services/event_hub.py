@@ -0,0 +1,180 @@
+"""In-process broadcast hub pushing committed domain events to live subscribers."""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import logging
+import threading
+from typing import Any, Callable
+
+from sqlalchemy import event
+from sqlmodel import Session
+
+logger = logging.getLogger(__name__)
+
+_PENDING_EVENTS_KEY = "event_hub.pending"
+
+
+class Subscription:
+    """Bounded per-client event queue bound to the event loop that created it."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_queue_size: int) -> None:
+        self.loop = loop
+        self.queue: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue(maxsize=max_queue_size)
+        self.dropped = False
+
+    async def get(self) -> dict[str, Any] | None:
+        """Wait for the next event; ``None`` means the subscription was dropped."""
+        return await self.queue.get()
+
+
+class EventHub:
+    """Fan out events to subscribers without ever blocking the publishing thread.
+
+    Publishers run on request worker threads, so delivery is handed to each
+    subscriber's event loop. A subscriber whose queue is full is dropped instead
+    of applying backpressure to writers; the client reconnects and resyncs.
+    """
+
+    def __init__(self, max_queue_size: int = 256) -> None:
+        self.max_queue_size = max_queue_size
+        self._subscriptions: set[Subscription] = set()
+        self._listeners: list[Callable[[str, dict[str, Any]], None]] = []
+        self._lock = threading.Lock()
+        self._sequence = itertools.count(1)
+
+    @property
+    def subscriber_count(self) -> int:
+        """Return the number of connected subscribers."""
+        return len(self._subscriptions)
+
+    def subscribe(self) -> Subscription:
+        """Register a subscriber; must be called from within a running event loop."""
+        subscription = Subscription(asyncio.get_running_loop(), self.max_queue_size)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a subscriber if it is still registered."""
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def add_listener(self, listener: Callable[[str, dict[str, Any]], None]) -> None:
+        """Register an in-process callback invoked synchronously for every event.
+
+        Listeners run on the publishing thread and must be cheap and non-blocking.
+        """
+        self._listeners.append(listener)
+
+    def publish(self, event_type: str, data: dict[str, Any]) -> None:
+        """Broadcast an event to every subscriber; safe to call from any thread."""
+        for listener in self._listeners:
+            try:
+                listener(event_type, data)
+            except Exception:
+                logger.exception("Event listener failed for %s event", event_type)
+        payload = {"id": next(self._sequence), "type": event_type, "data": data}
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(self._deliver, subscription, payload)
+            except RuntimeError:
+                # The subscriber's event loop is already closed.
+                self.unsubscribe(subscription)
+
+    def _deliver(self, subscription: Subscription, payload: dict[str, Any]) -> None:
+        if subscription.dropped:
+            return
+        try:
+            subscription.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            self._drop(subscription)
+
+    def _drop(self, subscription: Subscription) -> None:
+        subscription.dropped = True
+        self.unsubscribe(subscription)
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(None)
+        logger.warning("Dropped slow event stream subscriber")
+
+
+hub = EventHub()
+
+
+def publish_after_commit(session: Session, event_type: str, data: dict[str, Any]) -> None:
+    """Queue an event on the session; it is broadcast only once the session commits."""
+
+    session.info.setdefault(_PENDING_EVENTS_KEY, []).append((event_type, data))
+
+
+def publish_order_status(
+    session: Session,
+    order_id: int,
+    previous: str | None,
+    new: str | None,
+) -> None:
+    """Queue an ``order_status`` event describing a sales order transition."""
+
+    publish_after_commit(
+        session,
+        "order_status",
+        {
+            "order_id": order_id,
+            "from": getattr(previous, "value", previous),
+            "to": getattr(new, "value", new),
+        },
+    )
+
+
+def publish_production_status(
+    session: Session,
+    production_order_id: int,
+    sales_order_id: int,
+    previous: str | None,
+    new: str | None,
+) -> None:
+    """Queue a ``production_status`` event describing a production order transition."""
+
+    publish_after_commit(
+        session,
+        "production_status",
+        {
+            "production_order_id": production_order_id,
+            "sales_order_id": sales_order_id,
+            "from": getattr(previous, "value", previous),
+            "to": getattr(new, "value", new),
+        },
+    )
+
+
+def publish_billings_created(session: Session, billing_ids: list[int]) -> None:
+    """Queue a ``billing_created`` event for billings staged in this session."""
+
+    if billing_ids:
+        publish_after_commit(session, "billing_created", {"billing_ids": list(billing_ids)})
+
+
+def format_sse(payload: dict[str, Any]) -> str:
+    """Serialize an event payload using the Server-Sent Events wire format."""
+
+    return (
+        f"id: {payload['id']}\n"
+        f"event: {payload['type']}\n"
+        f"data: {json.dumps(payload['data'], default=str)}\n\n"
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending_events(session: Session) -> None:
+    for event_type, data in session.info.pop(_PENDING_EVENTS_KEY, []):
+        hub.publish(event_type, data)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_events(session: Session) -> None:
+    session.info.pop(_PENDING_EVENTS_KEY, None)
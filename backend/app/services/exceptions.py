@@ -22,7 +22,57 @@ class InvalidTransitionError(ServiceError):
 
 
 class EmailDeliveryError(ServiceError):
-    """Raised when an outbound email fails to send."""
+    """Raised when an outbound email fails to send.
 
-    def __init__(self, message: str) -> None:
+    ``retryable=False`` marks failures that another attempt cannot fix, such as a
+    missing recipient address.
+    """
+
+    def __init__(self, message: str, *, retryable: bool = True) -> None:
         super().__init__(message)
+        self.retryable = retryable
+
+
+class InsufficientStockError(ServiceError):
+    """Raised when a reservation requests more stock than is available."""
+
+    def __init__(self, product_id: int, requested: int, available: int) -> None:
+        super().__init__(
+            f"Insufficient stock for product {product_id}: "
+            f"requested {requested}, available {available}."
+        )
+        self.product_id = product_id
+        self.requested = requested
+        self.available = available
+
+
+class LeaseLostError(ServiceError):
+    """Raised when a worker acts on a production order it no longer holds a lease for."""
+
+    def __init__(self, production_order_id: int) -> None:
+        super().__init__(
+            f"Lease on production order {production_order_id} is missing, expired or held by another worker."
+        )
+        self.production_order_id = production_order_id
+
+
+class RenderPoolSaturatedError(ServiceError):
+    """Raised when the PDF render pool stays full for longer than the caller will wait."""
+
+    def __init__(self, waited_seconds: float) -> None:
+        super().__init__(f"PDF render pool is saturated; no slot freed up within {waited_seconds:g}s.")
+        self.waited_seconds = waited_seconds
+
+
+class CreditLimitExceededError(ServiceError):
+    """Raised when an order would take a customer's credit exposure past their limit."""
+
+    def __init__(self, customer_id: int, requested: float, exposure: float, credit_limit: float) -> None:
+        super().__init__(
+            f"Credit limit exceeded for customer {customer_id}: order of {requested:.2f} "
+            f"on top of {exposure:.2f} outstanding, limit {credit_limit:.2f}."
+        )
+        self.customer_id = customer_id
+        self.requested = requested
+        self.exposure = exposure
+        self.credit_limit = credit_limit
@@ -0,0 +1,268 @@
+"""Inventory service reserving stock through contention-safe conditional updates."""
+
+from __future__ import annotations
+
+import logging
+import random
+from collections import defaultdict
+from collections.abc import Collection, Iterable
+from typing import Any
+
+from sqlmodel import Session
+
+from app.models import StockMovementType
+from app.repositories.product_repository import ProductRepository
+from app.repositories.stock_balance_repository import StockBalanceRepository
+from app.repositories.stock_ledger_repository import StockLedgerRepository
+from app.services.exceptions import InsufficientStockError
+
+logger = logging.getLogger(__name__)
+
+product_repo = ProductRepository()
+stock_balance_repo = StockBalanceRepository()
+stock_ledger_repo = StockLedgerRepository()
+
+# Bounds the retries of a reservation racing other writers on the same slots.
+MAX_RESERVE_ATTEMPTS = 3
+
+
+def get_stock_level(session: Session, product_id: int) -> dict[str, Any]:
+    """Return on-hand, reserved and available quantity for a product."""
+
+    product_repo.get_or_raise(session, product_id)
+    on_hand, reserved, slots = stock_balance_repo.totals(session, product_id)
+    return {
+        "product_id": product_id,
+        "on_hand": on_hand,
+        "reserved": reserved,
+        "available": on_hand - reserved,
+        "slots": slots,
+    }
+
+
+def track_stock(session: Session, product_id: int, initial_quantity: int = 0) -> None:
+    """Stage a first stock slot for a product, making it stock-tracked."""
+
+    stock_balance_repo.ensure_slots(session, product_id, 1)
+    if initial_quantity:
+        receive_stock(session, product_id, initial_quantity)
+
+
+def receive_stock(session: Session, product_id: int, quantity: int) -> None:
+    """Stage a stock receipt, spreading the quantity evenly over the product's slots.
+
+    Products without balance rows get a single slot. The caller commits.
+    """
+
+    if quantity <= 0:
+        raise ValueError("Received quantity must be greater than zero.")
+    slots = [slot for slot, _ in stock_balance_repo.list_available(session, product_id)]
+    if not slots:
+        stock_balance_repo.ensure_slots(session, product_id, 1)
+        slots = [0]
+
+    share, remainder = divmod(quantity, len(slots))
+    entries = []
+    for index, slot in enumerate(slots):
+        amount = share + (1 if index < remainder else 0)
+        if amount:
+            stock_balance_repo.receive(session, product_id, slot, amount)
+            entries.append(_entry(product_id, slot, StockMovementType.receipt, amount))
+    stock_ledger_repo.append_many(session, entries)
+
+
+def split_stock(session: Session, product_id: int, slots: int) -> dict[str, Any]:
+    """Spread a hot product's stock over ``slots`` balance rows and commit.
+
+    Free (unreserved) quantity is moved from the fullest slots to the emptiest with
+    conditional updates, so concurrent reservations stay correct while it runs.
+    Slots can only be added; existing ones may still hold reservations.
+    """
+
+    if slots < 1:
+        raise ValueError("A product needs at least one stock slot.")
+    product_repo.get_or_raise(session, product_id)
+    current = stock_balance_repo.list_available(session, product_id)
+    if slots < len(current):
+        raise ValueError(f"Product {product_id} already uses {len(current)} stock slot(s).")
+
+    try:
+        stock_balance_repo.ensure_slots(session, product_id, slots)
+        available = dict.fromkeys(range(slots), 0)
+        available.update(current)
+        target = sum(available.values()) // slots
+        entries = []
+        receivers = [slot for slot, free in available.items() if free < target]
+        for donor, free in sorted(available.items(), key=lambda item: -item[1]):
+            surplus = free - target
+            while surplus > 0 and receivers:
+                receiver = receivers[0]
+                amount = min(surplus, target - available[receiver])
+                if not stock_balance_repo.take_free(session, product_id, donor, amount):
+                    break
+                stock_balance_repo.receive(session, product_id, receiver, amount)
+                entries.append(_entry(product_id, donor, StockMovementType.transfer, -amount))
+                entries.append(_entry(product_id, receiver, StockMovementType.transfer, amount))
+                surplus -= amount
+                available[receiver] += amount
+                if available[receiver] >= target:
+                    receivers.pop(0)
+        stock_ledger_repo.append_many(session, entries)
+        session.commit()
+    except Exception:
+        session.rollback()
+        logger.exception("Failed to split stock of product %s", product_id)
+        raise
+
+    logger.info("Split stock of product %s across %d slot(s)", product_id, slots)
+    return get_stock_level(session, product_id)
+
+
+def reserve_order_items(
+    session: Session,
+    sales_order_id: int,
+    items: Iterable[tuple[int, int]],
+) -> None:
+    """Stage reservations for ``(product_id, quantity)`` pairs of a sales order.
+
+    Only products with stock balance rows are reserved; the rest are purely made to
+    order. Each slot is claimed with one ``UPDATE ... WHERE on_hand - reserved >=
+    quantity``. A request one slot can cover starts from a random slot so
+    concurrent orders for a hot product spread over its rows; a request split
+    over several slots claims them in ascending slot order. Nothing is committed here; on ``InsufficientStockError``
+    the caller rolls back, which also undoes any partial reservation.
+    """
+
+    requested: dict[int, int] = defaultdict(int)
+    for product_id, quantity in items:
+        requested[product_id] += quantity
+    tracked = stock_balance_repo.tracked_product_ids(session, requested)
+
+    entries = []
+    # Reserve in product id order so concurrent multi-item orders touch rows consistently.
+    for product_id in sorted(tracked):
+        for slot, quantity in _reserve(session, product_id, requested[product_id]):
+            entries.append(
+                _entry(product_id, slot, StockMovementType.reservation, quantity, sales_order_id)
+            )
+    stock_ledger_repo.append_many(session, entries)
+
+
+def release_order(session: Session, sales_order_id: int) -> None:
+    """Stage the release of every open reservation held by a sales order."""
+
+    _settle_order(session, sales_order_id, StockMovementType.release)
+
+
+def issue_order(session: Session, sales_order_id: int) -> None:
+    """Stage the consumption of a sales order's reserved stock once it ships."""
+
+    _settle_order(session, sales_order_id, StockMovementType.issue)
+
+
+def issue_orders(session: Session, sales_order_ids: Collection[int]) -> None:
+    """Stage the consumption of several orders' reserved stock, e.g. a shipped batch.
+
+    Open reservations are read in one grouped query and each touched slot is
+    decremented once for the combined quantity; the ledger keeps one issue entry
+    per order and slot.
+    """
+
+    by_slot: dict[tuple[int, int], list[tuple[int, int]]] = defaultdict(list)
+    for sales_order_id, product_id, slot, quantity in stock_ledger_repo.open_reservations_many(
+        session, sales_order_ids
+    ):
+        by_slot[(product_id, slot)].append((sales_order_id, quantity))
+
+    entries = []
+    for (product_id, slot), claims in sorted(by_slot.items()):
+        if not stock_balance_repo.issue(session, product_id, slot, sum(q for _, q in claims)):
+            # Fall back to per-order settlement so one short slot cannot block the others.
+            for sales_order_id, quantity in claims:
+                if stock_balance_repo.issue(session, product_id, slot, quantity):
+                    entries.append(
+                        _entry(product_id, slot, StockMovementType.issue, quantity, sales_order_id)
+                    )
+                else:
+                    logger.warning(
+                        "Stock slot %s of product %s no longer holds %d reserved unit(s) for order %s",
+                        slot,
+                        product_id,
+                        quantity,
+                        sales_order_id,
+                    )
+            continue
+        entries.extend(
+            _entry(product_id, slot, StockMovementType.issue, quantity, sales_order_id)
+            for sales_order_id, quantity in claims
+        )
+    stock_ledger_repo.append_many(session, entries)
+
+
+def _reserve(session: Session, product_id: int, quantity: int) -> list[tuple[int, int]]:
+    """Claim ``quantity`` across a product's slots and return ``(slot, amount)`` claims."""
+
+    claims: list[tuple[int, int]] = []
+    remaining = quantity
+    for _ in range(MAX_RESERVE_ATTEMPTS):
+        slots = stock_balance_repo.list_available(session, product_id)
+        probe = slots
+        if not claims:
+            # Locking a single row cannot deadlock, so the probe may start anywhere
+            # and spread concurrent orders; held claims keep ascending slot order.
+            offset = random.randrange(len(slots))
+            probe = slots[offset:] + slots[:offset]
+
+        # Prefer a single slot that can cover the whole request.
+        for slot, available in probe:
+            if available >= remaining and stock_balance_repo.try_reserve(
+                session, product_id, slot, remaining
+            ):
+                return [*claims, (slot, remaining)]
+
+        # Otherwise gather the request from several slots, locking them in slot order.
+        for slot, available in slots:
+            amount = min(available, remaining)
+            if amount > 0 and stock_balance_repo.try_reserve(session, product_id, slot, amount):
+                claims.append((slot, amount))
+                remaining -= amount
+                if not remaining:
+                    return claims
+        if sum(max(available, 0) for _, available in slots) < remaining:
+            break
+
+    on_hand, reserved, _ = stock_balance_repo.totals(session, product_id)
+    raise InsufficientStockError(product_id, quantity, on_hand - reserved + quantity - remaining)
+
+
+def _settle_order(session: Session, sales_order_id: int, movement: StockMovementType) -> None:
+    apply = stock_balance_repo.release if movement == StockMovementType.release else stock_balance_repo.issue
+    entries = []
+    for product_id, slot, quantity in stock_ledger_repo.open_reservations(session, sales_order_id):
+        if not apply(session, product_id, slot, quantity):
+            logger.warning(
+                "Stock slot %s of product %s no longer holds %d reserved unit(s) for order %s",
+                slot,
+                product_id,
+                quantity,
+                sales_order_id,
+            )
+            continue
+        entries.append(_entry(product_id, slot, movement, quantity, sales_order_id))
+    stock_ledger_repo.append_many(session, entries)
+
+
+def _entry(
+    product_id: int,
+    slot: int,
+    movement: StockMovementType,
+    quantity: int,
+    sales_order_id: int | None = None,
+) -> dict[str, Any]:
+    return {
+        "product_id": product_id,
+        "slot": slot,
+        "movement": movement,
+        "quantity": quantity,
+        "sales_order_id": sales_order_id,
+    }
@@ -0,0 +1,117 @@
+"""Collision-free invoice numbers handed out from hi-lo reserved blocks."""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+from sqlmodel import Session
+
+from app.models import Billing
+from app.repositories.invoice_number_sequence_repository import InvoiceNumberSequenceRepository
+
+logger = logging.getLogger(__name__)
+
+sequence_repo = InvoiceNumberSequenceRepository()
+
+BLOCK_SIZE = int(os.getenv("INVOICE_NUMBER_BLOCK_SIZE", "50"))
+UNIQUE_INDEX = "ux_billing_invoice_number"
+
+_PENDING_KEY = "invoice_numbers.pending"
+
+
+def _take(numbers: list[int], count: int) -> range:
+    start = numbers[0]
+    stop = min(numbers[1], start + count)
+    numbers[0] = stop
+    return range(start, stop)
+
+
+class InvoiceNumberAllocator:
+    """Hands out ``INV-{YYYY}-{NNNNNN}`` numbers from blocks reserved per worker process.
+
+    Reserving a block is one statement on the year's ``invoice_number_sequence``
+    row (the "hi"), staged in the caller's transaction; the ``block_size``
+    numbers in it (the "lo" part) are then handed out from memory without
+    touching the database. Until that transaction commits the block belongs to
+    its session alone, so a rollback discards the block together with its
+    reservation. Numbers left over when a process exits, or used by a
+    transaction that rolls back after the block was shared, are skipped: the
+    sequence may have gaps but never repeats a number.
+    """
+
+    def __init__(self, block_size: int = BLOCK_SIZE) -> None:
+        self.block_size = max(block_size, 1)
+        self._free: dict[str, list[list[int]]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def allocate(self, session: Session, issued_at: datetime, count: int = 1) -> list[str]:
+        """Return ``count`` unused invoice numbers for invoices issued at ``issued_at``."""
+        prefix = f"INV-{issued_at:%Y}"
+        pending = session.info.setdefault(_PENDING_KEY, {})
+        own = pending.get((self, prefix))
+        numbers: list[int] = []
+        while len(numbers) < count:
+            if own is not None and own[0] < own[1]:
+                numbers.extend(_take(own, count - len(numbers)))
+                continue
+            with self._lock:
+                free = self._free[prefix]
+                while free and len(numbers) < count:
+                    numbers.extend(_take(free[0], count - len(numbers)))
+                    if free[0][0] >= free[0][1]:
+                        free.pop(0)
+            if len(numbers) < count:
+                block = sequence_repo.reserve_block(session, prefix)
+                own = pending[(self, prefix)] = [
+                    block * self.block_size + 1,
+                    (block + 1) * self.block_size + 1,
+                ]
+                logger.debug("Reserved invoice number block %s of %s", block, prefix)
+        return [f"{prefix}-{number:06d}" for number in numbers]
+
+    def _release(self, prefix: str, numbers: list[int]) -> None:
+        if numbers[0] < numbers[1]:
+            with self._lock:
+                self._free[prefix].append(numbers)
+
+
+allocator = InvoiceNumberAllocator()
+
+
+def next_invoice_number(session: Session, issued_at: datetime) -> str:
+    """Return one invoice number from the process-wide allocator."""
+
+    return allocator.allocate(session, issued_at)[0]
+
+
+def ensure_unique_index(session: Session) -> None:
+    """Create the invoice number uniqueness index on databases that predate it.
+
+    Databases holding duplicate numbers from the former random scheme keep
+    working without the index; the duplicates are logged for clean-up.
+    """
+
+    index = next(index for index in Billing.__table__.indexes if index.name == UNIQUE_INDEX)
+    try:
+        index.create(session.connection(), checkfirst=True)
+        session.commit()
+    except DBAPIError:
+        session.rollback()
+        logger.error("Cannot create %s: billing has duplicate invoice numbers", UNIQUE_INDEX)
+
+
+@event.listens_for(Session, "after_commit")
+def _share_pending_blocks(session: Session) -> None:
+    for (owner, prefix), numbers in session.info.pop(_PENDING_KEY, {}).items():
+        owner._release(prefix, numbers)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_blocks(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
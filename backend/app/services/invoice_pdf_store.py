@@ -0,0 +1,104 @@
+"""Content-addressed on-disk store for rendered invoice PDFs."""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+INVOICE_STORE_DIR = os.getenv("INVOICE_STORE_DIR", "invoice_store")
+INVOICE_STORE_GRACE_SECONDS = float(os.getenv("INVOICE_STORE_GRACE_SECONDS", "3600"))
+
+
+@dataclass(frozen=True)
+class StoredPdf:
+    """Location and SHA-256 digest of a stored invoice PDF."""
+
+    path: Path
+    digest: str
+
+
+class InvoicePdfStore:
+    """Invoice PDFs on disk at ``<root>/<billing_id // 1000>/<billing_id>/<sha256>.pdf``.
+
+    Files are written to a temporary name and renamed into place, so readers
+    never see a partial PDF and concurrent writers of the same content simply
+    replace one another. The newest file of a billing is its current version.
+    Superseded versions are kept for ``grace_seconds`` after being replaced,
+    so a response already streaming one is not cut off, and are swept by a
+    later ``put``.
+    """
+
+    def __init__(
+        self,
+        root: str | Path = INVOICE_STORE_DIR,
+        *,
+        grace_seconds: float = INVOICE_STORE_GRACE_SECONDS,
+    ) -> None:
+        self.root = Path(root)
+        self.grace_seconds = grace_seconds
+
+    def _directory(self, billing_id: int) -> Path:
+        return self.root / f"{billing_id // 1000:06d}" / str(billing_id)
+
+    def _versions(self, directory: Path) -> list[tuple[int, str]]:
+        """Return ``(mtime_ns, path)`` of every stored version, oldest first."""
+        versions = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not entry.name.endswith(".pdf"):
+                    continue
+                with contextlib.suppress(FileNotFoundError):
+                    versions.append((entry.stat().st_mtime_ns, entry.path))
+        return sorted(versions)
+
+    def get(self, billing_id: int) -> StoredPdf | None:
+        """Return the stored PDF of a billing, or ``None`` if it was never stored."""
+        try:
+            versions = self._versions(self._directory(billing_id))
+        except FileNotFoundError:
+            return None
+        if not versions:
+            return None
+        path = Path(versions[-1][1])
+        return StoredPdf(path, path.stem)
+
+    def put(self, billing_id: int, content: bytes) -> StoredPdf:
+        """Store ``content`` as the PDF of a billing and return where it lives."""
+        digest = hashlib.sha256(content).hexdigest()
+        directory = self._directory(billing_id)
+        path = directory / f"{digest}.pdf"
+        if not path.exists():
+            directory.mkdir(parents=True, exist_ok=True)
+            descriptor, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            try:
+                with os.fdopen(descriptor, "wb") as handle:
+                    handle.write(content)
+                os.replace(temporary, path)
+            except BaseException:
+                os.unlink(temporary)
+                raise
+            logger.info("Stored invoice PDF for billing %s (%s)", billing_id, digest[:12])
+        # Stamp the stored file as the newest version, also when it was stored before.
+        others = [stamp for stamp, other in self._versions(directory) if other != str(path)]
+        stamp = max(time.time_ns(), max(others, default=0) + 1)
+        os.utime(path, ns=(stamp, stamp))
+        self._sweep(directory, time.time_ns() - int(self.grace_seconds * 1e9))
+        return StoredPdf(path, digest)
+
+    def _sweep(self, directory: Path, superseded_before: int) -> None:
+        """Remove versions replaced by a newer one before ``superseded_before`` (in ns)."""
+        versions = self._versions(directory)
+        for (_, stale), (superseded_at, _) in zip(versions, versions[1:]):
+            if superseded_at < superseded_before:
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(stale)
+
+invoice_store = InvoicePdfStore()
@@ -0,0 +1,205 @@
+"""Template-based invoice PDF writer reusing a pre-built static layout."""
+
+from __future__ import annotations
+
+import zlib
+from typing import Any
+
+from fpdf.fonts import CORE_FONTS_CHARWIDTHS
+
+# Layout in millimetres, matching the FPDF renderer it replaces: A4 portrait,
+# 10 mm margins, 1 mm cell padding and a 15 mm automatic page-break margin.
+PAGE_WIDTH_MM = 210.0
+PAGE_HEIGHT_MM = 297.0
+MARGIN_MM = 10.0
+CELL_PADDING_MM = 1.0
+PAGE_BREAK_MM = PAGE_HEIGHT_MM - 15.0
+ROW_HEIGHT_MM = 8.0
+# (x, width, align) of the item, quantity and subtotal columns.
+COLUMNS = ((10.0, 100.0, "L"), (110.0, 30.0, "R"), (140.0, 40.0, "R"))
+TABLE_TOP_MM = 62.0
+
+_K = 72 / 25.4  # points per millimetre
+_BOLD, _REGULAR = b"F1", b"F2"
+_FONTS = {_BOLD: ("Helvetica-Bold", "helveticaB"), _REGULAR: ("Helvetica", "helvetica")}
+
+
+def _escape(text: str) -> bytes:
+    data = text.encode("cp1252", "replace")
+    return data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+class InvoiceTemplate:
+    """Invoice renderer that assembles PDF bytes around a layout built once.
+
+    Everything that is identical across invoices is prepared in the
+    constructor: the document header, catalog and font objects, the first
+    page's title, labels and table header, and per-font character widths used
+    to right-align figures and place values after their labels. The first page's
+    static drawing operators are fed to a zlib compressor once and that
+    compressor state is copied per invoice, so only the per-invoice fields and
+    line rows are laid out and compressed. The standard Helvetica fonts are
+    referenced, not embedded, so the output carries no font programs at all.
+    """
+
+    def __init__(self, compression_level: int = 6) -> None:
+        self.compression_level = compression_level
+        self._widths = {
+            font: [CORE_FONTS_CHARWIDTHS[metrics].get(chr(code), 0) for code in range(256)]
+            for font, (_, metrics) in _FONTS.items()
+        }
+        self._label_ends = {
+            label: MARGIN_MM + CELL_PADDING_MM + self.text_width(_REGULAR, 12, label)
+            for label in ("Invoice Number: ", "Invoice Date: ", "Bill To: ", "Email: ")
+        }
+        self._first_page = zlib.compressobj(compression_level)
+        self._first_page_head = self._first_page.compress(self._static_first_page())
+        self._header, self._header_offsets = self._static_objects()
+
+    # --- Metrics ---------------------------------------------------------
+
+    def text_width(self, font: bytes, size: float, text: str) -> float:
+        """Return the width of ``text`` in millimetres using the cached metrics."""
+        widths = self._widths[font]
+        return sum(widths[code] for code in text.encode("cp1252", "replace")) * size / 1000 / _K
+
+    # --- Static parts ----------------------------------------------------
+
+    def _static_first_page(self) -> bytes:
+        ops = [b"2 J\n0.57 w\n", self._font(_BOLD, 18)]
+        ops.append(self._text(MARGIN_MM + CELL_PADDING_MM, 10.0, 10.0, 18, "Invoice"))
+        ops.append(self._font(_REGULAR, 12))
+        for label, top in (
+            ("Invoice Number: ", 20.0),
+            ("Invoice Date: ", 28.0),
+            ("Bill To: ", 40.0),
+            ("Email: ", 48.0),
+        ):
+            ops.append(self._text(MARGIN_MM + CELL_PADDING_MM, top, ROW_HEIGHT_MM, 12, label))
+        ops.append(self._font(_BOLD, 12))
+        for (x, width, align), title in zip(COLUMNS, ("Item", "Quantity", "Subtotal")):
+            ops.append(self._cell(_BOLD, x, TABLE_TOP_MM, width, title, align))
+        ops.append(self._font(_REGULAR, 12))
+        return b"".join(ops)
+
+    def _static_objects(self) -> tuple[bytes, list[int]]:
+        header = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+        objects = [
+            (2, b"<< /Type /Catalog /Pages 1 0 R >>"),
+            (3, b"<< /Font << /F1 4 0 R /F2 5 0 R >> /ProcSet [/PDF /Text] >>"),
+        ]
+        for number, (font, (base_font, _)) in zip((4, 5), _FONTS.items()):
+            objects.append(
+                (
+                    number,
+                    b"<< /Type /Font /Subtype /Type1 /BaseFont /" + base_font.encode()
+                    + b" /Encoding /WinAnsiEncoding >>",
+                )
+            )
+        offsets = []
+        for number, body in objects:
+            offsets.append(len(header))
+            header += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+        return header, offsets
+
+    # --- Drawing operators -----------------------------------------------
+
+    @staticmethod
+    def _font(font: bytes, size: float) -> bytes:
+        return b"BT /%s %.2f Tf ET\n" % (font, size)
+
+    @staticmethod
+    def _text(x: float, top: float, height: float, size: float, text: str) -> bytes:
+        baseline = top + height / 2 + 0.3 * size / _K
+        return b"BT %.2f %.2f Td (%s) Tj ET\n" % (
+            x * _K,
+            (PAGE_HEIGHT_MM - baseline) * _K,
+            _escape(text),
+        )
+
+    def _cell(self, font: bytes, x: float, top: float, width: float, text: str, align: str) -> bytes:
+        border = b"%.2f %.2f %.2f %.2f re S " % (
+            x * _K,
+            (PAGE_HEIGHT_MM - top) * _K,
+            width * _K,
+            -ROW_HEIGHT_MM * _K,
+        )
+        if align == "R":
+            left = x + width - CELL_PADDING_MM - self.text_width(font, 12, text)
+        else:
+            left = x + CELL_PADDING_MM
+        return border + self._text(left, top, ROW_HEIGHT_MM, 12, text)
+
+    # --- Rendering -------------------------------------------------------
+
+    def render(self, payload: dict[str, Any]) -> bytes:
+        """Return the PDF for one plain-data invoice payload."""
+
+        first = [
+            self._text(self._label_ends[label], top, ROW_HEIGHT_MM, 12, payload[field])
+            for label, top, field in (
+                ("Invoice Number: ", 20.0, "invoice_number"),
+                ("Invoice Date: ", 28.0, "invoice_date"),
+                ("Bill To: ", 40.0, "customer_name"),
+                ("Email: ", 48.0, "customer_email"),
+            )
+        ]
+        pages: list[list[bytes]] = [first]
+        top = TABLE_TOP_MM + ROW_HEIGHT_MM
+
+        def next_row() -> None:
+            nonlocal top
+            if top + ROW_HEIGHT_MM > PAGE_BREAK_MM:
+                pages.append([b"2 J\n0.57 w\n", self._font(_REGULAR, 12)])
+                top = MARGIN_MM
+
+        for name, quantity, subtotal in payload["line_items"]:
+            next_row()
+            for (x, width, align), text in zip(COLUMNS, (name, f"{quantity}", f"{subtotal:.2f}")):
+                pages[-1].append(self._cell(_REGULAR, x, top, width, text, align))
+            top += ROW_HEIGHT_MM
+
+        top += 6.0
+        next_row()
+        pages[-1].append(self._font(_BOLD, 12))
+        pages[-1].append(self._cell(_BOLD, MARGIN_MM, top, 130.0, "Total", "L"))
+        pages[-1].append(self._cell(_BOLD, 140.0, top, 40.0, f"{payload['amount']:.2f}", "R"))
+
+        compressor = self._first_page.copy()
+        streams = [self._first_page_head + compressor.compress(b"".join(first)) + compressor.flush()]
+        streams.extend(zlib.compress(b"".join(ops), self.compression_level) for ops in pages[1:])
+        return self._assemble(streams)
+
+    def _assemble(self, streams: list[bytes]) -> bytes:
+        out = bytearray(self._header)
+        offsets = {number: offset for number, offset in zip((2, 3, 4, 5), self._header_offsets)}
+        kids = []
+        for index, stream in enumerate(streams):
+            page_number, content_number = 6 + 2 * index, 7 + 2 * index
+            kids.append(b"%d 0 R" % page_number)
+            offsets[page_number] = len(out)
+            out += b"%d 0 obj\n<< /Type /Page /Parent 1 0 R /Resources 3 0 R /Contents %d 0 R >>\n" % (
+                page_number,
+                content_number,
+            )
+            out += b"endobj\n"
+            offsets[content_number] = len(out)
+            out += b"%d 0 obj\n<< /Filter /FlateDecode /Length %d >>\n" % (content_number, len(stream))
+            out += b"stream\n" + stream + b"\nendstream\nendobj\n"
+        offsets[1] = len(out)
+        out += b"1 0 obj\n<< /Type /Pages /Kids [%s] /Count %d /MediaBox [0 0 %.2f %.2f] >>\n" % (
+            b" ".join(kids),
+            len(kids),
+            PAGE_WIDTH_MM * _K,
+            PAGE_HEIGHT_MM * _K,
+        )
+        out += b"endobj\n"
+        xref = len(out)
+        size = max(offsets) + 1
+        out += b"xref\n0 %d\n0000000000 65535 f \n" % size
+        out += b"".join(b"%010d 00000 n \n" % offsets[number] for number in range(1, size))
+        out += b"trailer\n<< /Size %d /Root 2 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, xref)
+        return bytes(out)
+
+
+invoice_template = InvoiceTemplate()
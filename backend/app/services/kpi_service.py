@@ -0,0 +1,231 @@
+"""KPI counter service keeping dashboard totals incrementally up to date."""
+
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+from sqlalchemy import func, inspect, text
+from sqlmodel import Session, select
+
+from app.models import (
+    KpiCounter,
+    ProductionOrder,
+    ProductionOrderStatus,
+    SalesOrder,
+    SalesOrderStatus,
+)
+from app.repositories.kpi_counter_repository import KpiCounterRepository
+from app.services import event_hub
+
+logger = logging.getLogger(__name__)
+
+kpi_counter_repo = KpiCounterRepository()
+
+TOTAL_ORDERS = "sales_order.total"
+
+
+def sales_order_counter(status: SalesOrderStatus) -> str:
+    """Return the counter name tracking sales orders in ``status``."""
+
+    return f"sales_order.{status.value}"
+
+
+def production_counter(status: ProductionOrderStatus) -> str:
+    """Return the counter name tracking production orders in ``status``."""
+
+    return f"production_order.{status.value}"
+
+
+COUNTER_NAMES: tuple[str, ...] = (
+    TOTAL_ORDERS,
+    *(sales_order_counter(status) for status in SalesOrderStatus),
+    *(production_counter(status) for status in ProductionOrderStatus),
+)
+
+
+def record_sales_order_transition(
+    session: Session,
+    previous: SalesOrderStatus | None,
+    new: SalesOrderStatus | None,
+    count: int = 1,
+) -> None:
+    """Stage counter deltas for ``count`` sales orders moving from ``previous`` to ``new``.
+
+    ``previous=None`` records a newly created order and ``new=None`` a deleted one.
+    The update is not committed; the caller's next commit persists it together with
+    the status change.
+    """
+
+    deltas: dict[str, int] = {}
+    if previous is None:
+        deltas[TOTAL_ORDERS] = count
+    else:
+        deltas[sales_order_counter(previous)] = -count
+    if new is None:
+        deltas[TOTAL_ORDERS] = deltas.get(TOTAL_ORDERS, 0) - count
+    else:
+        deltas[sales_order_counter(new)] = deltas.get(sales_order_counter(new), 0) + count
+    _stage_deltas(session, deltas)
+
+
+def record_production_transition(
+    session: Session,
+    previous: ProductionOrderStatus | None,
+    new: ProductionOrderStatus | None,
+    count: int = 1,
+) -> None:
+    """Stage counter deltas for production order status changes (see above)."""
+
+    deltas: dict[str, int] = {}
+    if previous is not None:
+        deltas[production_counter(previous)] = -count
+    if new is not None:
+        deltas[production_counter(new)] = deltas.get(production_counter(new), 0) + count
+    _stage_deltas(session, deltas)
+
+
+def get_counter_values(session: Session) -> dict[str, int]:
+    """Return all KPI counters without writing; counters not seeded yet read as zero."""
+
+    return {**dict.fromkeys(COUNTER_NAMES, 0), **kpi_counter_repo.get_values(session)}
+
+
+def get_counter_snapshot(session: Session) -> dict[str, dict[str, int]]:
+    """Return the ``value`` and ``version`` of every counter, the base for ``kpi_delta`` events."""
+
+    entries = kpi_counter_repo.get_entries(session)
+    return {
+        name: dict(zip(("value", "version"), entries.get(name, (0, 0))))
+        for name in (*COUNTER_NAMES, *entries)
+    }
+
+
+def unseen_updates(
+    seen: dict[str, dict[str, int]],
+    updates: dict[str, dict[str, int]],
+) -> dict[str, dict[str, int]]:
+    """Return the ``kpi_delta`` updates newer than ``seen`` and record them in it.
+
+    A subscriber registered before its snapshot was read may receive updates
+    the snapshot already holds; their version is not above the snapshot's.
+    """
+
+    fresh = {}
+    for name, update in updates.items():
+        if update["version"] > seen.get(name, {"version": 0})["version"]:
+            seen[name] = {"value": update["value"], "version": update["version"]}
+            fresh[name] = update
+    return fresh
+
+
+def ensure_counters(session: Session) -> None:
+    """Seed counters that do not exist yet from exact counts; run once at startup.
+
+    Existing counters are left alone, so concurrent seeding cannot overwrite
+    increments that landed in between. Tables that predate counter versions
+    get the column first.
+    """
+
+    table = KpiCounter.__tablename__
+    columns = {column["name"] for column in inspect(session.connection()).get_columns(table)}
+    if "version" not in columns:
+        session.exec(
+            text(f"ALTER TABLE {table} ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        )
+        session.commit()
+    stored = kpi_counter_repo.get_values(session)
+    missing = [name for name in COUNTER_NAMES if name not in stored]
+    if not missing:
+        return
+    try:
+        counts = _count_from_base_tables(session)
+        kpi_counter_repo.insert_missing(session, {name: counts.get(name, 0) for name in missing})
+        session.commit()
+    except Exception:
+        session.rollback()
+        logger.exception("Failed to seed KPI counters")
+        raise
+    logger.info("Seeded %d KPI counter(s)", len(missing))
+
+
+def reconcile_counters(session: Session) -> list[dict[str, Any]]:
+    """Compare counters with full table counts, repair any drift, and report it.
+
+    The counters are locked before counting, so an increment racing the
+    recount waits and lands on top of the repaired value instead of being lost.
+    """
+
+    drift: list[dict[str, Any]] = []
+    repaired: dict[str, dict[str, int]] = {}
+    try:
+        stored = kpi_counter_repo.lock_values(session)
+        actual = _count_from_base_tables(session)
+        for name in COUNTER_NAMES:
+            expected = actual.get(name, 0)
+            current = stored.get(name)
+            if current == expected:
+                continue
+            drift.append({"name": name, "stored": current, "actual": expected})
+            counter = kpi_counter_repo.set_value(session, name, expected)
+            repaired[name] = {
+                "delta": expected - (current or 0),
+                "value": expected,
+                "version": counter.version,
+            }
+        if repaired:
+            event_hub.publish_after_commit(session, "kpi_delta", repaired)
+        session.commit()
+    except Exception:
+        session.rollback()
+        logger.exception("Failed to reconcile KPI counters")
+        raise
+
+    if drift:
+        logger.warning("Repaired %d drifted KPI counter(s): %s", len(drift), drift)
+    return drift
+
+
+def _stage_deltas(session: Session, deltas: dict[str, int]) -> None:
+    """Apply non-zero deltas to the counters and publish the applied ones.
+
+    Each published update carries the counter's new ``value`` and ``version``
+    besides the ``delta``, so subscribers can apply it idempotently.
+    """
+
+    applied: dict[str, dict[str, int]] = {}
+    missing = []
+    for name, delta in deltas.items():
+        if not delta:
+            continue
+        result = kpi_counter_repo.increment(session, name, delta)
+        if result is None:
+            missing.append(name)
+            continue
+        value, version = result
+        applied[name] = {"delta": delta, "value": value, "version": version}
+    if missing:
+        logger.warning("Skipped deltas for unseeded KPI counter(s): %s", ", ".join(missing))
+    if applied:
+        event_hub.publish_after_commit(session, "kpi_delta", applied)
+
+
+def _count_from_base_tables(session: Session) -> dict[str, int]:
+    """Return exact counter values computed with full aggregate queries."""
+
+    counts: dict[str, int] = {TOTAL_ORDERS: 0}
+
+    sales_rows = session.exec(
+        select(SalesOrder.status, func.count()).group_by(SalesOrder.status)
+    ).all()
+    for status, count in sales_rows:
+        counts[sales_order_counter(SalesOrderStatus(status))] = int(count)
+        counts[TOTAL_ORDERS] += int(count)
+
+    production_rows = session.exec(
+        select(ProductionOrder.status, func.count()).group_by(ProductionOrder.status)
+    ).all()
+    for status, count in production_rows:
+        counts[production_counter(ProductionOrderStatus(status))] = int(count)
+
+    return counts
@@ -0,0 +1,219 @@
+"""Per-product production lead and queue time percentiles from streaming sketches."""
+
+from __future__ import annotations
+
+import logging
+import math
+from collections import defaultdict
+from datetime import UTC, datetime
+from typing import Any
+
+from sqlmodel import Session, delete, select
+
+from app.models import (
+    Product,
+    ProductionOrder,
+    ProductionOrderStatus,
+    ProductionTimeMetric,
+    ProductionTimeSketchBucket,
+    SalesOrder,
+    SalesOrderItem,
+)
+from app.repositories.production_time_sketch_repository import ProductionTimeSketchRepository
+from app.repositories.sales_order_item_repository import SalesOrderItemRepository
+
+logger = logging.getLogger(__name__)
+
+sketch_repo = ProductionTimeSketchRepository()
+sales_order_item_repo = SalesOrderItemRepository()
+
+RELATIVE_ACCURACY = 0.01
+QUANTILES: dict[str, float] = {"p50": 0.5, "p90": 0.9, "p99": 0.99}
+
+
+class QuantileSketch:
+    """Logarithmically bucketed quantile sketch (DDSketch-style).
+
+    A duration ``x`` seconds lands in bucket ``ceil(log_gamma(x))`` with
+    ``gamma = (1 + a) / (1 - a)``, so every quantile estimate is within relative
+    accuracy ``a`` of a true sample value. Buckets are plain counters: recording a
+    sample is one increment and sketches merge by adding counts, which is what
+    lets them live in a table updated with atomic upserts. Durations under one
+    second share bucket 0.
+    """
+
+    def __init__(self, relative_accuracy: float = RELATIVE_ACCURACY) -> None:
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.counts: dict[int, int] = defaultdict(int)
+
+    @property
+    def count(self) -> int:
+        """Return the number of recorded samples."""
+        return sum(self.counts.values())
+
+    def bucket(self, seconds: float) -> int:
+        """Return the bucket index for a duration."""
+        if seconds <= 1:
+            return 0
+        return math.ceil(math.log(seconds) / self._log_gamma)
+
+    def add(self, seconds: float, count: int = 1) -> None:
+        """Record ``count`` samples of ``seconds``."""
+        self.counts[self.bucket(seconds)] += count
+
+    def quantile(self, q: float) -> float | None:
+        """Return the estimated ``q`` quantile in seconds, or ``None`` when empty."""
+        total = self.count
+        if not total:
+            return None
+        rank = q * (total - 1)
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen > rank:
+                return self._value(bucket)
+        return self._value(max(self.counts))
+
+    def _value(self, bucket: int) -> float:
+        if bucket == 0:
+            return 0.0
+        return 2 * self.gamma**bucket / (self.gamma + 1)
+
+
+_bucketing = QuantileSketch()
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=UTC)
+
+
+def _samples(
+    ordered_at: datetime,
+    started_at: datetime | None,
+    completed_at: datetime,
+) -> dict[ProductionTimeMetric, float]:
+    ordered_at = _as_utc(ordered_at)
+    samples = {
+        ProductionTimeMetric.lead_time: (_as_utc(completed_at) - ordered_at).total_seconds()
+    }
+    if started_at is not None:
+        samples[ProductionTimeMetric.queue_time] = (_as_utc(started_at) - ordered_at).total_seconds()
+    return samples
+
+
+def record_completion(
+    session: Session,
+    production: ProductionOrder,
+    completed_at: datetime,
+) -> None:
+    """Stage sketch increments for a production order that is being completed.
+
+    Lead time runs from the sales order's creation to completion and queue time
+    from creation to the start of production; every product on the order gets one
+    sample of each. Nothing is committed here.
+    """
+
+    order = session.get(SalesOrder, production.sales_order_id)
+    if order is None:
+        return
+    samples = _samples(order.created_at, production.start_date, completed_at)
+    product_ids = {item.product_id for item in sales_order_item_repo.list_by_order(session, order.id)}
+    for product_id in sorted(product_ids):
+        for metric, seconds in samples.items():
+            sketch_repo.upsert_increment(
+                session,
+                {"product_id": product_id, "metric": metric, "bucket": _bucketing.bucket(seconds)},
+                {"count": 1},
+            )
+
+
+def get_production_time_stats(
+    session: Session,
+    product_id: int | None = None,
+) -> list[dict[str, Any]]:
+    """Return lead and queue time percentiles per product, read from the sketches."""
+
+    sketches: dict[int, dict[ProductionTimeMetric, QuantileSketch]] = defaultdict(
+        lambda: {metric: QuantileSketch() for metric in ProductionTimeMetric}
+    )
+    for row in sketch_repo.list_buckets(session, product_id):
+        sketches[row.product_id][ProductionTimeMetric(row.metric)].counts[row.bucket] += row.count
+
+    names: dict[int, str] = {}
+    if sketches:
+        names = dict(
+            session.exec(select(Product.id, Product.name).where(Product.id.in_(list(sketches)))).all()
+        )
+    return [
+        {
+            "product_id": key,
+            "product_name": names.get(key),
+            **{metric.value: _summary(sketch) for metric, sketch in metrics.items()},
+        }
+        for key, metrics in sorted(sketches.items())
+    ]
+
+
+def _summary(sketch: QuantileSketch) -> dict[str, Any]:
+    return {
+        "count": sketch.count,
+        **{f"{name}_seconds": sketch.quantile(q) for name, q in QUANTILES.items()},
+    }
+
+
+def rebuild_sketches(session: Session) -> int:
+    """Recompute every sketch from completed production history; return the orders folded in."""
+
+    rows = session.exec(
+        select(
+            ProductionOrder.id,
+            ProductionOrder.start_date,
+            ProductionOrder.end_date,
+            SalesOrder.created_at,
+            SalesOrderItem.product_id,
+        )
+        .join(SalesOrder, SalesOrder.id == ProductionOrder.sales_order_id)
+        .join(SalesOrderItem, SalesOrderItem.sales_order_id == SalesOrder.id)
+        .where(ProductionOrder.status == ProductionOrderStatus.completed)
+        .where(ProductionOrder.end_date.is_not(None))
+        .distinct()
+    ).all()
+
+    counts: dict[tuple[int, ProductionTimeMetric, int], int] = defaultdict(int)
+    production_ids: set[int] = set()
+    for row in rows:
+        production_ids.add(row.id)
+        for metric, seconds in _samples(row.created_at, row.start_date, row.end_date).items():
+            counts[(row.product_id, metric, _bucketing.bucket(seconds))] += 1
+
+    try:
+        session.exec(delete(ProductionTimeSketchBucket))
+        session.add_all(
+            ProductionTimeSketchBucket(product_id=product_id, metric=metric, bucket=bucket, count=count)
+            for (product_id, metric, bucket), count in counts.items()
+        )
+        session.commit()
+    except Exception:
+        session.rollback()
+        logger.exception("Failed to rebuild production time sketches")
+        raise
+
+    logger.info("Rebuilt production time sketches from %d production order(s)", len(production_ids))
+    return len(production_ids)
+
+
+def ensure_sketches(session: Session) -> None:
+    """Backfill sketches when they are empty but completed production exists."""
+
+    has_sketches = session.exec(select(ProductionTimeSketchBucket.count).limit(1)).first()
+    if has_sketches is not None:
+        return
+    has_completed = session.exec(
+        select(ProductionOrder.id)
+        .where(ProductionOrder.status == ProductionOrderStatus.completed)
+        .limit(1)
+    ).first()
+    if has_completed is not None:
+        rebuild_sketches(session)
+
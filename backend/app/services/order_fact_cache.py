@@ -0,0 +1,300 @@
+"""Columnar in-memory cache of order facts for vectorized analytics."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import UTC, date, datetime
+from typing import Any
+
+import numpy as np
+from sqlmodel import Session, select
+
+from app.models import (
+    Customer,
+    RollupGranularity,
+    SalesOrder,
+    SalesOrderItem,
+    SalesOrderStatus,
+)
+from app.services import event_hub
+
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_DAY = 86_400
+DELETED = -1
+_STATUS_CODES: dict[SalesOrderStatus, int] = {
+    status: code for code, status in enumerate(SalesOrderStatus)
+}
+_STATUSES: list[SalesOrderStatus] = list(SalesOrderStatus)
+_CANCELLED = _STATUS_CODES[SalesOrderStatus.cancelled]
+
+
+def _epoch_seconds(value: datetime) -> int:
+    """Return POSIX seconds for ``value``, treating naive datetimes as UTC."""
+
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=UTC)
+    return int(value.timestamp())
+
+
+def _grow(array: np.ndarray, needed: int) -> np.ndarray:
+    """Return ``array`` or a copy with at least ``needed`` slots (amortised doubling)."""
+
+    if needed <= len(array):
+        return array
+    grown = np.empty(max(needed, 2 * len(array)), dtype=array.dtype)
+    grown[: len(array)] = array
+    return grown
+
+
+class OrderFactCache:
+    """Order and order-item facts held in NumPy columns.
+
+    New orders are appended incrementally (everything above the loaded high-water
+    id), and status changes are applied in place from committed ``order_status``
+    events. Events are process-local, so the cache also does a full reload every
+    ``reload_interval`` seconds to pick up writes made by other workers.
+    """
+
+    def __init__(self, reload_interval: float = 300.0, initial_capacity: int = 1024) -> None:
+        self.reload_interval = reload_interval
+        self._initial_capacity = initial_capacity
+        self._lock = threading.RLock()
+        self._bind: Any = None
+        self._reset()
+
+    def _reset(self) -> None:
+        capacity = self._initial_capacity
+        self._order_ids = np.empty(capacity, dtype=np.int64)
+        self._order_created = np.empty(capacity, dtype=np.int64)
+        self._order_status = np.empty(capacity, dtype=np.int8)
+        self._order_role = np.empty(capacity, dtype=np.int16)
+        self._order_total = np.empty(capacity, dtype=np.float64)
+        self._item_order_row = np.empty(capacity, dtype=np.int64)
+        self._item_product = np.empty(capacity, dtype=np.int64)
+        self._item_quantity = np.empty(capacity, dtype=np.int64)
+        self._item_subtotal = np.empty(capacity, dtype=np.float64)
+        self._order_count = 0
+        self._item_count = 0
+        self._order_rows: dict[int, int] = {}
+        self._roles: list[str] = []
+        self._role_codes: dict[str, int] = {}
+        self._high_water = 0
+        self._has_new_orders = False
+        self._loaded_at = 0.0
+
+    # --- Maintenance -----------------------------------------------------
+
+    def handle_event(self, event_type: str, data: dict[str, Any]) -> None:
+        """Apply a committed ``order_status`` event published by the service layer."""
+
+        if event_type != "order_status":
+            return
+        with self._lock:
+            if data.get("from") is None:
+                self._has_new_orders = True
+                return
+            row = self._order_rows.get(data["order_id"])
+            if row is None:
+                return
+            new_status = data.get("to")
+            self._order_status[row] = (
+                DELETED if new_status is None else _STATUS_CODES[SalesOrderStatus(new_status)]
+            )
+
+    def ensure_loaded(self, session: Session) -> None:
+        """Load or incrementally extend the cache so it reflects ``session``'s database."""
+
+        with self._lock:
+            bind = session.get_bind()
+            stale = time.monotonic() - self._loaded_at > self.reload_interval
+            if bind is not self._bind or stale:
+                self._reset()
+                self._bind = bind
+                self._append_after(session, 0)
+                self._loaded_at = time.monotonic()
+            elif self._has_new_orders:
+                self._append_after(session, self._high_water)
+
+    def invalidate(self) -> None:
+        """Force a full reload on next use."""
+
+        with self._lock:
+            self._bind = None
+
+    def _role_code(self, role: str | None) -> int:
+        role = role or "unknown"
+        code = self._role_codes.get(role)
+        if code is None:
+            code = len(self._roles)
+            self._roles.append(role)
+            self._role_codes[role] = code
+        return code
+
+    def _append_after(self, session: Session, after_id: int) -> None:
+        """Append every order (and its items) with an id greater than ``after_id``."""
+
+        self._has_new_orders = False
+        order_rows = session.exec(
+            select(
+                SalesOrder.id,
+                SalesOrder.created_at,
+                SalesOrder.status,
+                SalesOrder.total_amount,
+                Customer.role,
+            )
+            .join(Customer, Customer.id == SalesOrder.customer_id, isouter=True)
+            .where(SalesOrder.id > after_id)
+            .order_by(SalesOrder.id)
+        ).all()
+        if not order_rows:
+            return
+        item_rows = session.exec(
+            select(
+                SalesOrderItem.sales_order_id,
+                SalesOrderItem.product_id,
+                SalesOrderItem.quantity,
+                SalesOrderItem.subtotal,
+            ).where(SalesOrderItem.sales_order_id > after_id)
+        ).all()
+
+        start, end = self._order_count, self._order_count + len(order_rows)
+        self._order_ids = _grow(self._order_ids, end)
+        self._order_created = _grow(self._order_created, end)
+        self._order_status = _grow(self._order_status, end)
+        self._order_role = _grow(self._order_role, end)
+        self._order_total = _grow(self._order_total, end)
+        self._order_ids[start:end] = [row.id for row in order_rows]
+        self._order_created[start:end] = [_epoch_seconds(row.created_at) for row in order_rows]
+        self._order_status[start:end] = [
+            _STATUS_CODES[SalesOrderStatus(row.status)] for row in order_rows
+        ]
+        self._order_role[start:end] = [self._role_code(row.role) for row in order_rows]
+        self._order_total[start:end] = [row.total_amount for row in order_rows]
+        for offset, row in enumerate(order_rows):
+            self._order_rows[row.id] = start + offset
+        self._order_count = end
+        self._high_water = order_rows[-1].id
+
+        item_rows = [row for row in item_rows if row.sales_order_id in self._order_rows]
+        start, end = self._item_count, self._item_count + len(item_rows)
+        self._item_order_row = _grow(self._item_order_row, end)
+        self._item_product = _grow(self._item_product, end)
+        self._item_quantity = _grow(self._item_quantity, end)
+        self._item_subtotal = _grow(self._item_subtotal, end)
+        self._item_order_row[start:end] = [self._order_rows[row.sales_order_id] for row in item_rows]
+        self._item_product[start:end] = [row.product_id for row in item_rows]
+        self._item_quantity[start:end] = [row.quantity for row in item_rows]
+        self._item_subtotal[start:end] = [row.subtotal for row in item_rows]
+        self._item_count = end
+
+    # --- Aggregations ----------------------------------------------------
+
+    def status_counts(self) -> dict[str, int]:
+        """Return the number of live orders per sales order status."""
+
+        with self._lock:
+            statuses = self._order_status[: self._order_count]
+            counts = np.bincount(statuses[statuses != DELETED], minlength=len(_STATUSES))
+            return {status.value: int(counts[code]) for status, code in _STATUS_CODES.items()}
+
+    def top_products(self, limit: int = 5) -> list[tuple[int, int]]:
+        """Return ``(product_id, quantity)`` pairs for the most ordered products."""
+
+        with self._lock:
+            live = self._order_status[self._item_order_row[: self._item_count]] != DELETED
+            products = self._item_product[: self._item_count][live]
+            if products.size == 0:
+                return []
+            quantities = np.bincount(
+                products, weights=self._item_quantity[: self._item_count][live]
+            )
+            ordered = np.flatnonzero(quantities)
+            ordered = ordered[np.argsort(-quantities[ordered], kind="stable")][:limit]
+            return [(int(product_id), int(quantities[product_id])) for product_id in ordered]
+
+    def order_volume(
+        self,
+        granularity: RollupGranularity,
+        start: date,
+        end: date,
+    ) -> list[dict[str, Any]]:
+        """Return non-cancelled order counts and revenue per created-at bucket."""
+
+        start_day = (start - date(1970, 1, 1)).days
+        end_day = (end - date(1970, 1, 1)).days
+        with self._lock:
+            days = self._order_created[: self._order_count] // SECONDS_PER_DAY
+            statuses = self._order_status[: self._order_count]
+            mask = (
+                (days >= start_day)
+                & (days <= end_day)
+                & (statuses != DELETED)
+                & (statuses != _CANCELLED)
+            )
+            days = days[mask]
+            totals = self._order_total[: self._order_count][mask]
+
+        if granularity == RollupGranularity.week:
+            # 1970-01-01 was a Thursday; shift so buckets start on Monday.
+            days = days - (days + 3) % 7
+        elif granularity == RollupGranularity.month:
+            days = (
+                days.astype("datetime64[D]").astype("datetime64[M]").astype("datetime64[D]")
+            ).astype(np.int64)
+
+        buckets, inverse = np.unique(days, return_inverse=True)
+        order_counts = np.bincount(inverse, minlength=len(buckets))
+        revenue = np.bincount(inverse, weights=totals, minlength=len(buckets))
+        bucket_dates = buckets.astype("datetime64[D]").tolist()
+        return [
+            {
+                "bucket_start": bucket_dates[index],
+                "order_count": int(order_counts[index]),
+                "revenue": float(revenue[index]),
+            }
+            for index in range(len(buckets))
+        ]
+
+    def role_breakdown(self) -> list[dict[str, Any]]:
+        """Return order count, quantity and revenue of non-cancelled orders per role."""
+
+        with self._lock:
+            statuses = self._order_status[: self._order_count]
+            live = (statuses != DELETED) & (statuses != _CANCELLED)
+            roles = self._order_role[: self._order_count]
+            role_count = len(self._roles)
+            order_counts = np.bincount(roles[live], minlength=role_count)
+            revenue = np.bincount(
+                roles[live], weights=self._order_total[: self._order_count][live], minlength=role_count
+            )
+            item_rows = self._item_order_row[: self._item_count]
+            item_live = live[item_rows]
+            quantities = np.bincount(
+                roles[item_rows][item_live],
+                weights=self._item_quantity[: self._item_count][item_live],
+                minlength=role_count,
+            )
+            return [
+                {
+                    "customer_role": role,
+                    "order_count": int(order_counts[code]),
+                    "quantity": int(quantities[code]),
+                    "revenue": float(revenue[code]),
+                }
+                for code, role in enumerate(self._roles)
+                if order_counts[code]
+            ]
+
+
+fact_cache = OrderFactCache()
+event_hub.hub.add_listener(fact_cache.handle_event)
+
+
+def get_fact_cache(session: Session) -> OrderFactCache:
+    """Return the shared fact cache, brought up to date for ``session``'s database."""
+
+    fact_cache.ensure_loaded(session)
+    return fact_cache
@@ -8,7 +8,14 @@ from typing import Any, TypedDict
 
 from sqlmodel import Session
 
-from app.models import Delivery, DeliveryStatus, SalesOrder, SalesOrderStatus
+from app.models import (
+    Delivery,
+    DeliveryStatus,
+    ProductionOrderStatus,
+    SalesOrder,
+    SalesOrderStatus,
+    current_utc_time,
+)
 from app.repositories.billing_repository import BillingRepository
 from app.repositories.customer_repository import CustomerRepository
 from app.repositories.delivery_repository import DeliveryRepository
@@ -16,6 +23,15 @@ from app.repositories.product_repository import ProductRepository
 from app.repositories.production_order_repository import ProductionOrderRepository
 from app.repositories.sales_order_item_repository import SalesOrderItemRepository
 from app.repositories.sales_order_repository import SalesOrderRepository
+from app.services import (
+    analytics_service,
+    atp_service,
+    credit_service,
+    event_hub,
+    inventory_service,
+    invoice_numbers,
+    kpi_service,
+)
 from app.services.exceptions import InvalidTransitionError
 
 logger = logging.getLogger(__name__)
@@ -131,6 +147,8 @@ def create_order_with_items(
                 }
             )
 
+        credit_service.reserve_order(session, customer_id, total_amount)
+        kpi_service.record_sales_order_transition(session, None, SalesOrderStatus.created)
         order = sales_order_repo.create(
             session,
             {
@@ -138,7 +156,9 @@ def create_order_with_items(
                 "total_amount": total_amount,
                 "status": SalesOrderStatus.created,
             },
+            commit=False,
         )
+        event_hub.publish_order_status(session, order.id, None, SalesOrderStatus.created)
 
         for item_payload in order_items:
             sales_order_item_repo.create(
@@ -147,9 +167,22 @@ def create_order_with_items(
                     "sales_order_id": order.id,
                     **item_payload,
                 },
+                commit=False,
             )
-
-        logger.info("Created order %s with %d item(s)", order.id, len(order_items))
+        requested = [
+            (item_payload["product_id"], item_payload["quantity"]) for item_payload in order_items
+        ]
+        inventory_service.reserve_order_items(session, order.id, requested)
+        promised_date = atp_service.commit_order(session, order.id, requested)
+        # The order and its items become visible together in a single commit.
+        session.commit()
+
+        logger.info(
+            "Created order %s with %d item(s), promised for %s",
+            order.id,
+            len(order_items),
+            promised_date,
+        )
         return sales_order_repo.get_or_raise(session, order.id)
     except Exception:
         session.rollback()
@@ -217,6 +250,7 @@ def get_order_details(session: Session, order_id: int) -> dict[str, Any]:
         "status": order.status,
         "total_amount": order.total_amount,
         "created_at": order.created_at,
+        "promised_date": atp_service.get_promised_dates(session, [order_id]).get(order_id),
         "items": item_payloads,
         "production_orders": production_payloads,
         "deliveries": delivery_payloads,
@@ -242,6 +276,7 @@ def update_order_status(
         else SalesOrderStatus(status)
     )
     order = sales_order_repo.get_or_raise(session, order_id)
+    previous_status = order.status
 
     allowed_targets = _ALLOWED_TRANSITIONS.get(order.status, set())
     if desired_status not in allowed_targets:
@@ -252,6 +287,23 @@ def update_order_status(
         )
 
     # Update the order status
+    if desired_status == SalesOrderStatus.billed:
+        billing = billing_repo.get_by_sales_order(session, order_id)
+        analytics_service.record_order_billed(
+            session,
+            order,
+            getattr(billing, "billed_date", None) or current_utc_time(),
+            billing.amount if billing else order.total_amount,
+        )
+    if desired_status == SalesOrderStatus.cancelled:
+        inventory_service.release_order(session, order_id)
+        atp_service.release_order(session, order_id)
+        credit_service.release_order(session, order.customer_id, order.total_amount)
+        _cancel_open_production(session, order_id)
+    elif desired_status == SalesOrderStatus.delivered:
+        inventory_service.issue_order(session, order_id)
+    kpi_service.record_sales_order_transition(session, previous_status, desired_status)
+    event_hub.publish_order_status(session, order_id, previous_status, desired_status)
     updated = sales_order_repo.update_status(session, order_id, desired_status)
     
     # Create Delivery entity when order becomes ready for delivery
@@ -272,25 +324,58 @@ def update_order_status(
     elif desired_status == SalesOrderStatus.delivered:
         existing_billing = billing_repo.get_by_sales_order(session, order_id)
         if not existing_billing:
-            billing_repo.create(
+            billed_at = current_utc_time()
+            billing = billing_repo.create(
                 session,
                 {
                     "sales_order_id": order_id,
                     "amount": updated.total_amount,
-                    "invoice_number": f"INV-{order_id:06d}",
-                }
+                    "invoice_number": invoice_numbers.next_invoice_number(session, billed_at),
+                    "billed_date": billed_at,
+                },
+                commit=False,
+            )
+            credit_service.record_billed(
+                session, [(updated.customer_id, updated.total_amount, billing.amount)]
             )
+            event_hub.publish_billings_created(session, [billing.id])
+            session.commit()
             logger.info("Created billing record for order %s", order_id)
     
     logger.info(
         "Order %s transitioned from %s to %s",
         order_id,
-        order.status,
+        previous_status,
         desired_status,
     )
     return updated
 
 
+def _cancel_open_production(session: Session, order_id: int) -> None:
+    """Stage cancellation of production orders that have not finished yet."""
+
+    for production in production_repo.list_by_sales_order(session, order_id):
+        if production.status not in (
+            ProductionOrderStatus.planned,
+            ProductionOrderStatus.in_progress,
+        ):
+            continue
+        kpi_service.record_production_transition(
+            session,
+            production.status,
+            ProductionOrderStatus.cancelled,
+        )
+        event_hub.publish_production_status(
+            session,
+            production.id,
+            order_id,
+            production.status,
+            ProductionOrderStatus.cancelled,
+        )
+        production.status = ProductionOrderStatus.cancelled
+        session.add(production)
+
+
 def transition_to_ready_for_delivery(session: Session, order_id: int) -> SalesOrder:
     """Transition an order to ready_for_delivery status and create delivery entity.
     
@@ -304,12 +389,19 @@ def delete_order(session: Session, order_id: int) -> bool:
     """Delete an order and all its associated items."""
 
     # Ensure the order exists before attempting deletions.
-    sales_order_repo.get_or_raise(session, order_id)
+    order = sales_order_repo.get_or_raise(session, order_id)
     items = sales_order_item_repo.list_by_order(session, order_id)
 
     try:
         for item in items:
             sales_order_item_repo.delete(session, item.id)
+        inventory_service.release_order(session, order_id)
+        atp_service.forget_order(session, order_id)
+        billed = billing_repo.get_by_sales_order(session, order_id) is not None
+        if order.status != SalesOrderStatus.cancelled and not billed:
+            credit_service.release_order(session, order.customer_id, order.total_amount)
+        kpi_service.record_sales_order_transition(session, order.status, None)
+        event_hub.publish_order_status(session, order_id, order.status, None)
         deleted = sales_order_repo.delete(session, order_id)
         logger.info("Deleted order %s and %d item(s)", order_id, len(items))
         return deleted
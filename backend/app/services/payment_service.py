@@ -0,0 +1,331 @@
+"""Bank statement import and cash application against open billings."""
+
+from __future__ import annotations
+
+import csv
+import hashlib
+import logging
+import os
+import re
+from collections import defaultdict, deque
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import Any
+
+from sqlmodel import Session
+
+from app.models import PaymentImport, PaymentStatus
+from app.repositories.billing_payment_total_repository import BillingPaymentTotalRepository
+from app.repositories.billing_repository import BillingRepository
+from app.repositories.customer_repository import CustomerRepository
+from app.repositories.payment_import_repository import PaymentImportRepository
+from app.repositories.payment_repository import PaymentRepository
+from app.services import credit_service, event_hub
+
+logger = logging.getLogger(__name__)
+
+billing_repo = BillingRepository()
+customer_repo = CustomerRepository()
+payment_repo = PaymentRepository()
+payment_import_repo = PaymentImportRepository()
+payment_total_repo = BillingPaymentTotalRepository()
+
+PAYMENT_IMPORT_BATCH_SIZE = int(os.getenv("PAYMENT_IMPORT_BATCH_SIZE", "1000"))
+REQUIRED_COLUMNS = ("date", "amount")
+OPTIONAL_COLUMNS = ("reference", "invoice_number", "customer_email")
+INVOICE_NUMBER_PATTERN = re.compile(r"\bINV-(?:\d{4}-\d{4,6}|\d{6})\b", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class StatementLine:
+    """One parsed credit line of a bank statement; ``amount`` is in cents."""
+
+    line_number: int
+    paid_on: date
+    amount: int
+    reference: str | None
+    invoice_number: str | None
+    customer_email: str | None
+
+
+def _cents(amount: float) -> int:
+    return round(amount * 100)
+
+
+class StatementImport:
+    """Streams one CSV bank statement into payments inside a single transaction.
+
+    The statement needs a header with ``date`` (ISO) and ``amount`` columns and
+    may carry ``reference``, ``invoice_number`` and ``customer_email``. Lines
+    can be fed in chunks of any size; every ``batch_size`` parsed lines are
+    matched and staged with a constant number of statements: one lookup each for
+    the batch's invoice numbers, customer emails and those customers' open
+    billings, one locking re-read of the candidate billings' open amounts, one
+    multi-row payment insert and one multi-row upsert of billing
+    payment totals. Matching is done with hash maps built from those lookups,
+    first by invoice number (when a given customer agrees), then by customer
+    and exact open amount, oldest billing first. A payment above the open
+    amount is applied up to it and the excess kept as unapplied overpayment; a
+    smaller one leaves the billing partly open. Debits and zero lines are
+    skipped. Nothing is committed until ``finish``, which also refuses a
+    statement that was imported before.
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        filename: str | None = None,
+        *,
+        batch_size: int = PAYMENT_IMPORT_BATCH_SIZE,
+    ) -> None:
+        self.session = session
+        self.batch_size = max(batch_size, 1)
+        self.record = payment_import_repo.create(session, {"filename": filename}, commit=False)
+        self._digest = hashlib.sha256()
+        self._columns: dict[str, int] | None = None
+        self._pending: list[StatementLine] = []
+        self._line_number = 0
+        self._counts = {"lines": 0, "matched": 0, "unmatched": 0, "skipped": 0}
+        self._cents = {"amount_received": 0, "amount_applied": 0, "amount_unapplied": 0}
+
+    def feed(self, lines: Iterable[str]) -> None:
+        """Parse statement lines, applying every full batch."""
+        for line in lines:
+            self._line_number += 1
+            line = line.rstrip("\r\n")
+            self._digest.update(line.encode() + b"\n")
+            if not line.strip():
+                continue
+            [fields] = csv.reader([line])
+            if self._columns is None:
+                self._columns = self._read_header(fields)
+                continue
+            self._counts["lines"] += 1
+            parsed = self._parse(fields)
+            if parsed is None:
+                self._counts["skipped"] += 1
+                continue
+            self._pending.append(parsed)
+            if len(self._pending) >= self.batch_size:
+                self._apply(self._pending)
+                self._pending = []
+
+    def finish(self) -> PaymentImport:
+        """Apply the last batch, record the import totals and commit everything."""
+        if self._columns is None:
+            raise ValueError("The statement is empty.")
+        if self._pending:
+            self._apply(self._pending)
+            self._pending = []
+        checksum = self._digest.hexdigest()
+        previous = payment_import_repo.get_by_checksum(self.session, checksum)
+        if previous is not None:
+            raise ValueError(f"This statement was already imported (import {previous.id}).")
+
+        record = self.record
+        record.checksum = checksum
+        for field, value in self._counts.items():
+            setattr(record, field, value)
+        for field, value in self._cents.items():
+            setattr(record, field, value / 100)
+        self.session.add(record)
+        event_hub.publish_after_commit(
+            self.session,
+            "payment_recorded",
+            {
+                "import_id": record.id,
+                "matched": record.matched,
+                "amount_applied": record.amount_applied,
+            },
+        )
+        self.session.commit()
+        self.session.refresh(record)
+        logger.info(
+            "Imported payment statement %s: %d line(s), %d matched, %.2f applied, %.2f unapplied",
+            record.id,
+            record.lines,
+            record.matched,
+            record.amount_applied,
+            record.amount_unapplied,
+        )
+        return record
+
+    @staticmethod
+    def _read_header(fields: list[str]) -> dict[str, int]:
+        columns = {name.strip().lstrip("\ufeff").lower(): index for index, name in enumerate(fields)}
+        missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+        if missing:
+            raise ValueError(f"Statement header is missing column(s): {', '.join(missing)}.")
+        return {name: columns[name] for name in (*REQUIRED_COLUMNS, *OPTIONAL_COLUMNS) if name in columns}
+
+    def _parse(self, fields: list[str]) -> StatementLine | None:
+        def field(name: str) -> str | None:
+            index = self._columns.get(name)
+            value = fields[index].strip() if index is not None and index < len(fields) else ""
+            return value or None
+
+        try:
+            paid_on = date.fromisoformat(field("date") or "")
+            amount = Decimal((field("amount") or "").replace(",", ""))
+        except (ValueError, InvalidOperation):
+            raise ValueError(f"Line {self._line_number}: expected an ISO date and a numeric amount.")
+        cents = int((amount * 100).to_integral_value())
+        if cents <= 0:
+            return None
+        reference = field("reference")
+        invoice_number = field("invoice_number")
+        if invoice_number is None and reference:
+            found = INVOICE_NUMBER_PATTERN.search(reference)
+            invoice_number = found.group(0) if found else None
+        email = field("customer_email")
+        return StatementLine(
+            line_number=self._line_number,
+            paid_on=paid_on,
+            amount=cents,
+            reference=reference,
+            invoice_number=invoice_number.upper() if invoice_number else None,
+            customer_email=email.lower() if email else None,
+        )
+
+    def _apply(self, batch: list[StatementLine]) -> None:
+        session = self.session
+        customers = customer_repo.ids_by_email(
+            session, {line.customer_email for line in batch if line.customer_email}
+        )
+        by_invoice = {
+            row.invoice_number: row
+            for row in billing_repo.open_amounts_by_invoice_number(
+                session, {line.invoice_number for line in batch if line.invoice_number}
+            )
+        }
+        customer_billings = billing_repo.open_amounts_for_customers(session, set(customers.values()))
+        # Lock the candidates and re-read what is open, so concurrent imports
+        # cannot both apply payment against the same open amount.
+        open_cents = {
+            row.id: _cents(row.open_amount)
+            for row in billing_repo.lock_open_amounts(
+                session, {row.id for row in (*by_invoice.values(), *customer_billings)}
+            )
+        }
+        by_customer_amount: dict[tuple[int, int], deque[int]] = defaultdict(deque)
+        for row in customer_billings:
+            by_customer_amount[(row.customer_id, open_cents[row.id])].append(row.id)
+
+        payments: list[dict[str, Any]] = []
+        applied_totals: dict[int, list[int]] = defaultdict(lambda: [0, 0])
+        applied_by_customer: dict[int, int] = defaultdict(int)
+        for line in batch:
+            customer_id = customers.get(line.customer_email) if line.customer_email else None
+            billing_id = rule = None
+            invoice = by_invoice.get(line.invoice_number) if line.invoice_number else None
+            if invoice is not None and customer_id in (None, invoice.customer_id):
+                billing_id, rule, customer_id = invoice.id, "invoice_number", invoice.customer_id
+            elif customer_id is not None:
+                candidates = by_customer_amount.get((customer_id, line.amount))
+                while candidates:
+                    candidate = candidates.popleft()
+                    if open_cents[candidate] == line.amount:
+                        billing_id, rule = candidate, "customer_amount"
+                        break
+
+            if billing_id is None:
+                applied, status = 0, PaymentStatus.unmatched
+                self._counts["unmatched"] += 1
+            else:
+                applied = min(line.amount, max(open_cents[billing_id], 0))
+                open_cents[billing_id] -= applied
+                if applied < line.amount:
+                    status = PaymentStatus.overpaid
+                elif open_cents[billing_id] > 0:
+                    status = PaymentStatus.partial
+                else:
+                    status = PaymentStatus.applied
+                totals = applied_totals[billing_id]
+                totals[0] += applied
+                totals[1] += 1
+                applied_by_customer[customer_id] += applied
+                self._counts["matched"] += 1
+            self._cents["amount_received"] += line.amount
+            self._cents["amount_applied"] += applied
+            self._cents["amount_unapplied"] += line.amount - applied
+            payments.append(
+                {
+                    "import_id": self.record.id,
+                    "line_number": line.line_number,
+                    "paid_on": line.paid_on,
+                    "amount": line.amount / 100,
+                    "reference": line.reference,
+                    "invoice_number": line.invoice_number,
+                    "customer_id": customer_id,
+                    "billing_id": billing_id,
+                    "applied_amount": applied / 100,
+                    "unapplied_amount": (line.amount - applied) / 100,
+                    "status": status,
+                    "match_rule": rule,
+                }
+            )
+
+        payment_repo.insert_many(session, payments)
+        payment_total_repo.upsert_increment_many(
+            session,
+            ["billing_id"],
+            [
+                {"billing_id": billing_id, "amount_paid": cents / 100, "payment_count": count}
+                for billing_id, (cents, count) in applied_totals.items()
+            ],
+        )
+        credit_service.record_payments(
+            session, {customer_id: cents / 100 for customer_id, cents in applied_by_customer.items()}
+        )
+
+
+def import_statement(
+    session: Session,
+    lines: Iterable[str],
+    filename: str | None = None,
+    *,
+    batch_size: int = PAYMENT_IMPORT_BATCH_SIZE,
+) -> PaymentImport:
+    """Import a whole statement from an iterable of lines, all or nothing."""
+
+    try:
+        statement_import = StatementImport(session, filename, batch_size=batch_size)
+        statement_import.feed(lines)
+        return statement_import.finish()
+    except Exception:
+        session.rollback()
+        logger.exception("Payment statement import failed")
+        raise
+
+
+def list_imports(session: Session, limit: int = 50) -> list[PaymentImport]:
+    """Return statement imports newest first."""
+
+    return payment_import_repo.list_recent(session, limit)
+
+
+def get_import(session: Session, import_id: int) -> PaymentImport:
+    """Return one statement import or raise if missing."""
+
+    return payment_import_repo.get_or_raise(session, import_id)
+
+
+def list_payments(
+    session: Session,
+    *,
+    import_id: int | None = None,
+    status: PaymentStatus | str | None = None,
+    limit: int = 100,
+    offset: int = 0,
+) -> list[Any]:
+    """Return recorded payments, optionally of one import and in one status."""
+
+    return payment_repo.list_filtered(
+        session,
+        import_id=import_id,
+        status=PaymentStatus(status) if status is not None else None,
+        limit=limit,
+        offset=offset,
+    )
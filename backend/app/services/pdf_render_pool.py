@@ -0,0 +1,180 @@
+"""Bounded process pool rendering invoice PDFs off the request threads."""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import threading
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime
+from typing import Any
+
+from fpdf import FPDF
+
+from app.services.exceptions import RenderPoolSaturatedError
+from app.services.invoice_template import invoice_template
+
+logger = logging.getLogger(__name__)
+
+RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+RENDER_QUEUE_DEPTH = int(os.getenv("PDF_RENDER_QUEUE_DEPTH", str(2 * max(RENDER_WORKERS, 1))))
+RENDER_SUBMIT_TIMEOUT = float(os.getenv("PDF_RENDER_SUBMIT_TIMEOUT", "30"))
+
+# Plain, picklable invoice data: strings and numbers only, no ORM instances.
+InvoicePayload = dict[str, Any]
+
+
+def invoice_payload(
+    *,
+    invoice_number: str | None,
+    billed_at: datetime,
+    customer_name: str,
+    customer_email: str,
+    line_items: Iterable[dict[str, Any]],
+    amount: float,
+) -> InvoicePayload:
+    """Return the plain-data payload a render worker needs for one invoice."""
+
+    return {
+        "invoice_number": invoice_number or "",
+        "invoice_date": f"{billed_at:%Y-%m-%d %H:%M %Z}",
+        "customer_name": customer_name,
+        "customer_email": customer_email,
+        "line_items": [
+            (str(entry["name"]), int(entry["quantity"]), float(entry["subtotal"]))
+            for entry in line_items
+        ],
+        "amount": float(amount),
+    }
+
+
+def render_invoice_pdf(payload: InvoicePayload) -> bytes:
+    """Render one invoice from the prepared template (runs in a worker process)."""
+
+    return invoice_template.render(payload)
+
+
+def render_invoice_pdf_with_fpdf(payload: InvoicePayload) -> bytes:
+    """Lay out one invoice from scratch with FPDF.
+
+    This is the original renderer that the template reproduces; it is kept as
+    the reference for comparisons and benchmarks.
+    """
+
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+
+    pdf.set_font("Helvetica", "B", 18)
+    pdf.cell(0, 10, "Invoice", ln=True)
+
+    pdf.set_font("Helvetica", size=12)
+    pdf.cell(0, 8, f"Invoice Number: {payload['invoice_number']}", ln=True)
+    pdf.cell(0, 8, f"Invoice Date: {payload['invoice_date']}", ln=True)
+    pdf.ln(4)
+    pdf.cell(0, 8, f"Bill To: {payload['customer_name']}", ln=True)
+    pdf.cell(0, 8, f"Email: {payload['customer_email']}", ln=True)
+    pdf.ln(6)
+
+    pdf.set_font("Helvetica", "B", 12)
+    pdf.cell(100, 8, "Item", border=1)
+    pdf.cell(30, 8, "Quantity", border=1, align="R")
+    pdf.cell(40, 8, "Subtotal", border=1, align="R", ln=True)
+
+    pdf.set_font("Helvetica", size=12)
+    for name, quantity, subtotal in payload["line_items"]:
+        pdf.cell(100, 8, name, border=1)
+        pdf.cell(30, 8, f"{quantity}", border=1, align="R")
+        pdf.cell(40, 8, f"{subtotal:.2f}", border=1, align="R", ln=True)
+
+    pdf.ln(6)
+    pdf.set_font("Helvetica", "B", 12)
+    pdf.cell(130, 8, "Total", border=1)
+    pdf.cell(40, 8, f"{payload['amount']:.2f}", border=1, align="R", ln=True)
+
+    return bytes(pdf.output())
+
+
+class RenderPool:
+    """``ProcessPoolExecutor`` with a bounded number of queued and running renders.
+
+    At most ``workers + queue_depth`` renders are outstanding; further submitters
+    block for up to ``submit_timeout`` seconds and then get
+    ``RenderPoolSaturatedError`` instead of growing the queue without bound.
+    Workers are spawned lazily on first use. With ``workers=0`` renders run
+    inline on the calling thread.
+    """
+
+    def __init__(
+        self,
+        workers: int = RENDER_WORKERS,
+        queue_depth: int = RENDER_QUEUE_DEPTH,
+        submit_timeout: float = RENDER_SUBMIT_TIMEOUT,
+    ) -> None:
+        self.workers = workers
+        self.submit_timeout = submit_timeout
+        self._queue_depth = queue_depth
+        self._slots = threading.BoundedSemaphore(max(workers, 1) + queue_depth)
+        self._lock = threading.Lock()
+        self._executor: ProcessPoolExecutor | None = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Spawned workers do not inherit the parent's threads, locks or DB connections.
+                self._executor = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+                logger.info("Started PDF render pool with %d worker(s)", self.workers)
+            return self._executor
+
+    def submit(self, payload: InvoicePayload, timeout: float | None = None) -> Future[bytes]:
+        """Queue one render, waiting for a free slot; raise if none frees up in time."""
+        if self.workers <= 0:
+            future: Future[bytes] = Future()
+            try:
+                future.set_result(render_invoice_pdf(payload))
+            except Exception as exc:
+                future.set_exception(exc)
+            return future
+        wait = self.submit_timeout if timeout is None else timeout
+        if not self._slots.acquire(timeout=wait):
+            raise RenderPoolSaturatedError(wait)
+        try:
+            future = self._get_executor().submit(render_invoice_pdf, payload)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def render(self, payload: InvoicePayload, timeout: float | None = None) -> bytes:
+        """Render one invoice and wait for its bytes."""
+        return self.submit(payload, timeout).result()
+
+    def render_many(self, payloads: Iterable[InvoicePayload]) -> Iterator[bytes]:
+        """Render invoices in input order, keeping the pool full without unbounded queueing."""
+        capacity = max(self.workers, 1) + self._queue_depth
+        pending: deque[Future[bytes]] = deque()
+        for payload in payloads:
+            # Wait on our own oldest render rather than on the slot semaphore, so a
+            # long batch never times out, and hand back results in order.
+            while pending and (len(pending) >= capacity or pending[0].done()):
+                yield pending.popleft().result()
+            pending.append(self.submit(payload))
+        while pending:
+            yield pending.popleft().result()
+
+    def shutdown(self) -> None:
+        """Stop the worker processes; a later render starts a fresh pool."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+            logger.info("Stopped PDF render pool")
+
+
+render_pool = RenderPool()
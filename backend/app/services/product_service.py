@@ -2,51 +2,174 @@
 
 from __future__ import annotations
 
+import hashlib
 import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
 from typing import Any, Mapping, Sequence
 
-from sqlalchemy import func
 from sqlmodel import Session
 
 from app.models import Product
-from app.repositories.product_repository import ProductRepository
+from app.repositories.product_repository import UPSERT_COLUMNS, ProductRepository
+from app.schemas.common import SuccessResponse
+from app.schemas.products import ProductResponse
+from app.services import inventory_service
+from app.services.search_index import product_index
 
 logger = logging.getLogger(__name__)
 
 product_repo = ProductRepository()
 
+CATALOG_CACHE_TTL_SECONDS = float(os.getenv("CATALOG_CACHE_TTL_SECONDS", "60"))
+BULK_UPSERT_BATCH_SIZE = 500
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """Pre-encoded catalog response body with its validator."""
+
+    body: bytes
+    etag: str
+    built_at: float
+
+
+_catalog_lock = threading.Lock()
+_catalog_snapshot: CatalogSnapshot | None = None
+_catalog_bind: Any = None
+
 
 def get_product_catalog(
     session: Session,
     *,
     search: str | None = None,
 ) -> Sequence[Product]:
-    """Return all products optionally filtered by a case-insensitive search term."""
+    """Return all products optionally filtered by a case-insensitive search term.
+
+    Search terms are resolved against the in-memory index over product names and
+    descriptions; only the matching rows are then loaded by primary key.
+    """
 
     filters = None
     if search:
-        pattern = f"%{search.lower()}%"
-        filters = [func.lower(Product.name).like(pattern)]
+        product_index.ensure_built(session)
+        product_ids = product_index.search(search)
+        if not product_ids:
+            return []
+        filters = [Product.id.in_(product_ids)]
 
     return product_repo.list(session, filters=filters)
 
 
+def autocomplete_products(session: Session, query: str, *, limit: int = 10) -> list[dict[str, Any]]:
+    """Return product suggestions for ``query`` straight from the search index."""
+
+    product_index.ensure_built(session)
+    return [
+        {"id": product_id, "label": name}
+        for product_id, name in product_index.autocomplete(query, limit=limit)
+    ]
+
+
+def get_catalog_snapshot(session: Session) -> CatalogSnapshot:
+    """Return the cached, JSON-encoded full catalog, rebuilding it when stale.
+
+    The snapshot is dropped whenever this process changes a product and expires
+    after ``CATALOG_CACHE_TTL_SECONDS`` to bound staleness across workers.
+    """
+
+    global _catalog_snapshot, _catalog_bind
+
+    bind = session.get_bind()
+    snapshot = _catalog_snapshot
+    if _is_fresh(snapshot, bind):
+        return snapshot
+
+    with _catalog_lock:
+        snapshot = _catalog_snapshot
+        if _is_fresh(snapshot, bind):
+            return snapshot
+        products = product_repo.list(session)
+        body = SuccessResponse[list[ProductResponse]](
+            data=[ProductResponse.model_validate(product, from_attributes=True) for product in products]
+        ).model_dump_json().encode()
+        snapshot = CatalogSnapshot(
+            body=body,
+            etag=f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"',
+            built_at=time.monotonic(),
+        )
+        _catalog_snapshot, _catalog_bind = snapshot, bind
+        logger.info("Built catalog cache with %d product(s)", len(products))
+        return snapshot
+
+
+def _is_fresh(snapshot: CatalogSnapshot | None, bind: Any) -> bool:
+    return (
+        snapshot is not None
+        and _catalog_bind is bind
+        and time.monotonic() - snapshot.built_at < CATALOG_CACHE_TTL_SECONDS
+    )
+
+
+def invalidate_catalog_cache() -> None:
+    """Drop the cached catalog so the next read rebuilds it."""
+
+    global _catalog_snapshot
+    with _catalog_lock:
+        _catalog_snapshot = None
+
+
+def warm_catalog_cache(session: Session) -> None:
+    """Build the catalog cache ahead of the first storefront request."""
+
+    get_catalog_snapshot(session)
+
+
 def create_product_with_stock(
     session: Session,
     product_data: Mapping[str, Any],
     stock_qty: int | None = None,
 ) -> Product:
-    """Create a product and optionally seed its stock quantity."""
+    """Create a product and optionally seed its stock quantity.
 
-    payload = dict(product_data)
-    if stock_qty is not None:
-        if stock_qty < 0:
-            raise ValueError("stock_qty cannot be negative")
-        payload["stock_qty"] = stock_qty
+    Passing ``stock_qty`` (even zero) makes the product stock-tracked, so sales
+    orders reserve against its balance.
+    """
 
-    product = product_repo.create(session, payload)
+    if stock_qty is not None and stock_qty < 0:
+        raise ValueError("stock_qty cannot be negative")
+
+    try:
+        product = product_repo.create(session, dict(product_data), commit=False)
+        if stock_qty is not None:
+            inventory_service.track_stock(session, product.id, stock_qty)
+        session.commit()
+    except Exception:
+        session.rollback()
+        logger.exception("Failed to create product")
+        raise
+
+    invalidate_catalog_cache()
     logger.info("Created product %s", product.id)
-    return product
+    return product_repo.get_or_raise(session, product.id)
+
+
+def restock_product(session: Session, product_id: int, quantity: int) -> Product:
+    """Receive ``quantity`` additional units of a product into stock."""
+
+    product_repo.get_or_raise(session, product_id)
+    try:
+        inventory_service.receive_stock(session, product_id, quantity)
+        session.commit()
+    except Exception:
+        session.rollback()
+        logger.exception("Failed to restock product %s", product_id)
+        raise
+
+    logger.info("Restocked product %s with %d unit(s)", product_id, quantity)
+    return product_repo.get_or_raise(session, product_id)
 
 
 def get_product(session: Session, product_id: int) -> Product:
@@ -58,6 +181,7 @@ def update_product(session: Session, product_id: int, product_data: Mapping[str,
     """Update an existing product with new data."""
     product = product_repo.get_or_raise(session, product_id)
     updated = product_repo.update(session, product_id, product_data)
+    invalidate_catalog_cache()
     logger.info("Updated product %s", product_id)
     return updated
 
@@ -66,4 +190,108 @@ def delete_product(session: Session, product_id: int) -> None:
     """Delete a product by ID."""
     product = product_repo.get_or_raise(session, product_id)
     product_repo.delete(session, product_id)
+    invalidate_catalog_cache()
     logger.info("Deleted product %s", product_id)
+
+
+def upsert_product_batch(session: Session, rows: Sequence[Mapping[str, Any]]) -> dict[str, Any]:
+    """Stage one batch of a bulk product import without committing.
+
+    Rows with a description are upserts: keyed rows go through
+    ``INSERT ... ON CONFLICT (external_key)``, the rest are matched by name. A
+    new key whose name matches a product without a key is attached to that
+    product instead of inserting a duplicate. Rows
+    without a description only update the price of an existing product. Each kind
+    is applied with a constant number of set-based statements.
+    """
+
+    upserts_by_key: dict[str, dict[str, Any]] = {}
+    upserts_by_name: dict[str, dict[str, Any]] = {}
+    prices_by_key: dict[str, dict[str, Any]] = {}
+    prices_by_name: dict[str, dict[str, Any]] = {}
+    for row in rows:
+        external_key = row.get("external_key")
+        if row.get("description") is not None:
+            payload = {column: row.get(column) for column in UPSERT_COLUMNS}
+            if external_key:
+                upserts_by_key[external_key] = {**payload, "external_key": external_key}
+            else:
+                upserts_by_name[row["name"]] = payload
+        elif external_key:
+            prices_by_key[external_key] = {"price": row["price"]}
+        else:
+            prices_by_name[row["name"]] = {"price": row["price"]}
+
+    existing_keys = product_repo.existing_values(session, "external_key", upserts_by_key)
+    new_keys_by_name = {
+        row["name"]: key for key, row in upserts_by_key.items() if key not in existing_keys
+    }
+    adopted_names = product_repo.unkeyed_names(session, new_keys_by_name)
+    product_repo.update_many_by_key(
+        session,
+        "name",
+        {name: upserts_by_key.pop(new_keys_by_name[name]) for name in adopted_names},
+        (*UPSERT_COLUMNS, "external_key"),
+        unkeyed_only=True,
+    )
+    product_repo.upsert_by_external_key(session, list(upserts_by_key.values()))
+
+    existing_names = product_repo.existing_values(session, "name", upserts_by_name)
+    product_repo.update_many_by_key(
+        session,
+        "name",
+        {name: row for name, row in upserts_by_name.items() if name in existing_names},
+        UPSERT_COLUMNS,
+    )
+    product_repo.insert_many(
+        session,
+        [row for name, row in upserts_by_name.items() if name not in existing_names],
+    )
+
+    matched_keys = product_repo.existing_values(session, "external_key", prices_by_key)
+    matched_names = product_repo.existing_values(session, "name", prices_by_name)
+    product_repo.update_many_by_key(
+        session,
+        "external_key",
+        {key: row for key, row in prices_by_key.items() if key in matched_keys},
+        ("price",),
+    )
+    product_repo.update_many_by_key(
+        session,
+        "name",
+        {name: row for name, row in prices_by_name.items() if name in matched_names},
+        ("price",),
+    )
+
+    updated = len(existing_keys) + len(adopted_names) + len(existing_names)
+    return {
+        "received": len(rows),
+        "inserted": len(upserts_by_key) + len(adopted_names) + len(upserts_by_name) - updated,
+        "updated": updated,
+        "price_updates": len(matched_keys) + len(matched_names),
+        "unmatched": sorted(set(prices_by_key) - matched_keys)
+        + sorted(set(prices_by_name) - matched_names),
+    }
+
+
+def new_bulk_summary() -> dict[str, Any]:
+    """Return an empty bulk import summary."""
+
+    return {"received": 0, "inserted": 0, "updated": 0, "price_updates": 0, "unmatched": []}
+
+
+def merge_bulk_summaries(total: dict[str, Any], batch: Mapping[str, Any]) -> dict[str, Any]:
+    """Accumulate a batch summary into a running total."""
+
+    for field in ("received", "inserted", "updated", "price_updates"):
+        total[field] += batch[field]
+    total["unmatched"] = [*total["unmatched"], *batch["unmatched"]]
+    return total
+
+
+def finish_bulk_upsert(session: Session) -> None:
+    """Commit a staged bulk import and drop catalog caches that it bypassed."""
+
+    session.commit()
+    invalidate_catalog_cache()
+    product_index.invalidate()
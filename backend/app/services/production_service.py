@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import logging
 from datetime import datetime
+from typing import Any
 
 from sqlmodel import Session
 
@@ -14,7 +15,9 @@ from app.models import (
     current_utc_time,
 )
 from app.repositories.production_order_repository import ProductionOrderRepository
+from app.repositories.sales_order_item_repository import SalesOrderItemRepository
 from app.repositories.sales_order_repository import SalesOrderRepository
+from app.services import atp_service, event_hub, kpi_service, lead_time_service
 from app.services.exceptions import InvalidTransitionError
 from app.services.order_service import transition_to_ready_for_delivery
 
@@ -22,6 +25,9 @@ logger = logging.getLogger(__name__)
 
 production_repo = ProductionOrderRepository()
 sales_order_repo = SalesOrderRepository()
+sales_order_item_repo = SalesOrderItemRepository()
+
+WAVE_SIZE_LIMIT = 5000
 
 
 def list_production_orders(
@@ -55,12 +61,32 @@ def start_production_for_order(session: Session, sales_order_id: int) -> Product
         )
 
     try:
+        kpi_service.record_production_transition(session, None, ProductionOrderStatus.planned)
         production = production_repo.create(
             session,
             {
                 "sales_order_id": order.id,
                 "status": ProductionOrderStatus.planned,
             },
+            commit=False,
+        )
+        event_hub.publish_production_status(
+            session,
+            production.id,
+            order.id,
+            None,
+            ProductionOrderStatus.planned,
+        )
+        kpi_service.record_sales_order_transition(
+            session,
+            order.status,
+            SalesOrderStatus.in_production,
+        )
+        event_hub.publish_order_status(
+            session,
+            order.id,
+            order.status,
+            SalesOrderStatus.in_production,
         )
         sales_order_repo.update_status(session, order.id, SalesOrderStatus.in_production)
         logger.info(
@@ -75,6 +101,93 @@ def start_production_for_order(session: Session, sales_order_id: int) -> Product
         raise
 
 
+def release_wave(
+    session: Session,
+    *,
+    product_id: int | None = None,
+    limit: int = 500,
+) -> dict[str, Any]:
+    """Release ``created`` sales orders to the floor as one wave and return its composition.
+
+    The orders are flipped to ``in_production`` with a single guarded ``UPDATE``,
+    one planned production order per sales order is inserted in bulk, and the
+    wave is summarised per product so the floor can batch identical work. With
+    ``product_id`` only orders containing that product are released.
+    """
+
+    if not 0 < limit <= WAVE_SIZE_LIMIT:
+        raise ValueError(f"limit must be between 1 and {WAVE_SIZE_LIMIT}.")
+
+    try:
+        order_ids = sales_order_repo.transition_many(
+            session,
+            SalesOrderStatus.created,
+            SalesOrderStatus.in_production,
+            product_id=product_id,
+            limit=limit,
+        )
+        productions = production_repo.create_planned_many(session, order_ids)
+        if order_ids:
+            kpi_service.record_sales_order_transition(
+                session,
+                SalesOrderStatus.created,
+                SalesOrderStatus.in_production,
+                count=len(order_ids),
+            )
+            kpi_service.record_production_transition(
+                session,
+                None,
+                ProductionOrderStatus.planned,
+                count=len(productions),
+            )
+        for order_id in order_ids:
+            event_hub.publish_order_status(
+                session,
+                order_id,
+                SalesOrderStatus.created,
+                SalesOrderStatus.in_production,
+            )
+        for production_id, order_id in productions:
+            event_hub.publish_production_status(
+                session,
+                production_id,
+                order_id,
+                None,
+                ProductionOrderStatus.planned,
+            )
+
+        products: dict[int, dict[str, Any]] = {}
+        for row in sales_order_item_repo.quantities_by_product(session, order_ids):
+            batch = products.setdefault(
+                row.product_id,
+                {
+                    "product_id": row.product_id,
+                    "product_name": row.product_name,
+                    "quantity": 0,
+                    "sales_order_ids": [],
+                },
+            )
+            batch["quantity"] += int(row.quantity)
+            batch["sales_order_ids"].append(row.sales_order_id)
+        session.commit()
+    except Exception:
+        session.rollback()
+        logger.exception("Failed to release production wave")
+        raise
+
+    logger.info(
+        "Released wave of %d sales order(s) across %d product(s)",
+        len(order_ids),
+        len(products),
+    )
+    return {
+        "order_count": len(order_ids),
+        "sales_order_ids": order_ids,
+        "production_order_ids": [production_id for production_id, _ in productions],
+        "products": list(products.values()),
+    }
+
+
 def mark_production_in_progress(session: Session, production_id: int) -> ProductionOrder:
     """Set the production order status to in_progress and stamp the start time."""
 
@@ -87,6 +200,18 @@ def mark_production_in_progress(session: Session, production_id: int) -> Product
         )
 
     start_time = current_utc_time()
+    kpi_service.record_production_transition(
+        session,
+        production.status,
+        ProductionOrderStatus.in_progress,
+    )
+    event_hub.publish_production_status(
+        session,
+        production_id,
+        production.sales_order_id,
+        production.status,
+        ProductionOrderStatus.in_progress,
+    )
     updated = production_repo.update(
         session,
         production_id,
@@ -111,6 +236,21 @@ def mark_production_complete(session: Session, production_id: int) -> Production
         )
 
     end_time = current_utc_time()
+    # Capacity booked for days after an early completion becomes available again.
+    atp_service.release_order(session, production.sales_order_id, after=end_time.date())
+    kpi_service.record_production_transition(
+        session,
+        production.status,
+        ProductionOrderStatus.completed,
+    )
+    lead_time_service.record_completion(session, production, end_time)
+    event_hub.publish_production_status(
+        session,
+        production_id,
+        production.sales_order_id,
+        production.status,
+        ProductionOrderStatus.completed,
+    )
     updated = production_repo.update(
         session,
         production_id,
@@ -0,0 +1,129 @@
+"""Accounts-receivable reporting over open billings."""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from datetime import UTC, date, datetime, time as dt_time, timedelta
+from typing import Any
+
+from sqlmodel import Session
+
+from app.repositories.billing_repository import BillingRepository
+from app.services import event_hub
+
+logger = logging.getLogger(__name__)
+
+billing_repo = BillingRepository()
+
+# (label, first day of age) of each aging bucket, youngest first.
+AGING_BUCKETS: tuple[tuple[str, int], ...] = (
+    ("days_0_30", 0),
+    ("days_31_60", 31),
+    ("days_61_90", 61),
+    ("days_over_90", 91),
+)
+AGING_CACHE_SECONDS = float(os.getenv("AR_AGING_CACHE_SECONDS", "300"))
+_INVALIDATING_EVENTS = frozenset({"billing_created", "payment_recorded"})
+
+
+class AgingReportCache:
+    """Aging reports per ``as_of`` day, dropped on every billing or payment event.
+
+    Events are process-local, so entries also expire after ``max_age`` seconds
+    to pick up billings and payments recorded by other workers.
+    """
+
+    def __init__(self, max_age: float = AGING_CACHE_SECONDS) -> None:
+        self.max_age = max_age
+        self._reports: dict[date, tuple[float, dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, as_of: date) -> dict[str, Any] | None:
+        with self._lock:
+            entry = self._reports.get(as_of)
+        if entry is None or time.monotonic() - entry[0] > self.max_age:
+            return None
+        return entry[1]
+
+    def put(self, as_of: date, report: dict[str, Any]) -> None:
+        with self._lock:
+            self._reports[as_of] = (time.monotonic(), report)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reports.clear()
+
+    def handle_event(self, event_type: str, data: dict[str, Any]) -> None:
+        """Drop cached reports when a committed event changes receivables."""
+        if event_type in _INVALIDATING_EVENTS:
+            self.clear()
+
+
+aging_cache = AgingReportCache()
+event_hub.hub.add_listener(aging_cache.handle_event)
+
+
+def _empty_buckets() -> dict[str, float]:
+    return {label: 0.0 for label, _ in AGING_BUCKETS} | {"total": 0.0}
+
+
+def get_aging_report(session: Session, as_of: date | None = None) -> dict[str, Any]:
+    """Return open receivables per customer, per role and overall, bucketed by age in days.
+
+    The age of a billing is the number of calendar days (UTC) from its billing
+    date to ``as_of`` (default today). All amounts come from one grouped query;
+    the report is cached until the next billing or payment event.
+    """
+
+    as_of = as_of or datetime.now(tz=UTC).date()
+    cached = aging_cache.get(as_of)
+    if cached is not None:
+        return cached
+
+    def day_start(day: date) -> datetime:
+        return datetime.combine(day, dt_time.min, tzinfo=UTC)
+
+    rows = billing_repo.aging_by_customer(
+        session,
+        day_start(as_of + timedelta(days=1)),
+        [day_start(as_of - timedelta(days=first_day - 1)) for _, first_day in AGING_BUCKETS[1:]],
+    )
+    customers: list[dict[str, Any]] = []
+    roles: dict[str, dict[str, Any]] = {}
+    totals = _empty_buckets()
+    for row in rows:
+        amounts = {
+            label: float(getattr(row, f"bucket_{index}") or 0.0)
+            for index, (label, _) in enumerate(AGING_BUCKETS)
+        }
+        amounts["total"] = sum(amounts.values())
+        customers.append(
+            {
+                "customer_id": row.customer_id,
+                "customer_name": row.customer_name,
+                "customer_role": row.customer_role,
+                "invoice_count": row.invoice_count,
+                **amounts,
+            }
+        )
+        role = roles.setdefault(
+            row.customer_role,
+            {"customer_role": row.customer_role, "customer_count": 0, "invoice_count": 0, **_empty_buckets()},
+        )
+        role["customer_count"] += 1
+        role["invoice_count"] += row.invoice_count
+        for label, amount in amounts.items():
+            role[label] += amount
+            totals[label] += amount
+
+    report = {
+        "as_of": as_of,
+        "customers": customers,
+        "roles": sorted(roles.values(), key=lambda role: role["customer_role"]),
+        "totals": totals,
+    }
+    aging_cache.put(as_of, report)
+    return report
@@ -0,0 +1,312 @@
+"""Capacity-aware shop-floor scheduler sequencing open production orders."""
+
+from __future__ import annotations
+
+import bisect
+import itertools
+import logging
+import math
+import os
+import threading
+import time
+from collections.abc import Iterator
+from datetime import date, datetime, time as clock_time, timedelta
+from typing import Any
+
+from sqlmodel import Session
+
+from app.models import ProductionOrderStatus, current_utc_time
+from app.repositories.production_order_repository import ProductionOrderRepository
+from app.services import event_hub
+
+logger = logging.getLogger(__name__)
+
+production_repo = ProductionOrderRepository()
+
+DAILY_MINUTES = int(os.getenv("SCHEDULER_DAILY_MINUTES", "480"))
+SHIFT_START_HOUR = int(os.getenv("SCHEDULER_SHIFT_START_HOUR", "8"))
+DEFAULT_RUN_MINUTES = float(os.getenv("SCHEDULER_DEFAULT_RUN_MINUTES", "30"))
+
+# (in-progress first, priority day ordinal, production order id)
+ScheduleKey = tuple[int, int, int]
+
+
+class ScheduleSequence:
+    """Sorted sequence of keyed durations with fast running totals.
+
+    Keys are held in blocks of at most ``2 * block_size`` entries, each with its
+    total duration, so inserting, removing or locating the start offset of one
+    entry touches a single block plus the per-block totals: roughly O(sqrt(n))
+    instead of shifting every later entry. Prefix sums over the block totals are
+    cached between changes.
+    """
+
+    def __init__(self, block_size: int = 64) -> None:
+        self.block_size = block_size
+        self._blocks: list[list[ScheduleKey]] = []
+        self._maxes: list[ScheduleKey] = []
+        self._totals: list[int] = []
+        self._durations: dict[ScheduleKey, int] = {}
+        self._prefix: list[int] | None = None
+
+    def __len__(self) -> int:
+        return len(self._durations)
+
+    def __contains__(self, key: ScheduleKey) -> bool:
+        return key in self._durations
+
+    @property
+    def total(self) -> int:
+        """Return the summed duration of every entry."""
+        return sum(self._totals)
+
+    def insert(self, key: ScheduleKey, duration: int) -> None:
+        """Add an entry in key order."""
+        if key in self._durations:
+            self.remove(key)
+        self._durations[key] = duration
+        self._prefix = None
+        if not self._blocks:
+            self._blocks.append([key])
+            self._maxes.append(key)
+            self._totals.append(duration)
+            return
+        index = min(bisect.bisect_left(self._maxes, key), len(self._blocks) - 1)
+        block = self._blocks[index]
+        bisect.insort(block, key)
+        self._maxes[index] = block[-1]
+        self._totals[index] += duration
+        if len(block) > 2 * self.block_size:
+            head, tail = block[: self.block_size], block[self.block_size :]
+            self._blocks[index : index + 1] = [head, tail]
+            self._maxes[index : index + 1] = [head[-1], tail[-1]]
+            self._totals[index : index + 1] = [
+                sum(self._durations[item] for item in head),
+                sum(self._durations[item] for item in tail),
+            ]
+
+    def remove(self, key: ScheduleKey) -> int:
+        """Remove an entry and return its duration."""
+        duration = self._durations.pop(key)
+        self._prefix = None
+        index = bisect.bisect_left(self._maxes, key)
+        block = self._blocks[index]
+        del block[bisect.bisect_left(block, key)]
+        if block:
+            self._maxes[index] = block[-1]
+            self._totals[index] -= duration
+        else:
+            del self._blocks[index], self._maxes[index], self._totals[index]
+        return duration
+
+    def start_of(self, key: ScheduleKey) -> int:
+        """Return the summed duration of every entry ordered before ``key``."""
+        index = bisect.bisect_left(self._maxes, key)
+        block = self._blocks[index]
+        position = bisect.bisect_left(block, key)
+        if self._prefix is None:
+            self._prefix = list(itertools.accumulate(self._totals, initial=0))
+        return self._prefix[index] + sum(self._durations[item] for item in block[:position])
+
+    def iterate(self, offset: int = 0) -> Iterator[tuple[ScheduleKey, int, int]]:
+        """Yield ``(key, start, duration)`` in order, skipping the first ``offset`` entries."""
+        start = 0
+        for block, total in zip(self._blocks, self._totals):
+            if offset >= len(block):
+                offset -= len(block)
+                start += total
+                continue
+            for item in block:
+                duration = self._durations[item]
+                if offset:
+                    offset -= 1
+                else:
+                    yield item, start, duration
+                start += duration
+            offset = 0
+
+
+class ProductionScheduler:
+    """Sequence of open production orders on a single work center.
+
+    In-progress orders run first, then planned orders by promised date (falling
+    back to the order date) and id. Each order occupies its run minutes of the
+    daily shift, so start and end times follow from the running total in front
+    of it. Committed ``production_status`` events add, re-key or drop orders
+    incrementally; the sequence is rebuilt when used with another database,
+    when run times change, or after ``reload_interval`` seconds.
+    """
+
+    def __init__(self, reload_interval: float = 300.0) -> None:
+        self.reload_interval = reload_interval
+        self._lock = threading.RLock()
+        self._bind: Any = None
+        self._loaded_at = 0.0
+        self._reset()
+
+    def _reset(self) -> None:
+        self._sequence = ScheduleSequence()
+        self._keys: dict[int, ScheduleKey] = {}
+        self._orders: dict[int, dict[str, Any]] = {}
+        self._pending: set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    # --- Maintenance -----------------------------------------------------
+
+    def handle_event(self, event_type: str, data: dict[str, Any]) -> None:
+        """Apply a committed ``production_status`` or ``product_capacity`` event."""
+
+        if event_type == "product_capacity":
+            self.invalidate()
+            return
+        if event_type != "production_status":
+            return
+        production_id = data["production_order_id"]
+        with self._lock:
+            if data.get("to") == ProductionOrderStatus.in_progress.value and production_id in self._keys:
+                self._orders[production_id]["status"] = ProductionOrderStatus.in_progress
+                self._place(production_id)
+            elif data.get("to") in (
+                ProductionOrderStatus.planned.value,
+                ProductionOrderStatus.in_progress.value,
+            ):
+                self._pending.add(production_id)
+            else:
+                self._pending.discard(production_id)
+                self._drop(production_id)
+
+    def ensure_loaded(self, session: Session) -> None:
+        """Build the schedule, or fold in orders added since the last use."""
+
+        with self._lock:
+            bind = session.get_bind()
+            if bind is not self._bind or time.monotonic() - self._loaded_at > self.reload_interval:
+                self._reset()
+                self._add_rows(production_repo.list_open_workloads(session, DEFAULT_RUN_MINUTES))
+                self._bind = bind
+                self._loaded_at = time.monotonic()
+                logger.info("Built production schedule with %d order(s)", len(self))
+            elif self._pending:
+                pending, self._pending = self._pending, set()
+                self._add_rows(
+                    production_repo.list_open_workloads(session, DEFAULT_RUN_MINUTES, pending)
+                )
+
+    def invalidate(self) -> None:
+        """Force a full rebuild on next use."""
+
+        with self._lock:
+            self._bind = None
+
+    def _add_rows(self, rows: list[Any]) -> None:
+        for row in rows:
+            priority = row.promised_date or row.created_at.date()
+            self._orders[row.id] = {
+                "production_order_id": row.id,
+                "sales_order_id": row.sales_order_id,
+                "status": ProductionOrderStatus(row.status),
+                "priority_date": priority,
+                "run_minutes": max(math.ceil(row.run_minutes or 0), 1),
+            }
+            self._place(row.id)
+
+    def _place(self, production_id: int) -> None:
+        order = self._orders[production_id]
+        key = (
+            0 if order["status"] == ProductionOrderStatus.in_progress else 1,
+            order["priority_date"].toordinal(),
+            production_id,
+        )
+        previous = self._keys.get(production_id)
+        if previous is not None:
+            self._sequence.remove(previous)
+        self._keys[production_id] = key
+        self._sequence.insert(key, order["run_minutes"])
+
+    def _drop(self, production_id: int) -> None:
+        key = self._keys.pop(production_id, None)
+        if key is not None:
+            self._sequence.remove(key)
+            self._orders.pop(production_id, None)
+
+    # --- Queries ---------------------------------------------------------
+
+    def slot_for(self, production_id: int, now: datetime | None = None) -> dict[str, Any] | None:
+        """Return the scheduled slot of one production order, if it is open."""
+
+        with self._lock:
+            key = self._keys.get(production_id)
+            if key is None:
+                return None
+            start = self._sequence.start_of(key)
+            return self._slot(production_id, start, _ShiftClock(now or current_utc_time()))
+
+    def slots(
+        self,
+        *,
+        offset: int = 0,
+        limit: int = 100,
+        now: datetime | None = None,
+    ) -> list[dict[str, Any]]:
+        """Return scheduled slots in execution order."""
+
+        clock = _ShiftClock(now or current_utc_time())
+        with self._lock:
+            slots = []
+            for (_, _, production_id), start, _ in self._sequence.iterate(offset):
+                if len(slots) >= limit:
+                    break
+                slots.append(self._slot(production_id, start, clock))
+            return slots
+
+    def _slot(self, production_id: int, start: int, clock: "_ShiftClock") -> dict[str, Any]:
+        order = self._orders[production_id]
+        return {
+            **order,
+            "planned_start": clock.at(start),
+            "planned_end": clock.at(start + order["run_minutes"], is_end=True),
+        }
+
+
+class _ShiftClock:
+    """Map working-minute offsets from ``now`` onto calendar times of daily shifts."""
+
+    def __init__(self, now: datetime) -> None:
+        shift_start = datetime.combine(now.date(), clock_time(SHIFT_START_HOUR), tzinfo=now.tzinfo)
+        elapsed = (now - shift_start).total_seconds() / 60
+        self.first_day: date = now.date()
+        if elapsed >= DAILY_MINUTES:
+            self.first_day += timedelta(days=1)
+            elapsed = 0
+        self.origin = max(math.ceil(elapsed), 0)
+        self.tzinfo = now.tzinfo
+
+    def at(self, offset: int, *, is_end: bool = False) -> datetime:
+        day, minute = divmod(self.origin + offset, DAILY_MINUTES)
+        if is_end and minute == 0 and day > 0:
+            # An order finishing exactly at closing time ends that day, not the next morning.
+            day, minute = day - 1, DAILY_MINUTES
+        return datetime.combine(
+            self.first_day + timedelta(days=day), clock_time(SHIFT_START_HOUR), tzinfo=self.tzinfo
+        ) + timedelta(minutes=minute)
+
+
+scheduler = ProductionScheduler()
+event_hub.hub.add_listener(scheduler.handle_event)
+
+
+def get_schedule(session: Session, *, offset: int = 0, limit: int = 100) -> list[dict[str, Any]]:
+    """Return the shop-floor schedule of open production orders in execution order."""
+
+    scheduler.ensure_loaded(session)
+    return scheduler.slots(offset=offset, limit=limit)
+
+
+def get_production_slot(session: Session, production_id: int) -> dict[str, Any] | None:
+    """Return the scheduled slot of one open production order, or ``None``."""
+
+    production_repo.get_or_raise(session, production_id)
+    scheduler.ensure_loaded(session)
+    return scheduler.slot_for(production_id)
@@ -0,0 +1,224 @@
+"""In-memory inverted indexes with prefix and trigram matching for catalog search."""
+
+from __future__ import annotations
+
+import bisect
+import logging
+import re
+import threading
+import time
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+from sqlmodel import Session, SQLModel, select
+
+from app.models import Customer, Product
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+_PENDING_CHANGES_KEY = "search_index.pending"
+
+
+def tokenize(text: str | None) -> list[str]:
+    """Split text into lower-cased word tokens."""
+
+    return _TOKEN_PATTERN.findall((text or "").lower())
+
+
+def _trigrams(token: str) -> set[str]:
+    return {token[index : index + 3] for index in range(len(token) - 2)}
+
+
+class SearchIndex:
+    """Inverted index mapping tokens to document ids.
+
+    Query terms match indexed tokens by prefix (binary search over the sorted
+    vocabulary) or, for terms of three or more characters, by substring through a
+    trigram-to-token index. Every query term must match for a document to qualify.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._clear()
+
+    def _clear(self) -> None:
+        self._labels: dict[int, str] = {}
+        self._doc_tokens: dict[int, set[str]] = {}
+        self._postings: dict[str, set[int]] = {}
+        self._vocabulary: list[str] = []
+        self._trigram_tokens: dict[str, set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def clear(self) -> None:
+        """Remove every document."""
+        with self._lock:
+            self._clear()
+
+    def add(self, doc_id: int, label: str, texts: Iterable[str | None]) -> None:
+        """Index (or re-index) a document under ``label`` using ``texts``."""
+        tokens = {token for text in texts for token in tokenize(text)}
+        tokens.update(tokenize(label))
+        with self._lock:
+            self._remove(doc_id)
+            self._labels[doc_id] = label
+            self._doc_tokens[doc_id] = tokens
+            for token in tokens:
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = set()
+                    bisect.insort(self._vocabulary, token)
+                    for trigram in _trigrams(token):
+                        self._trigram_tokens.setdefault(trigram, set()).add(token)
+                postings.add(doc_id)
+
+    def remove(self, doc_id: int) -> None:
+        """Drop a document from the index if present."""
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id: int) -> None:
+        self._labels.pop(doc_id, None)
+        for token in self._doc_tokens.pop(doc_id, set()):
+            postings = self._postings[token]
+            postings.discard(doc_id)
+            if postings:
+                continue
+            del self._postings[token]
+            del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
+            for trigram in _trigrams(token):
+                tokens = self._trigram_tokens[trigram]
+                tokens.discard(token)
+                if not tokens:
+                    del self._trigram_tokens[trigram]
+
+    def _matching_tokens(self, term: str) -> set[str]:
+        start = bisect.bisect_left(self._vocabulary, term)
+        end = bisect.bisect_left(self._vocabulary, term + "\uffff")
+        matches = set(self._vocabulary[start:end])
+        if len(term) >= 3:
+            trigram_sets = [self._trigram_tokens.get(trigram, set()) for trigram in _trigrams(term)]
+            candidates = set.intersection(*trigram_sets) if trigram_sets else set()
+            matches.update(token for token in candidates if term in token)
+        return matches
+
+    def search(self, query: str) -> set[int]:
+        """Return ids of documents matching every term in ``query``."""
+        terms = tokenize(query)
+        if not terms:
+            return set()
+        with self._lock:
+            result: set[int] | None = None
+            for term in sorted(set(terms), key=len, reverse=True):
+                docs: set[int] = set()
+                for token in self._matching_tokens(term):
+                    docs |= self._postings[token]
+                result = docs if result is None else result & docs
+                if not result:
+                    return set()
+            return result or set()
+
+    def autocomplete(self, query: str, limit: int = 10) -> list[tuple[int, str]]:
+        """Return ``(id, label)`` suggestions, labels starting with the query first."""
+        normalized = query.strip().lower()
+        doc_ids = self.search(query)
+        with self._lock:
+            suggestions = [(doc_id, self._labels[doc_id]) for doc_id in doc_ids]
+        suggestions.sort(
+            key=lambda item: (not item[1].lower().startswith(normalized), item[1].lower(), item[0])
+        )
+        return suggestions[:limit]
+
+
+class ModelSearchIndex(SearchIndex):
+    """Search index over one table, built lazily and kept current by ORM events.
+
+    Inserts, updates and deletes of ``model`` instances are collected during the
+    flush and applied once the owning session commits. The index is rebuilt when
+    it is used with a different database or after ``rebuild_interval`` seconds,
+    which bounds staleness caused by writes from other worker processes.
+    """
+
+    def __init__(
+        self,
+        model: type[SQLModel],
+        label: Callable[[Any], str],
+        texts: Callable[[Any], Iterable[str | None]],
+        rebuild_interval: float = 300.0,
+    ) -> None:
+        super().__init__()
+        self.model = model
+        self.label = label
+        self.texts = texts
+        self.rebuild_interval = rebuild_interval
+        self._bind: Any = None
+        self._built_at = 0.0
+        event.listen(model, "after_insert", self._stage_upsert)
+        event.listen(model, "after_update", self._stage_upsert)
+        event.listen(model, "after_delete", self._stage_delete)
+
+    def ensure_built(self, session: Session) -> None:
+        """Build the index from the database if it is missing or stale."""
+        bind = session.get_bind()
+        with self._lock:
+            if self._bind is bind and time.monotonic() - self._built_at < self.rebuild_interval:
+                return
+            self._clear()
+            for entity in session.exec(select(self.model)).all():
+                self.add(entity.id, self.label(entity), self.texts(entity))
+            self._bind = bind
+            self._built_at = time.monotonic()
+        logger.info("Built %s search index with %d document(s)", self.model.__name__, len(self))
+
+    def invalidate(self) -> None:
+        """Force a rebuild on next use, e.g. after bulk statements bypassing the ORM."""
+        with self._lock:
+            self._bind = None
+
+    def _stage_upsert(self, mapper: Any, connection: Any, target: Any) -> None:
+        self._stage(target, (self.label(target), list(self.texts(target))))
+
+    def _stage_delete(self, mapper: Any, connection: Any, target: Any) -> None:
+        self._stage(target, None)
+
+    def _stage(self, target: Any, document: tuple[str, list[str | None]] | None) -> None:
+        session = object_session(target)
+        if session is not None:
+            session.info.setdefault(_PENDING_CHANGES_KEY, []).append((self, target.id, document))
+
+    def apply_change(self, doc_id: int, document: tuple[str, list[str | None]] | None) -> None:
+        """Apply a committed change if the index has already been built."""
+        with self._lock:
+            if self._bind is None:
+                return
+            if document is None:
+                self.remove(doc_id)
+            else:
+                self.add(doc_id, *document)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending_changes(session: Session) -> None:
+    for index, doc_id, document in session.info.pop(_PENDING_CHANGES_KEY, []):
+        index.apply_change(doc_id, document)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_changes(session: Session) -> None:
+    session.info.pop(_PENDING_CHANGES_KEY, None)
+
+
+product_index = ModelSearchIndex(
+    Product,
+    label=lambda product: product.name,
+    texts=lambda product: (product.name, product.description),
+)
+customer_index = ModelSearchIndex(
+    Customer,
+    label=lambda customer: customer.name,
+    texts=lambda customer: (customer.name, customer.email),
+)
@@ -0,0 +1,110 @@
+"""Shop-floor work queue handing production orders to workers under leases."""
+
+from __future__ import annotations
+
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlmodel import Session
+
+from app.models import ProductionOrder, ProductionOrderStatus, current_utc_time
+from app.repositories.production_lease_repository import ProductionLeaseRepository
+from app.repositories.production_order_repository import ProductionOrderRepository
+from app.services import production_service
+from app.services.exceptions import LeaseLostError
+
+logger = logging.getLogger(__name__)
+
+lease_repo = ProductionLeaseRepository()
+production_repo = ProductionOrderRepository()
+
+LEASE_SECONDS = float(os.getenv("WORK_QUEUE_LEASE_SECONDS", "300"))
+# Candidates fetched per claim; extra ones absorb races lost to other workers.
+CLAIM_BATCH_SIZE = 10
+
+
+def claim_next(
+    session: Session,
+    worker_id: str,
+    *,
+    lease_seconds: float | None = None,
+) -> dict[str, Any] | None:
+    """Lease the next claimable production order to ``worker_id``, or return ``None``.
+
+    A planned order is moved to ``in_progress`` in the same transaction as the
+    lease; an in-progress order whose lease expired is taken over as is. The
+    returned ``token`` must accompany heartbeats and the completion call.
+    """
+
+    ttl = timedelta(seconds=lease_seconds or LEASE_SECONDS)
+    token = uuid.uuid4().hex
+    try:
+        now = current_utc_time()
+        for production_id in lease_repo.claimable_ids(session, now, CLAIM_BATCH_SIZE):
+            if not lease_repo.acquire(session, production_id, worker_id, token, now, now + ttl):
+                continue
+            production = production_repo.get_or_raise(session, production_id)
+            if production.status == ProductionOrderStatus.planned:
+                # Commits the lease together with the status change.
+                production = production_service.mark_production_in_progress(session, production_id)
+            else:
+                session.commit()
+            logger.info("Worker %s claimed production order %s", worker_id, production_id)
+            return _claim_payload(production, worker_id, token, now + ttl)
+        session.rollback()
+        return None
+    except Exception:
+        session.rollback()
+        logger.exception("Worker %s failed to claim production work", worker_id)
+        raise
+
+
+def heartbeat(
+    session: Session,
+    production_id: int,
+    token: str,
+    *,
+    lease_seconds: float | None = None,
+) -> dict[str, Any]:
+    """Extend a held lease; raise ``LeaseLostError`` if it expired or was taken over."""
+
+    now = current_utc_time()
+    expires_at = now + timedelta(seconds=lease_seconds or LEASE_SECONDS)
+    if not lease_repo.renew(session, production_id, token, now, expires_at):
+        session.rollback()
+        raise LeaseLostError(production_id)
+    session.commit()
+    return {"production_order_id": production_id, "expires_at": expires_at}
+
+
+def complete_claimed(session: Session, production_id: int, token: str) -> ProductionOrder:
+    """Complete a leased production order and release its lease."""
+
+    if not lease_repo.drop(session, production_id, token, current_utc_time()):
+        session.rollback()
+        raise LeaseLostError(production_id)
+    try:
+        # Commits the lease removal together with the completion.
+        return production_service.mark_production_complete(session, production_id)
+    except Exception:
+        session.rollback()
+        raise
+
+
+def _claim_payload(
+    production: ProductionOrder,
+    worker_id: str,
+    token: str,
+    expires_at: datetime,
+) -> dict[str, Any]:
+    return {
+        "production_order_id": production.id,
+        "sales_order_id": production.sales_order_id,
+        "status": production.status,
+        "worker_id": worker_id,
+        "token": token,
+        "expires_at": expires_at,
+    }
@@ -0,0 +1,84 @@
+"""Benchmark email sending: one unpooled request per message vs the batching HTTP transport.
+
+Starts the fake email provider with ``--latency`` seconds of simulated provider
+time per request, then sends ``--messages`` emails from ``--senders`` threads
+(the outbox worker's send slots) two ways: a fresh connection and request per
+message, as the Resend SDK does, and ``HttpEmailTransport`` with pooled
+keep-alive connections and batch coalescing. Reports messages per second,
+provider requests and TCP connections.
+
+Run from ``backend/``::
+
+    python -m benchmarks.email_transport_throughput --messages 400 --senders 16
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from app.services.email_transport import EmailMessage, HttpEmailTransport, _provider_payload
+from tests.fake_email_provider import FakeEmailProvider
+
+
+def build_messages(count: int) -> list[EmailMessage]:
+    return [
+        EmailMessage(
+            sender="billing@example.com",
+            to=(f"customer{index}@example.com",),
+            subject=f"Payment reminder {index}",
+            html=f"<p>Dear customer {index}, your invoice is due.</p>",
+        )
+        for index in range(count)
+    ]
+
+
+def run(name: str, send, messages: list[EmailMessage], senders: int, provider: FakeEmailProvider) -> None:
+    requests_before, connections_before = len(provider.requests), provider.connections
+    started = time.perf_counter()
+    with ThreadPoolExecutor(senders) as executor:
+        list(executor.map(send, messages))
+    elapsed = time.perf_counter() - started
+    print(
+        f"{name:<12} {len(messages):>8} {elapsed:>9.2f} {len(messages) / elapsed:>10.1f}"
+        f" {len(provider.requests) - requests_before:>9} {provider.connections - connections_before:>11}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=400)
+    parser.add_argument("--senders", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--window-ms", type=float, default=20.0)
+    parser.add_argument("--in-flight", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=0.0, help="max requests per second, 0 for no limit")
+    args = parser.parse_args()
+
+    messages = build_messages(args.messages)
+    headers = {"Authorization": "Bearer benchmark"}
+    print(f"{'transport':<12} {'messages':>8} {'seconds':>9} {'emails/s':>10} {'requests':>9} {'connections':>11}")
+    with FakeEmailProvider(latency=args.latency) as provider:
+
+        def unpooled(message: EmailMessage) -> None:
+            httpx.post(f"{provider.url}/emails", json=_provider_payload(message), headers=headers).raise_for_status()
+
+        run("unpooled", unpooled, messages, args.senders, provider)
+        transport = HttpEmailTransport(
+            provider.url,
+            "benchmark",
+            batch_window=args.window_ms / 1000,
+            max_in_flight=args.in_flight,
+            max_requests_per_second=args.rate,
+        )
+        try:
+            run("batched", transport.send, messages, args.senders, provider)
+        finally:
+            transport.close()
+
+
+if __name__ == "__main__":
+    main()
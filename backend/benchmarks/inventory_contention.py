@@ -0,0 +1,118 @@
+"""Benchmark stock reservation throughput under contention on one hot product.
+
+Worker threads reserve one unit at a time (one transaction per reservation)
+against a single product, once for each slot count, and the script reports
+reservations per second and retries caused by lock conflicts.
+
+Run from ``backend/``::
+
+    python -m benchmarks.inventory_contention --workers 16 --slots 1,4,16
+    python -m benchmarks.inventory_contention --database-url postgresql+psycopg://.../scratch
+
+The target database is wiped (all tables dropped and recreated) for every run, so
+only point ``--database-url`` at a scratch database. The default is a temporary
+SQLite file; SQLite serialises all writers, so slot splitting only pays off on a
+server database with row-level locking such as PostgreSQL.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.models import Product
+from app.services import inventory_service
+
+
+def run(database_url: str, *, slots: int, workers: int, reservations: int) -> dict[str, float]:
+    """Reserve ``reservations`` units with ``workers`` threads and return the timings."""
+
+    connect_args = {"timeout": 30, "check_same_thread": False} if database_url.startswith("sqlite") else {}
+    engine = create_engine(database_url, connect_args=connect_args, pool_size=workers, max_overflow=0)
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        product = Product(name="Hot item", description="Benchmark product", price=1.0)
+        session.add(product)
+        session.flush()
+        inventory_service.track_stock(session, product.id, reservations)
+        session.commit()
+        product_id = product.id
+        inventory_service.split_stock(session, product_id, slots)
+
+    order_ids = itertools.count(1)
+    counters = {"reserved": 0, "retries": 0}
+    lock = threading.Lock()
+
+    def worker() -> None:
+        with Session(engine) as session:
+            while True:
+                with lock:
+                    if counters["reserved"] >= reservations:
+                        return
+                    counters["reserved"] += 1
+                order_id = next(order_ids)
+                while True:
+                    try:
+                        inventory_service.reserve_order_items(session, order_id, [(product_id, 1)])
+                        session.commit()
+                        break
+                    except OperationalError:
+                        session.rollback()
+                        with lock:
+                            counters["retries"] += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    with Session(engine) as session:
+        level = inventory_service.get_stock_level(session, product_id)
+    engine.dispose()
+    assert level["reserved"] == reservations, level
+    return {
+        "slots": slots,
+        "seconds": elapsed,
+        "per_second": reservations / elapsed,
+        "retries": counters["retries"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="Scratch database URL (default: temporary SQLite file)")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--reservations", type=int, default=2000)
+    parser.add_argument("--slots", default="1,4,16", help="Comma-separated slot counts to compare")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = args.database_url or f"sqlite:///{Path(directory) / 'inventory_bench.db'}"
+        print(f"{'slots':>5} {'seconds':>9} {'res/sec':>9} {'retries':>8}")
+        for slots in (int(value) for value in args.slots.split(",")):
+            result = run(
+                database_url,
+                slots=slots,
+                workers=args.workers,
+                reservations=args.reservations,
+            )
+            print(
+                f"{result['slots']:>5} {result['seconds']:>9.2f} "
+                f"{result['per_second']:>9.0f} {result['retries']:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
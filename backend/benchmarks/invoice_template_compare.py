@@ -0,0 +1,48 @@
+"""Benchmark the template invoice renderer against per-invoice FPDF layout.
+
+Renders the same ``--invoices`` synthetic invoices inline with both renderers
+and reports PDFs per second, average PDF size and average base64 size (what an
+email attachment actually carries).
+
+Run from ``backend/``::
+
+    python -m benchmarks.invoice_template_compare --invoices 1000
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import random
+import time
+from collections.abc import Callable
+
+from app.services.pdf_render_pool import render_invoice_pdf, render_invoice_pdf_with_fpdf
+from benchmarks.pdf_render_throughput import build_payloads
+
+
+def measure(label: str, render: Callable[[dict], bytes], payloads: list[dict]) -> float:
+    started = time.perf_counter()
+    pdfs = [render(payload) for payload in payloads]
+    elapsed = time.perf_counter() - started
+    size = sum(len(pdf) for pdf in pdfs) / len(pdfs)
+    encoded = sum(len(base64.b64encode(pdf)) for pdf in pdfs) / len(pdfs)
+    print(f"{label:<10} {len(pdfs) / elapsed:>10.1f} {size:>10.0f} {encoded:>12.0f}")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--invoices", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    payloads = build_payloads(args.invoices, random.Random(args.seed))
+    print(f"{'renderer':<10} {'PDFs/s':>10} {'avg bytes':>10} {'avg base64':>12}")
+    fpdf = measure("fpdf", render_invoice_pdf_with_fpdf, payloads)
+    template = measure("template", render_invoice_pdf, payloads)
+    print(f"speed-up: {fpdf / template:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
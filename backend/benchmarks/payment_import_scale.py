@@ -0,0 +1,123 @@
+"""Benchmark importing a bank statement with hundreds of thousands of lines.
+
+Seeds ``--billings`` open billings spread over ``--customers`` customers, then
+imports a generated statement of ``--lines`` lines through
+``payment_service.StatementImport`` in one transaction and reports lines per
+second. Lines mix full and partial payments quoting an invoice number,
+payments identified only by customer and amount, overpayments and unknown
+transfers.
+
+Run from ``backend/``::
+
+    python -m benchmarks.payment_import_scale --lines 200000
+    python -m benchmarks.payment_import_scale --database-url postgresql+psycopg://.../scratch
+
+The target database is wiped (all tables dropped and recreated), so only point
+``--database-url`` at a scratch database. The default is a temporary SQLite file.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+from sqlalchemy import insert
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.models import Billing, Customer, SalesOrder, SalesOrderStatus
+from app.services import payment_service
+
+
+def seed(session: Session, customers: int, billings: int, rng: random.Random) -> list[tuple[str, str, float]]:
+    """Insert customers and billed orders; return ``(invoice_number, email, amount)`` per billing."""
+
+    session.exec(
+        insert(Customer),
+        params=[
+            {"id": index, "name": f"Customer {index}", "email": f"c{index}@example.com", "role": "student"}
+            for index in range(1, customers + 1)
+        ],
+    )
+    owners = [rng.randint(1, customers) for _ in range(billings)]
+    amounts = [rng.randint(10, 500) * 5.0 for _ in range(billings)]
+    session.exec(
+        insert(SalesOrder),
+        params=[
+            {"id": index + 1, "customer_id": owner, "total_amount": amount, "status": SalesOrderStatus.delivered}
+            for index, (owner, amount) in enumerate(zip(owners, amounts))
+        ],
+    )
+    session.exec(
+        insert(Billing),
+        params=[
+            {"sales_order_id": index + 1, "invoice_number": f"INV-2026-{index + 1:06d}", "amount": amount}
+            for index, amount in enumerate(amounts)
+        ],
+    )
+    session.commit()
+    return [
+        (f"INV-2026-{index + 1:06d}", f"c{owner}@example.com", amount)
+        for index, (owner, amount) in enumerate(zip(owners, amounts))
+    ]
+
+
+def statement(billings: list[tuple[str, str, float]], lines: int, rng: random.Random) -> Iterator[str]:
+    """Yield a CSV statement of ``lines`` payment lines."""
+
+    yield "date,amount,reference,customer_email"
+    for number in range(lines):
+        invoice, email, amount = billings[number % len(billings)]
+        kind = rng.random()
+        if kind < 0.5:
+            yield f"2026-07-01,{amount:.2f},Payment {invoice},"
+        elif kind < 0.7:
+            yield f"2026-07-01,{amount / 2:.2f},{invoice} part,{email}"
+        elif kind < 0.85:
+            yield f"2026-07-02,{amount:.2f},transfer {number},{email}"
+        elif kind < 0.95:
+            yield f"2026-07-02,{amount + 20:.2f},{invoice},"
+        else:
+            yield f"2026-07-03,{rng.randint(1, 999)}.00,unknown {number},"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=200_000)
+    parser.add_argument("--billings", type=int, default=100_000)
+    parser.add_argument("--customers", type=int, default=5_000)
+    parser.add_argument("--chunk", type=int, default=4_096, help="lines handed to feed() per call")
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        database_url = args.database_url or f"sqlite:///{Path(scratch) / 'payments.db'}"
+        engine = create_engine(database_url)
+        SQLModel.metadata.drop_all(engine)
+        SQLModel.metadata.create_all(engine)
+        rng = random.Random(args.seed)
+        with Session(engine) as session:
+            billings = seed(session, args.customers, args.billings, rng)
+            lines = list(statement(billings, args.lines, rng))
+
+            started = time.perf_counter()
+            statement_import = payment_service.StatementImport(session, "benchmark.csv")
+            for start in range(0, len(lines), args.chunk):
+                statement_import.feed(lines[start : start + args.chunk])
+            record = statement_import.finish()
+            elapsed = time.perf_counter() - started
+        engine.dispose()
+
+    print(f"lines      {record.lines:>9}  ({record.lines / elapsed:,.0f} lines/s, {elapsed:.2f} s)")
+    print(f"matched    {record.matched:>9}")
+    print(f"unmatched  {record.unmatched:>9}")
+    print(f"applied    {record.amount_applied:>14,.2f}")
+    print(f"unapplied  {record.amount_unapplied:>14,.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Benchmark invoice PDF rendering throughput at different render pool sizes.
+
+Renders ``--invoices`` synthetic invoices through ``RenderPool.render_many`` for
+each worker count in ``--workers`` (``0`` renders inline on the calling thread,
+as before the pool existed) and reports PDFs per second. Pool start-up is
+excluded by warming each pool first.
+
+Run from ``backend/``::
+
+    python -m benchmarks.pdf_render_throughput --invoices 400 --workers 0,1,2,4
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from datetime import UTC, datetime
+
+from app.services.pdf_render_pool import RenderPool, invoice_payload
+
+
+def build_payloads(count: int, rng: random.Random) -> list[dict]:
+    return [
+        invoice_payload(
+            invoice_number=f"INV-2026-{index:06d}",
+            billed_at=datetime.now(tz=UTC),
+            customer_name=f"Customer {index}",
+            customer_email=f"customer{index}@example.com",
+            line_items=[
+                {"name": f"Product {rng.randrange(500)}", "quantity": quantity, "subtotal": quantity * 250.0}
+                for quantity in (rng.randint(1, 5) for _ in range(rng.randint(1, 12)))
+            ],
+            amount=rng.uniform(100, 10_000),
+        )
+        for index in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--invoices", type=int, default=400)
+    parser.add_argument("--workers", default="0,1,2,4", help="comma-separated worker counts")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    payloads = build_payloads(args.invoices, random.Random(args.seed))
+    print(f"{'workers':>7} {'invoices':>8} {'seconds':>9} {'PDFs/s':>9} {'avg KiB':>8}")
+    for workers in (int(value) for value in args.workers.split(",")):
+        pool = RenderPool(workers=workers)
+        try:
+            list(pool.render_many(payloads[: max(workers, 1)]))
+            started = time.perf_counter()
+            sizes = [len(pdf) for pdf in pool.render_many(payloads)]
+            elapsed = time.perf_counter() - started
+        finally:
+            pool.shutdown()
+        print(
+            f"{workers:>7} {len(sizes):>8} {elapsed:>9.2f} {len(sizes) / elapsed:>9.1f}"
+            f" {sum(sizes) / len(sizes) / 1024:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark incremental rescheduling with tens of thousands of open production orders.
+
+Builds a schedule sequence of ``--orders`` entries, then measures inserting new
+orders, cancelling random ones and looking up start offsets, against the naive
+approach of recomputing every start time after each change.
+
+Run from ``backend/``::
+
+    python -m benchmarks.scheduler_scale --orders 50000
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import random
+import time
+from collections.abc import Callable
+
+from app.services.scheduling_service import ScheduleSequence
+
+
+def timed(label: str, operations: int, action: Callable[[], None]) -> None:
+    started = time.perf_counter()
+    action()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {operations:>7} ops {elapsed * 1000:>9.1f} ms {operations / elapsed:>11.0f} ops/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=50_000)
+    parser.add_argument("--changes", type=int, default=5_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    ids = itertools.count(1)
+    keys = [(1, 739_000 + rng.randrange(180), next(ids)) for _ in range(args.orders)]
+    sequence = ScheduleSequence()
+
+    def build() -> None:
+        for key in keys:
+            sequence.insert(key, rng.randrange(30, 600))
+
+    def add() -> None:
+        for _ in range(args.changes):
+            key = (1, 739_000 + rng.randrange(180), next(ids))
+            keys.append(key)
+            sequence.insert(key, rng.randrange(30, 600))
+
+    def cancel() -> None:
+        cancelled = set(rng.sample(keys, args.changes))
+        for key in cancelled:
+            sequence.remove(key)
+        keys[:] = [key for key in keys if key not in cancelled]
+
+    def lookup() -> None:
+        for key in rng.sample(keys, args.changes):
+            sequence.start_of(key)
+
+    def naive() -> None:
+        ordered = sorted(keys)
+        durations = {key: 60 for key in ordered}
+        for _ in range(20):
+            start = 0
+            for key in ordered:
+                start += durations[key]
+
+    timed("build", args.orders, build)
+    timed("add orders", args.changes, add)
+    timed("cancel orders", args.changes, cancel)
+    timed("start-time lookups", args.changes, lookup)
+    timed("naive full recompute", 20, naive)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Local stand-in for the email provider's HTTP API, for tests, benchmarks and development.
+
+Run from ``backend/`` and point ``EMAIL_API_URL`` at it::
+
+    python -m tests.fake_email_provider --port 8025
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class FakeEmailProvider:
+    """Threaded HTTP server accepting ``POST /emails`` and ``POST /emails/batch``.
+
+    It mirrors the parts of the Resend API the HTTP transport relies on: bearer
+    authentication, one id per accepted email, at most 100 emails per batch and
+    no attachments in batches. ``latency`` delays every response, ``fail_next``
+    answers the next requests with an error status, and ``requests``,
+    ``emails`` and ``connections`` record what arrived.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, *, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.requests: list[tuple[str, int]] = []
+        self.emails: list[dict[str, Any]] = []
+        self.connections = 0
+        self.max_concurrent = 0
+        self._active = 0
+        self._failures: list[int] = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        """Return the base URL the server listens on."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def fail_next(self, count: int = 1, status: int = 503) -> None:
+        """Answer the next ``count`` requests with ``status``."""
+        with self._lock:
+            self._failures.extend([status] * count)
+
+    def start(self) -> FakeEmailProvider:
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-email-provider", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the listening socket."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> FakeEmailProvider:
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        provider = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self) -> None:
+                super().setup()
+                with provider._lock:
+                    provider.connections += 1
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+            def do_POST(self) -> None:
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with provider._lock:
+                    provider._active += 1
+                    provider.max_concurrent = max(provider.max_concurrent, provider._active)
+                    failure = provider._failures.pop(0) if provider._failures else None
+                try:
+                    if provider.latency:
+                        time.sleep(provider.latency)
+                    status, payload = provider._respond(self.path, self.headers, body, failure)
+                finally:
+                    with provider._lock:
+                        provider._active -= 1
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+    def _respond(self, path: str, headers: Any, body: bytes, failure: int | None) -> tuple[int, Any]:
+        if failure is not None:
+            return failure, {"name": "simulated_failure", "message": "Simulated provider failure."}
+        if not headers.get("Authorization", "").startswith("Bearer "):
+            return 401, {"name": "missing_api_key", "message": "Missing API key in the authorization header."}
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return 400, {"name": "invalid_body", "message": "Request body is not valid JSON."}
+        if path == "/emails":
+            emails = [payload]
+        elif path == "/emails/batch":
+            emails = payload
+            if not isinstance(emails, list) or not 1 <= len(emails) <= 100:
+                return 422, {"name": "validation_error", "message": "A batch holds 1 to 100 emails."}
+            if any(email.get("attachments") for email in emails):
+                return 422, {"name": "validation_error", "message": "Attachments are not supported in batches."}
+        else:
+            return 404, {"name": "not_found", "message": f"No route for {path}."}
+        if any(not email.get("to") for email in emails):
+            return 422, {"name": "validation_error", "message": "Missing `to` field."}
+        ids = [uuid.uuid4().hex for _ in emails]
+        with self._lock:
+            self.requests.append((path, len(emails)))
+            self.emails.extend(emails)
+        if path == "/emails":
+            return 200, {"id": ids[0]}
+        return 200, {"data": [{"id": email_id} for email_id in ids]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve a fake email provider API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    provider = FakeEmailProvider(args.host, args.port, latency=args.latency)
+    logger.info("Fake email provider listening on %s", provider.url)
+    try:
+        provider._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        provider._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,23 +2,39 @@
 
 from __future__ import annotations
 
+import hashlib
+
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy.pool import StaticPool
 from sqlmodel import SQLModel, Session, create_engine
 
 from app.database import get_session
 from app.main import app
 # Import all models to ensure they are registered with SQLModel metadata
 from app import models
+from app.services import invoice_pdf_store, payment_service, pdf_render_pool
 
 
-@pytest.fixture(name="client")
-def client_fixture():
-    """Provide a test client with a fresh in-memory database."""
+@pytest.fixture(name="engine")
+def engine_fixture():
+    """Provide a fresh in-memory database shared by the test and the app."""
 
     # Create in-memory database for testing
-    engine = create_engine("sqlite://", echo=False)
+    engine = create_engine(
+        "sqlite://",
+        echo=False,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
     SQLModel.metadata.create_all(engine)
+    yield engine
+    SQLModel.metadata.drop_all(engine)
+
+
+@pytest.fixture(name="client")
+def client_fixture(engine):
+    """Provide a test client with a fresh in-memory database."""
 
     def get_session_override():
         with Session(engine) as session:
@@ -31,7 +47,6 @@ def client_fixture():
     yield client
 
     # Clean up
-    SQLModel.metadata.drop_all(engine)
     app.dependency_overrides.clear()
 
 
@@ -109,3 +124,129 @@ def test_create_order_missing_product(client: TestClient) -> None:
         },
     )
     assert response.status_code == 400
+
+
+def test_product_catalog_is_cached_and_invalidated(client: TestClient) -> None:
+    """Test the cached catalog carries validators and reflects product changes."""
+
+    first = client.get("/api/products")
+    assert first.status_code == 200
+    assert first.headers["cache-control"].startswith("public")
+    etag = first.headers["etag"]
+
+    not_modified = client.get("/api/products", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+
+    created = client.post(
+        "/api/products",
+        json={"name": "Lanyard", "description": "School lanyard", "price": 80.0},
+    )
+    assert created.status_code == 200
+
+    refreshed = client.get("/api/products", headers={"If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.headers["etag"] != etag
+    assert [product["name"] for product in refreshed.json()["data"]] == ["Lanyard"]
+
+
+def test_bulk_upsert_products_stream(client: TestClient) -> None:
+    """Test NDJSON bulk upsert inserts, updates by key or name, and reprices."""
+
+    client.post(
+        "/api/products",
+        json={"name": "Tote Bag", "description": "Canvas tote", "price": 150.0},
+    )
+    lines = [
+        '{"external_key": "SKU-1", "name": "Mug", "description": "Ceramic mug", "price": 200}',
+        '{"name": "Tote Bag", "description": "Canvas tote bag", "price": 175}',
+        '{"external_key": "SKU-2", "name": "Pin", "description": "Enamel pin", "price": 60}',
+    ]
+    first = client.post("/api/products/bulk", content="\n".join(lines))
+    assert first.status_code == 200
+    assert first.json()["data"]["inserted"] == 2
+    assert first.json()["data"]["updated"] == 1
+
+    second = client.post(
+        "/api/products/bulk",
+        content=(
+            '{"external_key": "SKU-1", "name": "Mug", "description": "Big mug", "price": 220}\n'
+            '{"external_key": "SKU-2", "price": 65}\n'
+            '{"name": "Missing", "price": 10}\n'
+        ),
+    )
+    summary = second.json()["data"]
+    assert summary["updated"] == 1
+    assert summary["price_updates"] == 1
+    assert summary["unmatched"] == ["Missing"]
+
+    products = {p["name"]: p for p in client.get("/api/products").json()["data"]}
+    assert len(products) == 3
+    assert products["Mug"]["description"] == "Big mug"
+    assert products["Pin"]["price"] == 65
+    assert products["Tote Bag"]["price"] == 175
+
+    keyed = client.post(
+        "/api/products/bulk",
+        content='{"external_key": "SKU-3", "name": "Tote Bag", "description": "Canvas tote", "price": 180}\n',
+    )
+    assert (keyed.json()["data"]["inserted"], keyed.json()["data"]["updated"]) == (0, 1)
+    products = {p["name"]: p for p in client.get("/api/products").json()["data"]}
+    assert len(products) == 3
+    assert (products["Tote Bag"]["external_key"], products["Tote Bag"]["price"]) == ("SKU-3", 180)
+
+    invalid = client.post("/api/products/bulk", content='{"name": "Bad", "price": -1}\n')
+    assert invalid.status_code == 400
+
+
+def test_statement_import_errors(client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test a malformed statement is a 400 and an internal failure a 500."""
+
+    malformed = client.post("/api/payments/imports", content="date,amount\n2025-01-05,ten\n")
+    assert malformed.status_code == 400
+    assert "Line 2" in malformed.json()["detail"]
+
+    def fail(self, batch):
+        raise RuntimeError("connection lost")
+
+    monkeypatch.setattr(payment_service.StatementImport, "_apply", fail)
+    failed = client.post("/api/payments/imports", content="date,amount\n2025-01-05,10.00\n")
+    assert failed.status_code == 500
+    assert client.get("/api/payments/imports").json()["data"] == []
+
+
+def test_invoice_pdf_is_stored_and_served_with_ranges(
+    client: TestClient, engine, monkeypatch: pytest.MonkeyPatch, tmp_path
+) -> None:
+    """Test the invoice PDF is rendered once, stored and served with Range support."""
+
+    monkeypatch.setattr(invoice_pdf_store, "invoice_store", invoice_pdf_store.InvoicePdfStore(tmp_path))
+    monkeypatch.setattr(pdf_render_pool, "render_pool", pdf_render_pool.RenderPool(workers=0))
+    renders = []
+    render = pdf_render_pool.render_pool.render
+    monkeypatch.setattr(pdf_render_pool.render_pool, "render", lambda *a: renders.append(a) or render(*a))
+
+    with Session(engine) as session:
+        customer = models.Customer(name="Test Customer", email="customer@example.com", role="student")
+        session.add(customer)
+        session.flush()
+        order = models.SalesOrder(customer_id=customer.id, total_amount=250.0, status="billed")
+        session.add(order)
+        session.flush()
+        billing = models.Billing(sales_order_id=order.id, invoice_number="INV-2026-0001", amount=250.0)
+        session.add(billing)
+        session.commit()
+        billing_id = billing.id
+
+    response = client.get(f"/api/billings/{billing_id}/pdf")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/pdf"
+    assert 'filename="INV-2026-0001.pdf"' in response.headers["content-disposition"]
+    pdf = response.content
+    assert pdf.startswith(b"%PDF")
+
+    partial = client.get(f"/api/billings/{billing_id}/pdf", headers={"Range": "bytes=0-3"})
+    assert partial.status_code == 206 and partial.content == b"%PDF"
+    assert response.headers["etag"] == f'"{hashlib.sha256(pdf).hexdigest()}"'
+    assert len(renders) == 1
+
+    assert client.get("/api/billings/999/pdf").status_code == 404
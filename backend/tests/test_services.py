@@ -2,15 +2,30 @@
 
 from __future__ import annotations
 
+import asyncio
+import re
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, date, datetime, timedelta
 from uuid import uuid4
 
 import pytest
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import SQLModel, Session, create_engine
 
 from app.models import (
+    Billing,
+    EmailOutbox,
+    InvoiceNumberSequence,
+    KpiCounter,
+    OutboxStatus,
     DeliveryStatus,
+    ProductionLease,
     ProductionOrderStatus,
+    RollupGranularity,
     SalesOrderStatus,
+    current_utc_time,
 )
 from app.repositories.billing_repository import BillingRepository
 from app.repositories.customer_repository import CustomerRepository
@@ -20,13 +35,41 @@ from app.repositories.production_order_repository import ProductionOrderReposito
 from app.repositories.sales_order_item_repository import SalesOrderItemRepository
 from app.repositories.sales_order_repository import SalesOrderRepository
 from app.services import (
+    analytics_service,
+    atp_service,
     billing_service,
+    credit_service,
+    customer_service,
+    dashboard_service,
     delivery_service,
+    dunning_service,
+    email_outbox_service,
+    email_transport,
+    event_hub,
+    inventory_service,
+    invoice_numbers,
+    invoice_pdf_store,
+    kpi_service,
+    lead_time_service,
+    order_fact_cache,
     order_service,
+    payment_service,
+    pdf_render_pool,
     product_service,
     production_service,
+    receivables_service,
+    scheduling_service,
+    work_queue_service,
 )
-from app.services.exceptions import InvalidTransitionError
+from app.services.exceptions import (
+    CreditLimitExceededError,
+    EmailDeliveryError,
+    InsufficientStockError,
+    InvalidTransitionError,
+    LeaseLostError,
+    RenderPoolSaturatedError,
+)
+from tests import fake_email_provider
 
 
 customer_repo = CustomerRepository()
@@ -45,6 +88,7 @@ def session_fixture() -> Session:
     engine = create_engine("sqlite://", echo=False)
     SQLModel.metadata.create_all(engine)
     with Session(engine) as session:
+        kpi_service.ensure_counters(session)
         yield session
     SQLModel.metadata.drop_all(engine)
 
@@ -74,6 +118,14 @@ def _create_product(session: Session, price: float = 100.0) -> int:
     return product.id
 
 
+def _deliver_order(session: Session, order_id: int) -> None:
+    production = production_service.start_production_for_order(session, order_id)
+    production_service.mark_production_in_progress(session, production.id)
+    production_service.mark_production_complete(session, production.id)
+    delivery = delivery_repo.list_by_sales_order(session, order_id)[0]
+    delivery_service.mark_delivery_done(session, delivery.id)
+
+
 def test_create_order_with_items_success(session: Session) -> None:
     customer_id = _create_customer(session)
     product_id = _create_product(session, price=250.0)
@@ -216,10 +268,41 @@ def test_update_order_status_creates_billing_entity(session: Session) -> None:
     billing = billing_repo.get_by_sales_order(session, order.id)
     assert billing is not None
     assert billing.amount == pytest.approx(300.0)
-    assert billing.invoice_number == f"INV-{order.id:06d}"
+    assert re.fullmatch(r"INV-\d{4}-\d{6}", billing.invoice_number)
     assert billing.sales_order_id == order.id
 
 
+def test_invoice_numbers_are_block_allocated_and_unique(session: Session) -> None:
+    allocator = invoice_numbers.InvoiceNumberAllocator(block_size=3)
+    issued_at = datetime(2026, 3, 1, tzinfo=UTC)
+    assert allocator.allocate(session, issued_at, 4) == [f"INV-2026-00000{n}" for n in range(1, 5)]
+    session.commit()
+    sequence = session.get(InvoiceNumberSequence, "INV-2026")
+    assert sequence.next_block == 2
+
+    # The rest of a committed block is served from memory, then a new block is reserved.
+    assert allocator.allocate(session, issued_at, 2) == ["INV-2026-000005", "INV-2026-000006"]
+    session.commit()
+    session.refresh(sequence)
+    assert sequence.next_block == 2
+    # A block reserved by a transaction that rolls back is discarded with it.
+    assert allocator.allocate(session, issued_at) == ["INV-2026-000007"]
+    session.rollback()
+    assert allocator.allocate(session, issued_at) == ["INV-2026-000007"]
+    assert allocator.allocate(session, datetime(2027, 1, 1, tzinfo=UTC)) == ["INV-2027-000001"]
+    session.commit()
+
+    customer_id = _create_customer(session)
+    product_id = _create_product(session)
+    order = order_service.create_order_with_items(
+        session, customer_id, [{"product_id": product_id, "quantity": 1}]
+    )
+    for _ in range(2):
+        session.add(Billing(sales_order_id=order.id, invoice_number="INV-2026-000007", amount=1.0))
+    with pytest.raises(IntegrityError):
+        session.commit()
+
+
 def test_delete_order_removes_items(session: Session) -> None:
     customer_id = _create_customer(session)
     product_id = _create_product(session)
@@ -380,3 +463,1088 @@ def test_product_creation_and_restock(session: Session) -> None:
             },
             stock_qty=-1,
         )
+
+
+def test_kpi_counters_track_order_lifecycle(session: Session) -> None:
+    customer_id = _create_customer(session)
+    product_id = _create_product(session)
+    first = order_service.create_order_with_items(
+        session,
+        customer_id,
+        [{"product_id": product_id, "quantity": 1}],
+    )
+    second = order_service.create_order_with_items(
+        session,
+        customer_id,
+        [{"product_id": product_id, "quantity": 2}],
+    )
+
+    production = production_service.start_production_for_order(session, first.id)
+    production_service.mark_production_in_progress(session, production.id)
+
+    summary = dashboard_service.get_dashboard_summary(session)
+    assert summary["total_orders"] == 2
+    assert summary["in_production"] == 1
+    assert summary["ready_for_delivery"] == 0
+
+    production_service.mark_production_complete(session, production.id)
+    delivery = delivery_repo.list_by_sales_order(session, first.id)[0]
+    delivery_service.mark_delivery_done(session, delivery.id)
+    billing_service.generate_billing_for_order(session, first.id)
+    order_service.delete_order(session, second.id)
+
+    summary = dashboard_service.get_dashboard_summary(session)
+    assert summary["total_orders"] == 1
+    assert summary["in_production"] == 0
+    assert summary["ready_for_delivery"] == 0
+    assert summary["billed"] == 1
+    assert kpi_service.reconcile_counters(session) == []
+
+
+def test_kpi_reconciliation_repairs_drift(session: Session) -> None:
+    customer_id = _create_customer(session)
+    product_id = _create_product(session)
+    order_service.create_order_with_items(
+        session,
+        customer_id,
+        [{"product_id": product_id, "quantity": 1}],
+    )
+
+    kpi_service.kpi_counter_repo.set_value(session, kpi_service.TOTAL_ORDERS, 42)
+    session.commit()
+
+    drift = kpi_service.reconcile_counters(session)
+    assert drift == [{"name": kpi_service.TOTAL_ORDERS, "stored": 42, "actual": 1}]
+    assert kpi_service.get_counter_values(session)[kpi_service.TOTAL_ORDERS] == 1
+
+
+def test_kpi_counters_are_seeded_once_and_read_without_writing(session: Session) -> None:
+    customer_id = _create_customer(session)
+    product_id = _create_product(session)
+    for _ in range(2):
+        order_service.create_order_with_items(
+            session, customer_id, [{"product_id": product_id, "quantity": 1}]
+        )
+    in_production = kpi_service.sales_order_counter(SalesOrderStatus.in_production)
+    planned = kpi_service.production_counter(ProductionOrderStatus.planned)
+    for name in (in_production, planned):
+        session.delete(session.get(KpiCounter, name))
+    session.commit()
+
+    # Deltas for unseeded counters are skipped, and reading does not seed them.
+    production_service.release_wave(session)
+    counters = kpi_service.get_counter_values(session)
+    assert (counters[in_production], counters[planned]) == (0, 0)
+    assert in_production not in kpi_service.kpi_counter_repo.get_values(session)
+
+    kpi_service.ensure_counters(session)
+    counters = kpi_service.get_counter_values(session)
+    assert (counters[in_production], counters[planned]) == (2, 2)
+    assert kpi_service.reconcile_counters(session) == []
+
+
+def test_revenue_rollups_updated_on_billing(session: Session) -> None:
+    customer_id = _create_customer(session)
+    product_id = _create_product(session, price=120.0)
+    for quantity in (1, 3):
+        order = order_service.create_order_with_items(
+            session,
+            customer_id,
+            [{"product_id": product_id, "quantity": quantity}],
+        )
+        _deliver_order(session, order.id)
+        billing = billing_service.generate_billing_for_order(session, order.id)
+
+    billed_day = billing.billed_date.date()
+    by_product = analytics_service.get_revenue_series(
+        session,
+        granularity="month",
+        start=billed_day,
+        end=billed_day,
+    )
+    assert len(by_product) == 1
+    assert by_product[0]["product_id"] == product_id
+    assert by_product[0]["order_count"] == 2
+    assert by_product[0]["quantity"] == 4
+    assert by_product[0]["revenue"] == pytest.approx(480.0)
+
+    by_role = analytics_service.get_revenue_series(
+        session,
+        granularity="day",
+        start=billed_day,
+        end=billed_day,
+        group_by="role",
+    )
+    assert by_role == [
+        {
+            "bucket_start": billed_day,
+            "customer_role": "student",
+            "order_count": 2,
+            "revenue": pytest.approx(480.0),
+        }
+    ]
+
+    assert analytics_service.rebuild_rollups(session) == 2
+    rebuilt = analytics_service.get_revenue_series(
+        session,
+        granularity="month",
+        start=billed_day,
+        end=billed_day,
+    )
+    assert rebuilt == by_product
+
+
+def test_event_hub_publishes_committed_transitions(session: Session) -> None:
+    customer_id = _create_customer(session)
+    product_id = _create_product(session)
+
+    async def scenario() -> list[dict]:
+        subscription = event_hub.hub.subscribe()
+        try:
+            order = order_service.create_order_with_items(
+                session,
+                customer_id,
+                [{"product_id": product_id, "quantity": 1}],
+            )
+            order_service.update_order_status(session, order.id, SalesOrderStatus.cancelled)
+            await asyncio.sleep(0)
+            received = []
+            while not subscription.queue.empty():
+                received.append(subscription.queue.get_nowait())
+            return received
+        finally:
+            event_hub.hub.unsubscribe(subscription)
+
+    events = asyncio.run(scenario())
+    status_events = [event["data"] for event in events if event["type"] == "order_status"]
+    assert [(event["from"], event["to"]) for event in status_events] == [
+        (None, "created"),
+        ("created", "cancelled"),
+    ]
+    kpi_events = [event["data"] for event in events if event["type"] == "kpi_delta"]
+    assert {
+        "sales_order.total": {"delta": 1, "value": 1, "version": 1},
+        "sales_order.created": {"delta": 1, "value": 1, "version": 1},
+    } in kpi_events
+
+
+def test_kpi_updates_covered_by_snapshot_are_dropped(session: Session) -> None:
+    customer_id = _create_customer(session)
+    product_id = _create_product(session)
+    created = kpi_service.sales_order_counter(SalesOrderStatus.created)
+
+    async def scenario() -> tuple[dict, list[dict]]:
+        subscription = event_hub.hub.subscribe()
+        try:
+            # Committed after subscribing but before the snapshot is read.
+            order_service.create_order_with_items(
+                session, customer_id, [{"product_id": product_id, "quantity": 1}]
+            )
+            snapshot = kpi_service.get_counter_snapshot(session)
+            order_service.create_order_with_items(
+                session, customer_id, [{"product_id": product_id, "quantity": 1}]
+            )
+            await asyncio.sleep(0)
+            seen = {name: dict(entry) for name, entry in snapshot.items()}
+            applied = []
+            while not subscription.queue.empty():
+                event = subscription.queue.get_nowait()
+                if event["type"] == "kpi_delta":
+                    applied.append(kpi_service.unseen_updates(seen, event["data"]))
+            return snapshot, applied
+        finally:
+            event_hub.hub.unsubscribe(subscription)
+
+    snapshot, applied = asyncio.run(scenario())
+    assert snapshot[created] == {"value": 1, "version": 1}
+    second = {"delta": 1, "value": 2, "version": 2}
+    assert applied == [{}, {kpi_service.TOTAL_ORDERS: second, created: second}]
+
+
+def test_event_hub_drops_slow_subscribers() -> None:
+    hub = event_hub.EventHub(max_queue_size=2)
+
+    async def scenario() -> tuple[list, int]:
+        subscription = hub.subscribe()
+        for index in range(5):
+            hub.publish("order_status", {"order_id": index})
+        await asyncio.sleep(0)
+        received = []
+        while not subscription.queue.empty():
+            received.append(subscription.queue.get_nowait())
+        return received, hub.subscriber_count
+
+    received, subscriber_count = asyncio.run(scenario())
+    assert received == [None]
+    assert subscriber_count == 0
+
+
+def test_order_fact_cache_vectorized_aggregations(session: Session) -> None:
+    student_id = _create_customer(session)
+    department_id = customer_repo.create(
+        session,
+        {"name": "Dept", "email": f"dept-{uuid4().hex}@example.com", "role": "department"},
+    ).id
+    hoodie_id = _create_product(session, price=100.0)
+    cap_id = _create_product(session, price=50.0)
+
+    order_service.create_order_with_items(
+        session,
+        student_id,
+        [{"product_id": hoodie_id, "quantity": 1}, {"product_id": cap_id, "quantity": 4}],
+    )
+    cancelled = order_service.create_order_with_items(
+        session,
+        department_id,
+        [{"product_id": hoodie_id, "quantity": 2}],
+    )
+    order_service.update_order_status(session, cancelled.id, SalesOrderStatus.cancelled)
+
+    cache = order_fact_cache.get_fact_cache(session)
+    assert cache.status_counts()["created"] == 1
+    assert cache.status_counts()["cancelled"] == 1
+    assert cache.top_products(limit=1) == [(cap_id, 4)]
+
+    # New orders are appended incrementally after the committed event.
+    order_service.create_order_with_items(
+        session,
+        department_id,
+        [{"product_id": hoodie_id, "quantity": 5}],
+    )
+    cache = order_fact_cache.get_fact_cache(session)
+    assert cache.top_products(limit=2) == [(hoodie_id, 8), (cap_id, 4)]
+
+    breakdown = {row["customer_role"]: row for row in cache.role_breakdown()}
+    assert breakdown["student"]["revenue"] == pytest.approx(300.0)
+    assert breakdown["department"]["order_count"] == 1
+    assert breakdown["department"]["quantity"] == 5
+
+    today = sales_order_repo.get_or_raise(session, cancelled.id).created_at.date()
+    volume = cache.order_volume(RollupGranularity.month, today, today)
+    assert volume == [
+        {"bucket_start": today.replace(day=1), "order_count": 2, "revenue": pytest.approx(800.0)}
+    ]
+
+
+def test_search_index_matches_prefixes_and_fragments(session: Session) -> None:
+    hoodie = product_service.create_product_with_stock(
+        session,
+        {"name": "Cardinal Hoodie", "description": "Red fleece pullover", "price": 900.0},
+    )
+    product_service.create_product_with_stock(
+        session,
+        {"name": "Engineering Tee", "description": "Cotton shirt", "price": 300.0},
+    )
+
+    assert [p.id for p in product_service.get_product_catalog(session, search="hood")] == [hoodie.id]
+    assert [p.id for p in product_service.get_product_catalog(session, search="eece")] == [hoodie.id]
+    assert product_service.get_product_catalog(session, search="cardinal shirt") == []
+
+    product_service.update_product(
+        session,
+        hoodie.id,
+        {"name": "Cardinal Jacket", "description": "Red windbreaker", "price": 950.0},
+    )
+    assert product_service.get_product_catalog(session, search="hoodie") == []
+    assert product_service.autocomplete_products(session, "car") == [
+        {"id": hoodie.id, "label": "Cardinal Jacket"}
+    ]
+
+    product_service.delete_product(session, hoodie.id)
+    assert product_service.autocomplete_products(session, "car") == []
+
+    customer_id = _create_customer(session)
+    assert [c.id for c in customer_service.list_customers(session, search="test cust")] == [
+        customer_id
+    ]
+    assert customer_service.autocomplete_customers(session, "tes") == [
+        {"id": customer_id, "label": "Test Customer"}
+    ]
+
+
+def test_stock_reservation_lifecycle_across_slots(session: Session) -> None:
+    customer_id = _create_customer(session)
+    product = product_service.create_product_with_stock(
+        session,
+        {"name": "Lanyard", "description": "School lanyard", "price": 50.0},
+        stock_qty=10,
+    )
+    level = inventory_service.split_stock(session, product.id, 3)
+    assert (level["on_hand"], level["available"], level["slots"]) == (10, 10, 3)
+
+    # No single slot holds 7 units, so the reservation spans several slots.
+    first = order_service.create_order_with_items(
+        session, customer_id, [{"product_id": product.id, "quantity": 7}]
+    )
+    assert inventory_service.get_stock_level(session, product.id)["available"] == 3
+
+    with pytest.raises(InsufficientStockError):
+        order_service.create_order_with_items(
+            session, customer_id, [{"product_id": product.id, "quantity": 5}]
+        )
+    level = inventory_service.get_stock_level(session, product.id)
+    assert (level["reserved"], level["available"]) == (7, 3)
+    assert len(order_service.get_customer_orders(session)) == 1
+
+    order_service.update_order_status(session, first.id, SalesOrderStatus.cancelled)
+    assert inventory_service.get_stock_level(session, product.id)["available"] == 10
+
+    second = order_service.create_order_with_items(
+        session, customer_id, [{"product_id": product.id, "quantity": 4}]
+    )
+    _deliver_order(session, second.id)
+    level = inventory_service.get_stock_level(session, product.id)
+    assert (level["on_hand"], level["reserved"], level["available"]) == (6, 0, 6)
+
+
+def test_split_reservation_claims_slots_in_ascending_order(
+    session: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    customer_id = _create_customer(session)
+    product = product_service.create_product_with_stock(
+        session,
+        {"name": "Pin", "description": "Enamel pin", "price": 20.0},
+        stock_qty=12,
+    )
+    inventory_service.split_stock(session, product.id, 4)
+    try_reserve = inventory_service.stock_balance_repo.try_reserve
+    attempts = []
+
+    def record(session, product_id, slot, quantity):
+        attempts.append(slot)
+        # A concurrent writer takes slot 1 first, so the request is retried holding slot 0.
+        if slot == 1 and attempts.count(1) == 1:
+            return False
+        return try_reserve(session, product_id, slot, quantity)
+
+    monkeypatch.setattr(inventory_service.random, "randrange", lambda n: n - 1)
+    monkeypatch.setattr(inventory_service.stock_balance_repo, "try_reserve", record)
+    order_service.create_order_with_items(
+        session, customer_id, [{"product_id": product.id, "quantity": 10}]
+    )
+
+    assert attempts == [0, 1, 2, 3, 1]
+    level = inventory_service.get_stock_level(session, product.id)
+    assert (level["reserved"], level["available"]) == (10, 2)
+
+
+def test_atp_promises_from_capacity_index(session: Session) -> None:
+    customer_id = _create_customer(session)
+    product_id = _create_product(session, price=100.0)
+    atp_service.set_product_capacity(session, product_id, daily_capacity=10, lead_time_days=1)
+    today = current_utc_time().date()
+
+    quote = atp_service.quote(session, [(product_id, 25)])
+    assert quote["promised_date"] == today + timedelta(days=3)
+
+    first = order_service.create_order_with_items(
+        session, customer_id, [{"product_id": product_id, "quantity": 15}]
+    )
+    details = order_service.get_order_details(session, first.id)
+    assert details["promised_date"] == today + timedelta(days=2)
+
+    second = order_service.create_order_with_items(
+        session, customer_id, [{"product_id": product_id, "quantity": 10}]
+    )
+    details = order_service.get_order_details(session, second.id)
+    assert details["promised_date"] == today + timedelta(days=3)
+
+    # Cancelling the first order frees its days; the next quote fills that hole first.
+    order_service.update_order_status(session, first.id, SalesOrderStatus.cancelled)
+    assert atp_service.quote(session, [(product_id, 12)])["promised_date"] == today + timedelta(days=2)
+
+    # A rebuilt index answers the same as the incrementally maintained one.
+    atp_service.atp_index.invalidate()
+    assert atp_service.quote(session, [(product_id, 12)])["promised_date"] == today + timedelta(days=2)
+    assert atp_service.quote(session, [(product_id, 21)])["promised_date"] == today + timedelta(days=4)
+
+
+def test_delete_order_drops_commitments_from_past_days(
+    session: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    customer_id = _create_customer(session)
+    product_id = _create_product(session, price=100.0)
+    atp_service.set_product_capacity(session, product_id, daily_capacity=10)
+    order = order_service.create_order_with_items(
+        session, customer_id, [{"product_id": product_id, "quantity": 15}]
+    )
+    today = current_utc_time().date()
+    monkeypatch.setattr(atp_service, "_today", lambda: today.toordinal() + 1)
+
+    assert order_service.delete_order(session, order.id)
+    assert atp_service.get_promised_dates(session, [order.id]) == {}
+    # Only the day still ahead went back to capacity.
+    assert atp_service.quote(session, [(product_id, 10)])["promised_date"] == today + timedelta(days=1)
+
+
+def test_atp_rebuild_keeps_bookings_of_open_transactions(tmp_path) -> None:
+    engine = create_engine(f"sqlite:///{tmp_path / 'atp.db'}", echo=False)
+    SQLModel.metadata.create_all(engine)
+    today = current_utc_time().date()
+    with Session(engine) as session:
+        customer_id = _create_customer(session)
+        product_id = _create_product(session, price=100.0)
+        atp_service.set_product_capacity(session, product_id, daily_capacity=10)
+        order = order_service.create_order_with_items(
+            session, customer_id, [{"product_id": product_id, "quantity": 10}]
+        )
+
+    with Session(engine) as booking, Session(engine) as reader:
+        promised = atp_service.commit_order(booking, order.id, [(product_id, 10)])
+        assert promised == today + timedelta(days=1)
+        # A reload while the booking is uncommitted must not lose it.
+        atp_service.atp_index.invalidate()
+        assert atp_service.quote(reader, [(product_id, 10)])["promised_date"] == today + timedelta(days=2)
+
+        booking.rollback()
+        assert atp_service.quote(reader, [(product_id, 20)])["promised_date"] == today + timedelta(days=2)
+
+    # A session closed without rolling back gives its bookings back too.
+    with Session(engine) as abandoned:
+        atp_service.commit_order(abandoned, order.id, [(product_id, 10)])
+    with Session(engine) as reader:
+        assert atp_service.quote(reader, [(product_id, 10)])["promised_date"] == today + timedelta(days=1)
+    engine.dispose()
+
+
+def test_schedule_sequence_tracks_running_totals() -> None:
+    sequence = scheduling_service.ScheduleSequence(block_size=2)
+    for production_id in range(1, 11):
+        sequence.insert((1, 0, production_id), production_id)
+    sequence.remove((1, 0, 4))
+    sequence.insert((0, 0, 99), 5)
+
+    assert sequence.start_of((0, 0, 99)) == 0
+    assert sequence.start_of((1, 0, 5)) == 5 + 1 + 2 + 3
+    entries = list(sequence.iterate(offset=2))
+    assert [key[2] for key, _, _ in entries] == [2, 3, 5, 6, 7, 8, 9, 10]
+    assert entries[2][1] == sequence.start_of((1, 0, 5))
+    assert sequence.total == 5 + sum(range(1, 11)) - 4
+
+
+def test_scheduler_sequences_production_orders_incrementally(session: Session) -> None:
+    customer_id = _create_customer(session)
+    product_id = _create_product(session, price=100.0)
+    atp_service.set_product_capacity(session, product_id, daily_capacity=10, run_minutes=60)
+
+    order_ids = [
+        order_service.create_order_with_items(
+            session, customer_id, [{"product_id": product_id, "quantity": quantity}]
+        ).id
+        for quantity in (4, 6, 2)
+    ]
+    productions = [
+        production_service.start_production_for_order(session, order_id) for order_id in order_ids
+    ]
+    scheduler = scheduling_service.scheduler
+    scheduling_service.get_schedule(session)
+    monday_morning = datetime(2030, 1, 7, 8, 0, tzinfo=UTC)
+
+    slots = scheduler.slots(now=monday_morning)
+    assert [slot["production_order_id"] for slot in slots] == [p.id for p in productions]
+    assert [slot["run_minutes"] for slot in slots] == [240, 360, 120]
+    assert slots[0]["planned_end"] == datetime(2030, 1, 7, 12, 0, tzinfo=UTC)
+    # The second order spills over into the next day's shift.
+    assert slots[1]["planned_end"] == datetime(2030, 1, 8, 10, 0, tzinfo=UTC)
+
+    production_service.mark_production_in_progress(session, productions[2].id)
+    order_service.update_order_status(session, order_ids[0], SalesOrderStatus.cancelled)
+    scheduling_service.get_schedule(session)
+    slots = scheduler.slots(now=monday_morning)
+    assert [slot["production_order_id"] for slot in slots] == [productions[2].id, productions[1].id]
+    assert slots[1]["planned_start"] == datetime(2030, 1, 7, 10, 0, tzinfo=UTC)
+
+    scheduler.invalidate()
+    scheduling_service.get_schedule(session)
+    assert scheduler.slots(now=monday_morning) == slots
+
+
+def test_release_wave_groups_created_orders_by_product(session: Session) -> None:
+    customer_id = _create_customer(session)
+    shirt = _create_product(session, price=100.0)
+    mug = _create_product(session, price=50.0)
+
+    first = order_service.create_order_with_items(
+        session, customer_id, [{"product_id": shirt, "quantity": 2}]
+    )
+    second = order_service.create_order_with_items(
+        session,
+        customer_id,
+        [{"product_id": shirt, "quantity": 3}, {"product_id": mug, "quantity": 1}],
+    )
+    third = order_service.create_order_with_items(
+        session, customer_id, [{"product_id": mug, "quantity": 4}]
+    )
+    production_service.start_production_for_order(session, first.id)
+
+    wave = production_service.release_wave(session, product_id=shirt)
+    assert wave["sales_order_ids"] == [second.id]
+    assert [(batch["product_id"], batch["quantity"]) for batch in wave["products"]] == [
+        (shirt, 3),
+        (mug, 1),
+    ]
+
+    wave = production_service.release_wave(session)
+    assert wave["sales_order_ids"] == [third.id]
+    assert production_service.release_wave(session)["order_count"] == 0
+
+    orders = order_service.get_customer_orders(session, status=SalesOrderStatus.in_production)
+    assert len(orders) == 3
+    assert len(production_service.list_production_orders(session, status="planned")) == 3
+    counters = kpi_service.get_counter_values(session)
+    assert counters[kpi_service.sales_order_counter(SalesOrderStatus.created)] == 0
+    assert counters[kpi_service.sales_order_counter(SalesOrderStatus.in_production)] == 3
+    assert counters[kpi_service.production_counter(ProductionOrderStatus.planned)] == 3
+
+
+def test_work_queue_leases_orders_to_one_worker_at_a_time(session: Session) -> None:
+    customer_id = _create_customer(session)
+    product_id = _create_product(session, price=100.0)
+    for _ in range(2):
+        order = order_service.create_order_with_items(
+            session, customer_id, [{"product_id": product_id, "quantity": 1}]
+        )
+        production_service.start_production_for_order(session, order.id)
+
+    first = work_queue_service.claim_next(session, "station-1")
+    second = work_queue_service.claim_next(session, "station-2")
+    assert first["production_order_id"] != second["production_order_id"]
+    assert first["status"] == ProductionOrderStatus.in_progress
+    assert work_queue_service.claim_next(session, "station-3") is None
+
+    work_queue_service.heartbeat(session, first["production_order_id"], first["token"])
+    with pytest.raises(LeaseLostError):
+        work_queue_service.heartbeat(session, first["production_order_id"], second["token"])
+
+    # Station 1 goes silent; once its lease lapses another station takes the order over.
+    lease = session.get(ProductionLease, first["production_order_id"])
+    lease.expires_at = current_utc_time() - timedelta(seconds=1)
+    session.add(lease)
+    session.commit()
+    takeover = work_queue_service.claim_next(session, "station-3")
+    assert takeover["production_order_id"] == first["production_order_id"]
+
+    with pytest.raises(LeaseLostError):
+        work_queue_service.complete_claimed(session, first["production_order_id"], first["token"])
+    completed = work_queue_service.complete_claimed(
+        session, takeover["production_order_id"], takeover["token"]
+    )
+    assert completed.status == ProductionOrderStatus.completed
+    assert session.get(ProductionLease, takeover["production_order_id"]) is None
+    assert work_queue_service.claim_next(session, "station-1") is None
+
+
+def test_lead_time_sketches_track_percentiles_per_product(session: Session) -> None:
+    sketch = lead_time_service.QuantileSketch()
+    for seconds in range(1, 10_001):
+        sketch.add(seconds)
+    for q in (0.5, 0.9, 0.99):
+        assert abs(sketch.quantile(q) - q * 10_000) <= 0.02 * q * 10_000
+
+    customer_id = _create_customer(session)
+    product_id = _create_product(session, price=100.0)
+    for hours in (2, 10):
+        order = order_service.create_order_with_items(
+            session, customer_id, [{"product_id": product_id, "quantity": 1}]
+        )
+        order.created_at = current_utc_time() - timedelta(hours=hours)
+        session.add(order)
+        session.commit()
+        production = production_service.start_production_for_order(session, order.id)
+        production_service.mark_production_in_progress(session, production.id)
+        production_service.mark_production_complete(session, production.id)
+
+    [stats] = lead_time_service.get_production_time_stats(session, product_id)
+    assert stats["lead_time"]["count"] == 2
+    assert stats["queue_time"]["count"] == 2
+    assert abs(stats["lead_time"]["p50_seconds"] - 2 * 3600) <= 0.02 * 2 * 3600
+    assert stats["queue_time"]["p50_seconds"] <= stats["lead_time"]["p50_seconds"]
+
+    before = lead_time_service.get_production_time_stats(session)
+    lead_time_service.rebuild_sketches(session)
+    assert lead_time_service.get_production_time_stats(session) == before
+
+
+def test_shipment_batches_consolidate_and_complete_in_bulk(session: Session) -> None:
+    first_customer = _create_customer(session)
+    second_customer = _create_customer(session)
+    product_id = product_service.create_product_with_stock(
+        session,
+        {"name": "Tote bag", "description": "Canvas tote", "price": 100.0},
+        stock_qty=10,
+    ).id
+    inventory_service.split_stock(session, product_id, 2)
+    order_ids = []
+    for customer_id in (first_customer, first_customer, second_customer):
+        order = order_service.create_order_with_items(
+            session, customer_id, [{"product_id": product_id, "quantity": 2}]
+        )
+        production = production_service.start_production_for_order(session, order.id)
+        production_service.mark_production_in_progress(session, production.id)
+        production_service.mark_production_complete(session, production.id)
+        order_ids.append(order.id)
+
+    batches = delivery_service.consolidate_deliveries(session, group_by="customer")
+    assert sorted(len(batch["delivery_ids"]) for batch in batches) == [1, 2]
+    assert delivery_service.consolidate_deliveries(session) == []
+
+    batch = next(batch for batch in batches if batch["customer_id"] == first_customer)
+    # One delivery of the batch is completed on its own before the batch ships.
+    delivery_service.mark_delivery_done(session, batch["delivery_ids"][0])
+
+    result = delivery_service.complete_shipment_batch(session, batch["id"])
+    assert result["delivery_ids"] == batch["delivery_ids"][1:]
+    assert result["skipped_delivery_ids"] == batch["delivery_ids"][:1]
+    assert result["sales_order_ids"] == [order_ids[1]]
+    for order_id in order_ids[:2]:
+        assert sales_order_repo.get_or_raise(session, order_id).status == SalesOrderStatus.delivered
+    assert sales_order_repo.get_or_raise(session, order_ids[2]).status == SalesOrderStatus.ready_for_delivery
+    stock = inventory_service.get_stock_level(session, product_id)
+    assert (stock["on_hand"], stock["reserved"]) == (6, 2)
+
+    with pytest.raises(InvalidTransitionError):
+        delivery_service.complete_shipment_batch(session, batch["id"])
+
+
+def test_invoice_email_is_queued_with_billing_and_retried(
+    session: Session, monkeypatch: pytest.MonkeyPatch, tmp_path
+) -> None:
+    monkeypatch.setattr(pdf_render_pool, "render_pool", pdf_render_pool.RenderPool(workers=0))
+    monkeypatch.setattr(invoice_pdf_store, "invoice_store", invoice_pdf_store.InvoicePdfStore(tmp_path))
+    monkeypatch.setenv("BILLING_FROM_EMAIL", "billing@example.com")
+    transport = email_transport.InMemoryTransport()
+    customer_id = _create_customer(session)
+    product_id = _create_product(session, price=100.0)
+    order = order_service.create_order_with_items(
+        session, customer_id, [{"product_id": product_id, "quantity": 1}]
+    )
+    _deliver_order(session, order.id)
+
+    billing = billing_service.generate_billing_and_send_invoice(session, order.id)
+    [message] = email_outbox_service.list_messages(session)
+    assert (message.kind, message.reference_id) == ("invoice", billing.id)
+    assert message.status == OutboxStatus.pending
+
+    transport.fail_next()
+    outcome = email_outbox_service.process_due(session, transport=transport)
+    assert outcome == {"sent": 0, "pending": 1, "dead": 0}
+    session.refresh(message)
+    assert message.attempts == 1 and message.next_attempt_at > current_utc_time().replace(tzinfo=None)
+    # Not due yet: backoff keeps the message parked.
+    assert email_outbox_service.process_due(session, transport=transport)["sent"] == 0
+
+    message.next_attempt_at = current_utc_time() - timedelta(seconds=1)
+    session.add(message)
+    session.commit()
+    assert email_outbox_service.process_due(session, transport=transport)["sent"] == 1
+    [sent] = transport.sent
+    assert sent.to[0].startswith("customer-") and sent.attachments[0].content.startswith(b"%PDF")
+
+    # A message without a recipient cannot succeed and is dead-lettered straight away.
+    broken = session.get(EmailOutbox, email_outbox_service.enqueue(session, "invoice", billing.id, "").id)
+    session.commit()
+    assert email_outbox_service.process_due(session, transport=transport)["dead"] == 1
+    assert email_outbox_service.requeue(session, broken.id).status == OutboxStatus.pending
+
+
+def test_only_one_billing_run_may_be_running(
+    session: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    running = billing_service.billing_run_repo.create(session, {})
+    failed = billing_service.billing_run_repo.create(session, {"status": "failed"})
+
+    # A concurrent request passed the check before this run was committed.
+    monkeypatch.setattr(billing_service.billing_run_repo, "get_running", lambda session: None)
+    with pytest.raises(ValueError, match="still running"):
+        billing_service.start_billing_run(session)
+    with pytest.raises(ValueError, match="still running"):
+        billing_service.resume_billing_run(session, failed.id)
+    runs = billing_service.list_billing_runs(session)
+    assert [(run["id"], run["status"]) for run in runs] == [(failed.id, "failed"), (running.id, "running")]
+
+
+def test_billing_run_bills_in_chunks_and_resumes_after_failure(
+    session: Session, monkeypatch: pytest.MonkeyPatch, tmp_path
+) -> None:
+    monkeypatch.setattr(pdf_render_pool, "render_pool", pdf_render_pool.RenderPool(workers=0))
+    monkeypatch.setattr(invoice_pdf_store, "invoice_store", invoice_pdf_store.InvoicePdfStore(tmp_path))
+    customer_id = _create_customer(session)
+    product_id = _create_product(session, price=50.0)
+    order_ids = []
+    for quantity in range(1, 6):
+        order = order_service.create_order_with_items(
+            session, customer_id, [{"product_id": product_id, "quantity": quantity}]
+        )
+        _deliver_order(session, order.id)
+        order_ids.append(order.id)
+    billing_service.generate_billing_for_order(session, order_ids[0])
+
+    record_orders_billed = analytics_service.record_orders_billed
+    calls = []
+
+    def fail_second_chunk(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 2:
+            raise RuntimeError("connection lost")
+        return record_orders_billed(*args, **kwargs)
+
+    monkeypatch.setattr(analytics_service, "record_orders_billed", fail_second_chunk)
+    with pytest.raises(RuntimeError):
+        billing_service.start_billing_run(session, chunk_size=2)
+    [failed] = billing_service.list_billing_runs(session)
+    assert failed["status"] == "failed" and failed["last_error"] == "connection lost"
+    assert (failed["orders_billed"], failed["invoices_rendered"]) == (2, 2)
+
+    monkeypatch.setattr(analytics_service, "record_orders_billed", record_orders_billed)
+    report = billing_service.resume_billing_run(session, failed["id"])
+    assert report["status"] == "completed"
+    assert (report["orders_billed"], report["invoices_rendered"]) == (4, 4)
+    assert report["total_amount"] == pytest.approx(50.0 * (2 + 3 + 4 + 5))
+    assert all(sales_order_repo.get(session, order_id).status == SalesOrderStatus.billed for order_id in order_ids)
+    pdfs = sorted(tmp_path.glob("*/*/*.pdf"))
+    assert len(pdfs) == 4 and all(pdf.read_bytes().startswith(b"%PDF") for pdf in pdfs)
+
+    counters = kpi_service.get_counter_values(session)
+    assert counters[kpi_service.sales_order_counter(SalesOrderStatus.billed)] == 5
+    assert counters[kpi_service.sales_order_counter(SalesOrderStatus.delivered)] == 0
+    billed_day = billing_repo.get_by_sales_order(session, order_ids[-1]).billed_date.date()
+    [by_role] = analytics_service.get_revenue_series(
+        session, granularity="day", start=billed_day, end=billed_day, group_by="role"
+    )
+    assert (by_role["order_count"], by_role["revenue"]) == (5, pytest.approx(750.0))
+
+    rerun = billing_service.start_billing_run(session)
+    assert rerun["status"] == "completed" and rerun["orders_billed"] == 0
+    with pytest.raises(ValueError):
+        billing_service.resume_billing_run(session, report["id"])
+
+
+def test_http_transport_batches_over_pooled_connections(monkeypatch: pytest.MonkeyPatch) -> None:
+    def message(index: int, to: str | None = None, attachments=()) -> email_transport.EmailMessage:
+        return email_transport.EmailMessage(
+            sender="billing@example.com",
+            to=(to,) if to else (),
+            subject=f"Invoice {index}",
+            html="<p>Hello</p>",
+            attachments=attachments,
+        )
+
+    with fake_email_provider.FakeEmailProvider(latency=0.01) as provider:
+        transport = email_transport.HttpEmailTransport(
+            provider.url, "test-key", batch_window=0.5, max_in_flight=2, max_requests_per_second=0
+        )
+        try:
+            with ThreadPoolExecutor(6) as executor:
+                ids = list(executor.map(transport.send, [message(i, f"c{i}@example.com") for i in range(6)]))
+            assert len(set(ids)) == 6
+            assert provider.requests == [("/emails/batch", 6)]
+
+            # The batch endpoint takes no attachments, so invoices are posted alone.
+            pdf = email_transport.EmailAttachment("INV-2026-000001.pdf", b"%PDF-1.4")
+            assert transport.send(message(7, "c7@example.com", (pdf,)))
+            assert provider.requests[-1] == ("/emails", 1)
+
+            # An invalid message fails alone; the rest of its batch is still delivered.
+            with ThreadPoolExecutor(3) as executor:
+                futures = [
+                    executor.submit(transport.send, message(index, to))
+                    for index, to in enumerate(("a@example.com", None, "b@example.com"))
+                ]
+            with pytest.raises(EmailDeliveryError) as rejected:
+                futures[1].result()
+            assert rejected.value.retryable is False
+            assert futures[0].result() and futures[2].result()
+
+            provider.fail_next(status=503)
+            with pytest.raises(EmailDeliveryError) as unavailable:
+                transport.send(message(8, "c8@example.com"))
+            assert unavailable.value.retryable is True
+        finally:
+            transport.close()
+    assert provider.connections <= 2 and provider.max_concurrent <= 2
+
+
+def test_receivables_aging_buckets_per_customer_and_role(session: Session) -> None:
+    receivables_service.aging_cache.clear()
+    student_id = _create_customer(session)
+    faculty_id = customer_repo.create(
+        session, {"name": "Faculty", "email": "faculty@example.com", "role": "faculty"}
+    ).id
+    product_id = _create_product(session, price=100.0)
+    as_of = date(2026, 6, 30)
+    billings = {}
+    ages = ((student_id, 0), (student_id, 30), (student_id, 31), (student_id, 75), (faculty_id, 91))
+    for customer_id, age in ages:
+        order = order_service.create_order_with_items(
+            session, customer_id, [{"product_id": product_id, "quantity": 1}]
+        )
+        _deliver_order(session, order.id)
+        billing = billing_service.generate_billing_for_order(session, order.id)
+        billing.billed_date = datetime.combine(as_of - timedelta(days=age), datetime.min.time(), UTC)
+        billings[age] = billing
+    # Billed after the report day, so not yet outstanding.
+    billings[0].billed_date = datetime.combine(as_of + timedelta(days=1), datetime.min.time(), UTC)
+    session.commit()
+    receivables_service.aging_cache.clear()
+
+    report = receivables_service.get_aging_report(session, as_of)
+    student, faculty = report["customers"]
+    assert (student["customer_id"], student["invoice_count"]) == (student_id, 3)
+    assert (student["days_0_30"], student["days_31_60"], student["days_61_90"]) == (100.0, 100.0, 100.0)
+    assert (faculty["days_over_90"], faculty["total"]) == (100.0, 100.0)
+    assert [role["customer_role"] for role in report["roles"]] == ["faculty", "student"]
+    assert report["totals"]["total"] == 400.0
+    assert receivables_service.get_aging_report(session, as_of) is report
+
+    order = order_service.create_order_with_items(
+        session, faculty_id, [{"product_id": product_id, "quantity": 2}]
+    )
+    _deliver_order(session, order.id)
+    billing_service.generate_billing_for_order(session, order.id)
+    refreshed = receivables_service.get_aging_report(session, date.today() + timedelta(days=1))
+    assert refreshed["totals"]["total"] == 700.0
+    assert receivables_service.get_aging_report(session, as_of) is not report
+
+    billing_repo.get_by_sales_order(session, order.id).billed_date = None
+    session.commit()
+    receivables_service.aging_cache.clear()
+    faculty = receivables_service.get_aging_report(session, as_of)["customers"][1]
+    assert (faculty["days_0_30"], faculty["total"]) == (200.0, 300.0)
+
+
+def test_statement_import_applies_payments_to_open_billings(session: Session) -> None:
+    customer_id = _create_customer(session)
+    email = customer_repo.get_or_raise(session, customer_id).email
+    other_id = customer_repo.create(
+        session, {"name": "Other", "email": "other@example.com", "role": "faculty"}
+    ).id
+    product_id = _create_product(session, price=100.0)
+    billings = []
+    for owner, quantity in ((customer_id, 1), (customer_id, 2), (customer_id, 3), (other_id, 1)):
+        order = order_service.create_order_with_items(
+            session, owner, [{"product_id": product_id, "quantity": quantity}]
+        )
+        _deliver_order(session, order.id)
+        billings.append(billing_service.generate_billing_for_order(session, order.id))
+    first, second, third, others = billings
+
+    statement = [
+        "date,amount,reference,customer_email",
+        f"2026-07-01,100.00,Payment {first.invoice_number} thanks,",
+        f"2026-07-01,50.00,{second.invoice_number},{email.upper()}",
+        f"2026-07-02,\"1,000.00\",{second.invoice_number},",
+        "2026-07-02,300.00,transfer,%s" % email,
+        f"2026-07-03,25.00,{others.invoice_number},{email}",
+        "2026-07-03,-10.00,fee,",
+        "2026-07-04,42.00,unknown,",
+    ]
+    record = payment_service.import_statement(session, statement, "july.csv", batch_size=2)
+
+    assert (record.lines, record.matched, record.unmatched, record.skipped) == (7, 4, 2, 1)
+    assert (record.amount_received, record.amount_applied, record.amount_unapplied) == (
+        1517.0,
+        600.0,
+        917.0,
+    )
+    payments = payment_service.list_payments(session, import_id=record.id)
+    assert [(p.billing_id, p.status.value, p.match_rule) for p in payments] == [
+        (first.id, "applied", "invoice_number"),
+        (second.id, "partial", "invoice_number"),
+        (second.id, "overpaid", "invoice_number"),
+        (third.id, "applied", "customer_amount"),
+        (None, "unmatched", None),
+        (None, "unmatched", None),
+    ]
+    assert payments[2].applied_amount == 150.0
+    assert payments[4].customer_id == customer_id
+    unmatched = payment_service.list_payments(session, status="unmatched")
+    assert [p.line_number for p in unmatched] == [6, 8]
+
+    receivables_service.aging_cache.clear()
+    report = receivables_service.get_aging_report(session, date.today() + timedelta(days=1))
+    assert [row["customer_id"] for row in report["customers"]] == [other_id]
+    assert report["totals"]["total"] == 100.0
+
+    with pytest.raises(ValueError, match="already imported"):
+        payment_service.import_statement(session, statement, "july-again.csv")
+    with pytest.raises(ValueError, match="Line 2"):
+        payment_service.import_statement(session, ["date,amount", "yesterday,5"])
+    assert [item.id for item in payment_service.list_imports(session)] == [record.id]
+    assert len(payment_service.list_payments(session)) == 6
+
+
+def test_dunning_reminds_each_overdue_customer_once_per_level(
+    session: Session, monkeypatch: pytest.MonkeyPatch, tmp_path
+) -> None:
+    monkeypatch.setenv("BILLING_FROM_EMAIL", "billing@example.com")
+    monkeypatch.setattr(invoice_pdf_store, "invoice_store", invoice_pdf_store.InvoicePdfStore(tmp_path))
+    product_id = _create_product(session, price=100.0)
+    as_of = date(2026, 6, 30)
+    late_id, slow_id, new_id, recent_id, paid_id = (_create_customer(session) for _ in range(5))
+    billings = []
+    ages = ((late_id, 100), (late_id, 40), (slow_id, 45), (new_id, 35), (recent_id, 10), (paid_id, 50))
+    for customer_id, age in ages:
+        order = order_service.create_order_with_items(
+            session, customer_id, [{"product_id": product_id, "quantity": 1}]
+        )
+        _deliver_order(session, order.id)
+        billing = billing_service.generate_billing_for_order(session, order.id)
+        billing.billed_date = datetime.combine(as_of - timedelta(days=age), datetime.min.time(), UTC)
+        billings.append(billing)
+    session.commit()
+    payment_service.import_statement(
+        session, ["date,amount,invoice_number", f"2026-06-01,100,{billings[-1].invoice_number}"]
+    )
+
+    with fake_email_provider.FakeEmailProvider() as provider:
+        transport = email_transport.HttpEmailTransport(provider.url, "test-key", max_requests_per_second=0)
+        try:
+            summary = dunning_service.run_dunning(session, as_of, send=True, transport=transport)
+        finally:
+            transport.close()
+    assert (summary["customers_overdue"], summary["notices_created"], summary["amount_overdue"]) == (3, 3, 400.0)
+    assert summary["notices_by_level"] == {"1": 2, "2": 0, "3": 1}
+    assert summary["emails"] == {"sent": 3, "pending": 0, "dead": 0}
+    # The final notice carries the invoice PDFs and goes alone; plain reminders are batched.
+    assert sorted(provider.requests) == [("/emails", 1), ("/emails/batch", 2)]
+    final, reminder, _ = sorted(provider.emails, key=lambda email: len(email.get("attachments", [])), reverse=True)
+    assert final["subject"] == "Final notice: 2 overdue invoices"
+    assert len(final["attachments"]) == 2
+    assert reminder["subject"] == "Payment reminder: 1 overdue invoice"
+    [notice] = dunning_service.list_notices(session, customer_id=late_id)
+    assert (notice.level, notice.max_days_overdue, notice.anchor_billing_id) == (3, 70, billings[0].id)
+
+    rerun = dunning_service.run_dunning(session, as_of)
+    assert (rerun["notices_created"], rerun["already_notified"]) == (0, 3)
+
+    # Left to the outbox by default.
+    later = dunning_service.run_dunning(session, as_of + timedelta(days=20))
+    assert (later["notices_created"], later["notices_by_level"]["2"]) == (1, 1)
+    assert later["emails"] == {"sent": 0, "pending": 0, "dead": 0}
+    transport = email_transport.InMemoryTransport()
+    assert email_outbox_service.process_due(session, transport=transport)["sent"] == 1
+    [sent] = transport.sent
+    assert sent.subject == "Second payment reminder: 1 overdue invoice" and not sent.attachments
+
+    assert dunning_service.send_chunk_size() == min(
+        dunning_service.SEND_CHUNK_SIZE,
+        int(email_transport.EMAIL_MAX_REQUESTS_PER_SECOND * email_outbox_service.CLAIM_SECONDS / 2),
+    )
+    limiter = email_transport.RequestRateLimiter(50)
+    started = time.monotonic()
+    for _ in range(4):
+        limiter.wait()
+    assert time.monotonic() - started >= 0.05
+
+
+def test_credit_exposure_tracks_orders_billing_and_payments(session: Session) -> None:
+    customer_id = _create_customer(session)
+    product_id = _create_product(session, price=100.0)
+    assert credit_service.set_credit_limit(session, customer_id, 250.0)["available_credit"] == 250.0
+
+    def order(quantity: int):
+        return order_service.create_order_with_items(
+            session, customer_id, [{"product_id": product_id, "quantity": quantity}]
+        )
+
+    first = order(1)
+    with pytest.raises(CreditLimitExceededError):
+        order(2)
+    assert len(sales_order_repo.list_by_customer(session, customer_id)) == 1
+    order_service.update_order_status(session, first.id, SalesOrderStatus.cancelled)
+    assert credit_service.get_credit_status(session, customer_id)["exposure"] == 0.0
+
+    second = order(2)
+    _deliver_order(session, second.id)
+    billing = billing_service.generate_billing_for_order(session, second.id)
+    status = credit_service.get_credit_status(session, customer_id)
+    assert (status["open_order_amount"], status["receivable_amount"]) == (0.0, 200.0)
+    with pytest.raises(CreditLimitExceededError, match="limit 250.00"):
+        order(1)
+
+    payment_service.import_statement(
+        session, ["date,amount,invoice_number", f"2026-07-01,150,{billing.invoice_number}"]
+    )
+    third = order(1)
+    status = credit_service.get_credit_status(session, customer_id)
+    assert (status["open_order_amount"], status["receivable_amount"], status["available_credit"]) == (
+        100.0,
+        50.0,
+        100.0,
+    )
+    order_service.delete_order(session, third.id)
+    assert credit_service.get_credit_status(session, customer_id)["exposure"] == 50.0
+
+    # A rebuild from the base tables agrees with the incremental balances and keeps the limit.
+    incremental = credit_service.get_credit_status(session, customer_id)
+    credit_service.rebuild_balances(session)
+    assert credit_service.get_credit_status(session, customer_id) == incremental
+    assert (incremental["credit_limit"], incremental["available_credit"]) == (250.0, 200.0)
+    credit_service.set_credit_limit(session, customer_id, None)
+    order(5)
+
+
+def test_render_pool_renders_in_worker_processes_with_backpressure() -> None:
+    payload = pdf_render_pool.invoice_payload(
+        invoice_number="INV-2026-000001",
+        billed_at=datetime(2026, 1, 5, tzinfo=UTC),
+        customer_name="Test Customer",
+        customer_email="customer@example.com",
+        line_items=[{"name": "Hoodie", "quantity": 2, "subtotal": 500.0}],
+        amount=500.0,
+    )
+    pool = pdf_render_pool.RenderPool(workers=1, queue_depth=0)
+    try:
+        first = pool.submit(payload)
+        # The only slot is taken until the (still starting) worker finishes.
+        with pytest.raises(RenderPoolSaturatedError):
+            pool.submit(payload, timeout=0.01)
+        assert first.result().startswith(b"%PDF")
+        pdfs = list(pool.render_many([payload] * 3))
+    finally:
+        pool.shutdown()
+    assert len(pdfs) == 3 and all(pdf.startswith(b"%PDF") for pdf in pdfs)
+
+
+def test_invoice_pdf_store_keeps_superseded_versions_for_grace_period(tmp_path) -> None:
+    store = invoice_pdf_store.InvoicePdfStore(tmp_path, grace_seconds=60)
+    first = store.put(7, b"%PDF-1.4 first")
+    second = store.put(7, b"%PDF-1.4 second")
+    assert store.get(7) == second and first.path.exists()
+
+    # Storing earlier content again makes it current again.
+    assert store.put(7, b"%PDF-1.4 first") == first and store.get(7) == first
+
+    store.grace_seconds = 0
+    third = store.put(7, b"%PDF-1.4 third")
+    assert store.get(7) == third
+    assert list(tmp_path.glob("*/*/*.pdf")) == [third.path]
+
+
+def test_invoice_template_matches_fpdf_layout_across_pages() -> None:
+    payload = pdf_render_pool.invoice_payload(
+        invoice_number="INV-2026-000002",
+        billed_at=datetime(2026, 1, 5, tzinfo=UTC),
+        customer_name="Dept. (Physics)",
+        customer_email="physics@example.com",
+        line_items=[
+            {"name": f"Lab coat {size}", "quantity": size, "subtotal": size * 99.5} for size in range(1, 41)
+        ],
+        amount=81_590.0,
+    )
+
+    def shown_text(pdf: bytes) -> list[list[str]]:
+        pages = []
+        for stream in re.findall(rb"stream\r?\n(.*?)\r?\nendstream", pdf, re.S):
+            ops = zlib.decompress(stream).decode("latin-1")
+            pages.append(re.findall(r"BT ([\d.]+ [\d.]+) Td \((.*?)\) Tj ET", ops))
+        return pages
+
+    template = pdf_render_pool.render_invoice_pdf(payload)
+    reference = pdf_render_pool.render_invoice_pdf_with_fpdf(payload)
+    assert len(template) < len(reference)
+    template_pages, reference_pages = shown_text(template), shown_text(reference)
+    assert len(template_pages) == len(reference_pages) > 1
+    # Same strings at the same positions; the template only splits "label: value" in two.
+    assert template_pages[1:] == reference_pages[1:]
+    assert template_pages[0][-40:] == reference_pages[0][-40:]